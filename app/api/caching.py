@@ -0,0 +1,119 @@
+"""
+HTTP Caching
+Validators and Cache-Control headers for responses derived from stored metrics
+"""
+import hashlib
+import datetime
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from app.core.config import METRICS_INTERVAL_SECONDS, ADAPTIVE_SAMPLING, ADAPTIVE_FAST_INTERVAL_SECONDS
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Build a strong entity tag from the values that determine a response.
+
+    Args:
+        parts: Values identifying the response, e.g. the query and the data version
+
+    Returns:
+        Quoted entity tag
+    """
+    digest = hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+
+def http_date(timestamp: Optional[str]) -> Optional[str]:
+    """
+    Convert a stored local ISO timestamp to an HTTP date.
+
+    Returns:
+        The date in IMF-fixdate format, or None if there is no valid timestamp
+    """
+    if not timestamp:
+        return None
+    try:
+        moment = datetime.datetime.fromisoformat(timestamp).astimezone(datetime.timezone.utc)
+    except ValueError:
+        return None
+    return format_datetime(moment.replace(microsecond=0), usegmt=True)
+
+
+def max_age(recorder=None) -> int:
+    """
+    Seconds a response stays fresh: the interval at which new samples arrive.
+
+    Args:
+        recorder: Running MetricsRecorder, whose current interval is used if available
+
+    Returns:
+        Max-age in whole seconds, at least 1
+    """
+    if recorder is not None:
+        interval = recorder.current_interval
+    elif ADAPTIVE_SAMPLING:
+        # Another worker records; assume it may be sampling fast
+        interval = ADAPTIVE_FAST_INTERVAL_SECONDS
+    else:
+        interval = METRICS_INTERVAL_SECONDS
+    return max(1, int(interval))
+
+
+def cache_headers(etag: str, last_modified: Optional[str], max_age_seconds: int) -> Dict[str, str]:
+    """
+    Returns the validator and freshness headers of a cacheable response.
+
+    Args:
+        etag: Entity tag of the response
+        last_modified: Stored timestamp of the latest change, if any
+        max_age_seconds: Seconds the response may be reused without revalidation
+    """
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={max_age_seconds}",
+    }
+    modified = http_date(last_modified)
+    if modified is not None:
+        headers["Last-Modified"] = modified
+    return headers
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[str]) -> bool:
+    """
+    Whether the client's cached copy is still current.
+
+    If-None-Match takes precedence; If-Modified-Since is only consulted when
+    the request carries no entity tags.
+
+    Args:
+        request: Incoming request
+        etag: Entity tag of the current response
+        last_modified: Stored timestamp of the latest change, if any
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        # Weak comparison, as required for If-None-Match
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return any(tag.removeprefix("W/") == etag for tag in tags)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    modified = http_date(last_modified)
+    if if_modified_since is None or modified is None:
+        return False
+    try:
+        return parsedate_to_datetime(modified) <= parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+
+
+def not_modified_response(headers: Dict[str, str]) -> Response:
+    """
+    Returns an empty 304 response carrying the cache headers.
+    """
+    return Response(status_code=304, headers=headers)
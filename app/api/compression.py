@@ -0,0 +1,204 @@
+"""
+Response Compression
+Opt-in gzip and brotli compression of large API responses
+"""
+import zlib
+from typing import Any, List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+
+def available_encodings() -> List[str]:
+    """
+    Returns the content codings supported in this environment, preferred first.
+    """
+    encodings = ["gzip"]
+    if brotli is not None:
+        encodings.insert(0, "br")
+    return encodings
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick the content coding for a response.
+
+    Codings are tried in order of their quality value, and in server
+    preference order (brotli before gzip) among equal values.
+
+    Args:
+        accept_encoding: Value of the Accept-Encoding request header
+
+    Returns:
+        The selected coding, or None to send the response uncompressed
+    """
+    if not accept_encoding:
+        return None
+
+    qualities = {}
+    for entry in accept_encoding.split(","):
+        coding, _, params = entry.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[coding.strip().lower()] = quality
+
+    best = None
+    best_quality = 0.0
+    for coding in available_encodings():
+        quality = qualities.get(coding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+class _GzipCompressor:
+    """
+    Incremental gzip stream; every chunk is flushed so a streamed body can
+    be decoded as it arrives.
+    """
+
+    def __init__(self, level: int) -> None:
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, more_body: bool) -> bytes:
+        flush_mode = zlib.Z_SYNC_FLUSH if more_body else zlib.Z_FINISH
+        return self._compressor.compress(data) + self._compressor.flush(flush_mode)
+
+
+class _BrotliCompressor:
+    """
+    Incremental brotli stream, flushed after every chunk like _GzipCompressor.
+    """
+
+    def __init__(self, quality: int) -> None:
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes, more_body: bool) -> bytes:
+        if more_body:
+            return self._compressor.process(data) + self._compressor.flush()
+        return self._compressor.process(data) + self._compressor.finish()
+
+
+class _CompressionResponder:
+    """
+    Wraps the `send` of a single response. The start message is held back
+    until the first body chunk shows whether the body is large enough to
+    compress, then the headers are adjusted and every chunk is compressed.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int, compressor: Optional[Any], encoding: Optional[str]) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compressor = compressor
+        self.encoding = encoding
+        self.send: Optional[Send] = None
+        self.start_message: Optional[Message] = None
+        self.compressing = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    async def send_compressed(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            return
+
+        if self.start_message is not None:
+            start_message, self.start_message = self.start_message, None
+            if message["type"] == "http.response.body":
+                message = self._start(start_message, message)
+            await self.send(start_message)
+        elif self.compressing and message["type"] == "http.response.body":
+            body = self.compressor.compress(message.get("body", b""), message.get("more_body", False))
+            message = {**message, "body": body}
+        await self.send(message)
+
+    def _start(self, start_message: Message, message: Message) -> Message:
+        """
+        Decide from the first body chunk whether to compress, adjust the
+        held-back start message's headers and return the chunk to send.
+        """
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        headers = MutableHeaders(raw=start_message["headers"])
+        eligible = (
+            "content-encoding" not in headers
+            and not headers.get("content-type", "").startswith("text/event-stream")
+            and (more_body or len(body) >= self.minimum_size)
+        )
+        if not eligible:
+            return message
+        headers.add_vary_header("Accept-Encoding")
+        if self.compressor is None:
+            return message
+
+        self.compressing = True
+        headers["Content-Encoding"] = self.encoding
+        # The compressed bytes differ from the representation the entity tag
+        # was computed for
+        etag = headers.get("etag")
+        if etag is not None and not etag.startswith("W/"):
+            headers["ETag"] = "W/" + etag
+        body = self.compressor.compress(body, more_body)
+        if more_body:
+            if "content-length" in headers:
+                del headers["content-length"]
+        else:
+            headers["Content-Length"] = str(len(body))
+        return {**message, "body": body}
+
+
+class CompressionMiddleware:
+    """
+    Compresses response bodies of at least `minimum_size` bytes with brotli
+    (when the `brotli` package is installed) or gzip, as negotiated from the
+    Accept-Encoding header.
+
+    Smaller responses, Server-Sent Events and responses that already carry
+    a Content-Encoding are sent unchanged.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ) -> None:
+        """
+        Initialize the middleware.
+
+        Args:
+            app: Wrapped ASGI application
+            minimum_size: Smallest body in bytes that is compressed
+            gzip_level: gzip compression level (1-9)
+            brotli_quality: brotli quality (0-11)
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        compressor = None
+        if encoding == "br":
+            compressor = _BrotliCompressor(self.brotli_quality)
+        elif encoding == "gzip":
+            compressor = _GzipCompressor(self.gzip_level)
+        await _CompressionResponder(self.app, self.minimum_size, compressor, encoding)(scope, receive, send)
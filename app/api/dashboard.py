@@ -0,0 +1,85 @@
+"""
+Dashboard Shell
+Serves the dashboard page pre-rendered, with the latest live snapshot
+embedded so the page can draw without waiting for a first API call
+"""
+import hashlib
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.api.formats import dumps
+
+# Rendered into the template where the snapshot is spliced in per request
+PLACEHOLDER = "__SYSMON_INITIAL_SNAPSHOT__"
+
+# Processes embedded in the page, as shown by the dashboard's table
+EMBEDDED_PROCESSES = 10
+
+
+class DashboardShell:
+    """
+    Renders the dashboard template once and serves it with the current
+    snapshot spliced in.
+
+    The page itself contains no live values, so rendering it never runs
+    psutil. Each request only concatenates the rendered halves of the page
+    with the snapshot, whose JSON is cached until a newer snapshot is
+    published.
+    """
+
+    def __init__(self, render_template: Callable[[Dict[str, Any]], str]):
+        """
+        Args:
+            render_template: Renders the dashboard template with a context;
+                only called once, on the first request
+        """
+        self.render_template = render_template
+        self._prefix: Optional[bytes] = None
+        self._suffix: Optional[bytes] = None
+        self.version: Optional[str] = None
+        self._snapshot_key: Any = object()
+        self._snapshot_json = b"null"
+
+    def _load(self) -> None:
+        """
+        Render the template and split it around the placeholder.
+        """
+        page = self.render_template({"initial_snapshot": PLACEHOLDER}).encode("utf-8")
+        self._prefix, _, self._suffix = page.partition(PLACEHOLDER.encode("ascii"))
+        self.version = hashlib.blake2b(page, digest_size=8).hexdigest()
+
+    def _embed(self, snapshot: Optional[Dict[str, Any]]) -> bytes:
+        """
+        Returns the JSON embedded for a snapshot, reusing it while the
+        snapshot has not changed.
+        """
+        key = snapshot["published_at"] if snapshot is not None else None
+        if key != self._snapshot_key:
+            if snapshot is None:
+                embedded = b"null"
+            else:
+                embedded = dumps({
+                    "published_at": snapshot["published_at"],
+                    "system_info": snapshot["system_info"],
+                    "processes": snapshot["processes"][:EMBEDDED_PROCESSES],
+                })
+                # Keep the JSON from closing the <script> element it sits in
+                embedded = embedded.replace(b"<", b"\\u003c")
+            self._snapshot_json = embedded
+            self._snapshot_key = key
+        return self._snapshot_json
+
+    def render(self, snapshot: Optional[Dict[str, Any]]) -> Tuple[bytes, Tuple[Any, ...]]:
+        """
+        Build the page for a snapshot.
+
+        Args:
+            snapshot: Dictionary as returned by SharedSnapshot.read_snapshot,
+                or None to let the page fetch the live metrics itself
+
+        Returns:
+            The page and the values identifying it, for an entity tag
+        """
+        if self._prefix is None:
+            self._load()
+        embedded = self._embed(snapshot)
+        return self._prefix + embedded + self._suffix, (self.version, self._snapshot_key)
@@ -2,95 +2,546 @@
 API Endpoints
 Defines all API endpoints for the monitoring application
 """
-from fastapi import APIRouter, Request, Depends, HTTPException
-from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
+import json
+import math
+import time
+import asyncio
+import datetime
+import functools
+
+from fastapi import APIRouter, Request, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
 from typing import Dict, List, Any, Union, Optional
 
-from app.core.config import TEMPLATES_DIR
-from app.core.system_monitor import SystemMonitor
-from app.database.db_manager import DatabaseManager
+from app.api.exposition import MetricsExposition, wants_openmetrics
+from app.api.exposition import PROMETHEUS_MEDIA_TYPE, OPENMETRICS_MEDIA_TYPE
+from app.api.dashboard import DashboardShell
+from app.api.caching import make_etag, max_age, cache_headers, is_not_modified, not_modified_response
+from app.api.formats import FastJSONResponse, history_response, negotiate_media_type
+from app.api.topics import RateLimiter
+from app.core.config import TEMPLATES_DIR, LIVE_SNAPSHOT_MAX_AGE_SECONDS
+from app.core.config import WS_CONTROL_RATE, WS_CONTROL_BURST
+from app.core.flight_recorder import expand_window
+from app.core.heatmap import core_heatmap, HEATMAP_STATS, MAX_HEATMAP_BUCKETS, MAX_HEATMAP_HOURS
+from app.core.instrumentation import STATS
+from app.core.process_table import MAX_PROCESS_LIMIT
+from app.core.shared_snapshot import MAX_PROCESSES
+from app.core.system_monitor import SystemMonitor, SYSTEM_INFO_FIELDS
+from app.database.db_manager import DatabaseManager, HISTORY_SERIES
+
+# Initialize router; JSON responses are rendered with orjson when installed
+router = APIRouter(default_response_class=FastJSONResponse)
+
+# Renders /metrics; keeps the snapshot part cached between scrapes
+exposition = MetricsExposition()
 
-# Initialize router
-router = APIRouter()
+# Serves the dashboard page, rendered by the first request
+dashboard = DashboardShell(lambda context: get_templates().get_template("index.html").render(context))
 
-# Initialize templates
-templates = Jinja2Templates(directory=TEMPLATES_DIR)
 
+# Templates are loaded (and Jinja2 imported) by the first page request
+@functools.lru_cache(maxsize=None)
+def get_templates():
+    from fastapi.templating import Jinja2Templates
+    return Jinja2Templates(directory=TEMPLATES_DIR)
 
-# Dependency to get SystemMonitor instance
+
+# Dependency to get the SystemMonitor, created on first use
+@functools.lru_cache(maxsize=None)
 def get_system_monitor():
     return SystemMonitor()
 
 
+# Database used when no lifespan is running; set up once per path
+@functools.lru_cache(maxsize=None)
+def _fallback_db_manager(db_path: str) -> DatabaseManager:
+    return DatabaseManager(db_path)
+
+
 # Dependency to get DatabaseManager instance
-def get_db_manager():
+def get_db_manager(request: Request):
+    # Prefer the instance created by the application lifespan
+    db_manager = getattr(request.app.state, "db_manager", None)
+    if db_manager is not None:
+        return db_manager
+    
     from app.core.config import DB_PATH
-    return DatabaseManager(DB_PATH)
+    return _fallback_db_manager(DB_PATH)
+
+
+# Dependency to get the running MetricsRecorder, if any
+def get_recorder(request: Request):
+    return getattr(request.app.state, "recorder", None)
+
+
+# Dependency to get the live snapshot shared between workers, if any
+def get_live_snapshot(request: Request):
+    return getattr(request.app.state, "snapshot", None)
+
+
+# Dependency to get the live stream broadcaster, if any
+def get_broadcaster(request: Request):
+    return getattr(request.app.state, "broadcaster", None)
+
+
+# Dependency to get the event loop lag monitor, if any
+def get_loop_monitor(request: Request):
+    return getattr(request.app.state, "loop_monitor", None)
+
+
+# Dependency to get the metric topic broadcaster, if any
+def get_topic_broadcaster(websocket: WebSocket):
+    return getattr(websocket.app.state, "topic_broadcaster", None)
 
 
 @router.get("/", response_class=HTMLResponse)
 async def read_root(
     request: Request,
-    monitor: SystemMonitor = Depends(get_system_monitor)
+    snapshot=Depends(get_live_snapshot)
 ):
     """
-    Serves the main HTML page with system performance data.
+    Serves the main HTML page with the latest live snapshot embedded.
+    
+    The page is rendered once and nothing is collected per request; without
+    a fresh snapshot the page fetches the live metrics itself. Responses
+    carry an ETag, and `If-None-Match` is answered with 304 until a newer
+    snapshot is published.
     """
-    cpu_percent = monitor.get_cpu_usage()
-    memory_info = monitor.get_memory_usage()
-
-    context = {
-        "request": request,
-        "cpu_percent": cpu_percent,
-        "memory_total_gb": memory_info["total_gb"],
-        "memory_available_gb": memory_info["available_gb"],
-        "memory_used_gb": memory_info["used_gb"],
-        "memory_percent": memory_info["percent"],
-    }
-    return templates.TemplateResponse("index.html", context)
+    data = None
+    if snapshot is not None:
+        data = snapshot.read_snapshot(max_age=LIVE_SNAPSHOT_MAX_AGE_SECONDS)
+    body, version = dashboard.render(data)
+    
+    etag = make_etag(request.url.path, *version)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if is_not_modified(request, etag, None):
+        return not_modified_response(headers)
+    return HTMLResponse(body, headers=headers)
 
 
 @router.get("/api/system-info")
 async def get_system_info_api(
-    monitor: SystemMonitor = Depends(get_system_monitor)
+    fields: Optional[str] = None,
+    monitor: SystemMonitor = Depends(get_system_monitor),
+    snapshot=Depends(get_live_snapshot)
 ):
     """
     Provides system performance data as JSON.
+    
+    `fields` selects what to return, e.g. `fields=cpu,memory`, from cpu,
+    memory, disk, per_core and network (default all). `sampled_at` maps
+    each returned key to the time its value was collected.
+    
+    Served from the shared live snapshot when it is fresh, otherwise only
+    the selected collectors run, concurrently and off the event loop.
     """
-    return monitor.get_system_info()
+    try:
+        names = SystemMonitor.parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # The payload is already primitive, so skip FastAPI's generic encoder
+    if snapshot is not None:
+        data = snapshot.read_snapshot(max_age=LIVE_SNAPSHOT_MAX_AGE_SECONDS)
+        if data is not None:
+            sampled_at = datetime.datetime.fromtimestamp(data["published_at"]).isoformat()
+            keys = [SYSTEM_INFO_FIELDS[name][0] for name in names]
+            result = {key: data["system_info"][key] for key in keys}
+            result["sampled_at"] = {key: sampled_at for key in keys}
+            return FastJSONResponse(result)
+    return FastJSONResponse(await run_in_threadpool(monitor.sample_system_info, names))
 
 
 @router.get("/api/processes")
 async def get_processes(
+    limit: int = Query(10, ge=1, le=MAX_PROCESS_LIMIT),
+    sort: str = "cpu_percent",
+    monitor: SystemMonitor = Depends(get_system_monitor),
+    snapshot=Depends(get_live_snapshot)
+):
+    """
+    Returns list of top processes by CPU usage, or by `sort` (cpu_percent,
+    memory_percent, rss or num_threads).
+    """
+    if sort == "cpu_percent" and snapshot is not None and limit <= MAX_PROCESSES:
+        processes = snapshot.read_processes(max_age=LIVE_SNAPSHOT_MAX_AGE_SECONDS)
+        if processes is not None:
+            return FastJSONResponse(processes[:limit])
+    try:
+        return FastJSONResponse(await run_in_threadpool(monitor.get_top_processes, limit, sort))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/api/processes/groups")
+async def get_process_groups(
+    by: str = "name",
+    sort: str = "cpu_percent",
+    limit: int = Query(10, ge=1, le=MAX_PROCESS_LIMIT),
     monitor: SystemMonitor = Depends(get_system_monitor)
 ):
-    """Returns list of top processes by CPU usage."""
-    return monitor.get_top_processes()
+    """
+    Returns process count, CPU, memory, RSS and thread totals per
+    executable name, user or cgroup (`by`), highest `sort` first.
+    
+    Computed from the worker's process table, which is collected in one
+    pass and reused for PROCESS_TABLE_TTL_SECONDS.
+    """
+    try:
+        return FastJSONResponse(await run_in_threadpool(monitor.get_process_groups, by, sort, limit))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/metrics", response_class=Response)
+async def get_metrics(
+    request: Request,
+    monitor: SystemMonitor = Depends(get_system_monitor),
+    snapshot=Depends(get_live_snapshot)
+):
+    """
+    Exposes live metrics and the monitor's own state for Prometheus.
+    
+    Rendered from the shared live snapshot, so a scrape does not collect
+    anything unless no fresh snapshot is available. OpenMetrics is served
+    when the scraper asks for it in the Accept header.
+    """
+    def collect():
+        return {
+            "published_at": time.time(),
+            "system_info": monitor.get_system_info(),
+            "byte_counts": monitor.get_byte_counts(),
+            "processes": [],
+            "process_count": monitor.get_process_count(),
+        }
+    
+    data = None
+    if snapshot is not None:
+        data = snapshot.read_snapshot(max_age=LIVE_SNAPSHOT_MAX_AGE_SECONDS)
+    if data is None:
+        data = await run_in_threadpool(collect)
+    
+    state = request.app.state
+    openmetrics = wants_openmetrics(request.headers.get("accept"))
+    body = exposition.render(
+        data,
+        openmetrics=openmetrics,
+        recorder=getattr(state, "recorder", None),
+        leader=getattr(state, "leader", None),
+        stream=getattr(state, "broadcaster", None),
+        topics=getattr(state, "topic_broadcaster", None),
+    )
+    return Response(body, media_type=OPENMETRICS_MEDIA_TYPE if openmetrics else PROMETHEUS_MEDIA_TYPE)
+
+
+@router.get("/api/stream")
+async def stream_live(
+    broadcaster=Depends(get_broadcaster)
+):
+    """
+    Streams live updates as Server-Sent Events.
+    
+    The first `snapshot` event carries the system information, processes and
+    recent alerts; it is followed by `system_info` deltas, `processes`,
+    `alerts` and `history` events as the data changes.
+    """
+    if broadcaster is None:
+        raise HTTPException(status_code=503, detail="Live stream is not available")
+    return StreamingResponse(
+        broadcaster.stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _cached_history(request, db_manager, recorder, names, hours, since, format, load):
+    """
+    Serve a history query with validators, answering 304 when the client's
+    copy is current. `load` reads the history only when it has changed.
+    """
+    media_type = negotiate_media_type(request.headers.get("accept"), format)
+    version = db_manager.get_history_version(names, hours, since=since)
+    if version is None:
+        return history_response(load(), request, format)
+    
+    etag = make_etag(request.url.path, names, hours, since, media_type, version)
+    headers = cache_headers(etag, version["last"], max_age(recorder))
+    headers["Vary"] = "Accept"
+    # Points age out of the rolling window while the latest one stays the
+    # same, so only the ETag, which covers the whole range, can validate
+    if is_not_modified(request, etag, None):
+        return not_modified_response(headers)
+    
+    response = history_response(load(), request, format)
+    response.headers.update(headers)
+    return response
+
+
+@router.get("/api/history")
+async def get_history(
+    request: Request,
+    series: str = "cpu,memory",
+    hours: int = 1,
+    since: Optional[str] = None,
+    format: Optional[str] = None,
+    db_manager: DatabaseManager = Depends(get_db_manager),
+    recorder=Depends(get_recorder)
+):
+    """
+    Returns several history series aligned on a shared time axis.
+    
+    `series` is a comma-separated list, e.g. `cpu,memory,per_core`.
+    Pass the `cursor` of a previous response as `since` to receive only newer points.
+    The response format is negotiated from the Accept header or `format`.
+    Responses carry an ETag; `If-None-Match` is answered with 304 while no
+    sample has been added to the range.
+    """
+    names = [name.strip() for name in series.split(",") if name.strip()]
+    unknown = [name for name in names if name not in HISTORY_SERIES]
+    if not names or unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown or missing series. Available: {', '.join(HISTORY_SERIES)}"
+        )
+    return _cached_history(
+        request, db_manager, recorder, names, hours, since, format,
+        lambda: db_manager.get_history(names, hours, since=since)
+    )
 
 
 @router.get("/api/history/cpu")
 async def get_cpu_history(
+    request: Request,
     hours: int = 1,
-    db_manager: DatabaseManager = Depends(get_db_manager)
+    since: Optional[str] = None,
+    format: Optional[str] = None,
+    db_manager: DatabaseManager = Depends(get_db_manager),
+    recorder=Depends(get_recorder)
 ):
     """Returns CPU usage history for the specified number of hours."""
-    return db_manager.get_cpu_history(hours)
+    return _cached_history(
+        request, db_manager, recorder, ["cpu"], hours, since, format,
+        lambda: db_manager.get_cpu_history(hours, since=since)
+    )
 
 
 @router.get("/api/history/memory")
 async def get_memory_history(
+    request: Request,
     hours: int = 1,
-    db_manager: DatabaseManager = Depends(get_db_manager)
+    since: Optional[str] = None,
+    format: Optional[str] = None,
+    db_manager: DatabaseManager = Depends(get_db_manager),
+    recorder=Depends(get_recorder)
 ):
     """Returns memory usage history for the specified number of hours."""
-    return db_manager.get_memory_history(hours)
+    return _cached_history(
+        request, db_manager, recorder, ["memory"], hours, since, format,
+        lambda: db_manager.get_memory_history(hours, since=since)
+    )
+
+
+@router.get("/api/history/per-core/heatmap")
+async def get_per_core_heatmap(
+    request: Request,
+    hours: int = Query(1, ge=1, le=MAX_HEATMAP_HOURS),
+    buckets: int = 120,
+    stat: str = "mean",
+    db_manager: DatabaseManager = Depends(get_db_manager),
+    recorder=Depends(get_recorder)
+):
+    """
+    Returns per-core CPU usage as a core by time matrix of whole-number
+    percentages, with `buckets` columns covering the last `hours`.
+    
+    `stat` combines the samples in a bucket (`mean` or `max`). Bucket
+    boundaries are aligned to multiples of the bucket width, so the
+    response only changes when a sample is added; it carries an ETag.
+    """
+    if not 1 <= buckets <= MAX_HEATMAP_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"buckets must be between 1 and {MAX_HEATMAP_BUCKETS}")
+    if stat not in HEATMAP_STATS:
+        raise HTTPException(status_code=400, detail=f"Unknown stat. Available: {', '.join(HEATMAP_STATS)}")
+    
+    span = hours * 3600
+    bucket_seconds = span / buckets
+    end = math.ceil(time.time() / bucket_seconds) * bucket_seconds
+    start = datetime.datetime.fromtimestamp(end - span)
+    
+    def load():
+        samples = db_manager.get_per_core_samples(start.isoformat())
+        return core_heatmap(samples, start, bucket_seconds, buckets, stat)
+    
+    version = db_manager.get_history_version(["per_core"], hours)
+    if version is None:
+        return FastJSONResponse(await run_in_threadpool(load))
+    
+    etag = make_etag(request.url.path, start.isoformat(), hours, buckets, stat, version)
+    headers = cache_headers(etag, version["last"], max_age(recorder))
+    # Rolling window: validated by the ETag alone, as for history
+    if is_not_modified(request, etag, None):
+        return not_modified_response(headers)
+    return FastJSONResponse(await run_in_threadpool(load), headers=headers)
 
 
 @router.get("/api/alerts")
 async def get_alerts(
+    request: Request,
     limit: int = 10,
+    db_manager: DatabaseManager = Depends(get_db_manager),
+    recorder=Depends(get_recorder)
+):
+    """
+    Returns the most recent system alerts.
+    
+    Responses carry an ETag; `If-None-Match` is answered with 304 while no
+    alert has been raised or resolved.
+    """
+    version = db_manager.get_alerts_version()
+    if version is None:
+        return FastJSONResponse(db_manager.get_alerts(limit))
+    
+    etag = make_etag(request.url.path, limit, version)
+    headers = cache_headers(etag, version["last"], max_age(recorder))
+    if is_not_modified(request, etag, version["last"]):
+        return not_modified_response(headers)
+    return FastJSONResponse(db_manager.get_alerts(limit), headers=headers)
+
+
+@router.get("/api/alerts/{alert_id}/processes")
+async def get_alert_processes(
+    alert_id: int,
     db_manager: DatabaseManager = Depends(get_db_manager)
 ):
-    """Returns the most recent system alerts."""
-    return db_manager.get_alerts(limit)
+    """
+    Returns the processes using the most CPU in the minutes before an alert
+    fired, one frame per flight recorder sample, as captured when it fired.
+    """
+    window = db_manager.get_alert_processes(alert_id)
+    if window is None:
+        raise HTTPException(status_code=404, detail="No processes were captured for this alert")
+    return FastJSONResponse({"alert_id": alert_id, **expand_window(window)})
+
+
+@router.get("/api/recorder")
+async def get_recorder_stats(
+    recorder=Depends(get_recorder)
+):
+    """Returns the metrics recorder's health, including spool depth and replay lag."""
+    if recorder is None:
+        raise HTTPException(status_code=503, detail="Metrics recorder is not running")
+    return recorder.get_stats()
+
+
+@router.get("/api/self-stats")
+async def get_self_stats(
+    loop_monitor=Depends(get_loop_monitor),
+    broadcaster=Depends(get_broadcaster)
+):
+    """
+    Returns this worker's latency histograms for routes, collectors,
+    database operations, recorder ticks and event loop lag, in seconds,
+    the state of its event loop lag monitor and the health of its live
+    stream producer.
+    """
+    return FastJSONResponse({
+        "enabled": STATS.enabled,
+        "histograms": STATS.snapshot(),
+        "loop": loop_monitor.get_stats() if loop_monitor is not None else None,
+        "stream": broadcaster.get_stats() if broadcaster is not None else None,
+    })
+
+
+@router.get("/api/slow-callbacks")
+async def get_slow_callbacks(
+    hours: int = 1,
+    limit: int = 50,
+    db_manager: DatabaseManager = Depends(get_db_manager)
+):
+    """
+    Returns calls that blocked the event loop of any worker, newest first,
+    with the route being served and the code that was running.
+    
+    Reports are only recorded while LOOP_DEBUG is enabled.
+    """
+    return FastJSONResponse(db_manager.get_slow_callbacks(hours, limit))
+
+
+@router.websocket("/ws/metrics")
+async def metrics_websocket(
+    websocket: WebSocket,
+    broadcaster=Depends(get_topic_broadcaster)
+):
+    """
+    Pushes selected metric topics over a WebSocket.
+    
+    Clients send `{"subscribe": ["per_core", "network:eth0"], "interval": 2}`
+    or `{"unsubscribe": [...]}` and receive `{"topic", "time", "data"}`
+    messages for each subscribed topic at the requested interval.
+    """
+    if broadcaster is None:
+        await websocket.close(code=1013)
+        return
+    
+    await websocket.accept()
+    subscriber = broadcaster.connect()
+    limiter = RateLimiter(WS_CONTROL_RATE, WS_CONTROL_BURST)
+    
+    async def send_updates():
+        while True:
+            message = await subscriber.queue.get()
+            if message is None:
+                # Dropped for falling behind
+                await websocket.close(code=1013, reason="Client too slow")
+                return
+            try:
+                await websocket.send_text(message)
+            except WebSocketDisconnect:
+                return
+    
+    async def handle_requests():
+        while True:
+            try:
+                text = await websocket.receive_text()
+            except WebSocketDisconnect:
+                return
+            
+            # Every frame counts, including ones that are not valid JSON
+            if not limiter.allow():
+                await websocket.close(code=1008, reason="Too many requests")
+                return
+            try:
+                request = json.loads(text)
+            except ValueError:
+                await websocket.send_json({"type": "error", "message": "Messages must be JSON objects"})
+                continue
+            if not isinstance(request, dict):
+                await websocket.send_json({"type": "error", "message": "Messages must be JSON objects"})
+                continue
+            
+            try:
+                if "subscribe" in request:
+                    topics = broadcaster.subscribe(
+                        subscriber, request["subscribe"], request.get("interval", broadcaster.tick)
+                    )
+                    await websocket.send_json({
+                        "type": "subscribed",
+                        "topics": topics,
+                        "interval": subscriber.intervals[topics[0]] if topics else None,
+                    })
+                elif "unsubscribe" in request:
+                    broadcaster.unsubscribe(subscriber, request["unsubscribe"])
+                    await websocket.send_json({"type": "unsubscribed", "topics": request["unsubscribe"]})
+                else:
+                    await websocket.send_json({"type": "error", "message": "Expected subscribe or unsubscribe"})
+            except (ValueError, TypeError) as e:
+                await websocket.send_json({"type": "error", "message": str(e)})
+    
+    tasks = [asyncio.create_task(send_updates()), asyncio.create_task(handle_requests())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        broadcaster.disconnect(subscriber)
+        for task in tasks:
+            task.cancel()
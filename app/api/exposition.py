@@ -0,0 +1,256 @@
+"""
+Metrics Exposition
+Renders the live snapshot and the monitor's own state in the Prometheus
+text and OpenMetrics exposition formats
+"""
+import math
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+OPENMETRICS_MEDIA_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+
+class MetricFamily:
+    """
+    A metric family with its HELP and TYPE lines encoded ahead of time.
+    """
+    __slots__ = ("name", "sample_name", "headers")
+
+    def __init__(self, name: str, metric_type: str, help_text: str):
+        """
+        Args:
+            name: Family name; counters get the `_total` suffix on their samples
+            metric_type: gauge or counter
+            help_text: Description shown by Prometheus
+        """
+        self.name = name
+        self.sample_name = name + "_total" if metric_type == "counter" else name
+        # Prometheus' text format names counters after their samples,
+        # OpenMetrics after the family
+        self.headers = {
+            False: f"# HELP {self.sample_name} {help_text}\n# TYPE {self.sample_name} {metric_type}\n",
+            True: f"# HELP {name} {help_text}\n# TYPE {name} {metric_type}\n",
+        }
+
+
+def _family_table(*families: MetricFamily) -> Dict[str, MetricFamily]:
+    """
+    Index families by name, keeping their order.
+    """
+    return {family.name: family for family in families}
+
+
+# Families rendered from the live snapshot, in exposition order
+SNAPSHOT_FAMILIES = _family_table(
+    MetricFamily("sysmon_cpu_usage_percent", "gauge", "System-wide CPU utilization."),
+    MetricFamily("sysmon_cpu_core_usage_percent", "gauge", "CPU utilization per logical core."),
+    MetricFamily("sysmon_memory_total_bytes", "gauge", "Total physical memory."),
+    MetricFamily("sysmon_memory_available_bytes", "gauge", "Memory available to new processes."),
+    MetricFamily("sysmon_memory_used_bytes", "gauge", "Memory in use."),
+    MetricFamily("sysmon_memory_usage_percent", "gauge", "Memory utilization."),
+    MetricFamily("sysmon_disk_total_bytes", "gauge", "Total size of a mounted partition."),
+    MetricFamily("sysmon_disk_used_bytes", "gauge", "Used space of a mounted partition."),
+    MetricFamily("sysmon_disk_free_bytes", "gauge", "Free space of a mounted partition."),
+    MetricFamily("sysmon_disk_usage_percent", "gauge", "Utilization of a mounted partition."),
+    MetricFamily("sysmon_network_sent_bytes", "counter", "Bytes sent on all interfaces."),
+    MetricFamily("sysmon_network_received_bytes", "counter", "Bytes received on all interfaces."),
+    MetricFamily("sysmon_network_sent_packets", "counter", "Packets sent on all interfaces."),
+    MetricFamily("sysmon_network_received_packets", "counter", "Packets received on all interfaces."),
+    MetricFamily("sysmon_processes", "gauge", "Number of processes on the host."),
+    MetricFamily("sysmon_snapshot_timestamp_seconds", "gauge", "Unix time the live metrics were sampled."),
+)
+
+# Families describing the monitor itself, rendered on every scrape
+INTERNAL_FAMILIES = _family_table(
+    MetricFamily("sysmon_snapshot_age_seconds", "gauge", "Age of the live metrics at scrape time."),
+    MetricFamily("sysmon_leader", "gauge", "Whether this worker holds the recorder lease."),
+    MetricFamily("sysmon_recorder_running", "gauge", "Whether the metrics recorder runs in this worker."),
+    MetricFamily("sysmon_recorder_interval_seconds", "gauge", "Current recording interval."),
+    MetricFamily("sysmon_recorder_missed_ticks", "counter", "Recorder ticks skipped because collection overran."),
+    MetricFamily("sysmon_recorder_buffered_samples", "gauge", "Samples waiting to be written."),
+    MetricFamily("sysmon_spool_samples", "gauge", "Samples spooled while the database rejects writes."),
+    MetricFamily("sysmon_spool_bytes", "gauge", "Size of the sample spool."),
+    MetricFamily("sysmon_spool_replay_lag_seconds", "gauge", "Age of the oldest spooled sample."),
+    MetricFamily("sysmon_spool_dropped_samples", "counter", "Samples dropped because the spool was full."),
+    MetricFamily("sysmon_stream_subscribers", "gauge", "Connected live stream clients."),
+    MetricFamily("sysmon_stream_dropped_subscribers", "counter", "Live stream clients dropped for falling behind."),
+    MetricFamily("sysmon_stream_failed_ticks", "counter", "Live stream producer ticks that raised an error."),
+    MetricFamily("sysmon_topic_subscribers", "gauge", "Connected WebSocket topic clients."),
+    MetricFamily("sysmon_topic_messages", "counter", "WebSocket topic messages queued for clients."),
+    MetricFamily("sysmon_topic_serializations", "counter", "WebSocket topic updates encoded."),
+    MetricFamily("sysmon_topic_dropped_subscribers", "counter", "WebSocket clients dropped for falling behind."),
+)
+
+
+def wants_openmetrics(accept: Optional[str]) -> bool:
+    """
+    Whether a scraper asked for the OpenMetrics format.
+    """
+    return bool(accept) and "application/openmetrics-text" in accept
+
+
+def _format_value(value: Any) -> str:
+    """
+    Format a sample value; missing values become NaN.
+    """
+    if value is None:
+        return "NaN"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _escape(value: Any) -> str:
+    """
+    Escape a label value.
+    """
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+Sample = Tuple[str, Any]
+
+
+class MetricsExposition:
+    """
+    Renders `/metrics` without collecting anything itself.
+
+    Metric families and their headers are built once at import. The part
+    rendered from the live snapshot is cached until a newer snapshot is
+    published, so repeated scrapes only format the handful of internal
+    metrics, which change on their own.
+    """
+
+    def __init__(self):
+        self._cache_key: Optional[Tuple[float, bool]] = None
+        self._cache: str = ""
+
+    def render(
+        self,
+        snapshot: Dict[str, Any],
+        openmetrics: bool = False,
+        recorder=None,
+        leader=None,
+        stream=None,
+        topics=None,
+        now: Optional[float] = None,
+    ) -> bytes:
+        """
+        Render the exposition.
+
+        Args:
+            snapshot: Dictionary as returned by SharedSnapshot.read_snapshot
+            openmetrics: Render OpenMetrics instead of the Prometheus text format
+            recorder: MetricsRecorder of this worker, if any
+            leader: LeaderElection of this worker, if any
+            stream: LiveBroadcaster of this worker, if any
+            topics: TopicBroadcaster of this worker, if any
+            now: Unix time of the scrape (default now)
+
+        Returns:
+            Encoded exposition
+        """
+        key = (snapshot["published_at"], openmetrics)
+        if key != self._cache_key:
+            self._cache = self._render_families(SNAPSHOT_FAMILIES, self._snapshot_samples(snapshot), openmetrics)
+            self._cache_key = key
+
+        now = time.time() if now is None else now
+        internals = self._internal_samples(snapshot, now, recorder, leader, stream, topics)
+        body = self._cache + self._render_families(INTERNAL_FAMILIES, internals, openmetrics)
+        if openmetrics:
+            body += "# EOF\n"
+        return body.encode("utf-8")
+
+    @staticmethod
+    def _render_families(
+        families: Dict[str, MetricFamily],
+        samples: Dict[str, List[Sample]],
+        openmetrics: bool,
+    ) -> str:
+        """
+        Render the families that have samples, in table order.
+        """
+        lines = []
+        for name, family in families.items():
+            family_samples = samples.get(name)
+            if not family_samples:
+                continue
+            lines.append(family.headers[openmetrics])
+            for labels, value in family_samples:
+                lines.append(f"{family.sample_name}{labels} {_format_value(value)}\n")
+        return "".join(lines)
+
+    @staticmethod
+    def _snapshot_samples(snapshot: Dict[str, Any]) -> Dict[str, List[Sample]]:
+        """
+        Map the live snapshot onto the snapshot families.
+        """
+        system_info = snapshot["system_info"]
+        memory = snapshot["byte_counts"]["memory"]
+        network = snapshot["byte_counts"]["network"]
+        samples: Dict[str, List[Sample]] = {
+            "sysmon_cpu_usage_percent": [("", system_info["cpu_percent"])],
+            "sysmon_cpu_core_usage_percent": [
+                (f'{{core="{core}"}}', value) for core, value in enumerate(system_info["per_core_cpu"])
+            ],
+            "sysmon_memory_total_bytes": [("", memory["total"])],
+            "sysmon_memory_available_bytes": [("", memory["available"])],
+            "sysmon_memory_used_bytes": [("", memory["used"])],
+            "sysmon_memory_usage_percent": [("", system_info["memory_info"]["percent"])],
+            "sysmon_network_sent_bytes": [("", network["sent"])],
+            "sysmon_network_received_bytes": [("", network["recv"])],
+            "sysmon_network_sent_packets": [("", system_info["network_stats"]["packets_sent"])],
+            "sysmon_network_received_packets": [("", system_info["network_stats"]["packets_recv"])],
+            "sysmon_processes": [("", snapshot["process_count"])],
+            "sysmon_snapshot_timestamp_seconds": [("", snapshot["published_at"])],
+        }
+        disk_bytes = snapshot["byte_counts"]["disks"]
+        for disk in system_info["disk_info"]:
+            labels = f'{{device="{_escape(disk["device"])}",mountpoint="{_escape(disk["mountpoint"])}"}}'
+            sizes = disk_bytes.get(disk["mountpoint"])
+            if sizes is not None:
+                samples.setdefault("sysmon_disk_total_bytes", []).append((labels, sizes["total"]))
+                samples.setdefault("sysmon_disk_used_bytes", []).append((labels, sizes["used"]))
+                samples.setdefault("sysmon_disk_free_bytes", []).append((labels, sizes["free"]))
+            samples.setdefault("sysmon_disk_usage_percent", []).append((labels, disk["percent"]))
+        return samples
+
+    @staticmethod
+    def _internal_samples(snapshot, now, recorder, leader, stream, topics) -> Dict[str, List[Sample]]:
+        """
+        Map the monitor's own components onto the internal families.
+        """
+        samples: Dict[str, List[Sample]] = {
+            "sysmon_snapshot_age_seconds": [("", max(0.0, now - snapshot["published_at"]))],
+        }
+        if leader is not None:
+            samples["sysmon_leader"] = [("", leader.is_leader)]
+        if recorder is not None:
+            stats = recorder.get_stats()
+            samples.update({
+                "sysmon_recorder_running": [("", stats["running"])],
+                "sysmon_recorder_interval_seconds": [("", stats["interval_seconds"])],
+                "sysmon_recorder_missed_ticks": [("", stats["missed_ticks"])],
+                "sysmon_recorder_buffered_samples": [("", stats["buffered_samples"])],
+                "sysmon_spool_samples": [("", stats["spool_depth"])],
+                "sysmon_spool_bytes": [("", stats["spool_bytes"])],
+                "sysmon_spool_replay_lag_seconds": [("", stats["spool_replay_lag_seconds"])],
+                "sysmon_spool_dropped_samples": [("", stats["spool_dropped_samples"])],
+            })
+        if stream is not None:
+            samples["sysmon_stream_subscribers"] = [("", stream.subscriber_count)]
+            samples["sysmon_stream_dropped_subscribers"] = [("", stream.dropped_subscribers)]
+            samples["sysmon_stream_failed_ticks"] = [("", stream.failed_ticks)]
+        if topics is not None:
+            samples["sysmon_topic_subscribers"] = [("", topics.subscriber_count)]
+            samples["sysmon_topic_messages"] = [("", topics.messages)]
+            samples["sysmon_topic_serializations"] = [("", topics.serializations)]
+            samples["sysmon_topic_dropped_subscribers"] = [("", topics.dropped_subscribers)]
+        return samples
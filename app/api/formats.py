@@ -0,0 +1,264 @@
+"""
+History Response Formats
+Content negotiation and encoders for history data
+"""
+import sys
+import json
+import math
+import struct
+import datetime
+from array import array
+from typing import Dict, List, Any, Optional, Tuple
+
+from fastapi import HTTPException, Request
+from fastapi.responses import JSONResponse, Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+
+# Media types offered by the history endpoints
+JSON_MEDIA_TYPE = "application/json"
+COLUMNAR_MEDIA_TYPE = "application/vnd.sysmon.columnar+json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+BINARY_MEDIA_TYPE = "application/vnd.sysmon.f64"
+
+# Short names accepted by the `format` query parameter
+FORMAT_ALIASES = {
+    "json": JSON_MEDIA_TYPE,
+    "columnar": COLUMNAR_MEDIA_TYPE,
+    "msgpack": MSGPACK_MEDIA_TYPE,
+    "binary": BINARY_MEDIA_TYPE,
+}
+
+# Magic bytes at the start of every binary history payload
+BINARY_MAGIC = b"SMH1"
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Serialize already-primitive content to compact JSON, using orjson when
+    it is installed.
+    """
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response that serializes already-primitive content directly,
+    using orjson when it is installed.
+
+    Returning this from an endpoint bypasses FastAPI's jsonable_encoder,
+    so it must only be used for dicts, lists, strings and numbers.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def available_media_types() -> List[str]:
+    """
+    Returns the history media types supported in this environment.
+    """
+    media_types = [JSON_MEDIA_TYPE, COLUMNAR_MEDIA_TYPE, BINARY_MEDIA_TYPE]
+    if msgpack is not None:
+        media_types.append(MSGPACK_MEDIA_TYPE)
+    return media_types
+
+
+def negotiate_media_type(accept: Optional[str], format: Optional[str] = None) -> str:
+    """
+    Pick the response media type for a history request.
+
+    An explicit `format` query value wins over the Accept header. Accept
+    entries are tried in order of their quality value; anything that is not
+    supported falls back to plain JSON.
+
+    Args:
+        accept: Value of the Accept request header
+        format: Optional short format name (json, columnar, msgpack, binary)
+
+    Returns:
+        The selected media type
+
+    Raises:
+        HTTPException: 406 if an explicitly requested format is unavailable
+    """
+    supported = available_media_types()
+
+    if format:
+        media_type = FORMAT_ALIASES.get(format.lower())
+        if media_type not in supported:
+            raise HTTPException(
+                status_code=406,
+                detail=f"Unsupported format '{format}'. Available: "
+                + ", ".join(name for name, value in FORMAT_ALIASES.items() if value in supported)
+            )
+        return media_type
+
+    candidates = []
+    for position, part in enumerate((accept or "").split(",")):
+        fields = part.strip().split(";")
+        media_type = fields[0].strip().lower()
+        quality = 1.0
+        for param in fields[1:]:
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if media_type and quality > 0:
+            candidates.append((-quality, position, media_type))
+
+    for _, _, media_type in sorted(candidates):
+        if media_type in supported:
+            return media_type
+    return JSON_MEDIA_TYPE
+
+
+def to_epoch_ms(timestamp: str) -> int:
+    """
+    Convert an ISO format timestamp to integer epoch milliseconds.
+    """
+    return int(datetime.datetime.fromisoformat(timestamp).timestamp() * 1000)
+
+
+def _history_columns(history: Dict[str, Any]) -> Dict[str, List]:
+    """
+    Returns the value columns of a history dict, for either the combined
+    shape (`series`) or the single-series shape (`values`).
+    """
+    if "series" in history:
+        return history["series"]
+    return {"values": history["values"]}
+
+
+def to_columnar(history: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a history dict to the columnar layout with epoch-ms time.
+
+    Args:
+        history: Dictionary with timestamps and values or series
+
+    Returns:
+        Dictionary with `time` (epoch ms integers), `series` columns and
+        the `cursor` for incremental requests
+    """
+    return {
+        "time": [to_epoch_ms(timestamp) for timestamp in history["timestamps"]],
+        "series": _history_columns(history),
+        "cursor": history.get("cursor"),
+    }
+
+
+def _pack_column(values: List[Any]) -> Tuple[array, List[int]]:
+    """
+    Pack a column into a float64 array, using NaN for missing values.
+
+    Columns of lists (such as per-core CPU) are flattened row-major and
+    padded with NaN to the widest row.
+
+    Returns:
+        Tuple of (packed array, shape)
+    """
+    nan = math.nan
+    if any(isinstance(value, list) for value in values):
+        width = max((len(value) for value in values if value), default=0)
+        packed = array("d")
+        for row in values:
+            row = row or []
+            packed.extend(nan if value is None else value for value in row)
+            packed.extend([nan] * (width - len(row)))
+        return packed, [len(values), width]
+
+    return array("d", (nan if value is None else value for value in values)), [len(values)]
+
+
+def to_binary(history: Dict[str, Any]) -> bytes:
+    """
+    Encode history as little-endian float64 columns.
+
+    Layout: the 4-byte magic `SMH1`, a uint32 header length, a JSON header
+    padded with spaces to an 8-byte boundary, then each column back to back.
+    The header holds the cursor and lists every column's name, byte offset
+    (from the start of the payload), element count and shape, so a browser can view each column with
+    `new Float64Array(buffer, offset, length)`. Time is epoch milliseconds.
+
+    Args:
+        history: Dictionary with timestamps and values or series
+
+    Returns:
+        Encoded payload
+    """
+    timestamps = history["timestamps"]
+    columns = [("time", array("d", (to_epoch_ms(ts) for ts in timestamps)), [len(timestamps)])]
+    for name, values in _history_columns(history).items():
+        packed, shape = _pack_column(values)
+        columns.append((name, packed, shape))
+
+    def build_header(data_start: int) -> bytes:
+        offset = data_start
+        entries = []
+        for name, packed, shape in columns:
+            entries.append({"name": name, "offset": offset, "length": len(packed), "shape": shape})
+            offset += len(packed) * 8
+        header = {"count": len(timestamps), "cursor": history.get("cursor"), "columns": entries}
+        return json.dumps(header).encode("utf-8")
+
+    # Offsets depend on the header length, so grow the data start until the
+    # header built with those offsets fits in front of it
+    data_start = 0
+    while True:
+        header = build_header(data_start)
+        needed = len(BINARY_MAGIC) + 4 + len(header)
+        needed += -needed % 8
+        if needed <= data_start:
+            break
+        data_start = needed
+    header += b" " * (data_start - len(BINARY_MAGIC) - 4 - len(header))
+
+    parts = [BINARY_MAGIC, struct.pack("<I", len(header)), header]
+    for _, packed, _ in columns:
+        if sys.byteorder == "big":  # pragma: no cover - big-endian hosts
+            packed.byteswap()
+        parts.append(packed.tobytes())
+    return b"".join(parts)
+
+
+def history_response(history: Dict[str, Any], request: Request, format: Optional[str] = None) -> Response:
+    """
+    Render history data in the format negotiated for the request.
+
+    Args:
+        history: Dictionary with timestamps and values or series
+        request: Incoming request, used for its Accept header
+        format: Optional short format name overriding the Accept header
+
+    Returns:
+        Response in JSON, columnar JSON, msgpack or binary form
+    """
+    media_type = negotiate_media_type(request.headers.get("accept"), format)
+    headers = {"Vary": "Accept"}
+
+    if media_type == COLUMNAR_MEDIA_TYPE:
+        return FastJSONResponse(to_columnar(history), media_type=media_type, headers=headers)
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return Response(msgpack.packb(to_columnar(history)), media_type=media_type, headers=headers)
+    if media_type == BINARY_MEDIA_TYPE:
+        return Response(to_binary(history), media_type=media_type, headers=headers)
+    return FastJSONResponse(history, headers=headers)
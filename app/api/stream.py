@@ -0,0 +1,296 @@
+"""
+Live Stream
+Server-Sent Events broadcaster pushing live metrics, new history points and
+alert changes from one producer to every connected dashboard
+"""
+import asyncio
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set
+
+from app.api.formats import dumps
+from app.database.db_manager import DatabaseManager
+
+
+# Series pushed to subscribers as new history points arrive
+STREAM_HISTORY_SERIES = ["cpu", "memory"]
+
+
+def format_event(event: str, data: Any) -> bytes:
+    """
+    Encode one Server-Sent Event. The JSON payload never contains newlines,
+    so it fits on a single data line.
+
+    Args:
+        event: Event name
+        data: JSON-serializable payload
+
+    Returns:
+        Encoded event, ready to be written to every subscriber
+    """
+    return b"event: " + event.encode("utf-8") + b"\ndata: " + dumps(data) + b"\n\n"
+
+
+class _Subscriber:
+    """
+    Bounded queue of encoded events waiting to be sent to one client.
+    """
+    __slots__ = ("queue", "dropped")
+
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = False
+
+
+class LiveBroadcaster:
+    """
+    Fans live updates out to Server-Sent Events subscribers.
+
+    A single producer task per process collects the data once per interval
+    and encodes each event once; subscribers only receive the bytes. Live
+    system information is sent as a delta of the fields that changed, the
+    process list and the recent alerts only when they changed, and history
+    as the points added since the previous interval.
+
+    Every subscriber has a bounded queue. A client that falls so far behind
+    that its queue is full is dropped: its stream ends and the browser's
+    EventSource reconnects, starting again from a full snapshot.
+
+    The producer runs only while at least one client is connected.
+    """
+
+    def __init__(
+        self,
+        db_manager: DatabaseManager,
+        system_info: Callable[[], Dict[str, Any]],
+        processes: Callable[[], List[Dict[str, Any]]],
+        interval: float = 2,
+        process_every: int = 5,
+        queue_size: int = 32,
+        heartbeat: float = 15,
+        alerts_limit: int = 10,
+    ):
+        """
+        Initialize the broadcaster.
+
+        Args:
+            db_manager: DatabaseManager for history and alerts
+            system_info: Blocking function returning live system information
+            processes: Blocking function returning the top processes
+            interval: Seconds between producer ticks
+            process_every: Number of ticks between process list refreshes
+            queue_size: Events buffered per subscriber before it is dropped
+            heartbeat: Seconds of silence after which a keep-alive comment is sent
+            alerts_limit: Number of recent alerts sent to subscribers
+        """
+        self.db_manager = db_manager
+        self.system_info = system_info
+        self.processes = processes
+        self.interval = interval
+        self.process_every = process_every
+        self.queue_size = queue_size
+        self.heartbeat = heartbeat
+        self.alerts_limit = alerts_limit
+        self.dropped_subscribers = 0
+        self.failed_ticks = 0
+        self.last_error: Optional[str] = None
+        self._subscribers: Set[_Subscriber] = set()
+        self._state: Optional[Dict[str, Any]] = None
+        self._cursor: Optional[str] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def subscriber_count(self) -> int:
+        """
+        Number of connected subscribers.
+        """
+        return len(self._subscribers)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the broadcaster's health.
+
+        Returns:
+            Dictionary with the number of connected and dropped subscribers,
+            the number of producer ticks that failed and the last error
+        """
+        return {
+            "subscribers": self.subscriber_count,
+            "dropped_subscribers": self.dropped_subscribers,
+            "failed_ticks": self.failed_ticks,
+            "last_error": self.last_error,
+        }
+
+    def subscribe(self) -> _Subscriber:
+        """
+        Register a subscriber, starting the producer if it is not running.
+
+        Returns:
+            The new subscriber
+        """
+        subscriber = _Subscriber(self.queue_size)
+        self._subscribers.add(subscriber)
+
+        if self._state is not None:
+            subscriber.queue.put_nowait(format_event("snapshot", self._state))
+        if self._task is None or self._task.done():
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="live-stream")
+            self._task = asyncio.create_task(self._produce())
+        return subscriber
+
+    def unsubscribe(self, subscriber: _Subscriber) -> None:
+        """
+        Remove a subscriber, stopping the producer after the last one leaves.
+        """
+        self._subscribers.discard(subscriber)
+        if not self._subscribers:
+            self._stop_producer()
+
+    def publish(self, event: bytes) -> None:
+        """
+        Queue an encoded event for every subscriber, dropping those whose
+        queue is full.
+        """
+        for subscriber in list(self._subscribers):
+            try:
+                subscriber.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self._drop(subscriber)
+
+    def _drop(self, subscriber: _Subscriber) -> None:
+        """
+        Disconnect a subscriber that cannot keep up.
+        """
+        self._subscribers.discard(subscriber)
+        self.dropped_subscribers += 1
+        self._end(subscriber)
+
+        if not self._subscribers:
+            self._stop_producer()
+
+    @staticmethod
+    def _end(subscriber: _Subscriber) -> None:
+        """
+        Replace a subscriber's backlog with the end-of-stream marker.
+        """
+        subscriber.dropped = True
+        while not subscriber.queue.empty():
+            subscriber.queue.get_nowait()
+        subscriber.queue.put_nowait(None)
+
+    async def stream(self, subscriber: Optional[_Subscriber] = None) -> AsyncIterator[bytes]:
+        """
+        Yield the encoded events of one client until it disconnects or is dropped.
+
+        Args:
+            subscriber: Subscriber to stream; a new one is registered by default
+        """
+        if subscriber is None:
+            subscriber = self.subscribe()
+        try:
+            # Ask the browser to wait a little before reconnecting
+            yield b"retry: 3000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), timeout=self.heartbeat)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                if event is None:
+                    break
+                yield event
+        finally:
+            self.unsubscribe(subscriber)
+
+    async def _run_blocking(self, func, *args):
+        """
+        Run a blocking function in the producer's thread.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def _produce(self) -> None:
+        """
+        Collect and publish updates every interval until cancelled.
+        """
+        await self._tick(0)
+        tick = 1
+        while True:
+            await asyncio.sleep(self.interval)
+            await self._tick(tick)
+            tick += 1
+
+    async def _tick(self, tick: int) -> None:
+        """
+        Collect one round of updates and publish what changed.
+        """
+        try:
+            system_info = await self._run_blocking(self.system_info)
+            processes = None
+            if tick % self.process_every == 0:
+                processes = await self._run_blocking(self.processes)
+            alerts = await self._run_blocking(self.db_manager.get_alerts, self.alerts_limit)
+
+            if self._state is None:
+                # First round: everyone gets the full state. History continues
+                # after the newest stored row rather than the wall clock, as
+                # rows are stamped with their tick time but written after it
+                version = await self._run_blocking(
+                    self.db_manager.get_history_version, STREAM_HISTORY_SERIES
+                )
+                if version is not None:
+                    self._cursor = version["last"]
+                else:
+                    self._cursor = datetime.datetime.now().isoformat()
+                self._state = {"system_info": system_info, "processes": processes, "alerts": alerts}
+                self.publish(format_event("snapshot", self._state))
+                return
+
+            delta = {
+                key: value for key, value in system_info.items()
+                if self._state["system_info"].get(key) != value
+            }
+            if delta:
+                self._state["system_info"] = system_info
+                self.publish(format_event("system_info", delta))
+            if processes is not None and processes != self._state["processes"]:
+                self._state["processes"] = processes
+                self.publish(format_event("processes", processes))
+            if alerts != self._state["alerts"]:
+                self._state["alerts"] = alerts
+                self.publish(format_event("alerts", alerts))
+
+            history = await self._run_blocking(
+                self.db_manager.get_history, STREAM_HISTORY_SERIES, 1, self._cursor
+            )
+            if history["timestamps"]:
+                self._cursor = history["cursor"]
+                self.publish(format_event("history", history))
+        except Exception as e:
+            # Counted so a persistent failure, which stops every update, shows
+            # up in /api/self-stats and /metrics rather than only in the log
+            self.failed_ticks += 1
+            self.last_error = str(e)
+            print(f"Error producing live stream update: {e}")
+
+    def _stop_producer(self) -> None:
+        """
+        Cancel the producer task and release its thread.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._state = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def stop(self) -> None:
+        """
+        End every subscriber's stream and stop the producer.
+        """
+        for subscriber in list(self._subscribers):
+            self._end(subscriber)
+        self._subscribers.clear()
+        self._stop_producer()
@@ -0,0 +1,54 @@
+"""
+Route Timing
+Records the latency of every API route in the self-instrumentation histograms
+"""
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.instrumentation import STATS, SelfStats
+
+
+class RouteTimingMiddleware:
+    """
+    Times each HTTP request from arrival until its last body chunk is sent,
+    keyed by method and route template (e.g. `GET /api/history/cpu`), so
+    path parameters do not create a histogram per URL.
+
+    Long-lived Server-Sent Events responses and WebSockets are not timed.
+    """
+
+    def __init__(self, app: ASGIApp, stats: SelfStats = STATS) -> None:
+        """
+        Args:
+            app: Wrapped ASGI application
+            stats: SelfStats receiving the observations
+        """
+        self.app = app
+        self.stats = stats
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.stats.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        streaming = False
+
+        async def send_timed(message: Message) -> None:
+            nonlocal streaming
+            if message["type"] == "http.response.start":
+                for name, value in message.get("headers", []):
+                    if name == b"content-type" and value.startswith(b"text/event-stream"):
+                        streaming = True
+            await send(message)
+            if (
+                message["type"] == "http.response.body"
+                and not message.get("more_body", False)
+                and not streaming
+            ):
+                route = scope.get("route")
+                path = getattr(route, "path", None) or "unmatched"
+                self.stats.observe("route", f"{scope['method']} {path}", time.perf_counter() - started)
+
+        await self.app(scope, receive, send_timed)
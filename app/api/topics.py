@@ -0,0 +1,308 @@
+"""
+Metric Topics
+Per-metric WebSocket subscriptions with a single fan-out broadcaster
+"""
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from app.api.formats import dumps
+from app.core.system_monitor import SystemMonitor
+
+
+# Topics that can be subscribed to, mapped to the function collecting them.
+# CPU is measured without blocking, over the time since the previous tick.
+TOPICS: Dict[str, Callable[[SystemMonitor], Any]] = {
+    "cpu": lambda monitor: monitor.get_cpu_usage(interval=None),
+    "per_core": lambda monitor: monitor.get_per_core_cpu(interval=None),
+    "memory": lambda monitor: monitor.get_memory_usage(),
+    "disk": lambda monitor: monitor.get_disk_usage(),
+    "network": lambda monitor: monitor.get_network_stats(),
+    "processes": lambda monitor: monitor.get_top_processes(),
+}
+
+# Prefix of the per-interface topics, e.g. `network:eth0`
+NIC_TOPIC_PREFIX = "network:"
+
+
+class RateLimiter:
+    """
+    Token bucket limiting how many control messages a client may send.
+    """
+
+    def __init__(self, rate: float, burst: int, clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the limiter with a full bucket.
+
+        Args:
+            rate: Tokens added per second
+            burst: Maximum number of tokens
+            clock: Monotonic clock
+        """
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._tokens = float(burst)
+        self._updated = clock()
+
+    def allow(self) -> bool:
+        """
+        Take a token if one is available.
+
+        Returns:
+            True if the message is within the limit
+        """
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+
+class TopicSubscriber:
+    """
+    One connected client: its topics, their rates and its outgoing queue.
+    """
+    __slots__ = ("queue", "intervals", "next_due", "dropped")
+
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.intervals: Dict[str, float] = {}
+        self.next_due: Dict[str, float] = {}
+        self.dropped = False
+
+
+class TopicBroadcaster:
+    """
+    Collects subscribed metric topics and fans each update out to its subscribers.
+
+    A single producer task ticks every `tick` seconds. On each tick it
+    collects only the topics that at least one subscriber is due for, and
+    serializes each topic's update once; every due subscriber receives the
+    same encoded message. Subscribers choose their own interval per topic
+    (never shorter than the tick), so clients at different rates share the
+    work of the fastest one.
+
+    Each subscriber has a bounded queue drained by its connection. A client
+    that lets its queue fill up is dropped rather than slowing the others.
+    """
+
+    def __init__(
+        self,
+        monitor: Optional[SystemMonitor] = None,
+        tick: float = 1,
+        queue_size: int = 64,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize the broadcaster.
+
+        Args:
+            monitor: SystemMonitor used to collect topics
+            tick: Seconds between producer ticks, the shortest allowed interval
+            queue_size: Messages buffered per subscriber before it is dropped
+            clock: Monotonic clock used for subscriber rates
+        """
+        self.monitor = monitor or SystemMonitor()
+        self.tick = tick
+        self.queue_size = queue_size
+        self.serializations = 0
+        self.messages = 0
+        self.dropped_subscribers = 0
+        self._clock = clock
+        self._subscribers: Set[TopicSubscriber] = set()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def subscriber_count(self) -> int:
+        """
+        Number of connected subscribers.
+        """
+        return len(self._subscribers)
+
+    def available_topics(self) -> List[str]:
+        """
+        Returns every topic name that can currently be subscribed to.
+        """
+        nics = self.monitor.get_network_stats_per_nic()
+        return list(TOPICS) + [NIC_TOPIC_PREFIX + nic for nic in nics]
+
+    def connect(self) -> TopicSubscriber:
+        """
+        Register a new client, starting the producer if it is not running.
+        """
+        subscriber = TopicSubscriber(self.queue_size)
+        self._subscribers.add(subscriber)
+        if self._task is None or self._task.done():
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="topic-broadcaster")
+            self._task = asyncio.create_task(self._produce())
+        return subscriber
+
+    def disconnect(self, subscriber: TopicSubscriber) -> None:
+        """
+        Remove a client, stopping the producer after the last one leaves.
+        """
+        self._subscribers.discard(subscriber)
+        if not self._subscribers:
+            self._stop_producer()
+
+    def subscribe(self, subscriber: TopicSubscriber, topics: Iterable[str], interval: float) -> List[str]:
+        """
+        Subscribe a client to topics at the given interval.
+
+        Args:
+            subscriber: Client to update
+            topics: Topic names
+            interval: Seconds between updates; raised to the tick if shorter
+
+        Returns:
+            The subscribed topic names
+
+        Raises:
+            ValueError: If a topic is unknown
+        """
+        topics = list(topics)
+        unknown = [topic for topic in topics if not self._is_known(topic)]
+        if unknown:
+            raise ValueError(
+                f"Unknown topics: {', '.join(unknown)}. Available: {', '.join(self.available_topics())}"
+            )
+
+        interval = max(self.tick, float(interval))
+        now = self._clock()
+        for topic in topics:
+            subscriber.intervals[topic] = interval
+            subscriber.next_due[topic] = now
+        return topics
+
+    def unsubscribe(self, subscriber: TopicSubscriber, topics: Iterable[str]) -> None:
+        """
+        Unsubscribe a client from topics.
+        """
+        for topic in topics:
+            subscriber.intervals.pop(topic, None)
+            subscriber.next_due.pop(topic, None)
+
+    def _is_known(self, topic: str) -> bool:
+        """
+        Whether a topic name can be collected.
+        """
+        if topic in TOPICS:
+            return True
+        if topic.startswith(NIC_TOPIC_PREFIX):
+            return topic[len(NIC_TOPIC_PREFIX):] in self.monitor.get_network_stats_per_nic()
+        return False
+
+    def collect(self, topics: Iterable[str]) -> Dict[str, Any]:
+        """
+        Collect the current value of each topic. Blocks on psutil.
+
+        Args:
+            topics: Topic names
+
+        Returns:
+            Dictionary mapping topic name to its value
+        """
+        values = {}
+        nics = None
+        for topic in topics:
+            if topic in TOPICS:
+                values[topic] = TOPICS[topic](self.monitor)
+            else:
+                # One psutil call serves every interface topic
+                if nics is None:
+                    nics = self.monitor.get_network_stats_per_nic()
+                values[topic] = nics.get(topic[len(NIC_TOPIC_PREFIX):])
+        return values
+
+    def due_topics(self, now: float) -> Dict[str, List[TopicSubscriber]]:
+        """
+        Group the subscribers that are due for an update by topic.
+        """
+        due: Dict[str, List[TopicSubscriber]] = {}
+        for subscriber in self._subscribers:
+            for topic, next_due in subscriber.next_due.items():
+                if next_due <= now:
+                    due.setdefault(topic, []).append(subscriber)
+        return due
+
+    def fan_out(self, now: float, due: Dict[str, List[TopicSubscriber]], values: Dict[str, Any]) -> None:
+        """
+        Serialize each topic update once and queue it for its due subscribers.
+        """
+        timestamp = time.time()
+        for topic, subscribers in due.items():
+            message = dumps({"topic": topic, "time": timestamp, "data": values.get(topic)}).decode("utf-8")
+            self.serializations += 1
+            for subscriber in subscribers:
+                if subscriber.dropped:
+                    continue
+                try:
+                    subscriber.queue.put_nowait(message)
+                except asyncio.QueueFull:
+                    self._drop(subscriber)
+                    continue
+                self.messages += 1
+                # Keep the subscriber's cadence, skipping updates it missed
+                interval = subscriber.intervals[topic]
+                next_due = subscriber.next_due[topic] + interval
+                subscriber.next_due[topic] = next_due if next_due > now else now + interval
+
+    def _drop(self, subscriber: TopicSubscriber) -> None:
+        """
+        Disconnect a subscriber that cannot keep up.
+        """
+        self._subscribers.discard(subscriber)
+        self.dropped_subscribers += 1
+        self._end(subscriber)
+
+    @staticmethod
+    def _end(subscriber: TopicSubscriber) -> None:
+        """
+        Replace a subscriber's backlog with the end-of-stream marker.
+        """
+        subscriber.dropped = True
+        while not subscriber.queue.empty():
+            subscriber.queue.get_nowait()
+        subscriber.queue.put_nowait(None)
+
+    async def _produce(self) -> None:
+        """
+        Collect and fan out due topics every tick until cancelled.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            try:
+                now = self._clock()
+                due = self.due_topics(now)
+                if due:
+                    values = await loop.run_in_executor(self._executor, self.collect, list(due))
+                    self.fan_out(now, due, values)
+            except Exception as e:
+                print(f"Error broadcasting metric topics: {e}")
+            await asyncio.sleep(max(0.0, self.tick - (loop.time() - started)))
+
+    def _stop_producer(self) -> None:
+        """
+        Cancel the producer task and release its thread.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def stop(self) -> None:
+        """
+        Disconnect every subscriber and stop the producer.
+        """
+        for subscriber in list(self._subscribers):
+            self._end(subscriber)
+        self._subscribers.clear()
+        self._stop_producer()
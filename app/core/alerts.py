@@ -0,0 +1,156 @@
+"""
+Alert Engine
+Stateful evaluation of alert rules against incoming samples
+"""
+import datetime
+from dataclasses import dataclass
+from typing import Dict, List, Any, Optional
+
+
+# Rule states
+INACTIVE = "inactive"
+PENDING = "pending"
+FIRING = "firing"
+RESOLVED = "resolved"
+
+
+@dataclass
+class AlertRule:
+    """
+    A threshold rule evaluated against one metric of every sample.
+
+    The rule becomes pending once the value rises above `threshold` and fires
+    when it has stayed above `clear_threshold` for `for_seconds`. A firing
+    rule resolves only when the value drops to `clear_threshold` or below, so
+    a value hovering around the threshold does not flap.
+    """
+    name: str
+    metric: str
+    threshold: float
+    alert_type: str
+    message: str
+    clear_threshold: Optional[float] = None
+    for_seconds: float = 0
+
+    def __post_init__(self):
+        if self.clear_threshold is None:
+            self.clear_threshold = self.threshold
+        if self.clear_threshold > self.threshold:
+            raise ValueError("clear_threshold must not be above threshold")
+
+
+class _RuleState:
+    """
+    Mutable evaluation state of a single rule.
+    """
+    __slots__ = ("state", "started_at", "peak")
+
+    def __init__(self):
+        self.state = INACTIVE
+        self.started_at = None
+        self.peak = None
+
+
+class AlertEngine:
+    """
+    Evaluates alert rules against samples and reports state transitions.
+
+    Only transitions are returned: a `firing` event when a rule starts firing
+    and a `resolved` event when it stops, each carrying the start time, the
+    end time (for resolved events) and the peak value seen while active.
+    """
+
+    def __init__(self, rules: List[AlertRule]):
+        """
+        Initialize the engine.
+
+        Args:
+            rules: Alert rules to evaluate
+        """
+        self.rules = list(rules)
+        self._states: Dict[str, _RuleState] = {rule.name: _RuleState() for rule in self.rules}
+
+    def state(self, rule_name: str) -> str:
+        """
+        Returns the current state of a rule (inactive, pending or firing).
+        """
+        return self._states[rule_name].state
+
+    def restore(self, open_alerts: List[Dict[str, Any]]) -> None:
+        """
+        Mark rules as firing for alerts left open by a previous run.
+
+        Args:
+            open_alerts: Alerts with rule, timestamp and peak_value keys
+        """
+        for alert in open_alerts:
+            state = self._states.get(alert["rule"])
+            if state is None:
+                continue
+            state.state = FIRING
+            state.started_at = datetime.datetime.fromisoformat(alert["timestamp"]).timestamp()
+            state.peak = alert["peak_value"]
+
+    def evaluate(self, timestamp: float, values: Dict[str, float]) -> List[Dict[str, Any]]:
+        """
+        Evaluate all rules against one sample.
+
+        Args:
+            timestamp: Sample time as a Unix timestamp
+            values: Metric values of the sample, keyed by metric name
+
+        Returns:
+            List of transition events, each a dictionary with event, rule,
+            alert_type, message, value, started_at, ended_at and peak keys
+        """
+        transitions = []
+
+        for rule in self.rules:
+            value = values.get(rule.metric)
+            if value is None:
+                continue
+
+            state = self._states[rule.name]
+
+            if state.state == INACTIVE:
+                if value > rule.threshold:
+                    state.state = PENDING
+                    state.started_at = timestamp
+                    state.peak = value
+            elif value <= rule.clear_threshold:
+                if state.state == FIRING:
+                    transitions.append(self._event(RESOLVED, rule, state, value, ended_at=timestamp))
+                state.state = INACTIVE
+                state.started_at = None
+                state.peak = None
+                continue
+            else:
+                state.peak = max(state.peak, value)
+
+            if state.state == PENDING and timestamp - state.started_at >= rule.for_seconds:
+                state.state = FIRING
+                transitions.append(self._event(FIRING, rule, state, value))
+
+        return transitions
+
+    @staticmethod
+    def _event(event: str, rule: AlertRule, state: _RuleState, value: float,
+               ended_at: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Build a transition event with ISO format times.
+        """
+        def iso(timestamp: Optional[float]) -> Optional[str]:
+            if timestamp is None:
+                return None
+            return datetime.datetime.fromtimestamp(timestamp).isoformat()
+
+        return {
+            "event": event,
+            "rule": rule.name,
+            "alert_type": rule.alert_type,
+            "message": rule.message,
+            "value": value,
+            "started_at": iso(state.started_at),
+            "ended_at": iso(ended_at),
+            "peak": state.peak,
+        }
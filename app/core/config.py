@@ -13,11 +13,44 @@ APP_VERSION = "0.1.0"
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 DB_PATH = os.path.join(BASE_DIR, "system_metrics.db")
 TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
+SPOOL_PATH = os.path.join(BASE_DIR, "metrics_spool.jsonl")
 
 # Metrics Recording Settings
-METRICS_INTERVAL_SECONDS = 60  # Record every minute
+METRICS_INTERVAL_SECONDS = 60  # Record every minute (sub-second values are allowed)
 CPU_ALERT_THRESHOLD = 80  # CPU usage percentage threshold for alerts
 MEMORY_ALERT_THRESHOLD = 80  # Memory usage percentage threshold for alerts
+PRESSURE_ALERT_THRESHOLD = 20  # Percentage of time tasks stalled on CPU, memory or I/O that triggers an alert
+ALERT_FOR_SECONDS = 120  # How long a threshold must be exceeded before an alert fires
+ALERT_HYSTERESIS = 5  # Percentage points below the threshold at which an alert resolves
+METRICS_BATCH_SIZE = 1  # Samples buffered before each database write
+RECORDER_MAX_WORKERS = 2  # Threads available for blocking collection
+SPOOL_MAX_BYTES = 16 * 1024 * 1024  # Spool size limit while the database rejects writes
+ADAPTIVE_SAMPLING = False  # Sample faster near alert thresholds and slower while idle
+ADAPTIVE_FAST_INTERVAL_SECONDS = 2  # Interval while a metric is near its threshold or changing sharply
+ADAPTIVE_NEAR_THRESHOLD = 10  # Percentage points below a threshold that trigger fast sampling
+ADAPTIVE_CHANGE_THRESHOLD = 15  # Percentage points of change between samples that trigger fast sampling
+LEADER_LEASE_SECONDS = 15  # A recorder leader not renewing its lease this long is replaced
+LEADER_HEARTBEAT_SECONDS = 5  # How often workers renew or contend for the recorder lease
+LIVE_SNAPSHOT_INTERVAL_SECONDS = 2  # How often the leader publishes live metrics to shared memory
+LIVE_SNAPSHOT_MAX_AGE_SECONDS = 10  # Older snapshots are ignored and metrics are collected directly
+LIVE_STREAM_INTERVAL_SECONDS = 2  # How often /api/stream pushes updates
+LIVE_STREAM_QUEUE_SIZE = 32  # Events buffered per stream client before it is dropped
+WS_TOPIC_TICK_SECONDS = 1  # Shortest interval of WebSocket metric topics
+WS_QUEUE_SIZE = 64  # Messages buffered per WebSocket client before it is dropped
+WS_CONTROL_RATE = 5  # Subscribe/unsubscribe messages allowed per second per client
+WS_CONTROL_BURST = 20  # Burst of subscribe/unsubscribe messages allowed per client
+COMPRESSION_ENABLED = False  # Compress large responses with brotli (if installed) or gzip
+COMPRESSION_MINIMUM_SIZE = 1024  # Smallest response body in bytes that is compressed
+COMPRESSION_GZIP_LEVEL = 6  # gzip level; higher compresses more at a higher CPU cost
+COMPRESSION_BROTLI_QUALITY = 4  # brotli quality; higher compresses more at a higher CPU cost
+SELF_STATS_ENABLED = True  # Record latency histograms of routes, collectors, database calls and recorder ticks
+LOOP_LAG_INTERVAL_SECONDS = 0.5  # How often the event loop's scheduling delay is measured
+LOOP_DEBUG = False  # Report calls blocking the event loop longer than SLOW_CALLBACK_SECONDS, with their route
+SLOW_CALLBACK_SECONDS = 0.1  # How long a call may block the event loop in debug mode before it is reported
+PROCESS_TABLE_TTL_SECONDS = 1  # How long a collected process table is reused for rankings and groups
+FLIGHT_RECORDER_WINDOW_SECONDS = 300  # Span of process samples stored with every alert that fires
+FLIGHT_RECORDER_INTERVAL_SECONDS = 5  # How often the busiest processes are sampled into the flight recorder
+FLIGHT_RECORDER_PROCESSES = 50  # Processes kept per flight recorder sample, by CPU usage
 
 # Server Settings
 HOST = "0.0.0.0"
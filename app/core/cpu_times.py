@@ -0,0 +1,107 @@
+"""
+CPU Time Breakdown
+Splits CPU usage into user, system, iowait, steal, irq and the other kernel
+accounting categories, from the difference between two cpu_times readings
+"""
+import time
+import threading
+from typing import Any, Dict, List, Optional
+
+from app.core.lazy import lazy_import
+
+psutil = lazy_import("psutil")
+
+# Categories reported, where the platform provides them
+CPU_TIME_FIELDS = ("user", "nice", "system", "idle", "iowait", "irq", "softirq", "steal")
+
+# Already counted in user and nice time
+_GUEST_FIELDS = ("guest", "guest_nice")
+
+
+def breakdown(before: Dict[str, float], after: Dict[str, float]) -> Dict[str, Optional[float]]:
+    """
+    Share of each CPU time category between two readings of one CPU.
+
+    Args:
+        before: Earlier reading, as a cpu_times field to seconds mapping
+        after: Later reading of the same CPU
+
+    Returns:
+        Percentage of each of CPU_TIME_FIELDS (None where the platform does
+        not report it) and `busy`, the time spent neither idle nor waiting
+        for I/O, as psutil.cpu_percent computes it
+    """
+    deltas = {field: max(after[field] - before[field], 0.0) for field in after}
+    total = sum(deltas.values()) - sum(deltas.get(field, 0.0) for field in _GUEST_FIELDS)
+    if total <= 0:
+        result = {field: (0.0 if field in deltas else None) for field in CPU_TIME_FIELDS}
+        result["busy"] = 0.0
+        return result
+
+    result = {
+        field: round(deltas[field] / total * 100, 1) if field in deltas else None
+        for field in CPU_TIME_FIELDS
+    }
+    busy = total - deltas["idle"] - deltas.get("iowait", 0.0)
+    result["busy"] = round(min(max(busy / total * 100, 0.0), 100.0), 1)
+    return result
+
+
+class CpuTimesSampler:
+    """
+    Takes one per-CPU cpu_times reading per call and reports the breakdown
+    since the previous call, for the whole system and for each core.
+
+    The system totals are the per-core readings summed, so a single read
+    of the kernel's counters covers both. Only the first call, which has no
+    earlier reading to compare with, waits `interval` seconds for a second
+    one; every later call returns immediately.
+    """
+
+    def __init__(self, interval: float = 0.5):
+        """
+        Initialize the sampler.
+
+        Args:
+            interval: Seconds the first call measures over
+        """
+        self.interval = interval
+        self._previous: Optional[List[Dict[str, float]]] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _read() -> List[Dict[str, float]]:
+        """
+        Read the time counters of every CPU.
+        """
+        return [times._asdict() for times in psutil.cpu_times(percpu=True)]
+
+    def sample(self) -> Dict[str, Any]:
+        """
+        Break down CPU usage since the previous call.
+
+        Returns:
+            Dictionary with `total`, the breakdown of the whole system, and
+            `per_core`, a breakdown for each core, as returned by breakdown
+        """
+        with self._lock:
+            current = self._read()
+            previous = self._previous
+            # Without a comparable earlier reading, measure over the interval;
+            # the core count only changes when CPUs go on or offline
+            if previous is None or len(previous) != len(current):
+                time.sleep(self.interval)
+                previous, current = current, self._read()
+            self._previous = current
+
+        return {
+            "total": breakdown(_sum(previous), _sum(current)),
+            "per_core": [breakdown(before, after) for before, after in zip(previous, current)],
+        }
+
+
+def _sum(readings: List[Dict[str, float]]) -> Dict[str, float]:
+    """
+    Add up the readings of several CPUs field by field.
+    """
+    return {field: sum(reading[field] for reading in readings) for field in readings[0]}
@@ -0,0 +1,137 @@
+"""
+Process Flight Recorder
+Keeps the last few minutes of per-process samples in a ring buffer, so the
+processes behind an alert can be inspected after they have exited
+"""
+import sys
+import time
+import heapq
+import datetime
+import threading
+from array import array
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+
+def _iso(timestamp: float) -> str:
+    """Format a Unix timestamp in ISO format"""
+    return datetime.datetime.fromtimestamp(timestamp).isoformat()
+
+
+class _Frame:
+    """
+    One sample of the busiest processes, stored column by column in packed
+    arrays. Names are interned, so a name recurring across processes and
+    frames is stored once.
+    """
+    __slots__ = ("timestamp", "pids", "names", "cpu", "rss")
+
+    def __init__(self, timestamp: float, rows: List[Dict[str, Any]]):
+        self.timestamp = timestamp
+        self.pids = array("l", [row["pid"] for row in rows])
+        self.names = tuple(sys.intern(row["name"] or "") for row in rows)
+        self.cpu = array("f", [row["cpu_percent"] for row in rows])
+        self.rss = array("q", [row["rss"] for row in rows])
+
+
+class ProcessFlightRecorder:
+    """
+    Ring buffer of compact process samples covering the last `window_seconds`.
+
+    Each sample keeps pid, name, CPU percentage and RSS of the
+    `max_processes` processes using the most CPU. The buffer is never
+    written anywhere by itself; `freeze` copies the current window, e.g.
+    when an alert fires, into a form that can be stored.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = 300,
+        interval: float = 5,
+        max_processes: int = 50,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Initialize an empty recorder.
+
+        Args:
+            window_seconds: Time span kept in the buffer
+            interval: Seconds between samples
+            max_processes: Processes kept per sample, by CPU usage
+            clock: Wall clock time source
+        """
+        self.window_seconds = window_seconds
+        self.interval = interval
+        self.max_processes = max_processes
+        self.clock = clock
+        self._frames: deque = deque(maxlen=max(1, round(window_seconds / interval)))
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def record(self, rows: List[Dict[str, Any]]) -> None:
+        """
+        Add a sample, dropping the oldest once the window is full.
+
+        Args:
+            rows: Rows as returned by ProcessTable.rows
+        """
+        busiest = heapq.nlargest(self.max_processes, rows, key=lambda row: row["cpu_percent"])
+        frame = _Frame(self.clock(), busiest)
+        with self._lock:
+            self._frames.append(frame)
+
+    def freeze(self) -> Dict[str, Any]:
+        """
+        Copy the current window.
+
+        Returns:
+            Dictionary with captured_at, interval_seconds and frames, each
+            frame holding a timestamp and pid, name, cpu_percent and rss
+            lists ordered by CPU usage
+        """
+        with self._lock:
+            frames = list(self._frames)
+        return {
+            "captured_at": _iso(self.clock()),
+            "interval_seconds": self.interval,
+            "frames": [
+                {
+                    "timestamp": _iso(frame.timestamp),
+                    "pid": frame.pids.tolist(),
+                    "name": list(frame.names),
+                    "cpu_percent": [round(cpu, 1) for cpu in frame.cpu],
+                    "rss": frame.rss.tolist(),
+                }
+                for frame in frames
+            ],
+        }
+
+
+def expand_window(window: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Turn a frozen window's columns into one dictionary per process.
+
+    Args:
+        window: Dictionary as returned by ProcessFlightRecorder.freeze
+
+    Returns:
+        The window with every frame's processes as a list of dictionaries
+        with pid, name, cpu_percent and rss keys, or None
+    """
+    if window is None:
+        return None
+    return {
+        **window,
+        "frames": [
+            {
+                "timestamp": frame["timestamp"],
+                "processes": [
+                    {"pid": pid, "name": name, "cpu_percent": cpu, "rss": rss}
+                    for pid, name, cpu, rss in zip(frame["pid"], frame["name"], frame["cpu_percent"], frame["rss"])
+                ],
+            }
+            for frame in window["frames"]
+        ],
+    }
@@ -0,0 +1,137 @@
+"""
+Per-Core Heatmap
+Buckets packed per-core CPU samples into a core by time matrix
+"""
+import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.core.config import METRICS_INTERVAL_SECONDS
+from app.core.lazy import lazy_import
+from app.database.packing import CORE_SCALE, unpack_cores
+
+# numpy vectorizes the bucketing when installed; it is loaded on first use
+try:
+    numpy = lazy_import("numpy")
+except ModuleNotFoundError:  # pragma: no cover - optional dependency
+    numpy = None
+
+# How the samples falling into one bucket are combined
+HEATMAP_STATS = ("mean", "max")
+
+# Widest matrix served; 128 cores at this width stay around 200 KB of JSON
+MAX_HEATMAP_BUCKETS = 500
+
+# Longest time span served, in hours
+MAX_HEATMAP_HOURS = 24 * 30
+
+
+def core_heatmap(
+    samples: Sequence[Tuple[str, bytes, Optional[float]]],
+    start: datetime.datetime,
+    bucket_seconds: float,
+    buckets: int,
+    stat: str = "mean",
+    default_interval: float = METRICS_INTERVAL_SECONDS,
+) -> Dict[str, Any]:
+    """
+    Combine per-core samples into fixed-width time buckets.
+
+    The mean weights every sample by the interval it covers, so the fast
+    samples adaptive sampling takes near alert thresholds do not outweigh
+    the slow ones taken while usage is flat.
+
+    Args:
+        samples: (ISO timestamp, packed percentages, interval) tuples in
+            time order, as returned by DatabaseManager.get_per_core_samples
+        start: Start of the first bucket
+        bucket_seconds: Width of each bucket
+        buckets: Number of buckets
+        stat: One of HEATMAP_STATS
+        default_interval: Weight of samples without a recorded interval
+
+    Returns:
+        Dictionary with start, end, bucket_seconds, stat, the number of
+        cores and `values`, one list per core holding the whole-number
+        percentage of every bucket, or None for buckets without samples.
+        Samples with a different core count than the latest one, e.g. from
+        before a CPU was brought online, are left out.
+
+    Raises:
+        ValueError: If the stat is unknown
+    """
+    if stat not in HEATMAP_STATS:
+        raise ValueError(f"Unknown stat: {stat}; choose from {', '.join(HEATMAP_STATS)}")
+
+    width = len(samples[-1][1]) if samples else 0
+    samples = [sample for sample in samples if len(sample[1]) == width]
+    cores = width // 2
+    heatmap = {
+        "start": start.isoformat(),
+        "end": (start + datetime.timedelta(seconds=bucket_seconds * buckets)).isoformat(),
+        "bucket_seconds": bucket_seconds,
+        "stat": stat,
+        "cores": cores,
+    }
+    if not cores:
+        heatmap["values"] = []
+    elif numpy is not None:
+        heatmap["values"] = _bucket_numpy(samples, start, bucket_seconds, buckets, cores, stat, default_interval)
+    else:
+        heatmap["values"] = _bucket_python(samples, start, bucket_seconds, buckets, cores, stat, default_interval)
+    return heatmap
+
+
+def _bucket_numpy(samples, start, bucket_seconds, buckets, cores, stat, default_interval) -> List[List[Optional[int]]]:
+    """
+    Bucket the samples with numpy. The samples are in time order, so each
+    bucket is a contiguous run of rows reduced in a single call.
+    """
+    times = numpy.array([timestamp for timestamp, _, _ in samples], dtype="datetime64[us]")
+    offsets = (times - numpy.datetime64(start, "us")).astype(numpy.int64)
+    index = offsets // int(round(bucket_seconds * 1e6))
+    keep = (index >= 0) & (index < buckets)
+
+    values = numpy.frombuffer(b"".join(blob for _, blob, _ in samples), dtype="<u2").reshape(-1, cores)
+    values = values[keep].astype(numpy.int64)
+    weights = numpy.array(
+        [interval or default_interval for _, _, interval in samples], dtype=numpy.float64
+    )[keep]
+    index = index[keep]
+
+    matrix = numpy.full((buckets, cores), -1, dtype=numpy.int64)
+    if len(index):
+        occupied, first = numpy.unique(index, return_index=True)
+        if stat == "max":
+            combined = numpy.maximum.reduceat(values, first, axis=0)
+        else:
+            weighted = numpy.add.reduceat(values * weights[:, None], first, axis=0)
+            combined = weighted / numpy.add.reduceat(weights, first)[:, None]
+        matrix[occupied] = numpy.rint(combined / CORE_SCALE)
+    return [[value if value >= 0 else None for value in row] for row in matrix.T.tolist()]
+
+
+def _bucket_python(samples, start, bucket_seconds, buckets, cores, stat, default_interval) -> List[List[Optional[int]]]:
+    """
+    Bucket the samples in plain Python, when numpy is not installed.
+    """
+    combined: Dict[int, List[float]] = {}
+    weights: Dict[int, float] = {}
+    for timestamp, blob, interval in samples:
+        offset = (datetime.datetime.fromisoformat(timestamp) - start).total_seconds()
+        index = int(offset // bucket_seconds)
+        if not 0 <= index < buckets:
+            continue
+        percents = unpack_cores(blob)
+        if stat == "max":
+            weights[index] = 1.0
+            combined[index] = [max(a, b) for a, b in zip(combined.get(index, percents), percents)]
+        else:
+            weight = interval or default_interval
+            weights[index] = weights.get(index, 0.0) + weight
+            combined[index] = [a + b * weight for a, b in zip(combined.get(index, [0.0] * cores), percents)]
+
+    matrix = [[None] * buckets for _ in range(cores)]
+    for index, percents in combined.items():
+        for core, percent in enumerate(percents):
+            matrix[core][index] = int(round(percent / weights[index]))
+    return matrix
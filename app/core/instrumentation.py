@@ -0,0 +1,225 @@
+"""
+Self-Instrumentation
+Fixed-bucket latency histograms for the monitor's own routes, collectors,
+database operations and recorder ticks
+"""
+import time
+import bisect
+import contextlib
+import functools
+import threading
+from typing import Any, Callable, Dict, Optional, Sequence
+
+# Upper bounds in seconds, from half a millisecond to ten seconds
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+class Histogram:
+    """
+    Counts observations into fixed buckets.
+
+    Recording is a binary search and three additions under a lock, so it
+    can stay enabled in production. Quantiles are estimated from the
+    buckets by linear interpolation, like Prometheus' histogram_quantile.
+    """
+    __slots__ = ("buckets", "counts", "sum", "count", "max", "_lock")
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        Args:
+            buckets: Sorted upper bounds; larger values fall in an overflow bucket
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """
+        Record one observation.
+        """
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+            if value > self.max:
+                self.max = value
+
+    def reset(self) -> None:
+        """
+        Forget all observations.
+        """
+        with self._lock:
+            self.counts = [0] * (len(self.buckets) + 1)
+            self.sum = 0.0
+            self.count = 0
+            self.max = 0.0
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate a quantile from the buckets.
+
+        Args:
+            q: Quantile between 0 and 1
+
+        Returns:
+            Estimated value in seconds, or None without observations
+        """
+        with self._lock:
+            counts = list(self.counts)
+            total = self.count
+            largest = self.max
+        if not total:
+            return None
+
+        rank = q * total
+        cumulative = 0
+        for index, count in enumerate(counts):
+            if cumulative + count >= rank and count:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                # The overflow bucket has no upper bound; use the largest value seen
+                upper = self.buckets[index] if index < len(self.buckets) else largest
+                return min(largest, lower + (upper - lower) * (rank - cumulative) / count)
+            cumulative += count
+        return largest
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Returns the histogram as a JSON-serializable dictionary.
+
+        Returns:
+            Dictionary with count, sum, max, estimated p50/p90/p99 and the
+            cumulative count per bucket upper bound
+        """
+        with self._lock:
+            counts = list(self.counts)
+            total, total_sum, largest = self.count, self.sum, self.max
+
+        buckets = {}
+        cumulative = 0
+        for bound, count in zip(self.buckets, counts):
+            cumulative += count
+            buckets[repr(bound)] = cumulative
+        buckets["+Inf"] = total
+
+        return {
+            "count": total,
+            "sum": total_sum,
+            "max": largest,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+            "buckets": buckets,
+        }
+
+
+class _Timer:
+    """
+    Context manager observing the time spent in its block.
+    """
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __enter__(self) -> "_Timer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.histogram.observe(time.perf_counter() - self.started)
+
+
+class SelfStats:
+    """
+    Histograms of the monitor's own latencies, grouped by component
+    (route, collector, database, recorder) and operation name.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        Args:
+            buckets: Bucket upper bounds used by every histogram
+        """
+        self.buckets = tuple(buckets)
+        self.enabled = True
+        self._histograms: Dict[str, Dict[str, Histogram]] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, group: str, name: str) -> Histogram:
+        """
+        Returns the histogram of an operation, creating it on first use.
+        """
+        histogram = self._histograms.get(group, {}).get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(group, {}).setdefault(name, Histogram(self.buckets))
+        return histogram
+
+    def observe(self, group: str, name: str, seconds: float) -> None:
+        """
+        Record the duration of one operation.
+        """
+        if self.enabled:
+            self.histogram(group, name).observe(seconds)
+
+    def timer(self, group: str, name: str):
+        """
+        Returns a context manager timing its block as one operation.
+        """
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return _Timer(self.histogram(group, name))
+
+    def reset(self) -> None:
+        """
+        Forget all observations, keeping the histograms.
+        """
+        for histograms in list(self._histograms.values()):
+            for histogram in list(histograms.values()):
+                histogram.reset()
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """
+        Returns every histogram that has observations, by group and name.
+        """
+        result: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for group, histograms in sorted(list(self._histograms.items())):
+            for name, histogram in sorted(list(histograms.items())):
+                if histogram.count:
+                    result.setdefault(group, {})[name] = histogram.snapshot()
+        return result
+
+
+# Process-wide statistics shared by every instrumented component
+STATS = SelfStats()
+
+
+def timed(group: str, name: Optional[str] = None, stats: SelfStats = STATS) -> Callable:
+    """
+    Decorator recording every call of a function in a histogram.
+
+    Args:
+        group: Component the function belongs to
+        name: Operation name (default the function name)
+        stats: SelfStats receiving the observations
+    """
+    def decorator(func: Callable) -> Callable:
+        histogram = stats.histogram(group, name or func.__name__)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not stats.enabled:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started)
+        return wrapper
+    return decorator
@@ -0,0 +1,40 @@
+"""
+Lazy Imports
+Defers loading heavy modules until they are first used, so importing the
+application (and every reload during development) stays fast
+"""
+import sys
+import importlib.util
+from types import ModuleType
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    Returns a module that is only executed on its first attribute access.
+
+    The module is registered in sys.modules right away, so later plain
+    imports of the same name share it instead of loading it a second time.
+    Modules that are already loaded are returned as they are.
+
+    Args:
+        name: Absolute module name, e.g. "psutil"
+
+    Returns:
+        The (possibly not yet executed) module
+
+    Raises:
+        ModuleNotFoundError: If the module is not installed
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
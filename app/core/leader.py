@@ -0,0 +1,163 @@
+"""
+Leader Election
+Elects a single process per database to run the metrics recorder
+"""
+import os
+import time
+import uuid
+import socket
+import sqlite3
+import asyncio
+from typing import Awaitable, Callable, Optional
+
+from app.database.db_manager import DatabaseManager
+
+
+class LeaderElection:
+    """
+    Lease-based leader election between server processes sharing a database.
+
+    Every worker started by `uvicorn --workers N` runs one election. The
+    worker holding the lease renews it every `heartbeat` seconds; the others
+    retry at the same rate and take over once the lease has not been renewed
+    for `ttl` seconds, e.g. after the leader crashed. A leader that shuts down
+    cleanly releases the lease so a follower takes over on its next attempt.
+    """
+
+    def __init__(
+        self,
+        db_manager: DatabaseManager,
+        name: str = "metrics_recorder",
+        ttl: float = 15,
+        heartbeat: float = 5,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Initialize the election.
+
+        Args:
+            db_manager: DatabaseManager holding the lease table
+            name: Name of the lease being contested
+            ttl: Seconds a lease stays valid without renewal
+            heartbeat: Seconds between acquire or renew attempts
+            clock: Wall clock shared by all processes
+        """
+        if heartbeat >= ttl:
+            raise ValueError("heartbeat must be shorter than ttl")
+
+        self.db_manager = db_manager
+        self.name = name
+        self.ttl = ttl
+        self.heartbeat = heartbeat
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._clock = clock
+        self._expires_at = 0.0
+        self._is_leader = False
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_leader(self) -> bool:
+        """
+        Whether this process currently holds an unexpired lease.
+        """
+        return self._is_leader and self._clock() < self._expires_at
+
+    def try_acquire(self) -> bool:
+        """
+        Acquire or renew the lease once.
+
+        While the database is locked or unavailable, no other process can
+        take the lease either, so a leader keeps its role until a renewal
+        shows another holder; the recorder then goes on spooling its samples.
+        On any other error a leader keeps its role until its own lease runs
+        out rather than stopping on the first failed renewal.
+
+        Returns:
+            Whether this process is the leader afterwards
+        """
+        now = self._clock()
+        try:
+            acquired = self.db_manager.acquire_lease(self.name, self.holder, self.ttl, now)
+        except sqlite3.OperationalError as e:
+            print(f"Error renewing leader lease: {e}")
+            if self._is_leader:
+                self._expires_at = now + self.ttl
+            return self._is_leader
+        except Exception as e:
+            print(f"Error renewing leader lease: {e}")
+            self._is_leader = self.is_leader
+            return self._is_leader
+
+        self._is_leader = acquired
+        if acquired:
+            self._expires_at = now + self.ttl
+        return acquired
+
+    def release(self) -> None:
+        """
+        Give up the lease if this process holds it.
+        """
+        if not self._is_leader:
+            return
+        self._is_leader = False
+        try:
+            self.db_manager.release_lease(self.name, self.holder)
+        except Exception as e:
+            print(f"Error releasing leader lease: {e}")
+
+    async def _campaign(
+        self,
+        on_elected: Callable[[], Awaitable[None]],
+        on_demoted: Callable[[], Awaitable[None]],
+    ) -> None:
+        """
+        Contend for the lease every heartbeat until cancelled, calling the
+        callbacks whenever leadership is gained or lost.
+        """
+        loop = asyncio.get_running_loop()
+        leading = False
+
+        while True:
+            is_leader = await loop.run_in_executor(None, self.try_acquire)
+            try:
+                if is_leader and not leading:
+                    print(f"Elected metrics recorder leader ({self.holder}).")
+                    await on_elected()
+                elif leading and not is_leader:
+                    print(f"Lost metrics recorder leadership ({self.holder}).")
+                    await on_demoted()
+            except Exception as e:
+                print(f"Error changing leader role: {e}")
+            leading = is_leader
+
+            await asyncio.sleep(self.heartbeat)
+
+    def start(
+        self,
+        on_elected: Callable[[], Awaitable[None]],
+        on_demoted: Callable[[], Awaitable[None]],
+    ) -> None:
+        """
+        Start contending for the lease as a task on the running event loop.
+
+        Args:
+            on_elected: Coroutine function awaited when this process becomes leader
+            on_demoted: Coroutine function awaited when it loses leadership
+        """
+        if self._task is not None and not self._task.done():
+            return
+        self._task = asyncio.create_task(self._campaign(on_elected, on_demoted))
+
+    async def stop(self) -> None:
+        """
+        Stop contending for the lease. The lease is kept until `release` is
+        called, so the leader can finish its own shutdown first.
+        """
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
@@ -0,0 +1,337 @@
+"""
+Event Loop Monitor
+Measures how late the API process' event loop runs its callbacks and, in
+debug mode, reports calls that block the loop together with their route
+"""
+import os
+import sys
+import time
+import asyncio
+import datetime
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import BASE_DIR
+from app.core.instrumentation import STATS, SelfStats
+
+
+class LoopLagMonitor:
+    """
+    Sleeps for a fixed interval in a loop and records how much later than
+    requested it wakes up. On an idle loop the lag is close to zero; any
+    blocking call made on the loop delays the wake-up by up to its duration.
+
+    Lags are kept per window (drained once per recorder tick, so the
+    leader's are stored alongside the system metrics) and in the
+    self-instrumentation histograms, which every worker serves.
+    """
+
+    def __init__(self, interval: float = 0.5, stats: SelfStats = STATS):
+        """
+        Initialize the monitor.
+
+        Args:
+            interval: Seconds between two measurements
+            stats: SelfStats receiving every measured lag
+        """
+        self.interval = interval
+        self.stats = stats
+        self.last_lag = 0.0
+        self.slow_callbacks = 0
+        self._lock = threading.Lock()
+        self._window_max = 0.0
+        self._window_sum = 0.0
+        self._window_count = 0
+        self._window_slow = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        """
+        Whether the measuring task is active.
+        """
+        return self._task is not None and not self._task.done()
+
+    def observe(self, lag: float) -> None:
+        """
+        Record one measured lag in seconds.
+        """
+        self.last_lag = lag
+        with self._lock:
+            self._window_count += 1
+            self._window_sum += lag
+            if lag > self._window_max:
+                self._window_max = lag
+        self.stats.observe("loop", "lag", lag)
+
+    def count_slow_callback(self) -> None:
+        """
+        Count a call reported by a SlowCallbackDetector. Safe to call from
+        any thread.
+        """
+        with self._lock:
+            self.slow_callbacks += 1
+            self._window_slow += 1
+
+    def drain(self) -> Optional[Dict[str, Any]]:
+        """
+        Returns the lag statistics of the current window and starts a new one.
+
+        Returns:
+            Dictionary with the maximum and mean lag in milliseconds and the
+            number of slow callbacks, or None if nothing was measured
+        """
+        with self._lock:
+            count, total, largest, slow = (
+                self._window_count, self._window_sum, self._window_max, self._window_slow
+            )
+            self._window_count = 0
+            self._window_sum = 0.0
+            self._window_max = 0.0
+            self._window_slow = 0
+        if not count:
+            return None
+        return {
+            "max_ms": largest * 1000,
+            "mean_ms": total / count * 1000,
+            "slow_callbacks": slow,
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Returns the monitor's current state.
+
+        Returns:
+            Dictionary with running state, interval, the latest lag in
+            milliseconds and the number of slow callbacks reported so far
+        """
+        return {
+            "running": self.running,
+            "interval_seconds": self.interval,
+            "last_lag_ms": self.last_lag * 1000,
+            "slow_callbacks": self.slow_callbacks,
+        }
+
+    async def _measure(self) -> None:
+        """
+        Measure the scheduling delay every interval until cancelled.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            due = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.observe(max(0.0, loop.time() - due))
+
+    async def start(self) -> None:
+        """
+        Start measuring as a task on the running event loop.
+        """
+        if self.running:
+            return
+        self._task = asyncio.create_task(self._measure())
+
+    async def stop(self) -> None:
+        """
+        Stop measuring.
+        """
+        if not self.running:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+def route_table(app) -> Dict[Any, str]:
+    """
+    Map the code object of every endpoint function to its route, named like
+    the route histograms (e.g. `GET /api/history/cpu`).
+
+    Args:
+        app: FastAPI or Starlette application
+
+    Returns:
+        Dictionary of code object to route name
+    """
+    routes = {}
+    for route in app.routes:
+        code = getattr(getattr(route, "endpoint", None), "__code__", None)
+        if code is None:
+            continue
+        methods = getattr(route, "methods", None)
+        method = ",".join(sorted(methods - {"HEAD"} or methods)) if methods else "WS"
+        routes[code] = f"{method} {route.path}"
+    return routes
+
+
+class SlowCallbackDetector:
+    """
+    Watchdog thread reporting calls that keep the event loop busy for longer
+    than a threshold.
+
+    The thread schedules a no-op callback on the loop every quarter of the
+    threshold. If the loop does not run it within the threshold, the loop is
+    blocked: the thread captures the loop thread's stack at that moment,
+    attributes it to the endpoint found on the stack (if any) and reports
+    the block once the loop answers again. The reported duration counts from
+    the unanswered callback, so it may understate the block by up to a
+    quarter of the threshold.
+
+    Unlike asyncio's own debug mode, this does not slow down every callback
+    and it knows which request was running.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.1,
+        routes: Optional[Dict[Any, str]] = None,
+        on_slow: Optional[Callable[[Dict[str, Any]], None]] = None,
+        history: int = 50,
+        stats: SelfStats = STATS,
+    ):
+        """
+        Initialize the detector.
+
+        Args:
+            threshold: Seconds the loop may stay busy before a call is reported
+            routes: Route names by endpoint code object, as built by route_table
+            on_slow: Called from the watchdog thread with every report
+            history: Number of recent reports kept in memory
+            stats: SelfStats receiving the duration of every report
+        """
+        self.threshold = threshold
+        self.routes = routes or {}
+        self.on_slow = on_slow
+        self.stats = stats
+        self.recent: deque = deque(maxlen=history)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        """
+        Whether the watchdog thread is active.
+        """
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """
+        Start watching the running event loop. Must be called from the loop's thread.
+        """
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._watch, name="slow-callback-detector", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop the watchdog thread.
+        """
+        if not self.running:
+            return
+        self._stopping.set()
+        self._thread.join()
+        self._thread = None
+
+    def describe(self, frame) -> Dict[str, Optional[str]]:
+        """
+        Attribute a stack to a route and a source location.
+
+        Args:
+            frame: Innermost frame of the blocked thread
+
+        Returns:
+            Dictionary with the route of the first endpoint found on the stack
+            (None for work outside a request) and the innermost location in
+            the application's code, or the innermost location overall
+        """
+        route = None
+        location = None
+        innermost = None
+        app_dir = os.path.join(BASE_DIR, "app")
+        while frame is not None:
+            code = frame.f_code
+            if innermost is None:
+                innermost = frame
+            if location is None and code.co_filename.startswith(app_dir):
+                location = self._format_frame(frame)
+            if route is None:
+                route = self.routes.get(code)
+            if route is not None and location is not None:
+                break
+            frame = frame.f_back
+        if location is None and innermost is not None:
+            location = self._format_frame(innermost)
+        return {"route": route, "location": location}
+
+    @staticmethod
+    def _format_frame(frame) -> str:
+        """
+        Format a frame as `path:line in function`, relative to the project.
+        """
+        filename = frame.f_code.co_filename
+        if filename.startswith(BASE_DIR):
+            filename = os.path.relpath(filename, BASE_DIR)
+        return f"{filename}:{frame.f_lineno} in {frame.f_code.co_name}"
+
+    def report(self, duration: float, route: Optional[str], location: Optional[str]) -> Dict[str, Any]:
+        """
+        Record a call that blocked the loop.
+
+        Args:
+            duration: Seconds the loop was blocked
+            route: Route being served, if any
+            location: Source location running when the block was detected
+
+        Returns:
+            The report as passed to on_slow
+        """
+        event = {
+            "timestamp": datetime.datetime.now().isoformat(),
+            "duration_ms": duration * 1000,
+            "route": route,
+            "location": location,
+            "pid": os.getpid(),
+        }
+        self.recent.append(event)
+        self.stats.observe("loop", "slow_callback", duration)
+        if self.on_slow is not None:
+            try:
+                self.on_slow(event)
+            except Exception as e:
+                print(f"Error reporting slow callback: {e}")
+        return event
+
+    def _watch(self) -> None:
+        """
+        Ping the loop until stopped, reporting every unanswered ping.
+        """
+        poll = self.threshold / 4
+        while not self._stopping.is_set():
+            answered = threading.Event()
+            sent = time.perf_counter()
+            try:
+                self._loop.call_soon_threadsafe(answered.set)
+            except RuntimeError:
+                # The loop was closed
+                return
+            if answered.wait(self.threshold):
+                self._stopping.wait(poll)
+                continue
+
+            frames: Dict[int, Any] = sys._current_frames()
+            where = self.describe(frames.get(self._loop_thread_id))
+            del frames
+            while not answered.wait(poll):
+                if self._stopping.is_set():
+                    return
+            self.report(time.perf_counter() - sent, where["route"], where["location"])
+
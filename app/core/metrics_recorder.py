@@ -2,95 +2,453 @@
 Metrics Recorder
 Responsible for recording metrics to the database periodically
 """
-import time
+import asyncio
 import datetime
+import sqlite3
 import threading
-from typing import Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
 
+from app.core.alerts import AlertEngine, AlertRule, FIRING
+from app.core.flight_recorder import ProcessFlightRecorder
+from app.core.instrumentation import STATS
+from app.core.loop_monitor import LoopLagMonitor
+from app.core.sampling import AdaptiveSamplingPolicy
+from app.core.scheduler import IntervalScheduler
+from app.core.spool import SampleSpool
 from app.core.system_monitor import SystemMonitor
 from app.database.db_manager import DatabaseManager
 
 
 class MetricsRecorder:
     """
-    Records system metrics to the database at regular intervals
+    Records system metrics to the database at regular intervals.
+
+    Runs as an asyncio task on the application's event loop. Blocking psutil
+    collection is handed to a small bounded thread pool so it never stalls
+    request handling. Database writes run in a separate writer task and
+    thread, so a slow or locked database never delays collection; batches the
+    database rejects are kept in a spool and replayed in order later.
     """
-    
-    def __init__(self, db_manager: DatabaseManager, interval: int = 60, cpu_threshold: int = 80, memory_threshold: int = 80):
+
+    def __init__(
+        self,
+        db_manager: DatabaseManager,
+        interval: float = 60,
+        cpu_threshold: int = 80,
+        memory_threshold: int = 80,
+        pressure_threshold: float = 20,
+        batch_size: int = 1,
+        max_workers: int = 2,
+        alert_for_seconds: float = 0,
+        alert_hysteresis: float = 0,
+        alert_rules: Optional[List[AlertRule]] = None,
+        spool: Optional[SampleSpool] = None,
+        sampling_policy: Optional[AdaptiveSamplingPolicy] = None,
+        loop_monitor: Optional[LoopLagMonitor] = None,
+        flight_recorder: Optional[ProcessFlightRecorder] = None,
+        monitor: Optional[SystemMonitor] = None,
+    ):
         """
         Initialize the metrics recorder.
-        
+
         Args:
             db_manager: DatabaseManager instance for database operations
-            interval: Recording interval in seconds (default 60)
+            interval: Recording interval in seconds (default 60), may be sub-second
             cpu_threshold: Threshold for CPU usage alerts
             memory_threshold: Threshold for memory usage alerts
+            pressure_threshold: Threshold for the share of time tasks stall
+                on CPU, memory or I/O (PSI "some" stall time)
+            batch_size: Number of samples buffered before they are written
+            max_workers: Size of the thread pool used for blocking work
+            alert_for_seconds: How long a threshold must be exceeded before alerting
+            alert_hysteresis: How far below the threshold a value must drop to resolve
+            alert_rules: Rules replacing the default CPU, memory and pressure
+                threshold rules; rules may use any key of PRESSURE_FIELDS
+            spool: Spool for batches the database cannot accept; without one,
+                failed batches stay in memory until the next flush
+            sampling_policy: Policy adapting the interval between ticks; without
+                one, every tick is `interval` seconds apart
+            loop_monitor: Event loop lag monitor of this worker, whose
+                statistics are stored with every sample; as only the leader
+                records, the stored lag is the leader's
+            flight_recorder: Ring buffer fed with process samples while
+                recording, whose window is stored with every alert that fires
+            monitor: Monitor metrics and processes are collected from (default
+                a new one); pass the one other components use so they share
+                its process table
         """
         self.db_manager = db_manager
         self.interval = interval
-        self.monitor = SystemMonitor()
+        self.monitor = monitor or SystemMonitor()
         self.cpu_threshold = cpu_threshold
         self.memory_threshold = memory_threshold
-        self._running = False
-        self._thread = None
-    
-    def _record_metrics(self) -> None:
+        self.pressure_threshold = pressure_threshold
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        if alert_rules is None:
+            alert_rules = [
+                AlertRule(
+                    name="cpu_high", metric="cpu", threshold=cpu_threshold,
+                    clear_threshold=cpu_threshold - alert_hysteresis, for_seconds=alert_for_seconds,
+                    alert_type="CPU", message="High CPU usage detected",
+                ),
+                AlertRule(
+                    name="memory_high", metric="memory", threshold=memory_threshold,
+                    clear_threshold=memory_threshold - alert_hysteresis, for_seconds=alert_for_seconds,
+                    alert_type="Memory", message="High memory usage detected",
+                ),
+            ]
+            # Tasks waiting on a resource show contention before its
+            # utilisation reaches the thresholds above
+            alert_rules += [
+                AlertRule(
+                    name=f"{resource}_pressure", metric=f"psi_{resource}_some_stall",
+                    threshold=pressure_threshold,
+                    clear_threshold=max(pressure_threshold - alert_hysteresis, 0),
+                    for_seconds=alert_for_seconds,
+                    alert_type=f"{label} Pressure", message=f"Tasks stalled waiting for {description}",
+                )
+                for resource, label, description in (
+                    ("cpu", "CPU", "CPU"), ("memory", "Memory", "memory"), ("io", "IO", "I/O"),
+                )
+            ]
+        self.alert_engine = AlertEngine(alert_rules)
+        self.spool = spool
+        self.sampling_policy = sampling_policy
+        self.loop_monitor = loop_monitor
+        self.flight_recorder = flight_recorder
+        self.scheduler = None
+        self._buffer: List[Dict[str, Any]] = []
+        self._flush_lock = threading.Lock()
+        self._flush_event: Optional[asyncio.Event] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._write_executor: Optional[ThreadPoolExecutor] = None
+        self._task: Optional[asyncio.Task] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        self._flight_task: Optional[asyncio.Task] = None
+        self._last_tick: Optional[float] = None
+        self.rejected_samples = 0
+
+    @property
+    def running(self) -> bool:
+        """
+        Whether the recording task is active.
+        """
+        return self._task is not None and not self._task.done()
+
+    @property
+    def missed_ticks(self) -> int:
+        """
+        Number of ticks skipped because a previous tick overran its interval.
+        """
+        return self.scheduler.missed_ticks if self.scheduler is not None else 0
+
+    @property
+    def current_interval(self) -> float:
+        """
+        Interval in seconds the scheduler currently ticks at. With a sampling
+        policy it is re-chosen after every sample, so it applies from the
+        next tick on.
+        """
+        return self.scheduler.interval if self.scheduler is not None else self.interval
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Returns the recorder's own health metrics.
+
+        Returns:
+            Dictionary with running state, interval, missed ticks, buffered
+            samples, samples the database rejected and spool depth, size,
+            replay lag and dropped samples
+        """
+        return {
+            "running": self.running,
+            "interval_seconds": self.current_interval,
+            "missed_ticks": self.missed_ticks,
+            "buffered_samples": len(self._buffer),
+            "rejected_samples": self.rejected_samples,
+            "spool_depth": self.spool.depth if self.spool else 0,
+            "spool_bytes": self.spool.size_bytes if self.spool else 0,
+            "spool_replay_lag_seconds": self.spool.replay_lag() if self.spool else 0.0,
+            "spool_dropped_samples": self.spool.dropped if self.spool else 0,
+        }
+
+    def collect(self, timestamp: str) -> Dict[str, Any]:
+        """
+        Collect one sample of every metric. CPU usage and its breakdown
+        cover the time since the previous tick, from a single read of the CPU
+        counters; only the first tick waits for a second reading. The
+        sample's `interval` is that time, the interval leading into the tick,
+        so aggregates can weight samples taken at different rates by it.
+
+        Args:
+            timestamp: ISO format timestamp of the tick
+
+        Returns:
+            Sample dictionary as accepted by DatabaseManager.insert_samples
+        """
+        cpu_breakdown = self.monitor.get_cpu_breakdown()
+        cpu = cpu_breakdown["cpu_percent"]
+        memory = self.monitor.get_memory_usage()
+        pressure = self.monitor.get_pressure()
+        tick = datetime.datetime.fromisoformat(timestamp).timestamp()
+
+        # The time since the previous tick, which differs from the current
+        # interval after it was changed or when ticks were missed
+        covered = self.current_interval
+        if self._last_tick is not None and tick > self._last_tick:
+            covered = round(tick - self._last_tick, 6)
+        self._last_tick = tick
+
+        # Evaluate alert rules; only state transitions are stored
+        alerts = self.alert_engine.evaluate(
+            tick, {"cpu": cpu, "memory": memory["percent"], **pressure},
+        )
+        # Keep the processes that led up to an alert, as they may be gone
+        # by the time anyone looks
+        if self.flight_recorder is not None:
+            for alert in alerts:
+                if alert["event"] == FIRING:
+                    alert["processes"] = self.flight_recorder.freeze()
+
+        return {
+            "timestamp": timestamp,
+            "cpu": cpu,
+            "memory": memory,
+            "per_core": cpu_breakdown["per_core_cpu"],
+            "cpu_times": cpu_breakdown["cpu_times"],
+            "per_core_times": cpu_breakdown["per_core_times"],
+            "pressure": pressure,
+            "disks": self.monitor.get_disk_usage(),
+            "network": self.monitor.get_network_stats(),
+            "interval": covered,
+            "alerts": alerts,
+        }
+
+    def flush(self) -> int:
+        """
+        Write all buffered samples to the database in one transaction.
+
+        Spooled samples are replayed first so rows reach the database in
+        order. If the database is locked or unavailable, the batch is appended
+        to the spool instead; without a spool it stays buffered for the next
+        flush. Samples the database can never accept are dropped (see
+        _insert_samples), so they cannot hold back the samples behind them.
+
+        Returns:
+            Number of buffered samples handled
+        """
+        # A flush cancelled on shutdown keeps running in its worker thread,
+        # so the final flush must wait for it rather than write the same rows
+        with self._flush_lock:
+            spooled = self.spool is not None and self.spool.depth > 0
+            if not self._buffer and not spooled:
+                return 0
+
+            batch = list(self._buffer)
+            try:
+                if spooled:
+                    self.spool.replay(self._insert_samples)
+                if batch:
+                    self._insert_samples(batch)
+            except sqlite3.OperationalError as e:
+                if self.spool is None:
+                    raise
+                print(f"Database write failed, spooling {len(batch)} sample(s): {e}")
+                self.spool.append(batch)
+
+            del self._buffer[:len(batch)]
+            return len(batch)
+
+    def _insert_samples(self, samples: List[Dict[str, Any]]) -> None:
+        """
+        Write samples, dropping those the database rejects permanently.
+
+        A locked or unavailable database raises sqlite3.OperationalError,
+        which is passed on so the samples can be retried. Any other error
+        means something in the batch cannot be stored; the samples are then
+        written one at a time and those that still fail are dropped and
+        counted in `rejected_samples`.
+
+        Args:
+            samples: Sample dictionaries as accepted by DatabaseManager.insert_samples
+        """
+        try:
+            self.db_manager.insert_samples(samples)
+            return
+        except sqlite3.OperationalError:
+            raise
+        except Exception as e:
+            if len(samples) == 1:
+                print(f"Dropping sample {samples[0].get('timestamp')} the database rejected: {e}")
+                self.rejected_samples += 1
+                return
+
+        for sample in samples:
+            self._insert_samples([sample])
+
+    async def _run_blocking(self, func, *args, executor: Optional[ThreadPoolExecutor] = None):
         """
-        Record system metrics to the database periodically.
+        Run a blocking function in one of the recorder's thread pools.
         """
-        while self._running:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor or self._executor, func, *args)
+
+    async def record_once(self, timestamp: str) -> Dict[str, Any]:
+        """
+        Collect a sample, buffer it and wake the writer once a batch is full.
+
+        Args:
+            timestamp: ISO format timestamp of the tick
+
+        Returns:
+            The collected sample
+        """
+        sample = await self._run_blocking(self.collect, timestamp)
+        if self.loop_monitor is not None:
+            sample["loop_lag"] = self.loop_monitor.drain()
+        self._buffer.append(sample)
+
+        spooled = self.spool is not None and self.spool.depth > 0
+        if (len(self._buffer) >= self.batch_size or spooled) and self._flush_event is not None:
+            self._flush_event.set()
+        return sample
+
+    def _adapt_interval(self, sample: Dict[str, Any]) -> None:
+        """
+        Let the sampling policy pick the interval until the next tick.
+        """
+        thresholds: Dict[str, float] = {}
+        for rule in self.alert_engine.rules:
+            thresholds[rule.metric] = min(rule.threshold, thresholds.get(rule.metric, rule.threshold))
+
+        interval = self.sampling_policy.next_interval(
+            {"cpu": sample["cpu"], "memory": sample["memory"]["percent"]}, thresholds
+        )
+        if interval != self.scheduler.interval:
+            self.scheduler.set_interval(interval)
+
+    async def _write_samples(self) -> None:
+        """
+        Flush the buffer whenever the collector signals, until cancelled.
+        """
+        while True:
+            await self._flush_event.wait()
+            self._flush_event.clear()
+            try:
+                with STATS.timer("recorder", "flush_duration"):
+                    await self._run_blocking(self.flush, executor=self._write_executor)
+            except Exception as e:
+                print(f"Error writing metrics: {e}")
+
+    def sample_processes(self) -> None:
+        """
+        Add a sample of the process table to the flight recorder.
+        """
+        self.flight_recorder.record(self.monitor.process_table.rows())
+
+    async def _record_processes(self) -> None:
+        """
+        Feed the flight recorder every interval until cancelled.
+        """
+        while True:
             try:
-                # Get current metrics
-                cpu = self.monitor.get_cpu_usage()
-                memory = self.monitor.get_memory_usage()
-                
-                # Current timestamp
-                timestamp = datetime.datetime.now().isoformat()
-                
-                # Insert CPU data
-                self.db_manager.insert_cpu_data(timestamp, cpu)
-                
-                # Insert memory data
-                self.db_manager.insert_memory_data(timestamp, memory)
-                
-                # Check for alert conditions
-                if cpu > self.cpu_threshold:
-                    self.db_manager.insert_alert(
-                        timestamp, "CPU", "High CPU usage detected", cpu
-                    )
-                
-                if memory["percent"] > self.memory_threshold:
-                    self.db_manager.insert_alert(
-                        timestamp, "Memory", "High memory usage detected", memory["percent"]
-                    )
-                
-                # Wait before next recording
-                time.sleep(self.interval)
-                
+                await self._run_blocking(self.sample_processes)
+            except Exception as e:
+                print(f"Error sampling processes: {e}")
+            await asyncio.sleep(self.flight_recorder.interval)
+
+    async def _record_metrics(self) -> None:
+        """
+        Record system metrics on every scheduler tick until cancelled.
+
+        Ticks are aligned to interval boundaries on the monotonic clock, so the
+        time spent collecting a sample does not delay the following ones. With
+        a sampling policy, the interval is re-chosen after every sample.
+        """
+        self.scheduler = IntervalScheduler(self.interval)
+
+        loop = asyncio.get_running_loop()
+        while True:
+            wait = self.scheduler.time_until_next()
+            due = loop.time() + wait
+            await asyncio.sleep(wait)
+            # How late the event loop woke up for the tick
+            STATS.observe("recorder", "tick_lag", max(0.0, loop.time() - due))
+
+            missed_before = self.scheduler.missed_ticks
+            tick = self.scheduler.tick()
+            missed = self.scheduler.missed_ticks - missed_before
+            if missed:
+                print(f"Metrics recorder missed {missed} tick(s); collection overran the interval.")
+
+            try:
+                with STATS.timer("recorder", "tick_duration"):
+                    sample = await self.record_once(datetime.datetime.fromtimestamp(tick).isoformat())
+                if self.sampling_policy is not None:
+                    self._adapt_interval(sample)
             except Exception as e:
                 print(f"Error recording metrics: {e}")
-                time.sleep(self.interval)  # Wait and try again
-    
-    def start(self) -> None:
+
+    async def start(self) -> None:
         """
-        Start the metrics recording in a background thread.
+        Start the metrics recording as a task on the running event loop.
         """
-        if self._thread is not None and self._thread.is_alive():
+        if self.running:
             print("Metrics recorder is already running.")
             return
-        
-        self._running = True
-        self._thread = threading.Thread(target=self._record_metrics, daemon=True)
-        self._thread.start()
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="metrics-recorder"
+        )
+        self._write_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="metrics-writer"
+        )
+        self._flush_event = asyncio.Event()
+        # Time spent stopped is not covered by the first new sample
+        self._last_tick = None
+
+        # Another process may have spooled samples while it was the recorder
+        if self.spool is not None:
+            self.spool.reload()
+
+        # Resume alerts that were still firing when the recorder last stopped
+        open_alerts = await self._run_blocking(self.db_manager.get_open_alerts)
+        self.alert_engine.restore(open_alerts)
+
+        self._writer_task = asyncio.create_task(self._write_samples())
+        self._task = asyncio.create_task(self._record_metrics())
+        if self.flight_recorder is not None:
+            self._flight_task = asyncio.create_task(self._record_processes())
         print(f"Metrics recorder started. Recording metrics every {self.interval} seconds.")
-    
-    def stop(self) -> None:
+
+    async def stop(self) -> None:
         """
-        Stop the metrics recording.
+        Stop the metrics recording and flush any buffered samples.
         """
-        self._running = False
-        if self._thread is not None and self._thread.is_alive():
-            self._thread.join(timeout=2.0)
-            print("Metrics recorder stopped.")
-        else:
+        if not self.running:
             print("Metrics recorder is not running.")
+            return
+
+        for task in (self._task, self._writer_task, self._flight_task):
+            if task is None:
+                continue
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+        try:
+            await self._run_blocking(self.flush, executor=self._write_executor)
+        except Exception as e:
+            print(f"Error flushing metrics on shutdown: {e}")
+
+        self._executor.shutdown(wait=True)
+        self._write_executor.shutdown(wait=True)
+        self._executor = None
+        self._write_executor = None
+        self._flush_event = None
+        self._flight_task = None
+        print("Metrics recorder stopped.")
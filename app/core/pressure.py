@@ -0,0 +1,154 @@
+"""
+Pressure and Contention
+Collects pressure stall information, load averages, context switches and the
+run queue from procfs, which show contention that utilisation percentages
+do not
+"""
+import os
+import time
+import threading
+from typing import Callable, Dict, Optional
+
+# Resources the kernel reports pressure stall information (PSI) for, and the
+# two kinds of stall: some tasks waiting, or all non-idle tasks waiting
+PSI_RESOURCES = ("cpu", "memory", "io")
+PSI_KINDS = ("some", "full")
+
+# Per resource and kind: the kernel's 10 and 60 second averages, and the
+# share of time stalled since the previous sample, from the total counter
+PSI_STATS = ("avg10", "avg60", "stall")
+
+# Every value of a sample, in storage order
+PRESSURE_FIELDS = tuple(
+    f"psi_{resource}_{kind}_{stat}"
+    for resource in PSI_RESOURCES for kind in PSI_KINDS for stat in PSI_STATS
+) + ("load_1", "load_5", "load_15", "context_switches", "run_queue", "blocked_processes")
+
+# /proc/stat lines read by read_stat
+_STAT_KEYS = ("ctxt", "procs_running", "procs_blocked")
+
+
+def read_pressure(resource: str, proc_path: str = "/proc") -> Optional[Dict[str, Dict[str, float]]]:
+    """
+    Read the pressure stall information of a resource.
+
+    Args:
+        resource: One of PSI_RESOURCES
+        proc_path: Mount point of procfs
+
+    Returns:
+        Mapping of kind (some, full) to its avg10, avg60, avg300 and total
+        values, or None if the kernel does not provide PSI
+    """
+    try:
+        with open(os.path.join(proc_path, "pressure", resource)) as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+    pressure = {}
+    for line in lines:
+        kind, *pairs = line.split()
+        pressure[kind] = {key: float(value) for key, value in (pair.split("=", 1) for pair in pairs)}
+    return pressure
+
+
+def read_stat(proc_path: str = "/proc") -> Dict[str, int]:
+    """
+    Read the context switch counter and run queue from /proc/stat.
+
+    Args:
+        proc_path: Mount point of procfs
+
+    Returns:
+        Mapping of ctxt, procs_running and procs_blocked to their values;
+        empty where /proc/stat is not available
+    """
+    stat = {}
+    try:
+        with open(os.path.join(proc_path, "stat")) as f:
+            for line in f:
+                name, _, value = line.partition(" ")
+                if name in _STAT_KEYS:
+                    stat[name] = int(value)
+    except OSError:
+        return {}
+    return stat
+
+
+class PressureSampler:
+    """
+    Samples pressure, load and scheduler counters in one pass over a few small
+    procfs files.
+
+    Stall time and context switches are kernel counters; they are reported as
+    rates over the time since the previous sample, so the first sample has
+    no rates. Values the host does not provide, such as PSI on kernels
+    without it, are None.
+    """
+
+    def __init__(self, proc_path: str = "/proc", clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the sampler.
+
+        Args:
+            proc_path: Mount point of procfs
+            clock: Monotonic time source
+        """
+        self.proc_path = proc_path
+        self.clock = clock
+        self._previous: Optional[Dict[str, float]] = None
+        self._lock = threading.Lock()
+
+    def sample(self) -> Dict[str, Optional[float]]:
+        """
+        Take a sample.
+
+        Returns:
+            Dictionary with a value for every entry of PRESSURE_FIELDS: PSI
+            averages and stall shares in percent, load averages, context
+            switches per second and the number of runnable and blocked tasks
+        """
+        pressure = {resource: read_pressure(resource, self.proc_path) for resource in PSI_RESOURCES}
+        stat = read_stat(self.proc_path)
+        counters = {
+            f"{resource}_{kind}": pressure[resource][kind]["total"]
+            for resource in PSI_RESOURCES if pressure[resource]
+            for kind in PSI_KINDS if kind in pressure[resource]
+        }
+        if "ctxt" in stat:
+            counters["ctxt"] = stat["ctxt"]
+        now = self.clock()
+
+        with self._lock:
+            previous, self._previous = self._previous, {"time": now, **counters}
+
+        def rate(counter: str) -> Optional[float]:
+            # Per second change of a counter, unless it is new or was reset
+            if previous is None or counter not in counters or counter not in previous:
+                return None
+            elapsed = now - previous["time"]
+            delta = counters[counter] - previous[counter]
+            if elapsed <= 0 or delta < 0:
+                return None
+            return delta / elapsed
+
+        sample: Dict[str, Optional[float]] = {}
+        for resource in PSI_RESOURCES:
+            for kind in PSI_KINDS:
+                line = (pressure[resource] or {}).get(kind)
+                prefix = f"psi_{resource}_{kind}"
+                sample[f"{prefix}_avg10"] = line["avg10"] if line else None
+                sample[f"{prefix}_avg60"] = line["avg60"] if line else None
+                # Totals are in microseconds, so microseconds per second / 1e4 is percent
+                stalled = rate(f"{resource}_{kind}")
+                sample[f"{prefix}_stall"] = round(min(stalled / 1e4, 100.0), 2) if stalled is not None else None
+
+        try:
+            sample["load_1"], sample["load_5"], sample["load_15"] = (round(load, 2) for load in os.getloadavg())
+        except (OSError, AttributeError):
+            sample["load_1"] = sample["load_5"] = sample["load_15"] = None
+        switches = rate("ctxt")
+        sample["context_switches"] = round(switches, 1) if switches is not None else None
+        sample["run_queue"] = stat.get("procs_running")
+        sample["blocked_processes"] = stat.get("procs_blocked")
+        return sample
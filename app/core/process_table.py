@@ -0,0 +1,219 @@
+"""
+Process Table
+Keeps a short-lived table of every running process, collected in one pass,
+from which the top processes and per-name, per-user and per-cgroup totals
+are derived
+"""
+import time
+import heapq
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core.instrumentation import timed
+from app.core.lazy import lazy_import
+
+psutil = lazy_import("psutil")
+
+# Attributes read for every process; psutil reads them within Process.oneshot(),
+# so the underlying /proc files are parsed once per process and pass
+PROCESS_ATTRS = ["pid", "name", "username", "create_time", "cpu_percent",
+                 "memory_percent", "memory_info", "num_threads"]
+
+# Keys processes can be ranked by
+PROCESS_SORT_KEYS = ("cpu_percent", "memory_percent", "rss", "num_threads")
+
+# Process attributes groups can be formed by, mapped to the row key holding them
+GROUP_BY = {"name": "name", "user": "username", "cgroup": "cgroup"}
+
+# Keys groups can be ranked by
+GROUP_SORT_KEYS = PROCESS_SORT_KEYS + ("count",)
+
+# Most processes or groups returned by one ranking
+MAX_PROCESS_LIMIT = 1000
+
+
+def read_cgroup(pid: int) -> Optional[str]:
+    """
+    Returns the control group of a process.
+
+    The unified (cgroup v2) path is used, unless it is the root and a v1
+    hierarchy places the process deeper, as on hybrid hosts.
+
+    Args:
+        pid: Process ID
+
+    Returns:
+        Control group path, e.g. "/system.slice/nginx.service", or None
+        where control groups are not available
+    """
+    try:
+        with open(f"/proc/{pid}/cgroup") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+    unified = None
+    nested = None
+    for line in lines:
+        hierarchy, _, path = line.split(":", 2)
+        if hierarchy == "0":
+            unified = path
+        elif nested is None and path != "/":
+            nested = path
+    if unified is not None and (unified != "/" or nested is None):
+        return unified
+    return nested or unified
+
+
+class ProcessTable:
+    """
+    Table of every running process, refreshed at most once per `ttl`.
+
+    Rows are collected in a single pass over psutil.process_iter, which
+    keeps the same Process objects between passes so per-process CPU
+    percentages cover the time since the previous pass. Control groups
+    rarely change, so each is read once per process lifetime. Rankings
+    use partial selection rather than sorting the whole table.
+    """
+
+    def __init__(self, ttl: float = 1.0, clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize an empty table.
+
+        Args:
+            ttl: Seconds a collected table is reused before it is refreshed
+            clock: Monotonic time source
+        """
+        self.ttl = ttl
+        self.clock = clock
+        self._rows: List[Dict[str, Any]] = []
+        self._collected_at: Optional[float] = None
+        self._groups: Dict[str, List[Dict[str, Any]]] = {}
+        self._cgroups: Dict[Tuple[int, float], Optional[str]] = {}
+        self._lock = threading.Lock()
+
+    @timed("collector", "process_table")
+    def refresh(self) -> List[Dict[str, Any]]:
+        """
+        Collect a row for every running process.
+
+        Returns:
+            List of dictionaries with pid, name, username, cgroup,
+            cpu_percent, memory_percent, rss (bytes) and num_threads
+        """
+        rows = []
+        cgroups = {}
+        for proc in psutil.process_iter(PROCESS_ATTRS):
+            try:
+                info = proc.info
+                key = (info["pid"], info["create_time"])
+                cgroup = self._cgroups[key] if key in self._cgroups else read_cgroup(info["pid"])
+                cgroups[key] = cgroup
+                memory = info["memory_info"]
+                rows.append({
+                    "pid": info["pid"],
+                    "name": info["name"],
+                    "username": info["username"],
+                    "cgroup": cgroup,
+                    "cpu_percent": info["cpu_percent"] or 0.0,
+                    "memory_percent": info["memory_percent"] or 0.0,
+                    "rss": memory.rss if memory is not None else 0,
+                    "num_threads": info["num_threads"] or 0,
+                })
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+        # Forget processes that have exited
+        self._cgroups = cgroups
+        self._rows = rows
+        self._groups = {}
+        self._collected_at = self.clock()
+        return rows
+
+    def _current(self) -> List[Dict[str, Any]]:
+        """
+        Returns the table, refreshing it when it is older than `ttl`.
+        Called with the lock held.
+        """
+        if self._collected_at is None or self.clock() - self._collected_at >= self.ttl:
+            self.refresh()
+        return self._rows
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """
+        Returns the table, refreshing it first when it is older than `ttl`.
+        """
+        with self._lock:
+            return self._current()
+
+    def top(self, limit: int = 10, sort: str = "cpu_percent") -> List[Dict[str, Any]]:
+        """
+        Returns the processes ranking highest by a key.
+
+        Args:
+            limit: Maximum number of processes to return
+            sort: One of PROCESS_SORT_KEYS
+
+        Returns:
+            Rows of the table, highest first
+
+        Raises:
+            ValueError: If the sort key is unknown
+        """
+        if sort not in PROCESS_SORT_KEYS:
+            raise ValueError(f"Unknown sort key: {sort}; choose from {', '.join(PROCESS_SORT_KEYS)}")
+        return heapq.nlargest(limit, self.rows(), key=lambda row: row[sort])
+
+    def groups(self, by: str = "name", sort: str = "cpu_percent", limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Returns process totals grouped by name, user or cgroup.
+
+        Args:
+            by: One of GROUP_BY
+            sort: One of GROUP_SORT_KEYS
+            limit: Maximum number of groups to return
+
+        Returns:
+            List of dictionaries with the group's `by` value, its process
+            count and summed cpu_percent, memory_percent, rss and
+            num_threads, highest first
+
+        Raises:
+            ValueError: If the grouping or sort key is unknown
+        """
+        if by not in GROUP_BY:
+            raise ValueError(f"Unknown grouping: {by}; choose from {', '.join(GROUP_BY)}")
+        if sort not in GROUP_SORT_KEYS:
+            raise ValueError(f"Unknown sort key: {sort}; choose from {', '.join(GROUP_SORT_KEYS)}")
+
+        with self._lock:
+            rows = self._current()
+            groups = self._groups.get(by)
+            if groups is None:
+                groups = self._groups[by] = self._aggregate(rows, GROUP_BY[by], by)
+        return heapq.nlargest(limit, groups, key=lambda group: group[sort])
+
+    @staticmethod
+    def _aggregate(rows: List[Dict[str, Any]], column: str, label: str) -> List[Dict[str, Any]]:
+        """
+        Sum the rows sharing a value of `column`, in one pass.
+        """
+        totals: Dict[Any, List[float]] = {}
+        for row in rows:
+            total = totals.get(row[column])
+            if total is None:
+                total = totals[row[column]] = [0, 0.0, 0.0, 0, 0]
+            total[0] += 1
+            total[1] += row["cpu_percent"]
+            total[2] += row["memory_percent"]
+            total[3] += row["rss"]
+            total[4] += row["num_threads"]
+        return [
+            {
+                label: value,
+                "count": count,
+                "cpu_percent": round(cpu, 1),
+                "memory_percent": round(memory, 2),
+                "rss": rss,
+                "num_threads": threads,
+            }
+            for value, (count, cpu, memory, rss, threads) in totals.items()
+        ]
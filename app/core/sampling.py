@@ -0,0 +1,83 @@
+"""
+Adaptive Sampling
+Chooses the recording interval from how close metrics are to their alert
+thresholds and how fast they are changing
+"""
+from typing import Dict, Optional
+
+
+class AdaptiveSamplingPolicy:
+    """
+    Switches the recorder between a fast and a slow sampling interval.
+
+    The fast interval is used as soon as any metric is within `near_threshold`
+    of its alert threshold or moved by more than `change_threshold` since the
+    previous sample. Once values are calm again the interval doubles on every
+    sample until it reaches the slow interval, so a brief lull during a spike
+    does not immediately drop back to the slow rate.
+    """
+
+    def __init__(
+        self,
+        fast_interval: float = 2,
+        slow_interval: float = 60,
+        near_threshold: float = 10,
+        change_threshold: float = 15,
+    ):
+        """
+        Initialize the policy.
+
+        Args:
+            fast_interval: Interval in seconds while metrics are interesting
+            slow_interval: Interval in seconds while metrics are flat
+            near_threshold: Percentage points below a threshold that count as near
+            change_threshold: Percentage points of change between samples that
+                count as a sharp change
+        """
+        if not 0 < fast_interval <= slow_interval:
+            raise ValueError("fast_interval must be positive and not above slow_interval")
+
+        self.fast_interval = fast_interval
+        self.slow_interval = slow_interval
+        self.near_threshold = near_threshold
+        self.change_threshold = change_threshold
+        self.interval = slow_interval
+        self._previous: Dict[str, float] = {}
+
+    def is_active(self, values: Dict[str, float], thresholds: Dict[str, float]) -> bool:
+        """
+        Whether a sample warrants fast sampling.
+
+        Args:
+            values: Metric values of the sample, keyed by metric name
+            thresholds: Alert thresholds, keyed by metric name
+        """
+        for metric, value in values.items():
+            if value is None:
+                continue
+            threshold = thresholds.get(metric)
+            if threshold is not None and value >= threshold - self.near_threshold:
+                return True
+            previous = self._previous.get(metric)
+            if previous is not None and abs(value - previous) > self.change_threshold:
+                return True
+        return False
+
+    def next_interval(self, values: Dict[str, Optional[float]], thresholds: Dict[str, float]) -> float:
+        """
+        Update the policy with a sample and return the interval to use next.
+
+        Args:
+            values: Metric values of the sample, keyed by metric name
+            thresholds: Alert thresholds, keyed by metric name
+
+        Returns:
+            Interval in seconds until the next sample
+        """
+        if self.is_active(values, thresholds):
+            self.interval = self.fast_interval
+        else:
+            self.interval = min(self.slow_interval, self.interval * 2)
+
+        self._previous = {metric: value for metric, value in values.items() if value is not None}
+        return self.interval
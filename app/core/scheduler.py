@@ -0,0 +1,106 @@
+"""
+Interval Scheduler
+Drift-free tick scheduling aligned to wall-clock interval boundaries
+"""
+import math
+import time
+from typing import Callable
+
+
+class IntervalScheduler:
+    """
+    Produces ticks on fixed interval boundaries without accumulating drift.
+
+    Deadlines are tracked on the monotonic clock, so the time spent collecting
+    and storing a sample does not push later ticks back. Each tick is aligned
+    to a wall-clock multiple of the interval (e.g. :00 of every minute for a
+    60 second interval), which keeps samples of different series on the same
+    timestamps. When a tick is reached too late to run the ones before it, the
+    skipped ticks are counted in `missed_ticks` instead of being run late.
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        clock: Callable[[], float] = time.monotonic,
+        wall_clock: Callable[[], float] = time.time,
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            interval: Tick interval in seconds, sub-second values are allowed
+            clock: Monotonic clock used for deadlines
+            wall_clock: Wall clock used to align ticks and label them
+        """
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+
+        self.interval = interval
+        self._clock = clock
+        self.missed_ticks = 0
+
+        # Fixed offset between the two clocks, so aligned wall-clock
+        # boundaries can be turned into monotonic deadlines
+        now = clock()
+        wall_now = wall_clock()
+        self._wall_offset = wall_now - now
+
+        # Ticks are numbered by interval since the epoch so that boundaries
+        # are computed exactly rather than by repeated float addition
+        self._next_index = math.ceil(wall_now / interval)
+        self._last_tick = None
+
+    @property
+    def next_deadline(self) -> float:
+        """
+        Monotonic time of the next tick.
+        """
+        return self._next_index * self.interval - self._wall_offset
+
+    def time_until_next(self) -> float:
+        """
+        Returns the number of seconds to wait before the next tick is due.
+        """
+        return max(0.0, self.next_deadline - self._clock())
+
+    def tick(self) -> float:
+        """
+        Consume the tick that is due and schedule the next one.
+
+        Call this once the wait returned by time_until_next has elapsed. If
+        one or more whole intervals have passed since the due tick, they are
+        skipped, counted as missed, and the most recent boundary is returned.
+
+        Returns:
+            Aligned wall-clock time of the tick as a Unix timestamp
+        """
+        lateness = self._clock() - self.next_deadline
+        missed = int(lateness // self.interval) if lateness > 0 else 0
+
+        tick_index = self._next_index + missed
+        self.missed_ticks += missed
+        self._next_index = tick_index + 1
+        self._last_tick = tick_index * self.interval
+        return self._last_tick
+
+    def set_interval(self, interval: float) -> None:
+        """
+        Change the interval, aligning the next tick to a boundary of the new
+        interval. The next tick is never at or before the last one.
+
+        Args:
+            interval: New tick interval in seconds
+        """
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        if interval == self.interval:
+            return
+
+        wall_now = self._clock() + self._wall_offset
+        next_index = math.ceil(wall_now / interval)
+        if self._last_tick is not None and next_index * interval <= self._last_tick:
+            next_index = math.floor(self._last_tick / interval) + 1
+
+        self.interval = interval
+        self._next_index = next_index
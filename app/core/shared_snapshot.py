@@ -0,0 +1,481 @@
+"""
+Shared Live Snapshot
+Fixed-layout shared memory segment holding the latest live metrics, written
+by one process and read by every server worker
+"""
+import math
+import time
+import struct
+import asyncio
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.system_monitor import SystemMonitor
+
+
+MAGIC = b"SMLS"
+VERSION = 3
+
+# Capacity of the fixed-size sections; larger values are truncated
+MAX_CORES = 256
+MAX_DISKS = 32
+MAX_PROCESSES = 32
+
+# magic, version, sequence, published_at, core count, disk count, process
+# count, total number of processes on the host
+_HEADER = struct.Struct("<4sIQdIIII")
+_SEQUENCE = struct.Struct("<Q")
+_SEQUENCE_OFFSET = 8
+# cpu, memory total/available/used/percent, MB sent/received, packets sent/received,
+# memory total/available/used bytes, bytes sent/received
+_SCALARS = struct.Struct("<5d2d2Q3Q2Q")
+_CORES = struct.Struct(f"<{MAX_CORES}d")
+# device, mountpoint, total/used/free GB, percent, total/used/free bytes
+_DISK = struct.Struct("<64s128s4d3Q")
+# pid, name, username, cpu percent, memory percent
+_PROCESS = struct.Struct("<q64s32s2d")
+
+_SCALARS_OFFSET = _HEADER.size
+_CORES_OFFSET = _SCALARS_OFFSET + _SCALARS.size
+_DISKS_OFFSET = _CORES_OFFSET + _CORES.size
+_PROCESSES_OFFSET = _DISKS_OFFSET + MAX_DISKS * _DISK.size
+SEGMENT_SIZE = _PROCESSES_OFFSET + MAX_PROCESSES * _PROCESS.size
+
+GB = 1024 ** 3
+MB = 1024 ** 2
+
+
+def _pack_text(value: Optional[str], size: int) -> bytes:
+    """
+    Encode a string into a fixed-size field, truncating it if needed.
+    """
+    return (value or "").encode("utf-8")[:size]
+
+
+def _unpack_text(value: bytes) -> Optional[str]:
+    """
+    Decode a fixed-size string field; empty fields become None.
+    """
+    text = value.rstrip(b"\0").decode("utf-8", errors="ignore")
+    return text or None
+
+
+def _number(value: float) -> Optional[float]:
+    """
+    Convert the NaN used for missing values back to None.
+    """
+    return None if math.isnan(value) else value
+
+
+class SharedSnapshot:
+    """
+    Latest live metrics in a named `multiprocessing.shared_memory` segment.
+
+    The layout is fixed, so readers decode fields in place with
+    `struct.unpack_from` instead of deserializing a payload. Consistency is
+    kept with a seqlock: the single writer makes the sequence number odd
+    before it writes and even again afterwards, and a reader retries when the
+    number was odd or changed while it was reading.
+
+    The segment outlives the processes using it, so a newly elected writer
+    picks up the existing one; it is never unlinked by the resource tracker.
+    """
+
+    def __init__(self, name: str):
+        """
+        Initialize a handle on the named segment without opening it.
+
+        Args:
+            name: Name of the shared memory segment
+        """
+        self.name = name
+        self._shm: Optional[shared_memory.SharedMemory] = None
+
+    @staticmethod
+    def name_for(db_path: str) -> str:
+        """
+        Returns the segment name shared by all workers using a database.
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        return "sysmon_" + hashlib.sha1(db_path.encode("utf-8")).hexdigest()[:12]
+
+    def _open(self, create: bool) -> Optional[memoryview]:
+        """
+        Open (and optionally create) the segment, returning its buffer.
+        """
+        if self._shm is not None:
+            return self._shm.buf
+
+        try:
+            shm = shared_memory.SharedMemory(self.name, create=create, size=SEGMENT_SIZE if create else 0)
+        except FileExistsError:
+            shm = shared_memory.SharedMemory(self.name)
+        except FileNotFoundError:
+            return None
+
+        # Python registers every segment with the resource tracker, which
+        # would unlink it when this process exits while others still use it
+        resource_tracker.unregister(shm._name, "shared_memory")
+
+        if shm.size < SEGMENT_SIZE:
+            shm.close()
+            if not create:
+                return None
+            # Left behind by an older layout; replace it
+            stale = shared_memory.SharedMemory(self.name)
+            self._unlink(stale)
+            stale.close()
+            return self._open(create)
+
+        self._shm = shm
+        return shm.buf
+
+    @staticmethod
+    def _unlink(shm: shared_memory.SharedMemory) -> None:
+        """
+        Unlink a segment opened by `_open`.
+        """
+        # unlink() also unregisters from the resource tracker, which logs an
+        # error for segments that were already unregistered
+        resource_tracker.register(shm._name, "shared_memory")
+        shm.unlink()
+
+    def close(self) -> None:
+        """
+        Detach from the segment. The segment itself is kept.
+        """
+        if self._shm is not None:
+            self._shm.close()
+            self._shm = None
+
+    def unlink(self) -> None:
+        """
+        Remove the segment from the system.
+        """
+        buf = self._open(create=False)
+        if buf is None:
+            return
+        shm = self._shm
+        self.close()
+        self._unlink(shm)
+
+    def write(
+        self,
+        system_info: Dict[str, Any],
+        processes: List[Dict[str, Any]],
+        published_at: Optional[float] = None,
+        process_count: Optional[int] = None,
+        byte_counts: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """
+        Publish a snapshot. Only one process may write at a time.
+
+        Args:
+            system_info: Dictionary as returned by SystemMonitor.get_system_info
+            processes: List as returned by SystemMonitor.get_top_processes
+            published_at: Unix timestamp of the snapshot (default now)
+            process_count: Number of processes on the host (default the
+                length of `processes`)
+            byte_counts: Dictionary as returned by
+                SystemMonitor.get_byte_counts; sizes it lacks are derived from
+                the rounded values of `system_info`
+        """
+        buf = self._open(create=True)
+        nan = math.nan
+        memory = system_info["memory_info"]
+        network = system_info["network_stats"]
+        cores = system_info["per_core_cpu"][:MAX_CORES]
+        disks = system_info["disk_info"][:MAX_DISKS]
+        processes = processes[:MAX_PROCESSES]
+        byte_counts = byte_counts or {}
+        memory_bytes = byte_counts.get("memory") or {
+            key: round(memory[f"{key}_gb"] * GB) for key in ("total", "available", "used")
+        }
+        network_bytes = byte_counts.get("network") or {
+            "sent": round(network["bytes_sent"] * MB), "recv": round(network["bytes_recv"] * MB)
+        }
+        disk_bytes = byte_counts.get("disks", {})
+
+        (sequence,) = _SEQUENCE.unpack_from(buf, _SEQUENCE_OFFSET)
+        if sequence % 2:
+            sequence += 1  # A previous writer died mid-update
+        _SEQUENCE.pack_into(buf, _SEQUENCE_OFFSET, sequence + 1)
+
+        _SCALARS.pack_into(
+            buf, _SCALARS_OFFSET,
+            system_info["cpu_percent"],
+            memory["total_gb"], memory["available_gb"], memory["used_gb"], memory["percent"],
+            network["bytes_sent"], network["bytes_recv"],
+            network["packets_sent"], network["packets_recv"],
+            memory_bytes["total"], memory_bytes["available"], memory_bytes["used"],
+            network_bytes["sent"], network_bytes["recv"],
+        )
+        _CORES.pack_into(buf, _CORES_OFFSET, *cores, *([nan] * (MAX_CORES - len(cores))))
+        for index, disk in enumerate(disks):
+            sizes = disk_bytes.get(disk["mountpoint"]) or {
+                key: round(disk[f"{key}_gb"] * GB) for key in ("total", "used", "free")
+            }
+            _DISK.pack_into(
+                buf, _DISKS_OFFSET + index * _DISK.size,
+                _pack_text(disk["device"], 64), _pack_text(disk["mountpoint"], 128),
+                disk["total_gb"], disk["used_gb"], disk["free_gb"], disk["percent"],
+                sizes["total"], sizes["used"], sizes["free"],
+            )
+        for index, proc in enumerate(processes):
+            _PROCESS.pack_into(
+                buf, _PROCESSES_OFFSET + index * _PROCESS.size,
+                proc["pid"], _pack_text(proc["name"], 64), _pack_text(proc["username"], 32),
+                nan if proc["cpu_percent"] is None else proc["cpu_percent"],
+                nan if proc["memory_percent"] is None else proc["memory_percent"],
+            )
+
+        _HEADER.pack_into(
+            buf, 0, MAGIC, VERSION, sequence + 1,
+            time.time() if published_at is None else published_at,
+            len(cores), len(disks), len(processes),
+            len(processes) if process_count is None else process_count,
+        )
+        _SEQUENCE.pack_into(buf, _SEQUENCE_OFFSET, sequence + 2)
+
+    def _read(self, decode, max_age: Optional[float], retries: int) -> Optional[Tuple[float, Any]]:
+        """
+        Run `decode(buf, header)` under the seqlock.
+
+        Returns:
+            Tuple of (published_at, decoded value), or None when there is no
+            snapshot, it is older than `max_age`, or no consistent read was
+            possible within `retries` attempts
+        """
+        buf = self._open(create=False)
+        if buf is None:
+            return None
+
+        for _ in range(retries):
+            header = _HEADER.unpack_from(buf, 0)
+            magic, version, sequence, published_at = header[:4]
+            if magic != MAGIC or version != VERSION:
+                return None
+            if sequence % 2:
+                continue
+
+            value = decode(buf, header)
+
+            (after,) = _SEQUENCE.unpack_from(buf, _SEQUENCE_OFFSET)
+            if after == sequence:
+                if max_age is not None and time.time() - published_at > max_age:
+                    return None
+                return published_at, value
+        return None
+
+    @staticmethod
+    def _decode_system_info(buf: memoryview, header: Tuple) -> Dict[str, Any]:
+        """
+        Decode the system information of a snapshot in place.
+        """
+        n_cores, n_disks = header[4], header[5]
+        scalars = _SCALARS.unpack_from(buf, _SCALARS_OFFSET)
+        cores = _CORES.unpack_from(buf, _CORES_OFFSET)[:n_cores]
+        disks = []
+        for index in range(n_disks):
+            device, mountpoint, total, used, free, percent = _DISK.unpack_from(
+                buf, _DISKS_OFFSET + index * _DISK.size
+            )[:6]
+            disks.append({
+                "device": _unpack_text(device),
+                "mountpoint": _unpack_text(mountpoint),
+                "total_gb": total,
+                "used_gb": used,
+                "free_gb": free,
+                "percent": percent,
+            })
+        return {
+            "cpu_percent": scalars[0],
+            "memory_info": {
+                "total_gb": scalars[1],
+                "available_gb": scalars[2],
+                "used_gb": scalars[3],
+                "percent": scalars[4],
+            },
+            "disk_info": disks,
+            "per_core_cpu": list(cores),
+            "network_stats": {
+                "bytes_sent": scalars[5],
+                "bytes_recv": scalars[6],
+                "packets_sent": scalars[7],
+                "packets_recv": scalars[8],
+            },
+        }
+
+    @staticmethod
+    def _decode_byte_counts(buf: memoryview, header: Tuple) -> Dict[str, Any]:
+        """
+        Decode the unrounded sizes of a snapshot in place, shaped like
+        SystemMonitor.get_byte_counts.
+        """
+        scalars = _SCALARS.unpack_from(buf, _SCALARS_OFFSET)
+        disks = {}
+        for index in range(header[5]):
+            record = _DISK.unpack_from(buf, _DISKS_OFFSET + index * _DISK.size)
+            disks[_unpack_text(record[1])] = {"total": record[6], "used": record[7], "free": record[8]}
+        return {
+            "memory": {"total": scalars[9], "available": scalars[10], "used": scalars[11]},
+            "network": {"sent": scalars[12], "recv": scalars[13]},
+            "disks": disks,
+        }
+
+    @staticmethod
+    def _decode_processes(buf: memoryview, header: Tuple) -> List[Dict[str, Any]]:
+        """
+        Decode the top processes of a snapshot in place.
+        """
+        processes = []
+        for index in range(header[6]):
+            pid, name, username, cpu, memory = _PROCESS.unpack_from(
+                buf, _PROCESSES_OFFSET + index * _PROCESS.size
+            )
+            processes.append({
+                "pid": pid,
+                "name": _unpack_text(name),
+                "username": _unpack_text(username),
+                "cpu_percent": _number(cpu),
+                "memory_percent": _number(memory),
+            })
+        return processes
+
+    def read_system_info(self, max_age: Optional[float] = None, retries: int = 100) -> Optional[Dict[str, Any]]:
+        """
+        Read the published system information.
+
+        Args:
+            max_age: Maximum age of the snapshot in seconds
+            retries: Attempts before giving up on a concurrent write
+
+        Returns:
+            Dictionary shaped like SystemMonitor.get_system_info, or None
+        """
+        result = self._read(self._decode_system_info, max_age, retries)
+        return result[1] if result else None
+
+    def read_processes(self, max_age: Optional[float] = None, retries: int = 100) -> Optional[List[Dict[str, Any]]]:
+        """
+        Read the published top processes.
+
+        Args:
+            max_age: Maximum age of the snapshot in seconds
+            retries: Attempts before giving up on a concurrent write
+
+        Returns:
+            List shaped like SystemMonitor.get_top_processes, or None
+        """
+        result = self._read(self._decode_processes, max_age, retries)
+        return result[1] if result else None
+
+    def read_snapshot(self, max_age: Optional[float] = None, retries: int = 100) -> Optional[Dict[str, Any]]:
+        """
+        Read the whole published snapshot consistently.
+
+        Args:
+            max_age: Maximum age of the snapshot in seconds
+            retries: Attempts before giving up on a concurrent write
+
+        Returns:
+            Dictionary with `published_at`, `system_info`, `byte_counts`
+            (shaped like SystemMonitor.get_byte_counts), `processes` and
+            `process_count`, or None
+        """
+        def decode(buf, header):
+            return {
+                "system_info": self._decode_system_info(buf, header),
+                "byte_counts": self._decode_byte_counts(buf, header),
+                "processes": self._decode_processes(buf, header),
+                "process_count": header[7],
+            }
+
+        result = self._read(decode, max_age, retries)
+        if result is None:
+            return None
+        published_at, snapshot = result
+        snapshot["published_at"] = published_at
+        return snapshot
+
+
+class SnapshotPublisher:
+    """
+    Periodically collects live metrics and writes them to a SharedSnapshot.
+
+    Runs only in the process elected to record metrics, so psutil is queried
+    once per host no matter how many workers serve requests.
+    """
+
+    def __init__(self, snapshot: SharedSnapshot, interval: float = 2, monitor: Optional[SystemMonitor] = None):
+        """
+        Initialize the publisher.
+
+        Args:
+            snapshot: Segment to publish into
+            interval: Seconds between snapshots
+            monitor: SystemMonitor used to collect metrics
+        """
+        self.snapshot = snapshot
+        self.interval = interval
+        self.monitor = monitor or SystemMonitor()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        """
+        Whether the publishing task is active.
+        """
+        return self._task is not None and not self._task.done()
+
+    def publish_once(self) -> None:
+        """
+        Collect live metrics and publish them. Blocks while psutil measures CPU.
+        """
+        system_info = self.monitor.get_system_info()
+        processes = self.monitor.get_top_processes(MAX_PROCESSES)
+        process_count = self.monitor.get_process_count()
+        byte_counts = self.monitor.get_byte_counts()
+        self.snapshot.write(system_info, processes, process_count=process_count, byte_counts=byte_counts)
+
+    async def _publish(self) -> None:
+        """
+        Publish a snapshot every interval until cancelled.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            try:
+                await loop.run_in_executor(self._executor, self.publish_once)
+            except Exception as e:
+                print(f"Error publishing live snapshot: {e}")
+            await asyncio.sleep(max(0.0, self.interval - (loop.time() - started)))
+
+    async def start(self) -> None:
+        """
+        Start publishing as a task on the running event loop.
+        """
+        if self.running:
+            return
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="snapshot-publisher")
+        self._task = asyncio.create_task(self._publish())
+
+    async def stop(self) -> None:
+        """
+        Stop publishing and detach from the segment.
+        """
+        if not self.running:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._executor.shutdown(wait=True)
+        self._executor = None
+        self.snapshot.close()
@@ -0,0 +1,174 @@
+"""
+Sample Spool
+Bounded append-only file holding samples the database could not accept
+"""
+import os
+import json
+import datetime
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+
+class SampleSpool:
+    """
+    Write-ahead spool for recorder samples.
+
+    Samples are appended as JSON lines when the database rejects a write
+    (locked by another process, a long export or a backup) and replayed in
+    their original order once it accepts writes again. The file is bounded:
+    when appending would exceed `max_bytes`, the oldest samples are dropped
+    and counted in `dropped`.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 16 * 1024 * 1024):
+        """
+        Initialize the spool, picking up samples left by a previous run.
+
+        Args:
+            path: Path of the spool file
+            max_bytes: Maximum size of the spool file in bytes
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._sizes: List[int] = []
+        self._oldest: Optional[str] = None
+        self.reload()
+
+    def reload(self) -> None:
+        """
+        Re-read the spool file, e.g. after another process wrote to it.
+        """
+        with self._lock:
+            lines = self._read_lines()
+            self._sizes = [len(line) for line in lines]
+            self._oldest = self._timestamp_of(lines[0]) if lines else None
+
+    @property
+    def depth(self) -> int:
+        """
+        Number of samples waiting in the spool.
+        """
+        return len(self._sizes)
+
+    @property
+    def size_bytes(self) -> int:
+        """
+        Current size of the spool file in bytes.
+        """
+        return sum(self._sizes)
+
+    def replay_lag(self, now: Optional[datetime.datetime] = None) -> float:
+        """
+        Returns how far behind the database is, in seconds: the age of the
+        oldest spooled sample, or 0 when the spool is empty.
+        """
+        if self._oldest is None:
+            return 0.0
+        now = now or datetime.datetime.now()
+        return max(0.0, (now - datetime.datetime.fromisoformat(self._oldest)).total_seconds())
+
+    def append(self, samples: List[Dict[str, Any]]) -> None:
+        """
+        Append samples to the end of the spool.
+
+        Args:
+            samples: Sample dictionaries, each with a timestamp key
+        """
+        lines = [(json.dumps(sample, separators=(",", ":")) + "\n").encode("utf-8") for sample in samples]
+        if not lines:
+            return
+
+        with self._lock:
+            if self.size_bytes + sum(len(line) for line in lines) > self.max_bytes:
+                # Make room by discarding the oldest samples first
+                kept = self._read_lines() + lines
+                total = sum(len(line) for line in kept)
+                start = 0
+                while start < len(kept) and total > self.max_bytes:
+                    total -= len(kept[start])
+                    start += 1
+                self.dropped += start
+                self._rewrite(kept[start:])
+                return
+
+            with open(self.path, "ab") as spool_file:
+                spool_file.writelines(lines)
+                spool_file.flush()
+                os.fsync(spool_file.fileno())
+            if self._oldest is None:
+                self._oldest = samples[0]["timestamp"]
+            self._sizes.extend(len(line) for line in lines)
+
+    def replay(self, write: Callable[[List[Dict[str, Any]]], None], batch_size: int = 500) -> int:
+        """
+        Write spooled samples back in order, removing each batch once written.
+
+        Stops at the first failing batch, leaving it and everything after it
+        in the spool, and re-raises the error. Lines that cannot be decoded
+        are skipped and counted in `dropped`.
+
+        Args:
+            write: Function writing a list of samples, e.g. DatabaseManager.insert_samples
+            batch_size: Number of samples written per call
+
+        Returns:
+            Number of samples replayed
+        """
+        with self._lock:
+            lines = self._read_lines()
+            replayed = 0
+            try:
+                while replayed < len(lines):
+                    batch = lines[replayed:replayed + batch_size]
+                    samples = []
+                    for line in batch:
+                        try:
+                            samples.append(json.loads(line))
+                        except ValueError:
+                            self.dropped += 1
+                    if samples:
+                        write(samples)
+                    replayed += len(batch)
+            finally:
+                if replayed:
+                    self._rewrite(lines[replayed:])
+            return replayed
+
+    def _read_lines(self) -> List[bytes]:
+        """
+        Read all complete lines of the spool file.
+        """
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, "rb") as spool_file:
+            # A partial last line from an interrupted append is discarded
+            return [line for line in spool_file.readlines() if line.endswith(b"\n")]
+
+    def _rewrite(self, lines: List[bytes]) -> None:
+        """
+        Atomically replace the spool contents with the given lines.
+        """
+        if lines:
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "wb") as spool_file:
+                spool_file.writelines(lines)
+                spool_file.flush()
+                os.fsync(spool_file.fileno())
+            os.replace(temp_path, self.path)
+        elif os.path.exists(self.path):
+            os.remove(self.path)
+
+        self._sizes = [len(line) for line in lines]
+        self._oldest = self._timestamp_of(lines[0]) if lines else None
+
+    @staticmethod
+    def _timestamp_of(line: bytes) -> Optional[str]:
+        """
+        Extract the sample timestamp from a spool line.
+        """
+        try:
+            return json.loads(line)["timestamp"]
+        except (ValueError, KeyError):
+            return None
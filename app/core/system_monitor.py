@@ -2,8 +2,30 @@
 System Metrics Monitor
 Handles collection of system performance metrics
 """
-import psutil
-from typing import Dict, List, Any, Union, Optional
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Tuple, Union, Optional
+
+from app.core.config import PROCESS_TABLE_TTL_SECONDS
+from app.core.cpu_times import CpuTimesSampler
+from app.core.instrumentation import timed
+from app.core.lazy import lazy_import
+from app.core.pressure import PressureSampler
+from app.core.process_table import ProcessTable
+
+# psutil is loaded by the first collector call, not when the application is imported
+psutil = lazy_import("psutil")
+
+# Fields of get_system_info, mapped to their key in the result and the
+# collector producing them
+SYSTEM_INFO_FIELDS = {
+    "cpu": ("cpu_percent", "get_cpu_usage"),
+    "memory": ("memory_info", "get_memory_usage"),
+    "disk": ("disk_info", "get_disk_usage"),
+    "per_core": ("per_core_cpu", "get_per_core_cpu"),
+    "network": ("network_stats", "get_network_stats"),
+}
 
 
 class SystemMonitor:
@@ -12,21 +34,49 @@ class SystemMonitor:
     disk usage, and network statistics.
     """
     
+    # Threads running independent collectors side by side, started on first use
+    _collector_pool: Optional[ThreadPoolExecutor] = None
+    _collector_pool_lock = threading.Lock()
+    
+    def __init__(self, process_table: Optional[ProcessTable] = None,
+                 cpu_times: Optional[CpuTimesSampler] = None,
+                 pressure: Optional[PressureSampler] = None):
+        """
+        Initialize the monitor.
+        
+        Args:
+            process_table: Table processes are ranked and grouped from
+                (default a new one, reused for PROCESS_TABLE_TTL_SECONDS)
+            cpu_times: Sampler CPU time breakdowns are taken from
+                (default a new one)
+            pressure: Sampler pressure and contention metrics are taken
+                from (default a new one)
+        """
+        self.process_table = process_table or ProcessTable(ttl=PROCESS_TABLE_TTL_SECONDS)
+        self.cpu_times = cpu_times or CpuTimesSampler()
+        self.pressure = pressure or PressureSampler()
+    
     @staticmethod
-    def get_cpu_usage() -> float:
+    @timed("collector")
+    def get_cpu_usage(interval: Optional[float] = 0.5) -> float:
         """
         Retrieves the current system-wide CPU utilization percentage.
         
+        Args:
+            interval: Seconds to measure over; None measures since the
+                previous non-blocking call from the same thread
+        
         Returns:
             CPU usage percentage as a float
         """
         try:
-            return psutil.cpu_percent(interval=0.5)
+            return psutil.cpu_percent(interval=interval)
         except Exception as e:
             print(f"Error getting CPU usage: {e}")
             return 0.0
     
     @staticmethod
+    @timed("collector")
     def get_memory_usage() -> Dict[str, float]:
         """
         Retrieves current system memory usage statistics.
@@ -52,6 +102,7 @@ class SystemMonitor:
             }
     
     @staticmethod
+    @timed("collector")
     def get_disk_usage() -> List[Dict[str, Any]]:
         """
         Retrieves disk usage statistics.
@@ -76,16 +127,97 @@ class SystemMonitor:
         return disks
     
     @staticmethod
-    def get_per_core_cpu() -> List[float]:
+    @timed("collector")
+    def get_byte_counts() -> Dict[str, Any]:
+        """
+        Retrieves memory, disk and network sizes in bytes, unrounded, for
+        exporters that need base units rather than the GB and MB values
+        of get_system_info.
+        
+        Returns:
+            Dictionary with memory (total, available, used), network (sent,
+            recv) and disks, mapping each mountpoint to its total, used and
+            free bytes
+        """
+        counts: Dict[str, Any] = {"memory": {}, "network": {}, "disks": {}}
+        try:
+            mem = psutil.virtual_memory()
+            counts["memory"] = {"total": mem.total, "available": mem.available, "used": mem.used}
+            net = psutil.net_io_counters()
+            counts["network"] = {"sent": net.bytes_sent, "recv": net.bytes_recv}
+            for partition in psutil.disk_partitions():
+                try:
+                    usage = psutil.disk_usage(partition.mountpoint)
+                except (PermissionError, FileNotFoundError):
+                    continue
+                counts["disks"][partition.mountpoint] = {
+                    "total": usage.total, "used": usage.used, "free": usage.free
+                }
+        except Exception as e:
+            print(f"Error getting byte counts: {e}")
+        return counts
+    
+    @staticmethod
+    @timed("collector")
+    def get_per_core_cpu(interval: Optional[float] = 0.5) -> List[float]:
         """
         Gets per-core CPU utilization.
         
+        Args:
+            interval: Seconds to measure over; None measures since the
+                previous non-blocking call from the same thread
+        
         Returns:
             List of CPU usage percentages per core
         """
-        return psutil.cpu_percent(interval=0.5, percpu=True)
+        return psutil.cpu_percent(interval=interval, percpu=True)
+    
+    @timed("collector")
+    def get_cpu_breakdown(self) -> Dict[str, Any]:
+        """
+        Breaks down CPU time since the previous call into user, system,
+        iowait, steal and the other categories, for the system and each core.
+        Only the first call waits for a second reading; later calls read the
+        CPU counters once and return immediately.
+        
+        Returns:
+            Dictionary with cpu_percent and per_core_cpu, the busy
+            percentages, and cpu_times and per_core_times, the percentage of
+            each category
+        """
+        try:
+            sample = self.cpu_times.sample()
+        except Exception as e:
+            print(f"Error getting CPU times: {e}")
+            return {"cpu_percent": 0.0, "per_core_cpu": [], "cpu_times": {}, "per_core_times": []}
+        return {
+            "cpu_percent": sample["total"]["busy"],
+            "per_core_cpu": [core["busy"] for core in sample["per_core"]],
+            "cpu_times": {field: value for field, value in sample["total"].items() if field != "busy"},
+            "per_core_times": [
+                {field: value for field, value in core.items() if field != "busy"}
+                for core in sample["per_core"]
+            ],
+        }
+    
+    @timed("collector")
+    def get_pressure(self) -> Dict[str, Optional[float]]:
+        """
+        Retrieves pressure stall information, load averages, context switches
+        and the run queue. Rates cover the time since the previous call.
+        
+        Returns:
+            Dictionary keyed by the names in PRESSURE_FIELDS; values the host
+            does not provide are None
+        """
+        try:
+            return self.pressure.sample()
+        except Exception as e:
+            print(f"Error getting pressure metrics: {e}")
+            return {}
     
     @staticmethod
+    @timed("collector")
     def get_network_stats() -> Dict[str, Union[float, int]]:
         """
         Retrieves network I/O statistics.
@@ -102,45 +234,167 @@ class SystemMonitor:
         }
     
     @staticmethod
-    def get_top_processes(limit: int = 10) -> List[Dict[str, Any]]:
+    @timed("collector")
+    def get_network_stats_per_nic() -> Dict[str, Dict[str, Union[float, int]]]:
+        """
+        Retrieves network I/O statistics for each network interface.
+        
+        Returns:
+            Dictionary mapping interface name to its network I/O metrics
+        """
+        return {
+            nic: {
+                "bytes_sent": round(net.bytes_sent / (1024**2), 2),  # MB
+                "bytes_recv": round(net.bytes_recv / (1024**2), 2),  # MB
+                "packets_sent": net.packets_sent,
+                "packets_recv": net.packets_recv
+            }
+            for nic, net in psutil.net_io_counters(pernic=True).items()
+        }
+    
+    @staticmethod
+    @timed("collector")
+    def get_process_count() -> int:
+        """
+        Returns the number of running processes.
+        """
+        try:
+            return len(psutil.pids())
+        except Exception as e:
+            print(f"Error counting processes: {e}")
+            return 0
+    
+    def get_top_processes(self, limit: int = 10, sort: str = "cpu_percent") -> List[Dict[str, Any]]:
         """
-        Returns list of top processes by CPU usage.
+        Returns list of top processes by CPU usage, or another key.
         
         Args:
             limit: Maximum number of processes to return
+            sort: One of PROCESS_SORT_KEYS
             
         Returns:
             List of dictionaries with process information
+        
+        Raises:
+            ValueError: If the sort key is unknown
         """
-        processes = []
-        for proc in sorted(
-            psutil.process_iter(['pid', 'name', 'username', 'cpu_percent', 'memory_percent']), 
-            key=lambda x: x.info['cpu_percent'], 
-            reverse=True
-        )[:limit]:
-            try:
-                processes.append({
-                    "pid": proc.info['pid'],
-                    "name": proc.info['name'],
-                    "username": proc.info['username'],
-                    "cpu_percent": proc.info['cpu_percent'],
-                    "memory_percent": proc.info['memory_percent']
-                })
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                pass
-        return processes
+        return [
+            {
+                "pid": row["pid"],
+                "name": row["name"],
+                "username": row["username"],
+                "cpu_percent": row["cpu_percent"],
+                "memory_percent": row["memory_percent"]
+            }
+            for row in self.process_table.top(limit, sort)
+        ]
     
-    def get_system_info(self) -> Dict[str, Any]:
+    def get_process_groups(self, by: str = "name", sort: str = "cpu_percent", limit: int = 10) -> List[Dict[str, Any]]:
         """
-        Collects all system information in a single call.
+        Returns total CPU, memory, RSS, threads and process count per
+        executable name, user or cgroup.
         
+        Args:
+            by: "name", "user" or "cgroup"
+            sort: One of GROUP_SORT_KEYS
+            limit: Maximum number of groups to return
+            
         Returns:
-            Dictionary with all system metrics
+            List of dictionaries with group totals, highest first
+        
+        Raises:
+            ValueError: If the grouping or sort key is unknown
         """
-        return {
-            "cpu_percent": self.get_cpu_usage(),
-            "memory_info": self.get_memory_usage(),
-            "disk_info": self.get_disk_usage(),
-            "per_core_cpu": self.get_per_core_cpu(),
-            "network_stats": self.get_network_stats()
-        }
+        return self.process_table.groups(by, sort, limit)
+    
+    @staticmethod
+    def parse_fields(fields: Optional[str]) -> List[str]:
+        """
+        Parse a comma-separated field selection.
+        
+        Args:
+            fields: Field names (keys of SYSTEM_INFO_FIELDS), e.g. "cpu,memory";
+                None or empty selects every field
+        
+        Returns:
+            Selected field names, without duplicates
+        
+        Raises:
+            ValueError: If a field name is unknown
+        """
+        if not fields:
+            return list(SYSTEM_INFO_FIELDS)
+        names = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+        unknown = [name for name in names if name not in SYSTEM_INFO_FIELDS]
+        if unknown:
+            raise ValueError(
+                f"Unknown fields: {', '.join(unknown)}; choose from {', '.join(SYSTEM_INFO_FIELDS)}"
+            )
+        return names or list(SYSTEM_INFO_FIELDS)
+    
+    @classmethod
+    def _pool(cls) -> ThreadPoolExecutor:
+        """
+        Returns the shared collector thread pool, creating it on first use.
+        """
+        with cls._collector_pool_lock:
+            if cls._collector_pool is None:
+                cls._collector_pool = ThreadPoolExecutor(
+                    max_workers=len(SYSTEM_INFO_FIELDS), thread_name_prefix="collector"
+                )
+            return cls._collector_pool
+    
+    def _sample_field(self, field: str) -> Tuple[Any, str]:
+        """
+        Run the collector of one field and note when it finished.
+        """
+        _, collector = SYSTEM_INFO_FIELDS[field]
+        value = getattr(self, collector)()
+        return value, datetime.datetime.now().isoformat()
+    
+    def sample_system_info(self, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Collects the selected system information, running independent
+        collectors concurrently.
+        
+        The CPU and per-core collectors each measure over half a second, so
+        selecting both costs that once rather than twice, and selecting only
+        memory or network costs no measuring interval at all.
+        
+        Args:
+            fields: Field names (keys of SYSTEM_INFO_FIELDS); None selects every field
+        
+        Returns:
+            Dictionary with the selected metrics under their get_system_info
+            keys, and `sampled_at` mapping each of those keys to the ISO
+            timestamp at which its value was collected
+        """
+        fields = list(SYSTEM_INFO_FIELDS) if fields is None else fields
+        if len(fields) == 1:
+            samples = [self._sample_field(fields[0])]
+        else:
+            samples = list(self._pool().map(self._sample_field, fields))
+        
+        result: Dict[str, Any] = {}
+        sampled_at: Dict[str, str] = {}
+        for field, (value, timestamp) in zip(fields, samples):
+            key, _ = SYSTEM_INFO_FIELDS[field]
+            result[key] = value
+            sampled_at[key] = timestamp
+        result["sampled_at"] = sampled_at
+        return result
+    
+    @timed("collector")
+    def get_system_info(self, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Collects system information in a single call.
+        
+        Args:
+            fields: Field names (keys of SYSTEM_INFO_FIELDS); None selects every field
+        
+        Returns:
+            Dictionary with the selected system metrics
+        """
+        result = self.sample_system_info(fields)
+        del result["sampled_at"]
+        return result
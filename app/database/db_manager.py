@@ -2,11 +2,47 @@
 Database Manager for System Monitor
 Handles database setup, connections, and operations
 """
-import os
+import json
 import sqlite3
 import datetime
 from typing import Dict, List, Any, Tuple, Optional
 
+from app.core.cpu_times import CPU_TIME_FIELDS
+from app.core.instrumentation import timed
+from app.core.pressure import PRESSURE_FIELDS
+from app.database.packing import pack_cores, unpack_cores
+
+
+# Series that can be requested from get_history, mapped to the table and
+# column holding their values. All history tables are keyed on the same
+# tick timestamp, so any combination can be aligned with a single join.
+HISTORY_SERIES = {
+    "cpu": ("cpu_history", "usage_percent"),
+    "memory": ("memory_history", "usage_percent"),
+    "per_core": ("per_core_history", "core_percents"),
+    "disk": ("disk_history", "usage_percent"),
+    "network_sent": ("network_history", "bytes_sent"),
+    "network_recv": ("network_history", "bytes_recv"),
+    "interval": ("sample_intervals", "interval_seconds"),
+    "leader_loop_lag_max": ("leader_loop_lag", "max_ms"),
+    "leader_loop_lag_mean": ("leader_loop_lag", "mean_ms"),
+    "leader_slow_callbacks": ("leader_loop_lag", "slow_callbacks"),
+    **{f"cpu_{field}": ("cpu_times_history", field) for field in CPU_TIME_FIELDS},
+    **{f"per_core_{field}": ("per_core_times_history", field) for field in CPU_TIME_FIELDS},
+    **{field: ("pressure_history", field) for field in PRESSURE_FIELDS},
+}
+
+# Series stored as packed per-core blobs (see app.database.packing)
+PACKED_SERIES = {"per_core", *(f"per_core_{field}" for field in CPU_TIME_FIELDS)}
+
+
+PER_CORE_TABLE = '''
+        CREATE TABLE IF NOT EXISTS per_core_history (
+            timestamp TEXT PRIMARY KEY,
+            core_percents BLOB
+        )
+        '''
+
 
 class DatabaseManager:
     """
@@ -34,6 +70,21 @@ class DatabaseManager:
         cursor = conn.cursor()
         return conn, cursor
     
+    @staticmethod
+    def _history_start(hours: int, since: Optional[str] = None) -> str:
+        """
+        Returns the exclusive lower timestamp bound for a history query.
+        
+        Args:
+            hours: Number of hours of history to retrieve
+            since: Optional cursor; only samples after it are returned
+        """
+        time_ago = (datetime.datetime.now() - datetime.timedelta(hours=hours)).isoformat()
+        if since and since > time_ago:
+            return since
+        return time_ago
+    
+    @timed("database")
     def setup_database(self) -> None:
         """
         Initialize the SQLite database and tables if they don't exist.
@@ -58,6 +109,85 @@ class DatabaseManager:
         )
         ''')
         
+        # One packed blob per tick, two bytes per core (see app.database.packing)
+        self._pack_per_core_history(cursor)
+        cursor.execute(PER_CORE_TABLE)
+        
+        # Share of each CPU time category per tick, for the system as a whole
+        # and packed per core like per_core_history
+        cursor.execute(
+            "CREATE TABLE IF NOT EXISTS cpu_times_history (timestamp TEXT PRIMARY KEY, "
+            + ", ".join(f"{field} REAL" for field in CPU_TIME_FIELDS) + ")"
+        )
+        cursor.execute(
+            "CREATE TABLE IF NOT EXISTS per_core_times_history (timestamp TEXT PRIMARY KEY, "
+            + ", ".join(f"{field} BLOB" for field in CPU_TIME_FIELDS) + ")"
+        )
+        
+        # Pressure stall information, load averages, context switches and run
+        # queue of each tick (see app.core.pressure)
+        cursor.execute(
+            "CREATE TABLE IF NOT EXISTS pressure_history (timestamp TEXT PRIMARY KEY, "
+            + ", ".join(f"{field} REAL" for field in PRESSURE_FIELDS) + ")"
+        )
+        
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS disk_history (
+            timestamp TEXT PRIMARY KEY,
+            usage_percent REAL,
+            total_gb REAL,
+            used_gb REAL
+        )
+        ''')
+        
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS network_history (
+            timestamp TEXT PRIMARY KEY,
+            bytes_sent REAL,
+            bytes_recv REAL,
+            packets_sent INTEGER,
+            packets_recv INTEGER
+        )
+        ''')
+        
+        # Effective sampling interval of each tick, so aggregates can weight
+        # samples taken at different rates
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sample_intervals (
+            timestamp TEXT PRIMARY KEY,
+            interval_seconds REAL
+        )
+        ''')
+        
+        # Event loop lag of the recording (leader) worker, per tick; earlier
+        # versions named the table loop_lag, as if it covered every worker
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('loop_lag', 'leader_loop_lag')")
+        if [row[0] for row in cursor.fetchall()] == ["loop_lag"]:
+            cursor.execute("ALTER TABLE loop_lag RENAME TO leader_loop_lag")
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS leader_loop_lag (
+            timestamp TEXT PRIMARY KEY,
+            max_ms REAL,
+            mean_ms REAL,
+            slow_callbacks INTEGER
+        )
+        ''')
+        
+        # Calls that blocked the event loop of any worker, in debug mode
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS slow_callbacks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT,
+            duration_ms REAL,
+            route TEXT,
+            location TEXT,
+            pid INTEGER
+        )
+        ''')
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_slow_callbacks_timestamp ON slow_callbacks (timestamp)"
+        )
+        
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS system_alerts (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -68,9 +198,83 @@ class DatabaseManager:
         )
         ''')
         
+        # Columns added to existing databases by later versions
+        self._add_missing_columns(cursor, "system_alerts", {
+            "rule": "TEXT",
+            "state": "TEXT",
+            "end_time": "TEXT",
+            "peak_value": "REAL",
+        })
+        
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_system_alerts_timestamp ON system_alerts (timestamp)"
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_system_alerts_open ON system_alerts (rule) WHERE end_time IS NULL"
+        )
+        
+        # Processes seen in the minutes before an alert fired, as frozen
+        # by the process flight recorder
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS alert_processes (
+            alert_id INTEGER PRIMARY KEY,
+            captured_at TEXT,
+            interval_seconds REAL,
+            frames TEXT
+        )
+        ''')
+        
+        # Leases used to elect a single recorder among server processes
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS leases (
+            name TEXT PRIMARY KEY,
+            holder TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        )
+        ''')
+        
         conn.commit()
         conn.close()
     
+    @staticmethod
+    def _add_missing_columns(cursor: sqlite3.Cursor, table: str, columns: Dict[str, str]) -> None:
+        """
+        Add any of the given columns that an existing table does not have yet.
+        
+        Args:
+            cursor: Cursor of an open connection
+            table: Name of the table to migrate
+            columns: Mapping of column name to SQL type
+        """
+        cursor.execute(f"PRAGMA table_info({table})")
+        existing = {row[1] for row in cursor.fetchall()}
+        for name, column_type in columns.items():
+            if name not in existing:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
+    
+    @staticmethod
+    def _pack_per_core_history(cursor: sqlite3.Cursor) -> None:
+        """
+        Convert per-core history stored as JSON text by earlier versions
+        into packed blobs.
+        
+        Args:
+            cursor: Cursor of an open connection
+        """
+        cursor.execute("PRAGMA table_info(per_core_history)")
+        if not any(row[1] == "core_percents" and row[2].upper() == "TEXT" for row in cursor.fetchall()):
+            return
+        cursor.execute("ALTER TABLE per_core_history RENAME TO per_core_history_json")
+        cursor.execute(PER_CORE_TABLE)
+        cursor.execute("SELECT timestamp, core_percents FROM per_core_history_json")
+        rows = [
+            (timestamp, pack_cores(json.loads(value)))
+            for timestamp, value in cursor.fetchall() if value is not None
+        ]
+        cursor.executemany("INSERT INTO per_core_history VALUES (?, ?)", rows)
+        cursor.execute("DROP TABLE per_core_history_json")
+    
+    @timed("database")
     def insert_cpu_data(self, timestamp: str, usage_percent: float) -> None:
         """
         Insert CPU usage data into the database.
@@ -87,6 +291,7 @@ class DatabaseManager:
         conn.commit()
         conn.close()
     
+    @timed("database")
     def insert_memory_data(self, timestamp: str, memory_data: Dict[str, float]) -> None:
         """
         Insert memory usage data into the database.
@@ -109,6 +314,74 @@ class DatabaseManager:
         conn.commit()
         conn.close()
     
+    @timed("database")
+    def insert_per_core_data(self, timestamp: str, core_percents: List[float]) -> None:
+        """
+        Insert per-core CPU usage data into the database.
+        
+        Args:
+            timestamp: ISO format timestamp
+            core_percents: CPU usage percentage for each core
+        """
+        conn, cursor = self.get_connection()
+        cursor.execute(
+            "INSERT INTO per_core_history VALUES (?, ?)",
+            (timestamp, pack_cores(core_percents))
+        )
+        conn.commit()
+        conn.close()
+    
+    @timed("database")
+    def insert_disk_data(self, timestamp: str, disk_data: List[Dict[str, Any]]) -> None:
+        """
+        Insert aggregate disk usage across all partitions into the database.
+        
+        Args:
+            timestamp: ISO format timestamp
+            disk_data: List of per-partition dictionaries from SystemMonitor.get_disk_usage
+        """
+        conn, cursor = self.get_connection()
+        cursor.execute(
+            "INSERT INTO disk_history VALUES (?, ?, ?, ?)",
+            self._disk_row(timestamp, disk_data)
+        )
+        conn.commit()
+        conn.close()
+    
+    @staticmethod
+    def _disk_row(timestamp: str, disk_data: List[Dict[str, Any]]) -> Tuple:
+        """
+        Build a disk_history row aggregating all partitions.
+        """
+        total_gb = sum(disk["total_gb"] for disk in disk_data)
+        used_gb = sum(disk["used_gb"] for disk in disk_data)
+        usage_percent = round(used_gb / total_gb * 100, 1) if total_gb else 0.0
+        return (timestamp, usage_percent, total_gb, used_gb)
+    
+    @timed("database")
+    def insert_network_data(self, timestamp: str, network_data: Dict[str, float]) -> None:
+        """
+        Insert network I/O counters into the database.
+        
+        Args:
+            timestamp: ISO format timestamp
+            network_data: Dictionary from SystemMonitor.get_network_stats
+        """
+        conn, cursor = self.get_connection()
+        cursor.execute(
+            "INSERT INTO network_history VALUES (?, ?, ?, ?, ?)",
+            (
+                timestamp,
+                network_data["bytes_sent"],
+                network_data["bytes_recv"],
+                network_data["packets_sent"],
+                network_data["packets_recv"]
+            )
+        )
+        conn.commit()
+        conn.close()
+    
+    @timed("database")
     def insert_alert(self, timestamp: str, alert_type: str, message: str, value: float) -> None:
         """
         Insert a system alert into the database.
@@ -127,25 +400,210 @@ class DatabaseManager:
         conn.commit()
         conn.close()
     
-    def get_cpu_history(self, hours: int = 1) -> Dict[str, List]:
+    @timed("database")
+    def insert_samples(self, samples: List[Dict[str, Any]]) -> None:
+        """
+        Insert a batch of recorder samples in a single transaction.
+        
+        Writing the same samples twice is harmless, so a batch can safely be
+        replayed after a failure whose outcome is unknown.
+        
+        Args:
+            samples: List of sample dictionaries with timestamp, cpu, memory,
+                per_core, disks and network keys, and optionally interval
+                (the seconds the sample covers), cpu_times and
+                per_core_times (as produced by SystemMonitor.get_cpu_breakdown),
+                pressure (as produced by SystemMonitor.get_pressure), loop_lag
+                (as produced by LoopLagMonitor.drain) and alerts (transitions
+                as produced by AlertEngine.evaluate)
+        """
+        conn, cursor = self.get_connection()
+        try:
+            cursor.executemany(
+                "INSERT OR IGNORE INTO cpu_history VALUES (?, ?)",
+                [(sample["timestamp"], sample["cpu"]) for sample in samples]
+            )
+            cursor.executemany(
+                "INSERT OR IGNORE INTO memory_history VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        sample["timestamp"],
+                        sample["memory"]["percent"],
+                        sample["memory"]["total_gb"],
+                        sample["memory"]["used_gb"],
+                        sample["memory"]["available_gb"]
+                    )
+                    for sample in samples
+                ]
+            )
+            cursor.executemany(
+                "INSERT OR IGNORE INTO per_core_history VALUES (?, ?)",
+                [(sample["timestamp"], pack_cores(sample["per_core"])) for sample in samples]
+            )
+            placeholders = ", ".join("?" * (len(CPU_TIME_FIELDS) + 1))
+            cursor.executemany(
+                f"INSERT OR IGNORE INTO cpu_times_history VALUES ({placeholders})",
+                [
+                    (sample["timestamp"], *(sample["cpu_times"].get(field) for field in CPU_TIME_FIELDS))
+                    for sample in samples if sample.get("cpu_times")
+                ]
+            )
+            cursor.executemany(
+                f"INSERT OR IGNORE INTO per_core_times_history VALUES ({placeholders})",
+                [
+                    (sample["timestamp"], *self._pack_core_times(sample["per_core_times"]))
+                    for sample in samples if sample.get("per_core_times")
+                ]
+            )
+            cursor.executemany(
+                f"INSERT OR IGNORE INTO pressure_history VALUES ({', '.join('?' * (len(PRESSURE_FIELDS) + 1))})",
+                [
+                    (sample["timestamp"], *(sample["pressure"].get(field) for field in PRESSURE_FIELDS))
+                    for sample in samples if sample.get("pressure")
+                ]
+            )
+            cursor.executemany(
+                "INSERT OR IGNORE INTO disk_history VALUES (?, ?, ?, ?)",
+                [self._disk_row(sample["timestamp"], sample["disks"]) for sample in samples]
+            )
+            cursor.executemany(
+                "INSERT OR IGNORE INTO network_history VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        sample["timestamp"],
+                        sample["network"]["bytes_sent"],
+                        sample["network"]["bytes_recv"],
+                        sample["network"]["packets_sent"],
+                        sample["network"]["packets_recv"]
+                    )
+                    for sample in samples
+                ]
+            )
+            cursor.executemany(
+                "INSERT OR IGNORE INTO sample_intervals VALUES (?, ?)",
+                [
+                    (sample["timestamp"], sample["interval"])
+                    for sample in samples if sample.get("interval") is not None
+                ]
+            )
+            cursor.executemany(
+                "INSERT OR IGNORE INTO leader_loop_lag VALUES (?, ?, ?, ?)",
+                [
+                    (
+                        sample["timestamp"],
+                        sample["loop_lag"]["max_ms"],
+                        sample["loop_lag"]["mean_ms"],
+                        sample["loop_lag"]["slow_callbacks"]
+                    )
+                    for sample in samples if sample.get("loop_lag") is not None
+                ]
+            )
+            # Alert transitions are applied in order: firing opens an alert,
+            # resolved closes the open alert of the same rule
+            for sample in samples:
+                for alert in sample.get("alerts", []):
+                    self._apply_alert_transition(cursor, alert)
+            conn.commit()
+        finally:
+            conn.close()
+    
+    @staticmethod
+    def _pack_core_times(per_core_times: List[Dict[str, Optional[float]]]) -> List[Optional[bytes]]:
+        """
+        Pack each CPU time category of all cores into one blob.
+        
+        Args:
+            per_core_times: Breakdown of each core
+            
+        Returns:
+            One packed blob per CPU_TIME_FIELDS entry, or None for categories
+            the platform does not report
+        """
+        return [
+            pack_cores([core[field] for core in per_core_times])
+            if per_core_times[0].get(field) is not None else None
+            for field in CPU_TIME_FIELDS
+        ]
+    
+    @staticmethod
+    def _apply_alert_transition(cursor: sqlite3.Cursor, alert: Dict[str, Any]) -> None:
+        """
+        Persist a single alert state transition.
+        
+        Args:
+            cursor: Cursor of an open connection
+            alert: Transition event from AlertEngine.evaluate; firing events
+                may carry the flight recorder's window under `processes`
+        """
+        if alert["event"] == "firing":
+            cursor.execute(
+                "INSERT INTO system_alerts (timestamp, alert_type, message, value, rule, state, peak_value) "
+                "SELECT ?, ?, ?, ?, ?, 'firing', ? WHERE NOT EXISTS "
+                "(SELECT 1 FROM system_alerts WHERE rule = ? AND timestamp = ?)",
+                (alert["started_at"], alert["alert_type"], alert["message"], alert["value"],
+                 alert["rule"], alert["peak"], alert["rule"], alert["started_at"])
+            )
+            window = alert.get("processes")
+            if window is not None:
+                cursor.execute(
+                    "INSERT OR IGNORE INTO alert_processes "
+                    "SELECT id, ?, ?, ? FROM system_alerts WHERE rule = ? AND timestamp = ?",
+                    (window["captured_at"], window["interval_seconds"], json.dumps(window["frames"]),
+                     alert["rule"], alert["started_at"])
+                )
+        elif alert["event"] == "resolved":
+            cursor.execute(
+                "UPDATE system_alerts SET state = 'resolved', end_time = ?, peak_value = ? "
+                "WHERE id = (SELECT MAX(id) FROM system_alerts WHERE rule = ? AND end_time IS NULL)",
+                (alert["ended_at"], alert["peak"], alert["rule"])
+            )
+    
+    @timed("database")
+    def get_open_alerts(self) -> List[Dict[str, Any]]:
+        """
+        Get alerts that are still firing.
+        
+        Returns:
+            List of alert dictionaries with rule, timestamp and peak_value
+        """
+        try:
+            conn, cursor = self.get_connection()
+            cursor.execute(
+                "SELECT rule, timestamp, peak_value FROM system_alerts "
+                "WHERE end_time IS NULL AND rule IS NOT NULL ORDER BY id"
+            )
+            results = cursor.fetchall()
+            conn.close()
+            
+            return [
+                {"rule": row[0], "timestamp": row[1], "peak_value": row[2]}
+                for row in results
+            ]
+        except Exception as e:
+            print(f"Error getting open alerts: {e}")
+            return []
+    
+    @timed("database")
+    def get_cpu_history(self, hours: int = 1, since: Optional[str] = None) -> Dict[str, Any]:
         """
         Get CPU usage history for the specified number of hours.
         
         Args:
             hours: Number of hours of history to retrieve
+            since: Optional cursor from a previous call; only newer samples are returned
             
         Returns:
-            Dictionary with timestamps and CPU usage values
+            Dictionary with timestamps, CPU usage values and the next cursor
         """
         try:
             conn, cursor = self.get_connection()
             
-            # Get data from the last X hours
-            time_ago = (datetime.datetime.now() - datetime.timedelta(hours=hours)).isoformat()
+            # Get data from the last X hours, or after the cursor
+            start = self._history_start(hours, since)
             
             cursor.execute(
                 "SELECT timestamp, usage_percent FROM cpu_history WHERE timestamp > ? ORDER BY timestamp",
-                (time_ago,)
+                (start,)
             )
             
             results = cursor.fetchall()
@@ -153,31 +611,34 @@ class DatabaseManager:
             
             return {
                 "timestamps": [row[0] for row in results],
-                "values": [row[1] for row in results]
+                "values": [row[1] for row in results],
+                "cursor": results[-1][0] if results else since
             }
         except Exception as e:
             print(f"Error getting CPU history: {e}")
-            return {"timestamps": [], "values": []}
+            return {"timestamps": [], "values": [], "cursor": since}
     
-    def get_memory_history(self, hours: int = 1) -> Dict[str, List]:
+    @timed("database")
+    def get_memory_history(self, hours: int = 1, since: Optional[str] = None) -> Dict[str, Any]:
         """
         Get memory usage history for the specified number of hours.
         
         Args:
             hours: Number of hours of history to retrieve
+            since: Optional cursor from a previous call; only newer samples are returned
             
         Returns:
-            Dictionary with timestamps and memory usage values
+            Dictionary with timestamps, memory usage values and the next cursor
         """
         try:
             conn, cursor = self.get_connection()
             
-            # Get data from the last X hours
-            time_ago = (datetime.datetime.now() - datetime.timedelta(hours=hours)).isoformat()
+            # Get data from the last X hours, or after the cursor
+            start = self._history_start(hours, since)
             
             cursor.execute(
                 "SELECT timestamp, usage_percent FROM memory_history WHERE timestamp > ? ORDER BY timestamp",
-                (time_ago,)
+                (start,)
             )
             
             results = cursor.fetchall()
@@ -185,12 +646,176 @@ class DatabaseManager:
             
             return {
                 "timestamps": [row[0] for row in results],
-                "values": [row[1] for row in results]
+                "values": [row[1] for row in results],
+                "cursor": results[-1][0] if results else since
             }
         except Exception as e:
             print(f"Error getting memory history: {e}")
-            return {"timestamps": [], "values": []}
+            return {"timestamps": [], "values": [], "cursor": since}
     
+    @timed("database")
+    def get_history(self, series: List[str], hours: int = 1, since: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get several history series aligned on a shared time axis.
+        
+        All requested series are read in a single query by joining their
+        tables on the tick timestamp, so the timestamps are returned once.
+        
+        Args:
+            series: Names of the series to retrieve (keys of HISTORY_SERIES)
+            hours: Number of hours of history to retrieve
+            since: Optional cursor from a previous call; only newer samples are returned
+            
+        Returns:
+            Dictionary with timestamps, a mapping of series name to values and
+            the next cursor. Values are None where a series has no sample for
+            a timestamp.
+        """
+        unknown = [name for name in series if name not in HISTORY_SERIES]
+        if unknown:
+            raise ValueError(f"Unknown history series: {', '.join(unknown)}")
+        
+        empty = {"timestamps": [], "series": {name: [] for name in series}, "cursor": since}
+        if not series:
+            return empty
+        
+        # The first requested table drives the time axis, others are joined to it
+        tables = []
+        for name in series:
+            table = HISTORY_SERIES[name][0]
+            if table not in tables:
+                tables.append(table)
+        base = tables[0]
+        joins = "".join(
+            f" LEFT JOIN {table} ON {table}.timestamp = {base}.timestamp"
+            for table in tables[1:]
+        )
+        columns = ", ".join(
+            "{}.{}".format(*HISTORY_SERIES[name]) for name in series
+        )
+        
+        try:
+            conn, cursor = self.get_connection()
+            
+            # Get data from the last X hours, or after the cursor
+            start = self._history_start(hours, since)
+            
+            cursor.execute(
+                f"SELECT {base}.timestamp, {columns} FROM {base}{joins} "
+                f"WHERE {base}.timestamp > ? ORDER BY {base}.timestamp",
+                (start,)
+            )
+            
+            results = cursor.fetchall()
+            conn.close()
+            
+            history = {
+                "timestamps": [row[0] for row in results],
+                "series": {},
+                "cursor": results[-1][0] if results else since
+            }
+            for index, name in enumerate(series, start=1):
+                values = [row[index] for row in results]
+                if name in PACKED_SERIES:
+                    values = [unpack_cores(value) if value is not None else None for value in values]
+                history["series"][name] = values
+            return history
+        except Exception as e:
+            print(f"Error getting history: {e}")
+            return empty
+    
+    @timed("database")
+    def get_per_core_samples(self, start: str) -> List[Tuple[str, bytes, Optional[float]]]:
+        """
+        Get packed per-core samples, without decoding them.
+        
+        Args:
+            start: ISO format timestamp; only later samples are returned
+            
+        Returns:
+            List of (timestamp, packed percentages, interval) tuples in time
+            order; the percentages are encoded by
+            app.database.packing.pack_cores, and the interval is the seconds
+            the sample covers, or None where it was not recorded
+        """
+        try:
+            conn, cursor = self.get_connection()
+            cursor.execute(
+                "SELECT p.timestamp, p.core_percents, i.interval_seconds FROM per_core_history p "
+                "LEFT JOIN sample_intervals i ON i.timestamp = p.timestamp "
+                "WHERE p.timestamp > ? ORDER BY p.timestamp",
+                (start,)
+            )
+            results = cursor.fetchall()
+            conn.close()
+            return results
+        except Exception as e:
+            print(f"Error getting per-core samples: {e}")
+            return []
+    
+    @timed("database")
+    def get_history_version(self, series: List[str], hours: int = 1, since: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Summarize the samples a history query would return, without reading them.
+        
+        The summary changes whenever a sample is added to or ages out of the
+        queried range, so it can be used to validate cached responses.
+        
+        Args:
+            series: Names of the series to summarize (keys of HISTORY_SERIES)
+            hours: Number of hours of history
+            since: Optional cursor from a previous call
+            
+        Returns:
+            Dictionary with the sample count and the first and last timestamps,
+            or None if the database could not be read
+        """
+        unknown = [name for name in series if name not in HISTORY_SERIES]
+        if unknown:
+            raise ValueError(f"Unknown history series: {', '.join(unknown)}")
+        
+        # Samples are written to all tables of a tick together, so the table
+        # driving the time axis stands for the whole query
+        base = HISTORY_SERIES[series[0]][0] if series else "cpu_history"
+        try:
+            conn, cursor = self.get_connection()
+            cursor.execute(
+                f"SELECT COUNT(*), MIN(timestamp), MAX(timestamp) FROM {base} WHERE timestamp > ?",
+                (self._history_start(hours, since),)
+            )
+            count, first, last = cursor.fetchone()
+            conn.close()
+            return {"count": count, "first": first, "last": last}
+        except Exception as e:
+            print(f"Error getting history version: {e}")
+            return None
+    
+    @timed("database")
+    def get_alerts_version(self) -> Optional[Dict[str, Any]]:
+        """
+        Summarize the alerts table, without reading the alerts.
+        
+        The summary changes whenever an alert is inserted or resolved.
+        
+        Returns:
+            Dictionary with the latest alert id, the alert count, the number of
+            open alerts and the latest change time, or None if the database
+            could not be read
+        """
+        try:
+            conn, cursor = self.get_connection()
+            cursor.execute(
+                "SELECT MAX(id), COUNT(*), COUNT(*) - COUNT(end_time), "
+                "MAX(MAX(timestamp), COALESCE(MAX(end_time), '')) FROM system_alerts"
+            )
+            latest_id, count, open_count, last = cursor.fetchone()
+            conn.close()
+            return {"latest_id": latest_id, "count": count, "open": open_count, "last": last or None}
+        except Exception as e:
+            print(f"Error getting alerts version: {e}")
+            return None
+    
+    @timed("database")
     def get_alerts(self, limit: int = 10) -> List[Dict[str, Any]]:
         """
         Get recent system alerts.
@@ -199,13 +824,15 @@ class DatabaseManager:
             limit: Maximum number of alerts to retrieve
             
         Returns:
-            List of alert dictionaries
+            List of alert dictionaries. Alerts raised by the alert engine also
+            carry their state, end time and peak value.
         """
         try:
             conn, cursor = self.get_connection()
             
             cursor.execute(
-                "SELECT timestamp, alert_type, message, value FROM system_alerts ORDER BY timestamp DESC LIMIT ?",
+                "SELECT timestamp, alert_type, message, value, id, state, end_time, peak_value "
+                "FROM system_alerts ORDER BY timestamp DESC LIMIT ?",
                 (limit,)
             )
             
@@ -217,10 +844,148 @@ class DatabaseManager:
                     "timestamp": row[0],
                     "alert_type": row[1],
                     "message": row[2],
-                    "value": row[3]
+                    "value": row[3],
+                    "id": row[4],
+                    "state": row[5],
+                    "end_time": row[6],
+                    "peak_value": row[7]
                 }
                 for row in results
             ]
         except Exception as e:
             print(f"Error getting alerts: {e}")
             return []
+    
+    @timed("database")
+    def get_alert_processes(self, alert_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Get the processes captured when an alert fired.
+        
+        Args:
+            alert_id: ID of the alert
+            
+        Returns:
+            Dictionary as returned by ProcessFlightRecorder.freeze, or None
+            if no processes were captured for the alert
+        """
+        try:
+            conn, cursor = self.get_connection()
+            cursor.execute(
+                "SELECT captured_at, interval_seconds, frames FROM alert_processes WHERE alert_id = ?",
+                (alert_id,)
+            )
+            row = cursor.fetchone()
+            conn.close()
+            
+            if row is None:
+                return None
+            return {"captured_at": row[0], "interval_seconds": row[1], "frames": json.loads(row[2])}
+        except Exception as e:
+            print(f"Error getting alert processes: {e}")
+            return None
+    
+    @timed("database")
+    def insert_slow_callback(self, event: Dict[str, Any]) -> None:
+        """
+        Insert a call that blocked the event loop.
+        
+        Args:
+            event: Report as produced by SlowCallbackDetector, with timestamp,
+                duration_ms, route, location and pid keys
+        """
+        try:
+            conn, cursor = self.get_connection()
+            cursor.execute(
+                "INSERT INTO slow_callbacks (timestamp, duration_ms, route, location, pid) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (event["timestamp"], event["duration_ms"], event["route"], event["location"], event["pid"])
+            )
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            print(f"Error inserting slow callback: {e}")
+    
+    @timed("database")
+    def get_slow_callbacks(self, hours: int = 1, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Get recent calls that blocked the event loop.
+        
+        Args:
+            hours: Number of hours of history to retrieve
+            limit: Maximum number of reports to retrieve
+        
+        Returns:
+            List of report dictionaries, newest first
+        """
+        try:
+            conn, cursor = self.get_connection()
+            
+            cursor.execute(
+                "SELECT timestamp, duration_ms, route, location, pid FROM slow_callbacks "
+                "WHERE timestamp > ? ORDER BY timestamp DESC LIMIT ?",
+                (self._history_start(hours), limit)
+            )
+            
+            results = cursor.fetchall()
+            conn.close()
+            
+            return [
+                {
+                    "timestamp": row[0],
+                    "duration_ms": row[1],
+                    "route": row[2],
+                    "location": row[3],
+                    "pid": row[4]
+                }
+                for row in results
+            ]
+        except Exception as e:
+            print(f"Error getting slow callbacks: {e}")
+            return []
+    
+    @timed("database")
+    def acquire_lease(self, name: str, holder: str, ttl: float, now: float) -> bool:
+        """
+        Take or renew a named lease.
+        
+        The lease is granted when it is free, expired or already held by
+        `holder`. The check and the write are a single statement, so two
+        processes can never both acquire the same lease.
+        
+        Args:
+            name: Name of the lease
+            holder: Unique identifier of the caller
+            ttl: Seconds until the lease expires unless renewed
+            now: Current Unix timestamp
+            
+        Returns:
+            True if `holder` holds the lease afterwards
+        """
+        conn, cursor = self.get_connection()
+        try:
+            cursor.execute(
+                "INSERT INTO leases (name, holder, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at "
+                "WHERE leases.holder = excluded.holder OR leases.expires_at < ?",
+                (name, holder, now + ttl, now)
+            )
+            conn.commit()
+            return cursor.rowcount > 0
+        finally:
+            conn.close()
+    
+    @timed("database")
+    def release_lease(self, name: str, holder: str) -> None:
+        """
+        Give up a lease held by `holder`, so another process can take over.
+        
+        Args:
+            name: Name of the lease
+            holder: Unique identifier of the caller
+        """
+        conn, cursor = self.get_connection()
+        try:
+            cursor.execute("DELETE FROM leases WHERE name = ? AND holder = ?", (name, holder))
+            conn.commit()
+        finally:
+            conn.close()
@@ -0,0 +1,49 @@
+"""
+Packed Per-Core Samples
+Fixed-width binary encoding of the per-core CPU percentages of one tick, so a
+tick is stored as a single small blob however many cores the host has
+"""
+import sys
+from array import array
+from typing import List, Sequence
+
+# Percentages are stored as little-endian unsigned 16-bit hundredths of a
+# percent: two bytes per core
+CORE_TYPECODE = "H"
+CORE_SCALE = 100
+CORE_MAX = 0xFFFF
+
+
+def pack_cores(percents: Sequence[float]) -> bytes:
+    """
+    Encode per-core CPU percentages.
+
+    Args:
+        percents: CPU usage percentage of each core
+
+    Returns:
+        Two bytes per core
+    """
+    values = array(CORE_TYPECODE, [
+        min(max(int(round(percent * CORE_SCALE)), 0), CORE_MAX) for percent in percents
+    ])
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values.tobytes()
+
+
+def unpack_cores(blob: bytes) -> List[float]:
+    """
+    Decode per-core CPU percentages encoded by pack_cores.
+
+    Args:
+        blob: Packed percentages
+
+    Returns:
+        CPU usage percentage of each core
+    """
+    values = array(CORE_TYPECODE)
+    values.frombytes(blob)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return [value / CORE_SCALE for value in values]
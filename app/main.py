@@ -2,62 +2,219 @@
 Main application entry point
 Initializes and runs the FastAPI application
 """
-import uvicorn
-from fastapi import FastAPI, Request, Depends
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
 from fastapi.security import HTTPBasic
 
-from app.core.config import APP_TITLE, APP_DESCRIPTION, APP_VERSION, DB_PATH, HOST, PORT
-from app.core.config import METRICS_INTERVAL_SECONDS, CPU_ALERT_THRESHOLD, MEMORY_ALERT_THRESHOLD
-from app.core.system_monitor import SystemMonitor
+from app.core.config import APP_TITLE, APP_DESCRIPTION, APP_VERSION, DB_PATH, SPOOL_PATH, HOST, PORT
+from app.core.config import METRICS_INTERVAL_SECONDS, CPU_ALERT_THRESHOLD, MEMORY_ALERT_THRESHOLD, PRESSURE_ALERT_THRESHOLD
+from app.core.config import METRICS_BATCH_SIZE, RECORDER_MAX_WORKERS, ALERT_FOR_SECONDS, ALERT_HYSTERESIS
+from app.core.config import SPOOL_MAX_BYTES, LEADER_LEASE_SECONDS, LEADER_HEARTBEAT_SECONDS
+from app.core.config import LIVE_SNAPSHOT_INTERVAL_SECONDS, LIVE_SNAPSHOT_MAX_AGE_SECONDS
+from app.core.config import LIVE_STREAM_INTERVAL_SECONDS, LIVE_STREAM_QUEUE_SIZE
+from app.core.config import WS_TOPIC_TICK_SECONDS, WS_QUEUE_SIZE
+from app.core.config import COMPRESSION_ENABLED, COMPRESSION_MINIMUM_SIZE, COMPRESSION_GZIP_LEVEL, COMPRESSION_BROTLI_QUALITY
+from app.core.config import SELF_STATS_ENABLED, LOOP_LAG_INTERVAL_SECONDS, LOOP_DEBUG, SLOW_CALLBACK_SECONDS
+from app.core.config import FLIGHT_RECORDER_WINDOW_SECONDS, FLIGHT_RECORDER_INTERVAL_SECONDS, FLIGHT_RECORDER_PROCESSES
+from app.core.instrumentation import STATS
+from app.core.config import ADAPTIVE_SAMPLING, ADAPTIVE_FAST_INTERVAL_SECONDS
+from app.core.config import ADAPTIVE_NEAR_THRESHOLD, ADAPTIVE_CHANGE_THRESHOLD
+from app.core.flight_recorder import ProcessFlightRecorder
+from app.core.leader import LeaderElection
+from app.core.loop_monitor import LoopLagMonitor, SlowCallbackDetector, route_table
+from app.core.shared_snapshot import SharedSnapshot, SnapshotPublisher
 from app.core.metrics_recorder import MetricsRecorder
+from app.core.sampling import AdaptiveSamplingPolicy
+from app.core.spool import SampleSpool
 from app.database.db_manager import DatabaseManager
-from app.api.endpoints import router
+from app.api.compression import CompressionMiddleware
+from app.api.endpoints import router, get_system_monitor
+from app.api.timing import RouteTimingMiddleware
+from app.api.stream import LiveBroadcaster
+from app.api.topics import TopicBroadcaster
 
 # Initialize security
 security = HTTPBasic()
 
-# Initialize application
-app = FastAPI(
-    title=APP_TITLE,
-    description=APP_DESCRIPTION,
-    version=APP_VERSION,
-)
-
-# Include API routes
-app.include_router(router)
-
 
-def initialize_app():
+@asynccontextmanager
+async def lifespan(app: FastAPI):
     """
-    Initialize application components
+    Start application components when the server starts and stop them on shutdown
     - Setup database
-    - Start metrics recorder
+    - Elect one recorder per database; with several workers, only the
+      leader records metrics and publishes the live snapshot shared by all
+      workers, and the others serve reads
+    - Serve the live stream and WebSocket topics from one producer each per worker
+    - Measure event loop lag in every worker (served from each worker's
+      /api/self-stats; only the leader's is stored with the samples) and,
+      in debug mode, report calls that block the loop
+    - Stop the recorder on shutdown, flushing buffered samples
+    
+    Importing this module has no side effects and does not load psutil,
+    Jinja2 or uvicorn; nothing runs until the server (or a TestClient used
+    as a context manager) enters the lifespan, which sets up and migrates
+    the database once.
     """
     # Initialize database
     db_manager = DatabaseManager(db_path=DB_PATH)
     
-    # Start metrics recorder
+    sampling_policy = None
+    if ADAPTIVE_SAMPLING:
+        sampling_policy = AdaptiveSamplingPolicy(
+            fast_interval=ADAPTIVE_FAST_INTERVAL_SECONDS,
+            slow_interval=METRICS_INTERVAL_SECONDS,
+            near_threshold=ADAPTIVE_NEAR_THRESHOLD,
+            change_threshold=ADAPTIVE_CHANGE_THRESHOLD,
+        )
+    
+    # Measure this worker's event loop lag; while this worker is leader, the
+    # recorder stores it with every sample as the leader_loop_lag series
+    loop_monitor = LoopLagMonitor(interval=LOOP_LAG_INTERVAL_SECONDS)
+    detector = None
+    if LOOP_DEBUG:
+        def on_slow(event):
+            loop_monitor.count_slow_callback()
+            print(
+                f"Event loop blocked for {event['duration_ms']:.0f} ms "
+                f"in {event['route'] or 'background task'} at {event['location']}"
+            )
+            db_manager.insert_slow_callback(event)
+        
+        detector = SlowCallbackDetector(
+            threshold=SLOW_CALLBACK_SECONDS, routes=route_table(app), on_slow=on_slow
+        )
+    
+    # The recorder and the live snapshot publisher share the endpoints'
+    # monitor, and so a single process table
+    monitor = get_system_monitor()
+    
+    # Create the metrics recorder; it runs only while this process is leader
     recorder = MetricsRecorder(
         db_manager=db_manager,
         interval=METRICS_INTERVAL_SECONDS,
         cpu_threshold=CPU_ALERT_THRESHOLD,
         memory_threshold=MEMORY_ALERT_THRESHOLD,
+        pressure_threshold=PRESSURE_ALERT_THRESHOLD,
+        batch_size=METRICS_BATCH_SIZE,
+        max_workers=RECORDER_MAX_WORKERS,
+        alert_for_seconds=ALERT_FOR_SECONDS,
+        alert_hysteresis=ALERT_HYSTERESIS,
+        spool=SampleSpool(SPOOL_PATH, max_bytes=SPOOL_MAX_BYTES),
+        sampling_policy=sampling_policy,
+        loop_monitor=loop_monitor,
+        flight_recorder=ProcessFlightRecorder(
+            window_seconds=FLIGHT_RECORDER_WINDOW_SECONDS,
+            interval=FLIGHT_RECORDER_INTERVAL_SECONDS,
+            max_processes=FLIGHT_RECORDER_PROCESSES,
+        ),
+        monitor=monitor,
     )
-    recorder.start()
     
-    return {"db_manager": db_manager, "recorder": recorder}
+    # Live metrics are published by the leader and read by every worker
+    snapshot_name = SharedSnapshot.name_for(DB_PATH)
+    publisher = SnapshotPublisher(
+        SharedSnapshot(snapshot_name), interval=LIVE_SNAPSHOT_INTERVAL_SECONDS, monitor=monitor
+    )
+    
+    # Make components available to the endpoints' dependencies
+    app.state.db_manager = db_manager
+    app.state.recorder = recorder
+    app.state.snapshot = SharedSnapshot(snapshot_name)
+    app.state.loop_monitor = loop_monitor
+    
+    # Live stream producer, reading the shared snapshot when it is fresh
+    
+    def live_system_info():
+        system_info = app.state.snapshot.read_system_info(max_age=LIVE_SNAPSHOT_MAX_AGE_SECONDS)
+        return system_info if system_info is not None else monitor.get_system_info()
+    
+    def live_processes():
+        processes = app.state.snapshot.read_processes(max_age=LIVE_SNAPSHOT_MAX_AGE_SECONDS)
+        return processes[:10] if processes is not None else monitor.get_top_processes()
+    
+    app.state.broadcaster = LiveBroadcaster(
+        db_manager,
+        system_info=live_system_info,
+        processes=live_processes,
+        interval=LIVE_STREAM_INTERVAL_SECONDS,
+        queue_size=LIVE_STREAM_QUEUE_SIZE,
+    )
+    app.state.topic_broadcaster = TopicBroadcaster(
+        monitor, tick=WS_TOPIC_TICK_SECONDS, queue_size=WS_QUEUE_SIZE
+    )
+    
+    election = LeaderElection(
+        db_manager,
+        ttl=LEADER_LEASE_SECONDS,
+        heartbeat=LEADER_HEARTBEAT_SECONDS,
+    )
+    app.state.leader = election
+    
+    async def on_elected():
+        await publisher.start()
+        await recorder.start()
+    
+    async def on_demoted():
+        await recorder.stop()
+        await publisher.stop()
+    
+    await loop_monitor.start()
+    if detector is not None:
+        detector.start()
+    election.start(on_elected=on_elected, on_demoted=on_demoted)
+    try:
+        yield
+    finally:
+        await app.state.broadcaster.stop()
+        await app.state.topic_broadcaster.stop()
+        await election.stop()
+        if recorder.running:
+            await recorder.stop()
+        await publisher.stop()
+        election.release()
+        if detector is not None:
+            detector.stop()
+        await loop_monitor.stop()
+        app.state.snapshot.close()
+        app.state.db_manager = None
+        app.state.recorder = None
+        app.state.leader = None
+        app.state.snapshot = None
+        app.state.broadcaster = None
+        app.state.topic_broadcaster = None
+        app.state.loop_monitor = None
 
 
-# Application initialization
-app_components = initialize_app()
+# Initialize application
+app = FastAPI(
+    title=APP_TITLE,
+    description=APP_DESCRIPTION,
+    version=APP_VERSION,
+    lifespan=lifespan,
+)
 
-# Make db_manager available for dependency injection
-from app.api.endpoints import get_db_manager
+# Compress large responses, if enabled
+if COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=COMPRESSION_MINIMUM_SIZE,
+        gzip_level=COMPRESSION_GZIP_LEVEL,
+        brotli_quality=COMPRESSION_BROTLI_QUALITY,
+    )
 
-app.dependency_overrides[get_db_manager] = lambda: app_components["db_manager"]
+# Time every route, including compression
+STATS.enabled = SELF_STATS_ENABLED
+app.add_middleware(RouteTimingMiddleware)
+
+# Include API routes
+app.include_router(router)
 
 
 if __name__ == "__main__":
+    import uvicorn
+    
     print("Starting FastAPI System Monitor")
     print(f"Access the application at http://{HOST}:{PORT}")
     uvicorn.run(app, host=HOST, port=PORT)
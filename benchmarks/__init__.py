@@ -0,0 +1,3 @@
+"""
+Benchmarks for System Performance Monitor
+"""
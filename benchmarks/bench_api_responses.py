@@ -0,0 +1,110 @@
+"""
+API Response Benchmark
+Compares latency and bytes on the wire of large API responses with the
+generic FastAPI encoder, the fast JSON response class and compression
+
+Usage:
+python -m benchmarks.bench_api_responses [--points N] [--processes N] [--requests N]
+"""
+import time
+import random
+import argparse
+import statistics
+from unittest.mock import Mock
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from app.api import formats
+from app.api.compression import CompressionMiddleware, available_encodings
+from app.api.endpoints import get_db_manager, get_system_monitor, get_live_snapshot
+from app.main import app
+from benchmarks.bench_history_formats import build_history
+
+
+def build_processes(count: int) -> list:
+    """Build a process list like SystemMonitor.get_top_processes returns"""
+    return [
+        {
+            "pid": pid,
+            "name": f"process-{pid}",
+            "username": random.choice(["root", "www-data", "postgres"]),
+            "cpu_percent": round(random.uniform(0, 100), 1),
+            "memory_percent": round(random.uniform(0, 10), 3),
+        }
+        for pid in range(count)
+    ]
+
+
+def percentiles(timings: list) -> tuple:
+    """p50 and p99 of a list of timings"""
+    timings = sorted(timings)
+    return statistics.median(timings), timings[max(0, int(len(timings) * 0.99) - 1)]
+
+
+def bench_encoders(payloads: dict, repeat: int) -> None:
+    """Encode time of the default FastAPI path against FastJSONResponse"""
+    print(f"Encoding, p50/p99 of {repeat} runs")
+    print(f"{'payload':<12}{'encoder':<22}{'p50 ms':>10}{'p99 ms':>10}{'bytes':>10}")
+    encoders = {
+        "jsonable_encoder": lambda content: JSONResponse(jsonable_encoder(content)).body,
+        "FastJSONResponse": lambda content: formats.FastJSONResponse(content).body,
+    }
+    for name, content in payloads.items():
+        for encoder, encode in encoders.items():
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                body = encode(content)
+                timings.append((time.perf_counter() - started) * 1000)
+            p50, p99 = percentiles(timings)
+            print(f"{name:<12}{encoder:<22}{p50:>10.2f}{p99:>10.2f}{len(body):>10}")
+
+
+def bench_endpoints(paths: dict, repeat: int) -> None:
+    """End-to-end latency and wire size per content coding"""
+    client = TestClient(CompressionMiddleware(app, minimum_size=1024))
+    print(f"\nRequests through the app, p50/p99 of {repeat} requests")
+    print(f"{'endpoint':<12}{'encoding':<12}{'p50 ms':>10}{'p99 ms':>10}{'bytes':>10}")
+    for name, path in paths.items():
+        for encoding in ["identity"] + available_encodings():
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                response = client.get(path, headers={"Accept-Encoding": encoding})
+                timings.append((time.perf_counter() - started) * 1000)
+            size = int(response.headers.get("content-length", len(response.content)))
+            p50, p99 = percentiles(timings)
+            print(f"{name:<12}{encoding:<12}{p50:>10.2f}{p99:>10.2f}{size:>10}")
+
+
+def run(points: int, processes: int, requests: int) -> None:
+    history = build_history(points)
+    process_list = build_processes(processes)
+    
+    db_manager = Mock()
+    db_manager.get_history.return_value = dict(history, cursor=history["timestamps"][-1])
+    db_manager.get_history_version.return_value = None
+    monitor = Mock()
+    monitor.get_top_processes.return_value = process_list
+    app.dependency_overrides[get_db_manager] = lambda: db_manager
+    app.dependency_overrides[get_system_monitor] = lambda: monitor
+    app.dependency_overrides[get_live_snapshot] = lambda: None
+    
+    print(f"orjson: {'yes' if formats.orjson is not None else 'no'}; encodings: {', '.join(available_encodings())}\n")
+    bench_encoders({"history": history, "processes": process_list}, requests)
+    bench_endpoints({
+        "history": "/api/history?series=cpu,memory,per_core",
+        "processes": "/api/processes",
+    }, requests)
+    app.dependency_overrides = {}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark API response encoding and compression")
+    parser.add_argument("--points", type=int, default=3600, help="History samples (default: 3600)")
+    parser.add_argument("--processes", type=int, default=500, help="Processes in the list (default: 500)")
+    parser.add_argument("--requests", type=int, default=50, help="Runs per configuration (default: 50)")
+    args = parser.parse_args()
+    run(args.points, args.processes, args.requests)
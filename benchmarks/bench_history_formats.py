@@ -0,0 +1,68 @@
+"""
+History Format Benchmark
+Compares encode time and payload size of the history response formats
+
+Usage:
+python -m benchmarks.bench_history_formats [--points N] [--repeat N]
+"""
+import time
+import random
+import argparse
+import datetime
+import statistics
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.api import formats
+
+
+def build_history(points: int, cores: int = 8) -> dict:
+    """Build a combined history payload with one sample per second"""
+    start = datetime.datetime.now() - datetime.timedelta(seconds=points)
+    timestamps = [(start + datetime.timedelta(seconds=i)).isoformat() for i in range(points)]
+    return {
+        "timestamps": timestamps,
+        "series": {
+            "cpu": [round(random.uniform(0, 100), 1) for _ in range(points)],
+            "memory": [round(random.uniform(0, 100), 1) for _ in range(points)],
+            "per_core": [
+                [round(random.uniform(0, 100), 1) for _ in range(cores)]
+                for _ in range(points)
+            ],
+        },
+    }
+
+
+def encoders() -> dict:
+    """Map of format name to an encode function returning bytes"""
+    table = {
+        "default-json": lambda h: JSONResponse(jsonable_encoder(h)).body,
+        "fast-json": lambda h: formats.FastJSONResponse(h).body,
+        "columnar-json": lambda h: formats.FastJSONResponse(formats.to_columnar(h)).body,
+        "binary-f64": formats.to_binary,
+    }
+    if formats.msgpack is not None:
+        table["msgpack"] = lambda h: formats.msgpack.packb(formats.to_columnar(h))
+    return table
+
+
+def run(points: int, repeat: int) -> None:
+    history = build_history(points)
+    print(f"History with {points} points, best/median of {repeat} runs")
+    print(f"{'format':<16}{'best ms':>10}{'median ms':>12}{'bytes':>12}")
+    for name, encode in encoders().items():
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            payload = encode(history)
+            timings.append((time.perf_counter() - started) * 1000)
+        print(f"{name:<16}{min(timings):>10.2f}{statistics.median(timings):>12.2f}{len(payload):>12}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark history response formats")
+    parser.add_argument("--points", type=int, default=3600, help="Number of samples (default: 3600)")
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per format (default: 20)")
+    args = parser.parse_args()
+    run(args.points, args.repeat)
@@ -0,0 +1,125 @@
+"""
+Startup Benchmark
+Measures how long importing the application and entering its lifespan take
+in fresh interpreters, using `python -X importtime`, as paid on every cold
+start and every development reload
+
+Usage:
+python -m benchmarks.bench_startup [--runs N]
+"""
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+from typing import Dict, List, Sequence, Tuple
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Import time of the application's own modules and dependencies, measured
+# with the web framework already loaded, that the tests allow
+APP_IMPORT_BUDGET_SECONDS = 0.25
+
+# Modules the application must not load at import; they are loaded on first use
+LAZY_MODULES = ("psutil", "jinja2", "uvicorn", "numpy")
+
+LIFESPAN_CODE = """
+import os, tempfile, time
+started = time.perf_counter()
+import app.main
+from fastapi.testclient import TestClient
+imported = time.perf_counter()
+app.main.DB_PATH = os.path.join(tempfile.mkdtemp(), "startup.db")
+with TestClient(app.main.app):
+    ready = time.perf_counter()
+print(imported - started, ready - imported)
+"""
+
+
+def import_times(module: str = "app.main", preload: Sequence[str] = ()) -> Dict[str, Tuple[int, int]]:
+    """
+    Import a module in a fresh interpreter with `-X importtime`.
+
+    Args:
+        module: Module to import
+        preload: Modules imported first, so their time is not counted
+
+    Returns:
+        Self and cumulative import time in microseconds of every module
+        loaded by the import of `module`, including the module itself
+    """
+    imports = "; ".join(f"import {name}" for name in (*preload, module))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", imports],
+        capture_output=True, text=True, cwd=PROJECT_DIR, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if name.strip() in preload and not name[1:].startswith(" "):
+            # Everything listed so far was loaded by a preloaded module
+            times = {}
+            continue
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def loaded_modules(module: str = "app.main") -> List[str]:
+    """
+    Returns the LAZY_MODULES that importing a module actually executes.
+    """
+    code = (
+        f"import sys, {module}; "
+        f"print(' '.join(name for name in {LAZY_MODULES!r} "
+        "if name in sys.modules and type(sys.modules[name]).__name__ == 'module'))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, cwd=PROJECT_DIR, check=True
+    )
+    return result.stdout.split()
+
+
+def app_import_seconds(runs: int = 3) -> float:
+    """
+    Fastest import of the application with FastAPI already loaded.
+    """
+    return min(import_times(preload=("fastapi",))["app.main"][1] for _ in range(runs)) / 1e6
+
+
+def run(runs: int) -> None:
+    """Print import and lifespan startup times"""
+    cold = [import_times()["app.main"][1] / 1e6 for _ in range(runs)]
+    own = [import_times(preload=("fastapi",))["app.main"][1] / 1e6 for _ in range(runs)]
+    print(f"Import of app.main, median of {runs} fresh interpreters")
+    print(f"  {'with framework':<28}{statistics.median(cold) * 1000:>8.1f} ms")
+    print(
+        f"  {'application only':<28}{statistics.median(own) * 1000:>8.1f} ms"
+        f"  (budget {APP_IMPORT_BUDGET_SECONDS * 1000:.0f} ms)"
+    )
+
+    times = import_times(preload=("fastapi",))
+    slowest = sorted(
+        ((name, self_us) for name, (self_us, _) in times.items() if name != "app.main"),
+        key=lambda item: item[1], reverse=True,
+    )[:10]
+    print("Slowest modules loaded by the application (self time)")
+    for name, self_us in slowest:
+        print(f"  {name:<40}{self_us / 1000:>8.1f} ms")
+    print(f"Loaded at import: {', '.join(loaded_modules()) or 'none of ' + ', '.join(LAZY_MODULES)}")
+
+    lifespans = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", LIFESPAN_CODE], capture_output=True, text=True, cwd=PROJECT_DIR, check=True
+        )
+        lifespans.append(float(result.stdout.split()[-1]))
+    print(f"Lifespan startup (database setup, election, tasks): {statistics.median(lifespans) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark application import and startup time")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per measurement (default: 5)")
+    args = parser.parse_args()
+    run(args.runs)
@@ -0,0 +1,115 @@
+"""
+Topic Fan-out Benchmark
+Load test of the WebSocket topic broadcaster with thousands of local subscribers
+
+Each subscriber picks a random set of topics and an interval; every tick
+the due topics are collected and fanned out, and a share of the
+subscribers drain their queues, as their connections would.
+
+Usage:
+python -m benchmarks.bench_topic_fanout [--subscribers N] [--ticks N] [--slow-share F]
+"""
+import time
+import random
+import asyncio
+import argparse
+import statistics
+from unittest.mock import Mock
+
+from app.api.topics import TOPICS, TopicBroadcaster
+from app.core.system_monitor import SystemMonitor
+
+
+def network_stats() -> dict:
+    """Build network counters like SystemMonitor.get_network_stats returns"""
+    return {
+        "bytes_sent": round(random.uniform(0, 1e6), 2),
+        "bytes_recv": round(random.uniform(0, 1e6), 2),
+        "packets_sent": random.randint(0, 10 ** 9),
+        "packets_recv": random.randint(0, 10 ** 9),
+    }
+
+
+def build_monitor(cores: int = 16, nics: int = 4, disks: int = 4) -> Mock:
+    """Monitor returning fixed values shaped like SystemMonitor's, so only the fan-out is measured"""
+    monitor = Mock(spec=SystemMonitor)
+    monitor.get_cpu_usage.return_value = 42.0
+    monitor.get_per_core_cpu.return_value = [round(random.uniform(0, 100), 1) for _ in range(cores)]
+    monitor.get_memory_usage.return_value = {
+        "total_gb": 62.7, "available_gb": 41.3, "used_gb": 19.8, "percent": 34.1,
+    }
+    monitor.get_disk_usage.return_value = [
+        {
+            "device": f"/dev/nvme0n1p{i + 1}",
+            "mountpoint": "/" if i == 0 else f"/mnt/data{i}",
+            "total_gb": 931.51,
+            "used_gb": 402.17,
+            "free_gb": 482.0,
+            "percent": 45.5,
+        }
+        for i in range(disks)
+    ]
+    monitor.get_network_stats.return_value = network_stats()
+    monitor.get_top_processes.return_value = [
+        {"pid": 1000 + i, "name": f"worker-{i}", "username": "www-data",
+         "cpu_percent": round(random.uniform(0, 100), 1), "memory_percent": round(random.uniform(0, 5), 2)}
+        for i in range(10)
+    ]
+    monitor.get_network_stats_per_nic.return_value = {f"eth{i}": network_stats() for i in range(nics)}
+    return monitor
+
+
+class Clock:
+    """Clock advanced by one tick per round"""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+async def run(subscribers: int, ticks: int, slow_share: float) -> None:
+    clock = Clock()
+    broadcaster = TopicBroadcaster(build_monitor(), tick=1, queue_size=64, clock=clock)
+    topics = broadcaster.available_topics()
+    
+    # Subscribers connect as the WebSocket endpoint connects them; the
+    # producer task this starts never runs, as the ticks below are driven
+    # by hand without yielding to the event loop
+    clients = []
+    for _ in range(subscribers):
+        subscriber = broadcaster.connect()
+        broadcaster.subscribe(subscriber, random.sample(topics, random.randint(1, 4)), random.choice([1, 2, 5]))
+        clients.append((subscriber, random.random() < slow_share))
+    
+    timings = []
+    for _ in range(ticks):
+        started = time.perf_counter()
+        due = broadcaster.due_topics(clock.now)
+        broadcaster.fan_out(clock.now, due, broadcaster.collect(list(due)))
+        timings.append((time.perf_counter() - started) * 1000)
+        
+        # Healthy clients drain their queue, slow ones never read
+        for subscriber, slow in clients:
+            if not slow and not subscriber.dropped:
+                while not subscriber.queue.empty():
+                    subscriber.queue.get_nowait()
+        clock.now += 1
+    
+    timings.sort()
+    print(f"{subscribers} subscribers over {len(topics)} topics ({len(TOPICS)} metrics), {ticks} ticks")
+    print(f"tick ms: p50 {statistics.median(timings):.2f}  p99 {timings[int(len(timings) * 0.99) - 1]:.2f}  max {timings[-1]:.2f}")
+    print(f"serializations: {broadcaster.serializations}  messages: {broadcaster.messages}  "
+          f"({broadcaster.messages / max(1, broadcaster.serializations):.0f} messages per encode)")
+    print(f"dropped slow subscribers: {broadcaster.dropped_subscribers}  remaining: {broadcaster.subscriber_count}")
+    await broadcaster.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the metric topic broadcaster")
+    parser.add_argument("--subscribers", type=int, default=5000, help="Local subscribers (default: 5000)")
+    parser.add_argument("--ticks", type=int, default=200, help="Producer ticks (default: 200)")
+    parser.add_argument("--slow-share", type=float, default=0.01, help="Share of subscribers that never read (default: 0.01)")
+    args = parser.parse_args()
+    asyncio.run(run(args.subscribers, args.ticks, args.slow_share))
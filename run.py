@@ -9,5 +9,9 @@ if __name__ == "__main__":
     print("Ensure 'templates/index.html' exists.")
     print(f"Access the application at http://{HOST}:{PORT}")
     
-    # Start the application with hot reloading for development
-    uvicorn.run("app.main:app", host=HOST, port=PORT, reload=True)
+    # Start the application with hot reloading for development; only the
+    # application and its templates are watched
+    uvicorn.run(
+        "app.main:app", host=HOST, port=PORT,
+        reload=True, reload_dirs=["app", "templates"], reload_includes=["*.py", "*.html"],
+    )
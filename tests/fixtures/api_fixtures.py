@@ -1,6 +1,7 @@
 """
 Test fixtures for API endpoints
 """
+import datetime
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import Mock, MagicMock, patch
@@ -8,6 +9,7 @@ from unittest.mock import Mock, MagicMock, patch
 from app.main import app
 from app.core.system_monitor import SystemMonitor
 from app.database.db_manager import DatabaseManager
+from app.database.packing import pack_cores
 
 
 @pytest.fixture
@@ -60,6 +62,28 @@ def mocked_system_monitor():
         }
     ]
     
+    # Mock process groups
+    monitor.get_process_groups.return_value = [
+        {
+            "name": "test_process",
+            "count": 3,
+            "cpu_percent": 12.5,
+            "memory_percent": 3.5,
+            "rss": 350000,
+            "num_threads": 6
+        }
+    ]
+    
+    # Mock process count
+    monitor.get_process_count.return_value = 250
+    
+    # Mock unrounded sizes
+    monitor.get_byte_counts.return_value = {
+        "memory": {"total": 17179869184, "available": 8589934592, "used": 8589934592},
+        "network": {"sent": 105381068, "recv": 210029773},
+        "disks": {"C:\\": {"total": 536870912000, "used": 268435456000, "free": 268435456000}},
+    }
+    
     # Mock system info
     monitor.get_system_info.return_value = {
         "cpu_percent": 25.5,
@@ -69,6 +93,14 @@ def mocked_system_monitor():
         "network_stats": monitor.get_network_stats.return_value
     }
     
+    # Mock field-selected system info with sample times
+    monitor.sample_system_info.return_value = dict(
+        monitor.get_system_info.return_value,
+        sampled_at={
+            key: "2025-05-25T10:00:00" for key in monitor.get_system_info.return_value
+        }
+    )
+    
     return monitor
 
 
@@ -89,6 +121,24 @@ def mocked_db_manager():
         "values": [45.7, 50.2]
     }
     
+    # Mock combined history
+    db_manager.get_history.return_value = {
+        "timestamps": ["2025-05-25T10:00:00", "2025-05-25T10:01:00"],
+        "series": {
+            "cpu": [25.5, 30.2],
+            "memory": [45.7, 50.2]
+        },
+        "cursor": "2025-05-25T10:01:00"
+    }
+    
+    # Mock data versions used for ETags
+    db_manager.get_history_version.return_value = {
+        "count": 3, "first": "2025-05-25T10:00:00", "last": "2025-05-25T10:02:00"
+    }
+    db_manager.get_alerts_version.return_value = {
+        "latest_id": 2, "count": 2, "open": 0, "last": "2025-05-25T10:05:00"
+    }
+    
     # Mock alerts
     db_manager.get_alerts.return_value = [
         {
@@ -105,6 +155,39 @@ def mocked_db_manager():
         }
     ]
     
+    # Mock packed per-core samples of a 4-core host, one minute apart
+    now = datetime.datetime.now()
+    db_manager.get_per_core_samples.return_value = [
+        ((now - datetime.timedelta(minutes=minutes)).isoformat(), pack_cores([10.0, 20.0, 30.0, 100.0]), 60.0)
+        for minutes in (3, 2, 1)
+    ]
+    
+    # Mock processes captured when the first alert fired
+    db_manager.get_alert_processes.side_effect = lambda alert_id: {
+        "captured_at": "2025-05-25T10:00:00",
+        "interval_seconds": 5,
+        "frames": [
+            {
+                "timestamp": "2025-05-25T09:59:55",
+                "pid": [4242, 1],
+                "name": ["stress", "init"],
+                "cpu_percent": [99.5, 0.0],
+                "rss": [1048576, 2097152]
+            }
+        ]
+    } if alert_id == 1 else None
+    
+    # Mock slow callback reports
+    db_manager.get_slow_callbacks.return_value = [
+        {
+            "timestamp": "2025-05-25T10:03:00",
+            "duration_ms": 152.4,
+            "route": "GET /api/processes",
+            "location": "app/core/system_monitor.py:120 in get_top_processes",
+            "pid": 4321
+        }
+    ]
+    
     return db_manager
 
 
@@ -1,6 +1,7 @@
 """
 Integration tests for API endpoints
 """
+import datetime
 import pytest
 from fastapi.testclient import TestClient
 from tests.fixtures.api_fixtures import mocked_system_monitor, mocked_db_manager, test_client
@@ -10,15 +11,52 @@ class TestApiEndpoints:
     """Test suite for the API endpoints"""
     
     def test_read_root(self, test_client, mocked_system_monitor):
-        """Test the root endpoint returns the dashboard HTML"""
+        """Test the root endpoint returns the dashboard HTML without collecting"""
         response = test_client.get("/")
         
         assert response.status_code == 200
         assert "text/html" in response.headers["content-type"]
+        assert '<script id="initial-snapshot" type="application/json">null</script>' in response.text
+        assert response.headers["cache-control"] == "no-cache"
         
-        # Verify that system monitor was called
-        mocked_system_monitor.get_cpu_usage.assert_called_once()
-        mocked_system_monitor.get_memory_usage.assert_called_once()
+        # Nothing is measured while serving the page
+        mocked_system_monitor.get_cpu_usage.assert_not_called()
+        mocked_system_monitor.get_memory_usage.assert_not_called()
+        mocked_system_monitor.get_system_info.assert_not_called()
+    
+    def test_read_root_embeds_snapshot(self, test_client, mocked_system_monitor):
+        """Test that the root page embeds the live snapshot and revalidates with its ETag"""
+        import json
+        import re
+        from unittest.mock import Mock
+        from app.main import app
+        from app.api.endpoints import get_live_snapshot
+        
+        snapshot = Mock()
+        snapshot.read_snapshot.return_value = {
+            "published_at": 1748167200.0,
+            "system_info": mocked_system_monitor.get_system_info.return_value,
+            "processes": [{"pid": pid, "name": "</script>"} for pid in range(20)],
+            "process_count": 20,
+        }
+        app.dependency_overrides[get_live_snapshot] = lambda: snapshot
+        
+        response = test_client.get("/")
+        embedded = re.search(r'id="initial-snapshot" type="application/json">(.*?)</script>', response.text).group(1)
+        data = json.loads(embedded)
+        
+        assert data["system_info"]["cpu_percent"] == 25.5
+        assert len(data["processes"]) == 10
+        assert data["processes"][0]["name"] == "</script>"
+        
+        etag = response.headers["etag"]
+        assert test_client.get("/", headers={"If-None-Match": etag}).status_code == 304
+        
+        # A newer snapshot changes the page
+        snapshot.read_snapshot.return_value = dict(snapshot.read_snapshot.return_value, published_at=1748167202.0)
+        response = test_client.get("/", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
     
     def test_get_system_info_api(self, test_client, mocked_system_monitor):
         """Test the system info API endpoint"""
@@ -39,8 +77,26 @@ class TestApiEndpoints:
         assert json_response["memory_info"]["percent"] == 50.0
         assert json_response["per_core_cpu"] == [25.0, 26.0, 24.0, 26.0]
         
-        # Verify that system monitor was called
-        mocked_system_monitor.get_system_info.assert_called_once()
+        # Verify that every collector was requested, with sample times
+        mocked_system_monitor.sample_system_info.assert_called_once_with(
+            ["cpu", "memory", "disk", "per_core", "network"]
+        )
+        assert json_response["sampled_at"]["cpu_percent"] == "2025-05-25T10:00:00"
+    
+    def test_get_system_info_api_fields(self, test_client, mocked_system_monitor):
+        """Test that only the selected fields are collected"""
+        response = test_client.get("/api/system-info?fields=memory,cpu,memory")
+        
+        assert response.status_code == 200
+        mocked_system_monitor.sample_system_info.assert_called_once_with(["memory", "cpu"])
+    
+    def test_get_system_info_api_unknown_field(self, test_client, mocked_system_monitor):
+        """Test that an unknown field is rejected"""
+        response = test_client.get("/api/system-info?fields=cpu,gpu")
+        
+        assert response.status_code == 400
+        assert "gpu" in response.json()["detail"]
+        mocked_system_monitor.sample_system_info.assert_not_called()
     
     def test_get_processes(self, test_client, mocked_system_monitor):
         """Test the processes API endpoint"""
@@ -56,8 +112,201 @@ class TestApiEndpoints:
         assert json_response[0]["cpu_percent"] == 10.5
         
         # Verify that system monitor was called
+        mocked_system_monitor.get_top_processes.assert_called_once_with(10, "cpu_percent")
+    
+    def test_get_processes_sort_key(self, test_client, mocked_system_monitor):
+        """Test that processes can be ranked by another key"""
+        response = test_client.get("/api/processes?sort=rss&limit=5")
+        
+        assert response.status_code == 200
+        mocked_system_monitor.get_top_processes.assert_called_once_with(5, "rss")
+    
+    def test_get_processes_unknown_sort_key(self, test_client, mocked_system_monitor):
+        """Test that an unknown sort key is rejected"""
+        mocked_system_monitor.get_top_processes.side_effect = ValueError("Unknown sort key: pid")
+        
+        response = test_client.get("/api/processes?sort=pid")
+        
+        assert response.status_code == 400
+        assert "pid" in response.json()["detail"]
+    
+    def test_get_process_groups(self, test_client, mocked_system_monitor):
+        """Test the process groups API endpoint"""
+        response = test_client.get("/api/processes/groups?by=name&sort=count&limit=3")
+        
+        assert response.status_code == 200
+        assert response.json()[0] == {
+            "name": "test_process",
+            "count": 3,
+            "cpu_percent": 12.5,
+            "memory_percent": 3.5,
+            "rss": 350000,
+            "num_threads": 6
+        }
+        mocked_system_monitor.get_process_groups.assert_called_once_with("name", "count", 3)
+    
+    def test_get_process_groups_unknown_grouping(self, test_client, mocked_system_monitor):
+        """Test that an unknown grouping is rejected"""
+        mocked_system_monitor.get_process_groups.side_effect = ValueError("Unknown grouping: pod")
+        
+        response = test_client.get("/api/processes/groups?by=pod")
+        
+        assert response.status_code == 400
+        assert "pod" in response.json()["detail"]
+    
+    @pytest.mark.parametrize("path", ["/api/processes", "/api/processes/groups"])
+    @pytest.mark.parametrize("limit", [-3, 0, 1001])
+    def test_process_limit_out_of_range(self, test_client, mocked_system_monitor, path, limit):
+        """Test that a limit outside 1 to MAX_PROCESS_LIMIT is rejected on both paths"""
+        response = test_client.get(path, params={"limit": limit})
+        
+        assert response.status_code == 422
+    
+    def test_live_endpoints_use_fresh_snapshot(self, test_client, mocked_system_monitor):
+        """Test that live endpoints read the shared snapshot instead of collecting"""
+        from unittest.mock import Mock
+        from app.main import app
+        from app.api.endpoints import get_live_snapshot
+        
+        published_at = datetime.datetime(2025, 5, 25, 10, 0, 2).timestamp()
+        snapshot = Mock()
+        snapshot.read_snapshot.return_value = {
+            "published_at": published_at,
+            "system_info": mocked_system_monitor.get_system_info.return_value,
+            "processes": [],
+            "process_count": 0,
+        }
+        snapshot.read_processes.return_value = [{"pid": pid} for pid in range(20)]
+        app.dependency_overrides[get_live_snapshot] = lambda: snapshot
+        
+        assert test_client.get("/api/system-info?fields=cpu,network").json() == {
+            "cpu_percent": 25.5,
+            "network_stats": mocked_system_monitor.get_network_stats.return_value,
+            "sampled_at": {"cpu_percent": "2025-05-25T10:00:02", "network_stats": "2025-05-25T10:00:02"},
+        }
+        assert len(test_client.get("/api/processes").json()) == 10
+        mocked_system_monitor.sample_system_info.assert_not_called()
+        mocked_system_monitor.get_top_processes.assert_not_called()
+    
+    def test_live_endpoints_fall_back_without_snapshot(self, test_client, mocked_system_monitor):
+        """Test that a missing or stale snapshot falls back to direct collection"""
+        from unittest.mock import Mock
+        from app.main import app
+        from app.api.endpoints import get_live_snapshot
+        
+        snapshot = Mock()
+        snapshot.read_snapshot.return_value = None
+        snapshot.read_processes.return_value = None
+        app.dependency_overrides[get_live_snapshot] = lambda: snapshot
+        
+        assert test_client.get("/api/system-info").json()["cpu_percent"] == 25.5
+        test_client.get("/api/processes")
+        mocked_system_monitor.sample_system_info.assert_called_once()
         mocked_system_monitor.get_top_processes.assert_called_once()
     
+    def test_get_metrics(self, test_client, mocked_system_monitor):
+        """Test the Prometheus exposition without a live snapshot"""
+        response = test_client.get("/metrics")
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert "sysmon_cpu_usage_percent 25.5\n" in response.text
+        assert 'sysmon_cpu_core_usage_percent{core="3"} 26.0\n' in response.text
+        assert "sysmon_processes 250\n" in response.text
+        assert "# TYPE sysmon_network_sent_bytes_total counter" in response.text
+        assert "sysmon_network_sent_bytes_total 105381068\n" in response.text
+        assert 'sysmon_disk_used_bytes{device="C:\\\\",mountpoint="C:\\\\"} 268435456000\n' in response.text
+    
+    def test_get_metrics_from_snapshot(self, test_client, mocked_system_monitor):
+        """Test that /metrics renders the live snapshot without collecting"""
+        import time
+        from unittest.mock import Mock
+        from app.main import app
+        from app.api.endpoints import get_live_snapshot
+        
+        snapshot = Mock()
+        snapshot.read_snapshot.return_value = {
+            "published_at": time.time(),
+            "system_info": mocked_system_monitor.get_system_info.return_value,
+            "byte_counts": {
+                "memory": {"total": 17179869184, "available": 8589934592, "used": 8589934592},
+                "network": {"sent": 105381068, "recv": 210029773},
+                "disks": {"C:\\": {"total": 536870912000, "used": 268435456000, "free": 268435456000}},
+            },
+            "processes": [],
+            "process_count": 99,
+        }
+        app.dependency_overrides[get_live_snapshot] = lambda: snapshot
+        mocked_system_monitor.reset_mock()
+        
+        response = test_client.get("/metrics", headers={"Accept": "application/openmetrics-text"})
+        
+        assert response.headers["content-type"].startswith("application/openmetrics-text")
+        assert "sysmon_processes 99\n" in response.text
+        assert response.text.endswith("# EOF\n")
+        mocked_system_monitor.get_system_info.assert_not_called()
+        mocked_system_monitor.get_byte_counts.assert_not_called()
+    
+    def test_get_history(self, test_client, mocked_db_manager):
+        """Test the combined history API endpoint"""
+        response = test_client.get("/api/history")
+        
+        assert response.status_code == 200
+        json_response = response.json()
+        
+        # Verify that series share a single timestamp axis
+        assert len(json_response["timestamps"]) == 2
+        assert json_response["series"]["cpu"] == [25.5, 30.2]
+        assert json_response["series"]["memory"] == [45.7, 50.2]
+        
+        # Verify that db_manager was called with the default series
+        mocked_db_manager.get_history.assert_called_once_with(["cpu", "memory"], 1, since=None)
+    
+    def test_get_history_with_series(self, test_client, mocked_db_manager):
+        """Test the combined history API endpoint with custom series"""
+        response = test_client.get("/api/history?series=per_core,disk,network_recv&hours=6")
+        
+        assert response.status_code == 200
+        mocked_db_manager.get_history.assert_called_once_with(["per_core", "disk", "network_recv"], 6, since=None)
+    
+    def test_get_history_since_cursor(self, test_client, mocked_db_manager):
+        """Test that the history endpoint forwards the since cursor"""
+        response = test_client.get("/api/history?since=2025-05-25T10:01:00")
+        
+        assert response.status_code == 200
+        assert response.json()["cursor"] == "2025-05-25T10:01:00"
+        mocked_db_manager.get_history.assert_called_once_with(
+            ["cpu", "memory"], 1, since="2025-05-25T10:01:00"
+        )
+    
+    def test_get_history_unknown_series(self, test_client, mocked_db_manager):
+        """Test the combined history API endpoint rejects unknown series"""
+        response = test_client.get("/api/history?series=cpu,gpu")
+        
+        assert response.status_code == 400
+        mocked_db_manager.get_history.assert_not_called()
+    
+    def test_get_history_columnar(self, test_client, mocked_db_manager):
+        """Test that the history endpoint negotiates the columnar format"""
+        response = test_client.get(
+            "/api/history",
+            headers={"Accept": "application/vnd.sysmon.columnar+json"}
+        )
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/vnd.sysmon.columnar+json")
+        json_response = response.json()
+        assert all(isinstance(value, int) for value in json_response["time"])
+        assert json_response["series"]["cpu"] == [25.5, 30.2]
+    
+    def test_get_cpu_history_binary(self, test_client, mocked_db_manager):
+        """Test that single-series history can be requested as binary"""
+        response = test_client.get("/api/history/cpu?format=binary")
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/vnd.sysmon.f64"
+        assert response.content[:4] == b"SMH1"
+    
     def test_get_cpu_history(self, test_client, mocked_db_manager):
         """Test the CPU history API endpoint"""
         response = test_client.get("/api/history/cpu")
@@ -72,7 +321,7 @@ class TestApiEndpoints:
         assert len(json_response["values"]) == 3
         
         # Verify that db_manager was called with default hour parameter
-        mocked_db_manager.get_cpu_history.assert_called_once_with(1)
+        mocked_db_manager.get_cpu_history.assert_called_once_with(1, since=None)
     
     def test_get_cpu_history_with_hours(self, test_client, mocked_db_manager):
         """Test the CPU history API endpoint with custom hours parameter"""
@@ -81,7 +330,7 @@ class TestApiEndpoints:
         assert response.status_code == 200
         
         # Verify that db_manager was called with custom hour parameter
-        mocked_db_manager.get_cpu_history.assert_called_once_with(12)
+        mocked_db_manager.get_cpu_history.assert_called_once_with(12, since=None)
     
     def test_get_memory_history(self, test_client, mocked_db_manager):
         """Test the memory history API endpoint"""
@@ -97,7 +346,7 @@ class TestApiEndpoints:
         assert len(json_response["values"]) == 2
         
         # Verify that db_manager was called with default hour parameter
-        mocked_db_manager.get_memory_history.assert_called_once_with(1)
+        mocked_db_manager.get_memory_history.assert_called_once_with(1, since=None)
     
     def test_get_memory_history_with_hours(self, test_client, mocked_db_manager):
         """Test the memory history API endpoint with custom hours parameter"""
@@ -106,7 +355,7 @@ class TestApiEndpoints:
         assert response.status_code == 200
         
         # Verify that db_manager was called with custom hour parameter
-        mocked_db_manager.get_memory_history.assert_called_once_with(24)
+        mocked_db_manager.get_memory_history.assert_called_once_with(24, since=None)
     
     def test_get_alerts(self, test_client, mocked_db_manager):
         """Test the alerts API endpoint"""
@@ -132,3 +381,303 @@ class TestApiEndpoints:
         
         # Verify that db_manager was called with custom limit
         mocked_db_manager.get_alerts.assert_called_once_with(5)
+    
+    def test_get_per_core_heatmap(self, test_client, mocked_db_manager):
+        """Test the per-core heatmap endpoint"""
+        response = test_client.get("/api/history/per-core/heatmap?hours=1&buckets=60&stat=max")
+        
+        assert response.status_code == 200
+        assert "etag" in response.headers
+        heatmap = response.json()
+        assert heatmap["cores"] == 4
+        assert heatmap["bucket_seconds"] == 60
+        assert heatmap["stat"] == "max"
+        assert [len(row) for row in heatmap["values"]] == [60] * 4
+        assert [value for value in heatmap["values"][3] if value is not None] == [100, 100, 100]
+        
+        # The window starts on a bucket boundary, one hour before the last one ends
+        start = datetime.datetime.fromisoformat(heatmap["start"])
+        assert start.timestamp() % 60 == 0
+        mocked_db_manager.get_per_core_samples.assert_called_once_with(heatmap["start"])
+    
+    @pytest.mark.parametrize("hours", [0, -1, 721])
+    def test_get_per_core_heatmap_hours_out_of_range(self, test_client, mocked_db_manager, hours):
+        """Test that a time span outside 1 to MAX_HEATMAP_HOURS is rejected"""
+        response = test_client.get("/api/history/per-core/heatmap", params={"hours": hours})
+        
+        assert response.status_code == 422
+    
+    def test_get_per_core_heatmap_conditional(self, test_client, mocked_db_manager):
+        """Test that heatmap responses are validated with ETags"""
+        etag = test_client.get("/api/history/per-core/heatmap").headers["etag"]
+        
+        cached = test_client.get("/api/history/per-core/heatmap", headers={"If-None-Match": etag})
+        
+        assert cached.status_code == 304
+        mocked_db_manager.get_per_core_samples.assert_called_once()
+    
+    def test_get_per_core_heatmap_invalid(self, test_client, mocked_db_manager):
+        """Test that invalid bucket counts and stats are rejected"""
+        assert test_client.get("/api/history/per-core/heatmap?buckets=0").status_code == 400
+        assert test_client.get("/api/history/per-core/heatmap?buckets=100000").status_code == 400
+        assert test_client.get("/api/history/per-core/heatmap?stat=median").status_code == 400
+    
+    def test_get_alert_processes(self, test_client, mocked_db_manager):
+        """Test that the processes captured with an alert are returned per frame"""
+        response = test_client.get("/api/alerts/1/processes")
+        
+        assert response.status_code == 200
+        assert response.json() == {
+            "alert_id": 1,
+            "captured_at": "2025-05-25T10:00:00",
+            "interval_seconds": 5,
+            "frames": [
+                {
+                    "timestamp": "2025-05-25T09:59:55",
+                    "processes": [
+                        {"pid": 4242, "name": "stress", "cpu_percent": 99.5, "rss": 1048576},
+                        {"pid": 1, "name": "init", "cpu_percent": 0.0, "rss": 2097152}
+                    ]
+                }
+            ]
+        }
+    
+    def test_get_history_ignores_if_modified_since(self, test_client, mocked_db_manager):
+        """Test that a rolling history window is not validated by its latest sample alone"""
+        response = test_client.get("/api/history/cpu")
+        
+        # Older points may have aged out although the latest one is unchanged
+        cached = test_client.get(
+            "/api/history/cpu", headers={"If-Modified-Since": response.headers["last-modified"]}
+        )
+        
+        assert cached.status_code == 200
+    
+    def test_get_alerts_if_modified_since(self, test_client, mocked_db_manager):
+        """Test that alerts are still validated by their latest change"""
+        response = test_client.get("/api/alerts")
+        
+        cached = test_client.get(
+            "/api/alerts", headers={"If-Modified-Since": response.headers["last-modified"]}
+        )
+        
+        assert cached.status_code == 304
+    
+    def test_get_alert_processes_not_captured(self, test_client, mocked_db_manager):
+        """Test that an alert without captured processes is not found"""
+        response = test_client.get("/api/alerts/2/processes")
+        
+        assert response.status_code == 404
+    
+    def test_get_history_conditional(self, test_client, mocked_db_manager):
+        """Test that history responses are validated with ETags"""
+        response = test_client.get("/api/history/cpu")
+        etag = response.headers["etag"]
+        
+        assert response.headers["cache-control"].startswith("public, max-age=")
+        assert "last-modified" in response.headers
+        
+        cached = test_client.get("/api/history/cpu", headers={"If-None-Match": etag})
+        
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert cached.headers["etag"] == etag
+        mocked_db_manager.get_cpu_history.assert_called_once()
+    
+    def test_get_history_etag_changes(self, test_client, mocked_db_manager):
+        """Test that the ETag changes with new samples and with the format"""
+        etag = test_client.get("/api/history").headers["etag"]
+        
+        assert test_client.get("/api/history?format=columnar").headers["etag"] != etag
+        assert test_client.get("/api/history?series=cpu").headers["etag"] != etag
+        
+        mocked_db_manager.get_history_version.return_value = {
+            "count": 4, "first": "2025-05-25T10:00:00", "last": "2025-05-25T10:03:00"
+        }
+        response = test_client.get("/api/history", headers={"If-None-Match": etag})
+        
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+    
+    def test_get_alerts_conditional(self, test_client, mocked_db_manager):
+        """Test that alert responses are validated with ETags"""
+        response = test_client.get("/api/alerts")
+        etag = response.headers["etag"]
+        
+        cached = test_client.get("/api/alerts", headers={"If-None-Match": etag})
+        
+        assert cached.status_code == 304
+        assert test_client.get("/api/alerts?limit=5", headers={"If-None-Match": etag}).status_code == 200
+        mocked_db_manager.get_alerts_version.return_value = {
+            "latest_id": 2, "count": 2, "open": 0, "last": "2025-05-25T10:09:00"
+        }
+        assert test_client.get("/api/alerts", headers={"If-None-Match": etag}).status_code == 200
+    
+    def test_get_self_stats(self, test_client):
+        """Test that route and collector latencies are exposed"""
+        from app.core.instrumentation import STATS
+        
+        STATS.reset()
+        test_client.get("/api/alerts")
+        
+        response = test_client.get("/api/self-stats")
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["enabled"] is True
+        route = data["histograms"]["route"]["GET /api/alerts"]
+        assert route["count"] == 1
+        assert route["buckets"]["+Inf"] == 1
+    
+    def test_get_self_stats_loop(self, test_client):
+        """Test that the event loop lag monitor's state is included"""
+        from unittest.mock import Mock
+        from app.main import app
+        from app.api.endpoints import get_loop_monitor
+        
+        loop_monitor = Mock()
+        loop_monitor.get_stats.return_value = {
+            "running": True, "interval_seconds": 0.5, "last_lag_ms": 1.5, "slow_callbacks": 0
+        }
+        app.dependency_overrides[get_loop_monitor] = lambda: loop_monitor
+        
+        response = test_client.get("/api/self-stats")
+        
+        assert response.status_code == 200
+        assert response.json()["loop"]["last_lag_ms"] == 1.5
+    
+    def test_get_self_stats_stream(self, test_client):
+        """Test that the live stream producer's failures are included"""
+        from unittest.mock import Mock
+        from app.main import app
+        from app.api.endpoints import get_broadcaster
+        
+        broadcaster = Mock()
+        broadcaster.get_stats.return_value = {
+            "subscribers": 1, "dropped_subscribers": 0, "failed_ticks": 7,
+            "last_error": "no such column: cpu"
+        }
+        app.dependency_overrides[get_broadcaster] = lambda: broadcaster
+        
+        response = test_client.get("/api/self-stats")
+        
+        assert response.status_code == 200
+        assert response.json()["stream"]["failed_ticks"] == 7
+    
+    def test_get_slow_callbacks(self, test_client, mocked_db_manager):
+        """Test the slow callback report endpoint"""
+        response = test_client.get("/api/slow-callbacks?hours=2&limit=5")
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data[0]["route"] == "GET /api/processes"
+        assert data[0]["duration_ms"] == 152.4
+        mocked_db_manager.get_slow_callbacks.assert_called_once_with(2, 5)
+    
+    def test_get_recorder_stats(self, test_client):
+        """Test the recorder health endpoint"""
+        from unittest.mock import Mock
+        from app.main import app
+        from app.api.endpoints import get_recorder
+        
+        recorder = Mock()
+        recorder.get_stats.return_value = {"running": True, "spool_depth": 3}
+        app.dependency_overrides[get_recorder] = lambda: recorder
+        
+        response = test_client.get("/api/recorder")
+        
+        assert response.status_code == 200
+        assert response.json() == {"running": True, "spool_depth": 3}
+    
+    def test_get_recorder_stats_not_running(self, test_client):
+        """Test the recorder health endpoint without a running recorder"""
+        response = test_client.get("/api/recorder")
+        
+        assert response.status_code == 503
+    
+    def test_stream_not_available(self, test_client):
+        """Test the live stream without a broadcaster"""
+        response = test_client.get("/api/stream")
+        
+        assert response.status_code == 503
+    
+    def test_stream_events(self, test_client):
+        """Test that the live stream is served as Server-Sent Events"""
+        from unittest.mock import Mock
+        from app.main import app
+        from app.api.endpoints import get_broadcaster
+        
+        async def events():
+            yield b"retry: 3000\n\n"
+            yield b'event: alerts\ndata: []\n\n'
+        
+        broadcaster = Mock()
+        broadcaster.stream.side_effect = events
+        app.dependency_overrides[get_broadcaster] = lambda: broadcaster
+        
+        response = test_client.get("/api/stream")
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert response.headers["cache-control"] == "no-cache"
+        assert "event: alerts" in response.text
+    
+    def test_metrics_websocket(self, test_client):
+        """Test subscribing to metric topics over the WebSocket"""
+        from unittest.mock import Mock
+        from app.main import app
+        from app.api.endpoints import get_topic_broadcaster
+        from app.api.topics import TopicBroadcaster
+        from app.core.system_monitor import SystemMonitor
+        
+        monitor = Mock(spec=SystemMonitor)
+        monitor.get_per_core_cpu.return_value = [10.0, 20.0]
+        monitor.get_network_stats_per_nic.return_value = {}
+        broadcaster = TopicBroadcaster(monitor, tick=0.01)
+        app.dependency_overrides[get_topic_broadcaster] = lambda: broadcaster
+        
+        with test_client.websocket_connect("/ws/metrics") as websocket:
+            websocket.send_json({"subscribe": ["gpu"]})
+            assert websocket.receive_json()["type"] == "error"
+            
+            websocket.send_json({"subscribe": ["per_core"], "interval": 0.01})
+            assert websocket.receive_json() == {"type": "subscribed", "topics": ["per_core"], "interval": 0.01}
+            
+            update = websocket.receive_json()
+            assert update["topic"] == "per_core"
+            assert update["data"] == [10.0, 20.0]
+        
+        assert broadcaster.subscriber_count == 0
+    
+    def test_metrics_websocket_rate_limits_invalid_json(self, test_client):
+        """Test that frames which are not JSON count towards the rate limit"""
+        from unittest.mock import Mock
+        from starlette.websockets import WebSocketDisconnect
+        from app.main import app
+        from app.api.endpoints import get_topic_broadcaster
+        from app.api.topics import TopicBroadcaster
+        from app.core.config import WS_CONTROL_BURST
+        from app.core.system_monitor import SystemMonitor
+        
+        broadcaster = TopicBroadcaster(Mock(spec=SystemMonitor), tick=0.01)
+        app.dependency_overrides[get_topic_broadcaster] = lambda: broadcaster
+        
+        errors = 0
+        with test_client.websocket_connect("/ws/metrics") as websocket:
+            for _ in range(WS_CONTROL_BURST * 2):
+                websocket.send_text("not json")
+            with pytest.raises(WebSocketDisconnect) as closed:
+                while True:
+                    assert websocket.receive_json()["type"] == "error"
+                    errors += 1
+        
+        assert closed.value.code == 1008
+        assert WS_CONTROL_BURST <= errors < WS_CONTROL_BURST * 2
+    
+    def test_metrics_websocket_not_available(self, test_client):
+        """Test that the WebSocket is refused without a broadcaster"""
+        from starlette.websockets import WebSocketDisconnect
+        
+        with pytest.raises(WebSocketDisconnect):
+            with test_client.websocket_connect("/ws/metrics") as websocket:
+                websocket.receive_json()
@@ -0,0 +1,92 @@
+"""
+Integration tests for the application lifespan
+"""
+import sys
+import time
+import subprocess
+import pytest
+from unittest.mock import patch, AsyncMock, PropertyMock
+from fastapi.testclient import TestClient
+
+from app.main import app
+from benchmarks.bench_startup import APP_IMPORT_BUDGET_SECONDS, app_import_seconds, loaded_modules
+from app.core.metrics_recorder import MetricsRecorder
+from app.core.shared_snapshot import SnapshotPublisher
+from app.database.db_manager import DatabaseManager
+
+
+def wait_for(condition, timeout=2.0):
+    """Poll a condition until it holds or the timeout expires"""
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+class TestLifespan:
+    """Test suite for application startup and shutdown"""
+    
+    def test_import_has_no_side_effects(self):
+        """Test that importing the application starts no recorder threads"""
+        code = (
+            "import threading, app.main; "
+            "assert threading.active_count() == 1, threading.enumerate(); "
+            "assert not hasattr(app.main.app.state, 'recorder')"
+        )
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        
+        assert result.returncode == 0, result.stderr
+    
+    def test_import_defers_heavy_modules(self):
+        """Test that psutil, Jinja2 and uvicorn are not loaded at import"""
+        assert loaded_modules("app.main") == []
+    
+    def test_import_within_budget(self):
+        """Test that importing the application stays within its startup budget"""
+        assert app_import_seconds() < APP_IMPORT_BUDGET_SECONDS
+    
+    def test_lifespan_starts_and_stops_recorder(self, test_db_path):
+        """Test that the recorder runs only while the lifespan is active"""
+        with patch('app.main.DB_PATH', test_db_path), \
+             patch.object(MetricsRecorder, 'start', new_callable=AsyncMock) as start, \
+             patch.object(MetricsRecorder, 'stop', new_callable=AsyncMock) as stop, \
+             patch.object(MetricsRecorder, 'running', new_callable=PropertyMock, return_value=True), \
+             patch.object(SnapshotPublisher, 'start', new_callable=AsyncMock) as publisher_start, \
+             patch.object(SnapshotPublisher, 'stop', new_callable=AsyncMock) as publisher_stop:
+            
+            with TestClient(app) as client:
+                # The only worker wins the election and starts recording
+                assert wait_for(lambda: start.await_count == 1)
+                publisher_start.assert_awaited_once()
+                stop.assert_not_awaited()
+                assert app.state.db_manager.db_path == test_db_path
+                assert app.state.leader.is_leader
+                assert app.state.loop_monitor.running
+                
+                # Endpoints use the lifespan's database manager
+                response = client.get("/api/alerts")
+                assert response.status_code == 200
+            
+            stop.assert_awaited_once()
+            publisher_stop.assert_awaited()
+        
+        # The lease is released on shutdown so another worker can take over
+        assert DatabaseManager(test_db_path).acquire_lease("metrics_recorder", "other", 15, time.time())
+    
+    def test_follower_does_not_record(self, test_db_path):
+        """Test that a worker does not record while another worker holds the lease"""
+        DatabaseManager(test_db_path).acquire_lease("metrics_recorder", "other-worker", 60, time.time())
+        
+        with patch('app.main.DB_PATH', test_db_path), \
+             patch.object(MetricsRecorder, 'start', new_callable=AsyncMock) as start, \
+             patch.object(SnapshotPublisher, 'start', new_callable=AsyncMock) as publisher_start:
+            
+            with TestClient(app) as client:
+                time.sleep(0.2)
+                start.assert_not_awaited()
+                publisher_start.assert_not_awaited()
+                assert not app.state.leader.is_leader
+                
+                # Followers still serve reads
+                response = client.get("/api/alerts")
+                assert response.status_code == 200
@@ -0,0 +1,100 @@
+"""
+Unit tests for the AlertEngine class
+"""
+import pytest
+from datetime import datetime
+
+from app.core.alerts import AlertEngine, AlertRule
+
+
+class TestAlertEngine:
+    """Test suite for the AlertEngine class"""
+    
+    @pytest.fixture
+    def rule(self):
+        """CPU rule with a two minute duration and 10 point hysteresis"""
+        return AlertRule(
+            name="cpu_high", metric="cpu", threshold=80, clear_threshold=70,
+            for_seconds=120, alert_type="CPU", message="High CPU usage detected",
+        )
+    
+    @pytest.fixture
+    def engine(self, rule):
+        """Engine evaluating the CPU rule"""
+        return AlertEngine([rule])
+    
+    @staticmethod
+    def feed(engine, values, start=1748174400.0, step=60.0):
+        """Evaluate a series of CPU values one minute apart, returning all events"""
+        events = []
+        for index, value in enumerate(values):
+            events.extend(engine.evaluate(start + index * step, {"cpu": value}))
+        return events
+    
+    def test_short_spike_does_not_fire(self, engine):
+        """Test that a spike shorter than for_seconds stays pending"""
+        events = self.feed(engine, [90, 95, 50])
+        
+        assert events == []
+        assert engine.state("cpu_high") == "inactive"
+    
+    def test_sustained_value_fires_once(self, engine):
+        """Test that a sustained breach produces a single firing event"""
+        events = self.feed(engine, [90, 95, 99, 97, 96, 98])
+        
+        assert [event["event"] for event in events] == ["firing"]
+        assert events[0]["started_at"] == datetime.fromtimestamp(1748174400.0).isoformat()
+        assert events[0]["peak"] == 99
+        assert engine.state("cpu_high") == "firing"
+    
+    def test_hysteresis_prevents_flapping(self, engine):
+        """Test that values between the clear and fire thresholds keep the alert firing"""
+        events = self.feed(engine, [90, 90, 90, 75, 85, 72, 78])
+        
+        assert [event["event"] for event in events] == ["firing"]
+        assert engine.state("cpu_high") == "firing"
+    
+    def test_resolves_with_peak_and_end_time(self, engine):
+        """Test that dropping below the clear threshold resolves the alert"""
+        events = self.feed(engine, [90, 99, 90, 85, 65])
+        
+        assert [event["event"] for event in events] == ["firing", "resolved"]
+        resolved = events[1]
+        assert resolved["peak"] == 99
+        assert resolved["started_at"] == datetime.fromtimestamp(1748174400.0).isoformat()
+        assert resolved["ended_at"] == datetime.fromtimestamp(1748174400.0 + 4 * 60).isoformat()
+        assert engine.state("cpu_high") == "inactive"
+    
+    def test_zero_duration_fires_immediately(self):
+        """Test that rules without a duration fire on the first breach"""
+        engine = AlertEngine([AlertRule(
+            name="memory_high", metric="memory", threshold=80,
+            alert_type="Memory", message="High memory usage detected",
+        )])
+        
+        events = engine.evaluate(1748174400.0, {"memory": 81})
+        
+        assert [event["event"] for event in events] == ["firing"]
+    
+    def test_missing_metric_is_ignored(self, engine):
+        """Test that samples without the rule's metric leave its state alone"""
+        assert engine.evaluate(1748174400.0, {"memory": 99}) == []
+        assert engine.state("cpu_high") == "inactive"
+    
+    def test_restore_open_alert(self, engine):
+        """Test that restored alerts resolve rather than fire again"""
+        engine.restore([{"rule": "cpu_high", "timestamp": "2025-05-25T11:00:00", "peak_value": 97.0}])
+        
+        events = self.feed(engine, [90, 60])
+        
+        assert [event["event"] for event in events] == ["resolved"]
+        assert events[0]["started_at"] == "2025-05-25T11:00:00"
+        assert events[0]["peak"] == 97.0
+    
+    def test_invalid_clear_threshold(self):
+        """Test that a clear threshold above the fire threshold is rejected"""
+        with pytest.raises(ValueError):
+            AlertRule(
+                name="bad", metric="cpu", threshold=80, clear_threshold=90,
+                alert_type="CPU", message="High CPU usage detected",
+            )
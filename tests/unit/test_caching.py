@@ -0,0 +1,73 @@
+"""
+Unit tests for the HTTP caching helpers
+"""
+from unittest.mock import Mock, patch
+
+from app.api import caching
+
+
+def make_request(**headers):
+    """Create a request stub with the given headers"""
+    request = Mock()
+    request.headers = {name.replace("_", "-"): value for name, value in headers.items()}
+    return request
+
+
+class TestCaching:
+    """Test suite for the HTTP caching helpers"""
+    
+    def test_make_etag(self):
+        """Test that entity tags are quoted and depend on every part"""
+        etag = caching.make_etag("/api/history", ["cpu"], {"count": 3})
+        
+        assert etag.startswith('"') and etag.endswith('"')
+        assert etag == caching.make_etag("/api/history", ["cpu"], {"count": 3})
+        assert etag != caching.make_etag("/api/history", ["cpu"], {"count": 4})
+    
+    def test_http_date(self):
+        """Test that stored timestamps become HTTP dates"""
+        date = caching.http_date("2025-05-25T10:00:00.123456")
+        
+        assert date.endswith(" GMT")
+        assert caching.http_date(None) is None
+        assert caching.http_date("not a timestamp") is None
+    
+    def test_max_age_follows_recorder_interval(self):
+        """Test that max-age matches the recorder's current interval"""
+        recorder = Mock(current_interval=2.5)
+        
+        assert caching.max_age(recorder) == 2
+        assert caching.max_age(Mock(current_interval=0.2)) == 1
+        with patch.object(caching, "ADAPTIVE_SAMPLING", False):
+            assert caching.max_age(None) == caching.METRICS_INTERVAL_SECONDS
+        with patch.object(caching, "ADAPTIVE_SAMPLING", True):
+            assert caching.max_age(None) == caching.ADAPTIVE_FAST_INTERVAL_SECONDS
+    
+    def test_cache_headers(self):
+        """Test the validator and freshness headers"""
+        headers = caching.cache_headers('"abc"', "2025-05-25T10:00:00", 60)
+        
+        assert headers["ETag"] == '"abc"'
+        assert headers["Cache-Control"] == "public, max-age=60"
+        assert "Last-Modified" in headers
+        assert "Last-Modified" not in caching.cache_headers('"abc"', None, 60)
+    
+    def test_if_none_match(self):
+        """Test weak comparison of If-None-Match entity tags"""
+        assert caching.is_not_modified(make_request(if_none_match='"abc"'), '"abc"', None)
+        assert caching.is_not_modified(make_request(if_none_match='"x", W/"abc"'), '"abc"', None)
+        assert caching.is_not_modified(make_request(if_none_match="*"), '"abc"', None)
+        assert not caching.is_not_modified(make_request(if_none_match='"x"'), '"abc"', None)
+        assert not caching.is_not_modified(make_request(), '"abc"', None)
+    
+    def test_if_modified_since(self):
+        """Test that If-Modified-Since is used only without If-None-Match"""
+        last = "2025-05-25T10:00:00"
+        date = caching.http_date(last)
+        
+        assert caching.is_not_modified(make_request(if_modified_since=date), '"abc"', last)
+        assert not caching.is_not_modified(make_request(if_modified_since=date), '"abc"', "2025-05-25T10:01:00")
+        assert not caching.is_not_modified(
+            make_request(if_none_match='"x"', if_modified_since=date), '"abc"', last
+        )
+        assert not caching.is_not_modified(make_request(if_modified_since="garbage"), '"abc"', last)
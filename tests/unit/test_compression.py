@@ -0,0 +1,133 @@
+"""
+Unit tests for the response compression middleware
+"""
+import pytest
+from unittest.mock import patch
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.api import compression
+from app.api.compression import CompressionMiddleware, negotiate_encoding
+
+
+class FakeCompressor:
+    """Stand-in for brotli.Compressor that tags the data it is given"""
+    
+    def __init__(self, quality):
+        self.quality = quality
+    
+    def process(self, data):
+        return b"br(" + data + b")"
+    
+    def flush(self):
+        return b""
+    
+    def finish(self):
+        return b"."
+
+
+class FakeBrotli:
+    """Stand-in for the brotli module"""
+    Compressor = FakeCompressor
+
+
+@pytest.fixture
+def client():
+    """Create a client for a small app behind the middleware"""
+    app = FastAPI()
+    
+    @app.get("/large")
+    async def large():
+        return PlainTextResponse("x" * 2000, headers={"ETag": '"abc"'})
+    
+    @app.get("/small")
+    async def small():
+        return PlainTextResponse("x" * 10, headers={"ETag": '"abc"'})
+    
+    @app.get("/stream")
+    async def stream():
+        return Response("data: x\n\n" * 500, media_type="text/event-stream")
+    
+    @app.get("/chunked")
+    async def chunked():
+        async def chunks():
+            for index in range(3):
+                yield f"chunk {index};".encode("utf-8")
+        return StreamingResponse(chunks(), media_type="text/plain")
+    
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+    return TestClient(app)
+
+
+class TestCompression:
+    """Test suite for the compression middleware"""
+    
+    def test_negotiate_encoding(self):
+        """Test that codings are chosen by quality and server preference"""
+        with patch.object(compression, "brotli", FakeBrotli):
+            assert negotiate_encoding("gzip, deflate, br") == "br"
+            assert negotiate_encoding("gzip;q=1, br;q=0.5") == "gzip"
+            assert negotiate_encoding("br;q=0, gzip") == "gzip"
+            assert negotiate_encoding("*") == "br"
+        with patch.object(compression, "brotli", None):
+            assert negotiate_encoding("br, gzip") == "gzip"
+            assert negotiate_encoding("br") is None
+        assert negotiate_encoding("identity") is None
+        assert negotiate_encoding(None) is None
+    
+    def test_gzip_large_response(self, client):
+        """Test that large responses are gzip-compressed with a weak ETag"""
+        with patch.object(compression, "brotli", None):
+            response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+        
+        assert response.headers["content-encoding"] == "gzip"
+        assert int(response.headers["content-length"]) < 2000
+        assert response.headers["etag"] == 'W/"abc"'
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert response.text == "x" * 2000
+    
+    def test_brotli_large_response(self, client):
+        """Test that brotli is preferred when it is installed"""
+        with patch.object(compression, "brotli", FakeBrotli):
+            response = client.get("/large", headers={"Accept-Encoding": "gzip, br"})
+        
+        assert response.headers["content-encoding"] == "br"
+        assert response.headers["etag"] == 'W/"abc"'
+    
+    def test_small_response_unchanged(self, client):
+        """Test that responses below the minimum size are sent as is"""
+        response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+        
+        assert "content-encoding" not in response.headers
+        assert response.headers["etag"] == '"abc"'
+    
+    def test_identity_when_not_accepted(self, client):
+        """Test that clients without Accept-Encoding receive plain bodies"""
+        response = client.get("/large", headers={"Accept-Encoding": "identity"})
+        
+        assert "content-encoding" not in response.headers
+        assert response.headers["etag"] == '"abc"'
+    
+    def test_event_stream_unchanged(self, client):
+        """Test that Server-Sent Events are never compressed"""
+        response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+        
+        assert "content-encoding" not in response.headers
+    
+    def test_streamed_response_compressed_throughout(self, client):
+        """Test that every chunk of a streamed body is compressed"""
+        with patch.object(compression, "brotli", FakeBrotli):
+            response = client.get("/chunked", headers={"Accept-Encoding": "br"})
+        
+        assert response.headers["content-encoding"] == "br"
+        assert "content-length" not in response.headers
+        assert response.content == b"br(chunk 0;)br(chunk 1;)br(chunk 2;)br()."
+    
+    def test_streamed_gzip_response(self, client):
+        """Test that a streamed gzip body decodes to the original chunks"""
+        with patch.object(compression, "brotli", None):
+            response = client.get("/chunked", headers={"Accept-Encoding": "gzip"})
+        
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.text == "chunk 0;chunk 1;chunk 2;"
@@ -0,0 +1,118 @@
+"""
+Unit tests for the CPU time breakdown
+"""
+import time
+import pytest
+from collections import namedtuple
+from unittest.mock import patch
+
+from app.core.cpu_times import CPU_TIME_FIELDS, CpuTimesSampler, breakdown
+
+scputimes = namedtuple("scputimes", CPU_TIME_FIELDS + ("guest", "guest_nice"))
+
+
+def reading(user=0.0, system=0.0, idle=0.0, iowait=0.0, steal=0.0, guest=0.0):
+    """Build the cpu_times of one CPU"""
+    return scputimes(user=user, nice=0.0, system=system, idle=idle, iowait=iowait,
+                     irq=0.0, softirq=0.0, steal=steal, guest=guest, guest_nice=0.0)
+
+
+class TestBreakdown:
+    """Test suite for the breakdown function"""
+    
+    def test_percentages(self):
+        """Test that each category's share of the elapsed time is reported"""
+        before = reading(user=100, system=50, idle=1000, iowait=10, steal=0)._asdict()
+        after = reading(user=130, system=60, idle=1040, iowait=30, steal=0)._asdict()
+        
+        result = breakdown(before, after)
+        
+        assert result["user"] == 30.0
+        assert result["system"] == 10.0
+        assert result["idle"] == 40.0
+        assert result["iowait"] == 20.0
+        assert result["steal"] == 0.0
+        # iowait counts as idle time, as in psutil.cpu_percent
+        assert result["busy"] == 40.0
+    
+    def test_guest_time_not_counted_twice(self):
+        """Test that guest time, already part of user time, is left out of the total"""
+        before = reading()._asdict()
+        after = reading(user=50, idle=50, guest=50)._asdict()
+        
+        assert breakdown(before, after)["user"] == 50.0
+    
+    def test_missing_category(self):
+        """Test that categories the platform does not report are None"""
+        before = {"user": 0.0, "system": 0.0, "idle": 0.0}
+        after = {"user": 1.0, "system": 1.0, "idle": 2.0}
+        
+        result = breakdown(before, after)
+        
+        assert result["steal"] is None
+        assert result["iowait"] is None
+        assert result["busy"] == 50.0
+    
+    def test_no_elapsed_time(self):
+        """Test that identical readings give zeros rather than dividing by zero"""
+        times = reading(user=5, idle=5)._asdict()
+        
+        result = breakdown(times, times)
+        
+        assert result["busy"] == 0.0
+        assert result["user"] == 0.0
+
+
+class TestCpuTimesSampler:
+    """Test suite for the CpuTimesSampler class"""
+    
+    def test_first_sample_waits_once(self):
+        """Test that only the first sample waits for a second reading"""
+        readings = [
+            [reading(user=0, idle=0), reading(user=0, idle=0)],
+            [reading(user=10, idle=10), reading(user=0, idle=20)],
+            [reading(user=10, idle=30, steal=20), reading(user=20, idle=40)],
+        ]
+        sampler = CpuTimesSampler(interval=0.5)
+        with patch("psutil.cpu_times", side_effect=readings) as cpu_times, \
+             patch("app.core.cpu_times.time.sleep") as sleep:
+            first = sampler.sample()
+            second = sampler.sample()
+        
+        sleep.assert_called_once_with(0.5)
+        assert cpu_times.call_count == 3
+        assert [core["busy"] for core in first["per_core"]] == [50.0, 0.0]
+        assert first["total"]["busy"] == 25.0
+        assert second["per_core"][0]["steal"] == 50.0
+        assert second["per_core"][1]["user"] == 50.0
+        assert second["total"]["steal"] == 25.0
+    
+    def test_core_count_change(self):
+        """Test that a CPU going offline starts a new measurement"""
+        readings = [
+            [reading(), reading()],
+            [reading(user=1, idle=1), reading(user=1, idle=1)],
+            [reading(user=2, idle=2)],
+            [reading(user=2, idle=4)],
+        ]
+        sampler = CpuTimesSampler(interval=0.1)
+        with patch("psutil.cpu_times", side_effect=readings), \
+             patch("app.core.cpu_times.time.sleep") as sleep:
+            sampler.sample()
+            result = sampler.sample()
+        
+        assert sleep.call_count == 2
+        assert len(result["per_core"]) == 1
+        assert result["total"]["idle"] == 100.0
+    
+    def test_real_counters(self):
+        """Test sampling the host's counters"""
+        sampler = CpuTimesSampler(interval=0.05)
+        sampler.sample()
+        time.sleep(0.1)
+        result = sampler.sample()
+        
+        assert 0.0 <= result["total"]["busy"] <= 100.0
+        assert len(result["per_core"]) >= 1
+        assert sum(value for field, value in result["total"].items()
+                   if field != "busy" and value is not None) == pytest.approx(100.0, abs=1.0)
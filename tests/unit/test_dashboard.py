@@ -0,0 +1,64 @@
+"""
+Unit tests for the pre-rendered dashboard shell
+"""
+from unittest.mock import Mock
+
+from app.api.dashboard import DashboardShell, PLACEHOLDER
+
+
+def make_snapshot(published_at, processes=3):
+    """Build a snapshot like SharedSnapshot.read_snapshot returns"""
+    return {
+        "published_at": published_at,
+        "system_info": {"cpu_percent": 12.5},
+        "processes": [{"pid": pid} for pid in range(processes)],
+        "process_count": processes,
+    }
+
+
+class TestDashboardShell:
+    """Test suite for the DashboardShell class"""
+    
+    def test_template_rendered_once(self):
+        """Test that the template is rendered on the first request only"""
+        render_template = Mock(return_value=f"<html>{PLACEHOLDER}</html>")
+        shell = DashboardShell(render_template)
+        render_template.assert_not_called()
+        
+        shell.render(None)
+        shell.render(make_snapshot(1.0))
+        
+        render_template.assert_called_once_with({"initial_snapshot": PLACEHOLDER})
+    
+    def test_embeds_snapshot(self):
+        """Test that the snapshot replaces the placeholder, trimmed to the process table"""
+        shell = DashboardShell(lambda context: f"<script>{context['initial_snapshot']}</script>")
+        
+        body, _ = shell.render(make_snapshot(1.0, processes=15))
+        
+        assert body.startswith(b'<script>{"published_at":1.0,"system_info":{"cpu_percent":12.5},')
+        assert body.count(b'"pid"') == 10
+        assert shell.render(None)[0] == b"<script>null</script>"
+    
+    def test_escapes_markup(self):
+        """Test that snapshot strings cannot close the surrounding script element"""
+        shell = DashboardShell(lambda context: f"<script>{context['initial_snapshot']}</script>")
+        snapshot = make_snapshot(1.0)
+        snapshot["processes"] = [{"name": "</script><b>"}]
+        
+        body, _ = shell.render(snapshot)
+        
+        assert body.count(b"</script>") == 1
+        assert b"\\u003c/script>\\u003cb>" in body
+    
+    def test_version_follows_snapshot(self):
+        """Test that the page version changes only with a newer snapshot"""
+        shell = DashboardShell(lambda context: context["initial_snapshot"])
+        
+        _, first = shell.render(make_snapshot(1.0))
+        _, same = shell.render(make_snapshot(1.0))
+        _, newer = shell.render(make_snapshot(2.0))
+        _, empty = shell.render(None)
+        
+        assert first == same
+        assert len({first, newer, empty}) == 3
@@ -7,6 +7,7 @@ from datetime import datetime, timedelta
 from unittest.mock import patch, Mock
 
 from app.database.db_manager import DatabaseManager
+from app.database.packing import pack_cores
 from tests.fixtures.db_fixtures import test_db_path, test_db_manager, test_db_with_data
 
 
@@ -203,3 +204,520 @@ class TestDatabaseManager:
             result = test_db_manager.get_alerts()
             
             assert result == []
+    
+    def test_get_history_aligns_series(self, test_db_manager):
+        """Test that get_history returns several series on one time axis"""
+        now = datetime.now()
+        first = (now - timedelta(minutes=2)).isoformat()
+        second = (now - timedelta(minutes=1)).isoformat()
+        memory_data = {"percent": 40.0, "total_gb": 16.0, "used_gb": 6.4, "available_gb": 9.6}
+        
+        test_db_manager.insert_cpu_data(first, 10.0)
+        test_db_manager.insert_cpu_data(second, 20.0)
+        test_db_manager.insert_memory_data(first, memory_data)
+        test_db_manager.insert_per_core_data(first, [5.0, 15.0])
+        test_db_manager.insert_per_core_data(second, [10.0, 30.0])
+        
+        result = test_db_manager.get_history(["cpu", "memory", "per_core"], hours=1)
+        
+        assert result["timestamps"] == [first, second]
+        assert result["series"]["cpu"] == [10.0, 20.0]
+        assert result["series"]["memory"] == [40.0, None]
+        assert result["series"]["per_core"] == [[5.0, 15.0], [10.0, 30.0]]
+    
+    def test_get_history_disk_and_network(self, test_db_manager):
+        """Test that disk and network series are aggregated and retrievable"""
+        timestamp = datetime.now().isoformat()
+        disks = [
+            {"total_gb": 100.0, "used_gb": 25.0},
+            {"total_gb": 300.0, "used_gb": 75.0},
+        ]
+        network = {"bytes_sent": 1.5, "bytes_recv": 2.5, "packets_sent": 10, "packets_recv": 20}
+        
+        test_db_manager.insert_disk_data(timestamp, disks)
+        test_db_manager.insert_network_data(timestamp, network)
+        
+        result = test_db_manager.get_history(["disk", "network_sent", "network_recv"], hours=1)
+        
+        assert result["timestamps"] == [timestamp]
+        assert result["series"]["disk"] == [25.0]
+        assert result["series"]["network_sent"] == [1.5]
+        assert result["series"]["network_recv"] == [2.5]
+    
+    def test_get_history_unknown_series(self, test_db_manager):
+        """Test that requesting an unknown series raises ValueError"""
+        with pytest.raises(ValueError):
+            test_db_manager.get_history(["cpu", "gpu"])
+    
+    def test_get_history_error(self, test_db_manager):
+        """Test error handling in get_history"""
+        with patch.object(test_db_manager, 'get_connection', side_effect=Exception("Test exception")):
+            result = test_db_manager.get_history(["cpu", "memory"])
+            
+            assert result == {"timestamps": [], "series": {"cpu": [], "memory": []}, "cursor": None}
+    
+    def test_get_history_since_cursor(self, test_db_manager):
+        """Test that get_history only returns samples after the cursor"""
+        now = datetime.now()
+        timestamps = [(now - timedelta(minutes=minutes)).isoformat() for minutes in (3, 2, 1)]
+        for index, timestamp in enumerate(timestamps):
+            test_db_manager.insert_cpu_data(timestamp, float(index))
+        
+        full = test_db_manager.get_history(["cpu"], hours=1)
+        assert full["cursor"] == timestamps[-1]
+        
+        result = test_db_manager.get_history(["cpu"], hours=1, since=timestamps[0])
+        assert result["timestamps"] == timestamps[1:]
+        assert result["series"]["cpu"] == [1.0, 2.0]
+        assert result["cursor"] == timestamps[-1]
+        
+        # No new points keeps the cursor where it was
+        result = test_db_manager.get_history(["cpu"], hours=1, since=timestamps[-1])
+        assert result["timestamps"] == []
+        assert result["cursor"] == timestamps[-1]
+    
+    def test_get_cpu_history_since_cursor(self, test_db_manager):
+        """Test that get_cpu_history only returns samples after the cursor"""
+        now = datetime.now()
+        first = (now - timedelta(minutes=2)).isoformat()
+        second = (now - timedelta(minutes=1)).isoformat()
+        test_db_manager.insert_cpu_data(first, 10.0)
+        test_db_manager.insert_cpu_data(second, 20.0)
+        
+        result = test_db_manager.get_cpu_history(hours=1, since=first)
+        
+        assert result["timestamps"] == [second]
+        assert result["values"] == [20.0]
+        assert result["cursor"] == second
+    
+    def test_insert_samples(self, test_db_manager):
+        """Test that a batch of samples is written to every table"""
+        samples = [
+            {
+                "timestamp": f"2025-05-25T12:0{minute}:00",
+                "cpu": 10.0 + minute,
+                "memory": {"percent": 40.0, "total_gb": 16.0, "used_gb": 6.4, "available_gb": 9.6},
+                "per_core": [5.0, 15.0],
+                "disks": [{"total_gb": 100.0, "used_gb": 50.0}],
+                "network": {"bytes_sent": 1.0, "bytes_recv": 2.0, "packets_sent": 3, "packets_recv": 4},
+                "alerts": [{
+                    "event": "firing", "rule": "cpu_high", "alert_type": "CPU",
+                    "message": "High CPU usage detected", "value": 95.0,
+                    "started_at": "2025-05-25T12:01:00", "ended_at": None, "peak": 95.0,
+                }] if minute else [],
+            }
+            for minute in range(2)
+        ]
+        
+        test_db_manager.insert_samples(samples)
+        
+        conn, cursor = test_db_manager.get_connection()
+        counts = {
+            table: cursor.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("cpu_history", "memory_history", "per_core_history",
+                          "disk_history", "network_history", "system_alerts")
+        }
+        conn.close()
+        
+        assert counts == {
+            "cpu_history": 2, "memory_history": 2, "per_core_history": 2,
+            "disk_history": 2, "network_history": 2, "system_alerts": 1,
+        }
+    
+    def test_insert_samples_is_atomic(self, test_db_manager):
+        """Test that a failing batch leaves no partial rows behind"""
+        samples = [{
+            "timestamp": "2025-05-25T12:00:00",
+            "cpu": 20.0,
+            "memory": {"percent": 40.0, "total_gb": 16.0, "used_gb": 6.4, "available_gb": 9.6},
+            "per_core": [],
+            "disks": [],
+            "network": None,
+        }]
+        
+        with pytest.raises(TypeError):
+            test_db_manager.insert_samples(samples)
+        
+        conn, cursor = test_db_manager.get_connection()
+        cpu_rows = cursor.execute("SELECT COUNT(*) FROM cpu_history").fetchone()[0]
+        memory_rows = cursor.execute("SELECT COUNT(*) FROM memory_history").fetchone()[0]
+        conn.close()
+        assert cpu_rows == 0
+        assert memory_rows == 0
+    
+    def test_insert_samples_replay_is_idempotent(self, test_db_manager):
+        """Test that writing the same batch twice does not duplicate rows or alerts"""
+        samples = [{
+            "timestamp": "2025-05-25T12:00:00",
+            "cpu": 85.0,
+            "memory": {"percent": 40.0, "total_gb": 16.0, "used_gb": 6.4, "available_gb": 9.6},
+            "per_core": [10.0, 20.0],
+            "disks": [],
+            "network": {"bytes_sent": 1.0, "bytes_recv": 2.0, "packets_sent": 3, "packets_recv": 4},
+            "alerts": [{
+                "event": "firing", "rule": "cpu_high", "alert_type": "CPU",
+                "message": "High CPU usage detected", "value": 85.0,
+                "started_at": "2025-05-25T12:00:00", "ended_at": None, "peak": 85.0,
+            }],
+        }]
+        
+        test_db_manager.insert_samples(samples)
+        test_db_manager.insert_samples(samples)
+        
+        conn, cursor = test_db_manager.get_connection()
+        cpu_rows = cursor.execute("SELECT COUNT(*) FROM cpu_history").fetchone()[0]
+        alert_rows = cursor.execute("SELECT COUNT(*) FROM system_alerts").fetchone()[0]
+        conn.close()
+        assert cpu_rows == 1
+        assert alert_rows == 1
+    
+    def test_insert_samples_records_interval(self, test_db_manager):
+        """Test that the sampling interval is stored and available as a series"""
+        now = datetime.now()
+        samples = [
+            {
+                "timestamp": (now - timedelta(seconds=seconds)).isoformat(),
+                "cpu": 20.0,
+                "memory": {"percent": 40.0, "total_gb": 16.0, "used_gb": 6.4, "available_gb": 9.6},
+                "per_core": [],
+                "disks": [],
+                "network": {"bytes_sent": 1.0, "bytes_recv": 2.0, "packets_sent": 3, "packets_recv": 4},
+                "interval": interval,
+            }
+            for seconds, interval in ((120, 60), (60, 2), (58, 2))
+        ]
+        
+        test_db_manager.insert_samples(samples)
+        history = test_db_manager.get_history(["cpu", "interval"], hours=1)
+        
+        assert history["series"]["interval"] == [60, 2, 2]
+    
+    def test_insert_samples_records_loop_lag(self, test_db_manager):
+        """Test that event loop lag is stored and available as series"""
+        now = datetime.now()
+        samples = [
+            {
+                "timestamp": (now - timedelta(seconds=seconds)).isoformat(),
+                "cpu": 20.0,
+                "memory": {"percent": 40.0, "total_gb": 16.0, "used_gb": 6.4, "available_gb": 9.6},
+                "per_core": [],
+                "disks": [],
+                "network": {"bytes_sent": 1.0, "bytes_recv": 2.0, "packets_sent": 3, "packets_recv": 4},
+                "loop_lag": loop_lag,
+            }
+            for seconds, loop_lag in (
+                (120, {"max_ms": 250.0, "mean_ms": 12.5, "slow_callbacks": 1}),
+                (60, None),
+            )
+        ]
+        
+        test_db_manager.insert_samples(samples)
+        history = test_db_manager.get_history(
+            ["cpu", "leader_loop_lag_max", "leader_loop_lag_mean", "leader_slow_callbacks"], hours=1
+        )
+        
+        assert history["series"]["leader_loop_lag_max"] == [250.0, None]
+        assert history["series"]["leader_loop_lag_mean"] == [12.5, None]
+        assert history["series"]["leader_slow_callbacks"] == [1, None]
+    
+    def test_setup_renames_loop_lag_table(self, test_db_path):
+        """Test that loop lag stored by an older version is kept under the leader's table"""
+        conn = sqlite3.connect(test_db_path)
+        conn.execute(
+            "CREATE TABLE loop_lag (timestamp TEXT PRIMARY KEY, max_ms REAL, mean_ms REAL, slow_callbacks INTEGER)"
+        )
+        conn.execute("INSERT INTO loop_lag VALUES ('2025-05-25T10:00:00', 250.0, 12.5, 1)")
+        conn.commit()
+        conn.close()
+        
+        DatabaseManager(db_path=test_db_path)
+        DatabaseManager(db_path=test_db_path)
+        
+        conn = sqlite3.connect(test_db_path)
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        rows = conn.execute("SELECT * FROM leader_loop_lag").fetchall()
+        conn.close()
+        assert "loop_lag" not in tables
+        assert rows == [("2025-05-25T10:00:00", 250.0, 12.5, 1)]
+    
+    def test_slow_callbacks(self, test_db_manager):
+        """Test that slow callback reports are stored and returned newest first"""
+        now = datetime.now()
+        for minutes, route in ((90, "GET /old"), (2, "GET /api/processes"), (1, None)):
+            test_db_manager.insert_slow_callback({
+                "timestamp": (now - timedelta(minutes=minutes)).isoformat(),
+                "duration_ms": 150.0,
+                "route": route,
+                "location": "app/api/endpoints.py:120 in get_processes",
+                "pid": 42,
+            })
+        
+        result = test_db_manager.get_slow_callbacks(hours=1)
+        
+        assert [report["route"] for report in result] == [None, "GET /api/processes"]
+        assert result[1]["location"] == "app/api/endpoints.py:120 in get_processes"
+        assert result[1]["pid"] == 42
+        assert test_db_manager.get_slow_callbacks(hours=1, limit=1)[0]["route"] is None
+    
+    def test_alert_transitions(self, test_db_manager):
+        """Test that firing and resolved transitions open and close one alert"""
+        firing = {
+            "event": "firing", "rule": "cpu_high", "alert_type": "CPU",
+            "message": "High CPU usage detected", "value": 85.0,
+            "started_at": "2025-05-25T12:00:00", "ended_at": None, "peak": 85.0,
+        }
+        resolved = dict(firing, event="resolved", value=60.0, ended_at="2025-05-25T12:30:00", peak=97.5)
+        base = {
+            "memory": {"percent": 40.0, "total_gb": 16.0, "used_gb": 6.4, "available_gb": 9.6},
+            "per_core": [], "disks": [], "cpu": 85.0,
+            "network": {"bytes_sent": 1.0, "bytes_recv": 2.0, "packets_sent": 3, "packets_recv": 4},
+        }
+        
+        test_db_manager.insert_samples([dict(base, timestamp="2025-05-25T12:02:00", alerts=[firing])])
+        assert test_db_manager.get_open_alerts() == [
+            {"rule": "cpu_high", "timestamp": "2025-05-25T12:00:00", "peak_value": 85.0}
+        ]
+        
+        test_db_manager.insert_samples([dict(base, timestamp="2025-05-25T12:30:00", alerts=[resolved])])
+        assert test_db_manager.get_open_alerts() == []
+        
+        alerts = test_db_manager.get_alerts()
+        assert len(alerts) == 1
+        assert alerts[0]["timestamp"] == "2025-05-25T12:00:00"
+        assert alerts[0]["state"] == "resolved"
+        assert alerts[0]["end_time"] == "2025-05-25T12:30:00"
+        assert alerts[0]["peak_value"] == 97.5
+    
+    def test_alert_processes(self, test_db_manager):
+        """Test that the processes captured with a firing alert are stored once"""
+        window = {
+            "captured_at": "2025-05-25T12:02:00",
+            "interval_seconds": 5,
+            "frames": [{
+                "timestamp": "2025-05-25T12:01:55",
+                "pid": [4242, 1], "name": ["stress", "init"], "cpu_percent": [99.5, 0.0], "rss": [1024, 2048],
+            }],
+        }
+        firing = {
+            "event": "firing", "rule": "cpu_high", "alert_type": "CPU",
+            "message": "High CPU usage detected", "value": 85.0,
+            "started_at": "2025-05-25T12:00:00", "ended_at": None, "peak": 85.0,
+            "processes": window,
+        }
+        base = {
+            "memory": {"percent": 40.0, "total_gb": 16.0, "used_gb": 6.4, "available_gb": 9.6},
+            "per_core": [], "disks": [], "cpu": 85.0,
+            "network": {"bytes_sent": 1.0, "bytes_recv": 2.0, "packets_sent": 3, "packets_recv": 4},
+        }
+        sample = dict(base, timestamp="2025-05-25T12:02:00", alerts=[firing])
+        
+        test_db_manager.insert_samples([sample])
+        # Replaying the same batch must not duplicate anything
+        test_db_manager.insert_samples([sample])
+        
+        alert_id = test_db_manager.get_alerts()[0]["id"]
+        assert test_db_manager.get_alert_processes(alert_id) == window
+        assert test_db_manager.get_alert_processes(alert_id + 1) is None
+    
+    def test_get_alert_processes_error(self, test_db_manager):
+        """Test error handling in get_alert_processes"""
+        with patch.object(test_db_manager, 'get_connection', side_effect=Exception("Test exception")):
+            assert test_db_manager.get_alert_processes(1) is None
+    
+    def test_get_history_version(self, test_db_manager):
+        """Test that the history version summarizes the queried range"""
+        now = datetime.now()
+        first = (now - timedelta(minutes=2)).isoformat()
+        second = (now - timedelta(minutes=1)).isoformat()
+        
+        assert test_db_manager.get_history_version(["cpu"]) == {"count": 0, "first": None, "last": None}
+        
+        test_db_manager.insert_cpu_data(first, 10.0)
+        test_db_manager.insert_cpu_data(second, 20.0)
+        
+        assert test_db_manager.get_history_version(["cpu", "memory"]) == {
+            "count": 2, "first": first, "last": second
+        }
+        assert test_db_manager.get_history_version(["cpu"], since=first) == {
+            "count": 1, "first": second, "last": second
+        }
+        assert test_db_manager.get_history_version(["memory"])["count"] == 0
+    
+    def test_get_history_version_error(self, test_db_manager):
+        """Test error handling in get_history_version"""
+        with patch.object(test_db_manager, 'get_connection', side_effect=Exception("Test exception")):
+            assert test_db_manager.get_history_version(["cpu"]) is None
+    
+    def test_get_alerts_version_changes_on_resolve(self, test_db_manager):
+        """Test that the alerts version changes when an alert fires and resolves"""
+        firing = {
+            "event": "firing", "rule": "cpu_high", "alert_type": "CPU",
+            "message": "High CPU usage detected", "value": 85.0,
+            "started_at": "2025-05-25T12:00:00", "ended_at": None, "peak": 85.0,
+        }
+        resolved = dict(firing, event="resolved", ended_at="2025-05-25T12:30:00", peak=97.5)
+        base = {
+            "memory": {"percent": 40.0, "total_gb": 16.0, "used_gb": 6.4, "available_gb": 9.6},
+            "per_core": [], "disks": [], "cpu": 85.0,
+            "network": {"bytes_sent": 1.0, "bytes_recv": 2.0, "packets_sent": 3, "packets_recv": 4},
+        }
+        
+        empty = test_db_manager.get_alerts_version()
+        test_db_manager.insert_samples([dict(base, timestamp="2025-05-25T12:02:00", alerts=[firing])])
+        opened = test_db_manager.get_alerts_version()
+        test_db_manager.insert_samples([dict(base, timestamp="2025-05-25T12:30:00", alerts=[resolved])])
+        closed = test_db_manager.get_alerts_version()
+        
+        assert empty == {"latest_id": None, "count": 0, "open": 0, "last": None}
+        assert opened == {"latest_id": 1, "count": 1, "open": 1, "last": "2025-05-25T12:00:00"}
+        assert closed == {"latest_id": 1, "count": 1, "open": 0, "last": "2025-05-25T12:30:00"}
+    
+    def test_setup_migrates_alert_columns(self, test_db_path):
+        """Test that an alerts table from an older version gains the new columns"""
+        conn = sqlite3.connect(test_db_path)
+        conn.execute(
+            "CREATE TABLE system_alerts (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "timestamp TEXT, alert_type TEXT, message TEXT, value REAL)"
+        )
+        conn.execute(
+            "INSERT INTO system_alerts (timestamp, alert_type, message, value) "
+            "VALUES ('2025-05-25T10:00:00', 'CPU', 'High CPU usage detected', 85.2)"
+        )
+        conn.commit()
+        conn.close()
+        
+        db_manager = DatabaseManager(db_path=test_db_path)
+        alerts = db_manager.get_alerts()
+        
+        assert alerts[0]["value"] == 85.2
+        assert alerts[0]["state"] is None
+        assert db_manager.get_open_alerts() == []
+    
+    def test_insert_samples_records_cpu_times(self, test_db_manager):
+        """Test that the CPU time breakdown is stored for the system and each core"""
+        now = datetime.now()
+        busy = {"user": 60.0, "nice": 0.0, "system": 10.0, "idle": 5.0,
+                "iowait": 20.0, "irq": 0.0, "softirq": 0.0, "steal": 5.0}
+        quiet = {**busy, "user": 0.0, "system": 0.0, "idle": 100.0, "iowait": 0.0, "steal": 0.0}
+        no_steal = {**quiet, "steal": None}
+        samples = [
+            {
+                "timestamp": (now - timedelta(seconds=seconds)).isoformat(),
+                "cpu": 20.0,
+                "memory": {"percent": 40.0, "total_gb": 16.0, "used_gb": 6.4, "available_gb": 9.6},
+                "per_core": [],
+                "disks": [],
+                "network": {"bytes_sent": 1.0, "bytes_recv": 2.0, "packets_sent": 3, "packets_recv": 4},
+                "cpu_times": cpu_times,
+                "per_core_times": per_core_times,
+            }
+            for seconds, cpu_times, per_core_times in (
+                (120, busy, [busy, quiet]),
+                (60, no_steal, [no_steal, no_steal]),
+                (30, None, None),
+            )
+        ]
+        
+        test_db_manager.insert_samples(samples)
+        history = test_db_manager.get_history(
+            ["cpu", "cpu_iowait", "cpu_steal", "per_core_iowait", "per_core_steal"], hours=1
+        )
+        
+        assert history["series"]["cpu_iowait"] == [20.0, 0.0, None]
+        assert history["series"]["cpu_steal"] == [5.0, None, None]
+        assert history["series"]["per_core_iowait"] == [[20.0, 0.0], [0.0, 0.0], None]
+        # A category missing on the platform is stored as NULL, not as zeros
+        assert history["series"]["per_core_steal"] == [[5.0, 0.0], None, None]
+    
+    def test_insert_samples_records_pressure(self, test_db_manager):
+        """Test that pressure and contention metrics are stored and available as series"""
+        now = datetime.now()
+        samples = [
+            {
+                "timestamp": (now - timedelta(seconds=seconds)).isoformat(),
+                "cpu": 20.0,
+                "memory": {"percent": 40.0, "total_gb": 16.0, "used_gb": 6.4, "available_gb": 9.6},
+                "per_core": [],
+                "disks": [],
+                "network": {"bytes_sent": 1.0, "bytes_recv": 2.0, "packets_sent": 3, "packets_recv": 4},
+                "pressure": pressure,
+            }
+            for seconds, pressure in (
+                (120, {"psi_io_some_stall": None, "load_1": 1.5, "context_switches": None, "run_queue": 2}),
+                (60, {"psi_io_some_stall": 42.5, "load_1": 2.25, "context_switches": 1800.0, "run_queue": 7}),
+                (30, None),
+            )
+        ]
+        
+        test_db_manager.insert_samples(samples)
+        history = test_db_manager.get_history(
+            ["cpu", "psi_io_some_stall", "load_1", "context_switches", "run_queue", "psi_memory_full_avg10"],
+            hours=1,
+        )
+        
+        assert history["series"]["psi_io_some_stall"] == [None, 42.5, None]
+        assert history["series"]["load_1"] == [1.5, 2.25, None]
+        assert history["series"]["context_switches"] == [None, 1800.0, None]
+        assert history["series"]["run_queue"] == [2, 7, None]
+        assert history["series"]["psi_memory_full_avg10"] == [None, None, None]
+    
+    def test_per_core_stored_packed(self, test_db_manager):
+        """Test that per-core samples are stored as one blob of two bytes per core"""
+        timestamp = datetime.now().isoformat()
+        
+        test_db_manager.insert_per_core_data(timestamp, [12.3] * 128)
+        
+        conn = sqlite3.connect(test_db_manager.db_path)
+        stored = conn.execute("SELECT core_percents FROM per_core_history").fetchone()[0]
+        conn.close()
+        assert isinstance(stored, bytes)
+        assert len(stored) == 256
+        assert test_db_manager.get_history(["per_core"])["series"]["per_core"] == [[12.3] * 128]
+    
+    def test_get_per_core_samples(self, test_db_manager):
+        """Test that packed samples after a time are returned in time order"""
+        now = datetime.now()
+        first = (now - timedelta(minutes=2)).isoformat()
+        second = (now - timedelta(minutes=1)).isoformat()
+        test_db_manager.insert_per_core_data(second, [10.0, 30.0])
+        test_db_manager.insert_per_core_data(first, [5.0, 15.0])
+        
+        samples = test_db_manager.get_per_core_samples((now - timedelta(minutes=5)).isoformat())
+        
+        assert [timestamp for timestamp, _, _ in samples] == [first, second]
+        assert samples[1][1] == pack_cores([10.0, 30.0])
+        assert test_db_manager.get_per_core_samples(first) == samples[1:]
+    
+    def test_get_per_core_samples_with_intervals(self, test_db_manager):
+        """Test that each packed sample comes with the interval it covers, if recorded"""
+        test_db_manager.insert_per_core_data("2025-05-25T10:00:00", [5.0])
+        test_db_manager.insert_per_core_data("2025-05-25T10:01:00", [7.0])
+        conn = sqlite3.connect(test_db_manager.db_path)
+        conn.execute("INSERT INTO sample_intervals VALUES ('2025-05-25T10:01:00', 2.5)")
+        conn.commit()
+        conn.close()
+        
+        samples = test_db_manager.get_per_core_samples("2025-05-25T00:00:00")
+        
+        assert [interval for _, _, interval in samples] == [None, 2.5]
+    
+    def test_setup_packs_json_per_core_history(self, test_db_path):
+        """Test that per-core history stored as JSON by an older version is packed"""
+        conn = sqlite3.connect(test_db_path)
+        conn.execute("CREATE TABLE per_core_history (timestamp TEXT PRIMARY KEY, core_percents TEXT)")
+        conn.execute("INSERT INTO per_core_history VALUES ('2025-05-25T10:00:00', '[5.0, 99.5]')")
+        conn.commit()
+        conn.close()
+        
+        db_manager = DatabaseManager(db_path=test_db_path)
+        # Opening the database again must leave the packed table alone
+        DatabaseManager(db_path=test_db_path)
+        
+        assert db_manager.get_per_core_samples("2025-05-25T00:00:00") == [
+            ("2025-05-25T10:00:00", pack_cores([5.0, 99.5]), None)
+        ]
+        conn = sqlite3.connect(test_db_path)
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        conn.close()
+        assert "per_core_history_json" not in tables
+
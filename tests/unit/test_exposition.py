@@ -0,0 +1,106 @@
+"""
+Unit tests for the metrics exposition
+"""
+import pytest
+from unittest.mock import Mock
+
+from app.api.exposition import MetricsExposition, wants_openmetrics
+
+
+SNAPSHOT = {
+    "published_at": 1000.0,
+    "system_info": {
+        "cpu_percent": 25.5,
+        "memory_info": {"total_gb": 16.0, "available_gb": 8.0, "used_gb": 8.0, "percent": 50.0},
+        "disk_info": [
+            {"device": 'C:\\', "mountpoint": 'C:\\ "x"', "total_gb": 1.0,
+             "used_gb": 0.5, "free_gb": 0.5, "percent": 50.0},
+        ],
+        "per_core_cpu": [20.0, float("nan")],
+        "network_stats": {"bytes_sent": 1.0, "bytes_recv": 2.0, "packets_sent": 10, "packets_recv": 20},
+    },
+    "byte_counts": {
+        "memory": {"total": 17179869183, "available": 8589934592, "used": 8589934591},
+        "network": {"sent": 1048577, "recv": 2097152},
+        "disks": {'C:\\ "x"': {"total": 1073741824, "used": 536870913, "free": 536870911}},
+    },
+    "processes": [],
+    "process_count": 250,
+}
+
+
+class TestMetricsExposition:
+    """Test suite for the MetricsExposition class"""
+    
+    @pytest.fixture
+    def exposition(self):
+        """Create an exposition renderer"""
+        return MetricsExposition()
+    
+    def test_render_snapshot(self, exposition):
+        """Test that snapshot metrics are rendered in base units"""
+        text = exposition.render(SNAPSHOT, now=1002.0).decode("utf-8")
+        
+        assert "# TYPE sysmon_cpu_usage_percent gauge\nsysmon_cpu_usage_percent 25.5\n" in text
+        assert 'sysmon_cpu_core_usage_percent{core="0"} 20.0\n' in text
+        assert 'sysmon_cpu_core_usage_percent{core="1"} NaN\n' in text
+        assert "sysmon_memory_total_bytes 17179869183\n" in text
+        assert "sysmon_network_sent_bytes_total 1048577\n" in text
+        assert 'sysmon_disk_used_bytes{device="C:\\\\",mountpoint="C:\\\\ \\"x\\""} 536870913\n' in text
+        assert "# TYPE sysmon_network_sent_packets_total counter\nsysmon_network_sent_packets_total 10\n" in text
+        assert "sysmon_processes 250\n" in text
+        assert "sysmon_snapshot_age_seconds 2.0\n" in text
+        assert "# EOF" not in text
+    
+    def test_label_values_are_escaped(self, exposition):
+        """Test that quotes and backslashes in labels are escaped"""
+        text = exposition.render(SNAPSHOT).decode("utf-8")
+        
+        assert 'sysmon_disk_usage_percent{device="C:\\\\",mountpoint="C:\\\\ \\"x\\""} 50.0\n' in text
+    
+    def test_render_openmetrics(self, exposition):
+        """Test that OpenMetrics names counter families without the suffix and ends with EOF"""
+        text = exposition.render(SNAPSHOT, openmetrics=True).decode("utf-8")
+        
+        assert "# TYPE sysmon_network_sent_packets counter\nsysmon_network_sent_packets_total 10\n" in text
+        assert text.endswith("# EOF\n")
+    
+    def test_render_internals(self, exposition):
+        """Test that the monitor's own components are exposed"""
+        recorder = Mock()
+        recorder.get_stats.return_value = {
+            "running": True, "interval_seconds": 60, "missed_ticks": 2, "buffered_samples": 1,
+            "spool_depth": 3, "spool_bytes": 300, "spool_replay_lag_seconds": 12.5,
+            "spool_dropped_samples": 0,
+        }
+        leader = Mock(is_leader=True)
+        stream = Mock(subscriber_count=4, dropped_subscribers=1, failed_ticks=3)
+        topics = Mock(subscriber_count=5, messages=100, serializations=10, dropped_subscribers=0)
+        
+        text = exposition.render(
+            SNAPSHOT, recorder=recorder, leader=leader, stream=stream, topics=topics
+        ).decode("utf-8")
+        
+        assert "sysmon_leader 1\n" in text
+        assert "sysmon_recorder_running 1\n" in text
+        assert "sysmon_recorder_missed_ticks_total 2\n" in text
+        assert "sysmon_spool_replay_lag_seconds 12.5\n" in text
+        assert "sysmon_stream_subscribers 4\n" in text
+        assert "sysmon_stream_failed_ticks_total 3\n" in text
+        assert "sysmon_topic_messages_total 100\n" in text
+    
+    def test_snapshot_part_is_cached(self, exposition):
+        """Test that the snapshot section is rendered once per snapshot"""
+        first = exposition.render(SNAPSHOT, now=1002.0)
+        
+        changed = dict(SNAPSHOT, process_count=1)
+        assert exposition.render(changed, now=1002.0) == first
+        
+        newer = dict(changed, published_at=1001.0)
+        assert b"sysmon_processes 1\n" in exposition.render(newer, now=1002.0)
+    
+    def test_wants_openmetrics(self):
+        """Test format negotiation from the Accept header"""
+        assert wants_openmetrics("application/openmetrics-text; version=1.0.0,text/plain;q=0.5")
+        assert not wants_openmetrics("text/plain")
+        assert not wants_openmetrics(None)
@@ -0,0 +1,111 @@
+"""
+Unit tests for the process flight recorder
+"""
+import sys
+from array import array
+from datetime import datetime
+
+from app.core.flight_recorder import ProcessFlightRecorder, expand_window
+
+
+def make_rows(*cpu_percents):
+    """Build process table rows with the given CPU percentages"""
+    return [
+        {"pid": 100 + index, "name": f"worker-{index % 2}", "username": "root", "cgroup": "/",
+         "cpu_percent": cpu, "memory_percent": 0.5, "rss": 1024 * (index + 1), "num_threads": 1}
+        for index, cpu in enumerate(cpu_percents)
+    ]
+
+
+class Clock:
+    """Manually advanced wall clock"""
+    
+    def __init__(self):
+        self.now = datetime(2025, 5, 25, 12, 0, 0).timestamp()
+    
+    def __call__(self):
+        return self.now
+
+
+class TestProcessFlightRecorder:
+    """Test suite for the ProcessFlightRecorder class"""
+    
+    def test_keeps_busiest_processes(self):
+        """Test that each sample keeps the processes using the most CPU, busiest first"""
+        recorder = ProcessFlightRecorder(max_processes=2, clock=Clock())
+        
+        recorder.record(make_rows(1.0, 50.0, 0.0, 25.0))
+        
+        frame = recorder.freeze()["frames"][0]
+        assert frame == {
+            "timestamp": "2025-05-25T12:00:00",
+            "pid": [101, 103],
+            "name": ["worker-1", "worker-1"],
+            "cpu_percent": [50.0, 25.0],
+            "rss": [2048, 4096],
+        }
+    
+    def test_window_drops_oldest_samples(self):
+        """Test that the buffer only covers the window"""
+        clock = Clock()
+        recorder = ProcessFlightRecorder(window_seconds=15, interval=5, clock=clock)
+        
+        for second in range(5):
+            clock.now += 5
+            recorder.record(make_rows(float(second)))
+        
+        window = recorder.freeze()
+        assert len(recorder) == 3
+        assert [frame["cpu_percent"] for frame in window["frames"]] == [[2.0], [3.0], [4.0]]
+        assert window["captured_at"] == "2025-05-25T12:00:25"
+        assert window["interval_seconds"] == 5
+    
+    def test_freeze_is_independent_of_later_samples(self):
+        """Test that a frozen window does not change as recording goes on"""
+        recorder = ProcessFlightRecorder(window_seconds=10, interval=5, clock=Clock())
+        recorder.record(make_rows(10.0))
+        
+        window = recorder.freeze()
+        recorder.record(make_rows(20.0))
+        recorder.record(make_rows(30.0))
+        
+        assert [frame["cpu_percent"] for frame in window["frames"]] == [[10.0]]
+    
+    def test_samples_are_packed(self):
+        """Test that samples are stored in packed arrays with shared names"""
+        recorder = ProcessFlightRecorder(clock=Clock())
+        recorder.record(make_rows(1.0, 2.0, 3.0))
+        recorder.record(make_rows(1.0, 2.0, 3.0))
+        
+        first, second = recorder._frames
+        assert isinstance(first.pids, array) and isinstance(first.cpu, array) and isinstance(first.rss, array)
+        assert list(first.pids) == [102, 101, 100]
+        assert first.names[0] is second.names[0] is sys.intern("worker-0")
+    
+    def test_empty_window(self):
+        """Test freezing before anything was recorded"""
+        assert ProcessFlightRecorder(clock=Clock()).freeze()["frames"] == []
+
+
+class TestExpandWindow:
+    """Test suite for expand_window"""
+    
+    def test_expand(self):
+        """Test that columns become one dictionary per process"""
+        recorder = ProcessFlightRecorder(max_processes=2, clock=Clock())
+        recorder.record(make_rows(5.0, 7.5))
+        
+        window = expand_window(recorder.freeze())
+        
+        assert window["frames"] == [{
+            "timestamp": "2025-05-25T12:00:00",
+            "processes": [
+                {"pid": 101, "name": "worker-1", "cpu_percent": 7.5, "rss": 2048},
+                {"pid": 100, "name": "worker-0", "cpu_percent": 5.0, "rss": 1024},
+            ],
+        }]
+        assert window["interval_seconds"] == 5
+    
+    def test_expand_none(self):
+        """Test that a missing window stays missing"""
+        assert expand_window(None) is None
@@ -0,0 +1,93 @@
+"""
+Unit tests for history response formats
+"""
+import json
+import math
+import struct
+import pytest
+from array import array
+from datetime import datetime
+from fastapi import HTTPException
+
+from app.api import formats
+
+
+class TestFormats:
+    """Test suite for history content negotiation and encoders"""
+    
+    @pytest.fixture
+    def history(self):
+        """Combined history with a missing value and a per-core column"""
+        return {
+            "timestamps": ["2025-05-25T10:00:00", "2025-05-25T10:01:00"],
+            "series": {
+                "cpu": [25.5, None],
+                "per_core": [[10.0, 20.0], None],
+            }
+        }
+    
+    def test_negotiate_defaults_to_json(self):
+        """Test that missing or unsupported Accept headers fall back to JSON"""
+        assert formats.negotiate_media_type(None) == formats.JSON_MEDIA_TYPE
+        assert formats.negotiate_media_type("text/html, */*") == formats.JSON_MEDIA_TYPE
+    
+    def test_negotiate_respects_quality(self):
+        """Test that Accept entries are picked in order of quality"""
+        accept = f"{formats.COLUMNAR_MEDIA_TYPE};q=0.5, {formats.BINARY_MEDIA_TYPE}"
+        assert formats.negotiate_media_type(accept) == formats.BINARY_MEDIA_TYPE
+    
+    def test_negotiate_format_parameter(self):
+        """Test that the format parameter overrides the Accept header"""
+        result = formats.negotiate_media_type(formats.BINARY_MEDIA_TYPE, format="columnar")
+        assert result == formats.COLUMNAR_MEDIA_TYPE
+    
+    def test_negotiate_unknown_format(self):
+        """Test that an explicitly requested unknown format is rejected"""
+        with pytest.raises(HTTPException) as exc_info:
+            formats.negotiate_media_type(None, format="xml")
+        assert exc_info.value.status_code == 406
+    
+    def test_to_columnar(self, history):
+        """Test that columnar output uses epoch milliseconds"""
+        result = formats.to_columnar(history)
+        
+        expected = int(datetime.fromisoformat("2025-05-25T10:00:00").timestamp() * 1000)
+        assert result["time"][0] == expected
+        assert result["time"][1] - result["time"][0] == 60000
+        assert result["series"] is history["series"]
+    
+    def test_to_columnar_single_series(self):
+        """Test that single-series history is exposed as a values column"""
+        result = formats.to_columnar({"timestamps": ["2025-05-25T10:00:00"], "values": [1.0]})
+        assert result["series"] == {"values": [1.0]}
+    
+    def test_to_binary_layout(self, history):
+        """Test that binary columns are aligned and readable at their offsets"""
+        payload = formats.to_binary(history)
+        
+        assert payload[:4] == formats.BINARY_MAGIC
+        header_length = struct.unpack_from("<I", payload, 4)[0]
+        header = json.loads(payload[8:8 + header_length])
+        columns = {column["name"]: column for column in header["columns"]}
+        
+        assert header["count"] == 2
+        for column in columns.values():
+            assert column["offset"] % 8 == 0
+        
+        def read(name):
+            column = columns[name]
+            values = array("d")
+            values.frombytes(payload[column["offset"]:column["offset"] + column["length"] * 8])
+            return list(values)
+        
+        assert read("cpu")[0] == 25.5
+        assert math.isnan(read("cpu")[1])
+        assert columns["per_core"]["shape"] == [2, 2]
+        assert read("per_core")[:2] == [10.0, 20.0]
+        assert all(math.isnan(value) for value in read("per_core")[2:])
+        assert len(payload) == columns["per_core"]["offset"] + 4 * 8
+    
+    def test_fast_json_response(self, history):
+        """Test that the fast JSON response renders plain content"""
+        response = formats.FastJSONResponse(history)
+        assert json.loads(response.body) == history
@@ -0,0 +1,105 @@
+"""
+Unit tests for the per-core heatmap
+"""
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from app.core import heatmap
+from app.core.heatmap import core_heatmap
+from app.database.packing import pack_cores
+
+START = datetime(2025, 5, 25, 12, 0, 0)
+
+
+def sample(seconds, percents, interval=None):
+    """Build a packed sample taken a number of seconds after START"""
+    return ((START + timedelta(seconds=seconds)).isoformat(), pack_cores(percents), interval)
+
+
+SAMPLES = [
+    sample(-5, [99.0, 99.0]),
+    sample(0, [10.0, 100.0]),
+    sample(20, [20.0, 100.0]),
+    sample(30, [30.0, 100.0]),
+    sample(150.5, [40.0, 0.0]),
+    sample(185, [50.0, 50.0]),
+]
+
+
+@pytest.fixture(params=["numpy", "python"])
+def bucketing(request):
+    """Run a test with numpy bucketing and with the plain Python fallback"""
+    if request.param == "python":
+        with patch.object(heatmap, "numpy", None):
+            yield request.param
+    else:
+        pytest.importorskip("numpy")
+        yield request.param
+
+
+class TestCoreHeatmap:
+    """Test suite for core_heatmap"""
+    
+    def test_mean(self, bucketing):
+        """Test that samples are averaged per bucket and core"""
+        result = core_heatmap(SAMPLES, START, 60, 3)
+        
+        assert result == {
+            "start": "2025-05-25T12:00:00",
+            "end": "2025-05-25T12:03:00",
+            "bucket_seconds": 60,
+            "stat": "mean",
+            "cores": 2,
+            "values": [[20, None, 40], [100, None, 0]],
+        }
+    
+    def test_mean_weighted_by_interval(self, bucketing):
+        """Test that fast samples near a threshold do not outweigh slow calm ones"""
+        samples = [
+            sample(0, [10.0], interval=60),
+            sample(2, [90.0], interval=2),
+            sample(4, [90.0], interval=2),
+            sample(6, [90.0], interval=2),
+            sample(60, [10.0]),
+            sample(62, [40.0], interval=20),
+        ]
+        
+        result = core_heatmap(samples, START, 60, 2, default_interval=40)
+        
+        # (10 * 60 + 90 * 6) / 66 and (10 * 40 + 40 * 20) / 60
+        assert result["values"] == [[17, 20]]
+        assert core_heatmap(samples, START, 60, 2, stat="max")["values"] == [[90, 40]]
+    
+    def test_max(self, bucketing):
+        """Test that the busiest sample of each bucket is kept"""
+        result = core_heatmap(SAMPLES, START, 60, 3, stat="max")
+        
+        assert result["values"] == [[30, None, 40], [100, None, 0]]
+    
+    def test_sub_minute_buckets(self, bucketing):
+        """Test buckets narrower than the sampling interval"""
+        result = core_heatmap(SAMPLES, START, 15, 4)
+        
+        assert result["values"][0] == [10, 20, 30, None]
+    
+    def test_changed_core_count(self, bucketing):
+        """Test that samples from before the core count changed are left out"""
+        samples = [sample(0, [10.0]), sample(10, [20.0, 80.0])]
+        
+        result = core_heatmap(samples, START, 60, 1)
+        
+        assert result["cores"] == 2
+        assert result["values"] == [[20], [80]]
+    
+    def test_no_samples(self, bucketing):
+        """Test an empty range"""
+        result = core_heatmap([], START, 60, 3)
+        
+        assert result["cores"] == 0
+        assert result["values"] == []
+    
+    def test_unknown_stat(self):
+        """Test that an unknown stat is rejected"""
+        with pytest.raises(ValueError, match="median"):
+            core_heatmap(SAMPLES, START, 60, 3, stat="median")
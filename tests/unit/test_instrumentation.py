@@ -0,0 +1,143 @@
+"""
+Unit tests for the self-instrumentation histograms
+"""
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import Response
+from fastapi.testclient import TestClient
+
+from app.api.timing import RouteTimingMiddleware
+from app.core.instrumentation import Histogram, SelfStats, timed
+
+
+class TestHistogram:
+    """Test suite for the Histogram class"""
+    
+    def test_observe_counts_into_buckets(self):
+        """Test that observations land in the first bucket not below them"""
+        histogram = Histogram([0.1, 1.0])
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value)
+        
+        snapshot = histogram.snapshot()
+        
+        assert snapshot["buckets"] == {"0.1": 2, "1.0": 3, "+Inf": 4}
+        assert snapshot["count"] == 4
+        assert snapshot["sum"] == pytest.approx(3.65)
+        assert snapshot["max"] == 3.0
+    
+    def test_quantile_interpolates(self):
+        """Test that quantiles are interpolated within a bucket"""
+        histogram = Histogram([1.0, 2.0])
+        for _ in range(10):
+            histogram.observe(1.5)
+        
+        assert histogram.quantile(0.5) == pytest.approx(1.5)
+        assert histogram.quantile(0.99) == 1.5  # Never above the largest value
+        assert Histogram().quantile(0.5) is None
+    
+    def test_overflow_bucket_uses_max(self):
+        """Test that quantiles in the overflow bucket are bounded by the maximum"""
+        histogram = Histogram([1.0])
+        histogram.observe(4.0)
+        
+        assert histogram.quantile(0.99) <= 4.0
+    
+    def test_reset(self):
+        """Test that reset forgets observations"""
+        histogram = Histogram([1.0])
+        histogram.observe(0.5)
+        histogram.reset()
+        
+        assert histogram.snapshot()["count"] == 0
+
+
+class TestSelfStats:
+    """Test suite for the SelfStats class"""
+    
+    def test_timed_decorator(self):
+        """Test that decorated calls are recorded, including failing ones"""
+        stats = SelfStats()
+        
+        @timed("database", stats=stats)
+        def query(fail=False):
+            if fail:
+                raise RuntimeError("boom")
+            return 42
+        
+        assert query() == 42
+        with pytest.raises(RuntimeError):
+            query(fail=True)
+        
+        assert stats.snapshot()["database"]["query"]["count"] == 2
+    
+    def test_timer_and_snapshot(self):
+        """Test timers and that idle histograms are left out of the snapshot"""
+        stats = SelfStats()
+        stats.histogram("collector", "idle")
+        
+        with stats.timer("recorder", "tick_duration"):
+            pass
+        stats.observe("recorder", "tick_lag", 0.002)
+        
+        snapshot = stats.snapshot()
+        assert set(snapshot) == {"recorder"}
+        assert snapshot["recorder"]["tick_lag"]["count"] == 1
+        assert snapshot["recorder"]["tick_duration"]["count"] == 1
+    
+    def test_disabled(self):
+        """Test that nothing is recorded while disabled"""
+        stats = SelfStats()
+        
+        @timed("collector", stats=stats)
+        def collect():
+            return 1
+        
+        stats.enabled = False
+        collect()
+        stats.observe("recorder", "tick_lag", 1.0)
+        with stats.timer("recorder", "tick_duration"):
+            pass
+        
+        assert stats.snapshot() == {}
+
+
+class TestRouteTimingMiddleware:
+    """Test suite for the RouteTimingMiddleware class"""
+    
+    @pytest.fixture
+    def stats(self):
+        """Create an isolated SelfStats"""
+        return SelfStats()
+    
+    @pytest.fixture
+    def client(self, stats):
+        """Create a client for a small app behind the middleware"""
+        app = FastAPI()
+        
+        @app.get("/items/{item_id}")
+        async def item(item_id: int):
+            return {"id": item_id}
+        
+        @app.get("/events")
+        async def events():
+            return Response("data: x\n\n", media_type="text/event-stream")
+        
+        app.add_middleware(RouteTimingMiddleware, stats=stats)
+        return TestClient(app)
+    
+    def test_routes_are_keyed_by_template(self, client, stats):
+        """Test that requests are recorded under their route template"""
+        client.get("/items/1")
+        client.get("/items/2")
+        client.get("/missing")
+        
+        routes = stats.snapshot()["route"]
+        assert routes["GET /items/{item_id}"]["count"] == 2
+        assert routes["GET unmatched"]["count"] == 1
+    
+    def test_event_streams_are_not_timed(self, client, stats):
+        """Test that Server-Sent Events responses are skipped"""
+        client.get("/events")
+        
+        assert stats.snapshot() == {}
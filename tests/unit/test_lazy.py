@@ -0,0 +1,56 @@
+"""
+Unit tests for lazy imports
+"""
+import sys
+import pytest
+
+from app.core.lazy import lazy_import
+
+
+class TestLazyImport:
+    """Test suite for the lazy_import function"""
+    
+    @pytest.fixture
+    def module_dir(self, tmp_path, monkeypatch):
+        """Create an importable module that records when it is executed"""
+        (tmp_path / "lazy_probe.py").write_text(
+            "import builtins\n"
+            "builtins.lazy_probe_runs = getattr(builtins, 'lazy_probe_runs', 0) + 1\n"
+            "VALUE = 42\n"
+        )
+        monkeypatch.syspath_prepend(str(tmp_path))
+        yield tmp_path
+        sys.modules.pop("lazy_probe", None)
+        import builtins
+        if hasattr(builtins, "lazy_probe_runs"):
+            del builtins.lazy_probe_runs
+    
+    def test_executes_on_first_attribute_access(self, module_dir):
+        """Test that the module only runs when one of its attributes is used"""
+        import builtins
+        
+        module = lazy_import("lazy_probe")
+        
+        assert not hasattr(builtins, "lazy_probe_runs")
+        assert module.VALUE == 42
+        assert builtins.lazy_probe_runs == 1
+    
+    def test_shared_with_regular_import(self, module_dir):
+        """Test that a later import statement reuses the lazy module"""
+        import builtins
+        
+        module = lazy_import("lazy_probe")
+        import lazy_probe
+        
+        assert lazy_probe is module
+        assert lazy_probe.VALUE == 42
+        assert builtins.lazy_probe_runs == 1
+    
+    def test_returns_loaded_module(self):
+        """Test that an already imported module is returned unchanged"""
+        assert lazy_import("sys") is sys
+    
+    def test_missing_module(self):
+        """Test that a module that is not installed fails immediately"""
+        with pytest.raises(ModuleNotFoundError):
+            lazy_import("no_such_module_for_lazy_import")
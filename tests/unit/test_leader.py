@@ -0,0 +1,146 @@
+"""
+Unit tests for LeaderElection class
+"""
+import asyncio
+import sqlite3
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from app.core.leader import LeaderElection
+from app.database.db_manager import DatabaseManager
+
+
+class FakeClock:
+    """Manually advanced wall clock"""
+    
+    def __init__(self, now=1000.0):
+        self.now = now
+    
+    def __call__(self):
+        return self.now
+
+
+class TestLeaderElection:
+    """Test suite for the LeaderElection class"""
+    
+    @pytest.fixture
+    def db_manager(self, test_db_path):
+        """Create a database manager on a temporary database"""
+        return DatabaseManager(test_db_path)
+    
+    @pytest.fixture
+    def clock(self):
+        """Create a fake clock shared by all elections of a test"""
+        return FakeClock()
+    
+    def test_invalid_heartbeat(self, db_manager):
+        """Test that the heartbeat must be shorter than the lease"""
+        with pytest.raises(ValueError):
+            LeaderElection(db_manager, ttl=5, heartbeat=5)
+    
+    def test_single_leader(self, db_manager, clock):
+        """Test that only one of several contenders becomes leader"""
+        elections = [LeaderElection(db_manager, ttl=15, heartbeat=5, clock=clock) for _ in range(4)]
+        
+        results = [election.try_acquire() for election in elections]
+        
+        assert results == [True, False, False, False]
+        assert elections[0].is_leader
+    
+    def test_leader_renews_lease(self, db_manager, clock):
+        """Test that a leader renewing every heartbeat keeps the lease"""
+        leader = LeaderElection(db_manager, ttl=15, heartbeat=5, clock=clock)
+        follower = LeaderElection(db_manager, ttl=15, heartbeat=5, clock=clock)
+        leader.try_acquire()
+        
+        for _ in range(10):
+            clock.now += 5
+            assert leader.try_acquire()
+            assert not follower.try_acquire()
+    
+    def test_takeover_after_expiry(self, db_manager, clock):
+        """Test that a follower takes over once the leader stops renewing"""
+        leader = LeaderElection(db_manager, ttl=15, heartbeat=5, clock=clock)
+        follower = LeaderElection(db_manager, ttl=15, heartbeat=5, clock=clock)
+        leader.try_acquire()
+        
+        clock.now += 10
+        assert not follower.try_acquire()
+        
+        clock.now += 10
+        assert not leader.is_leader
+        assert follower.try_acquire()
+        assert not leader.try_acquire()
+    
+    def test_release_hands_over(self, db_manager, clock):
+        """Test that a released lease can be taken immediately"""
+        leader = LeaderElection(db_manager, ttl=15, heartbeat=5, clock=clock)
+        follower = LeaderElection(db_manager, ttl=15, heartbeat=5, clock=clock)
+        leader.try_acquire()
+        
+        leader.release()
+        
+        assert not leader.is_leader
+        assert follower.try_acquire()
+    
+    def test_database_error_keeps_unexpired_lease(self, clock):
+        """Test that a leader survives failed renewals until its lease expires"""
+        db_manager = Mock(spec=DatabaseManager)
+        db_manager.acquire_lease.return_value = True
+        election = LeaderElection(db_manager, ttl=15, heartbeat=5, clock=clock)
+        election.try_acquire()
+        
+        db_manager.acquire_lease.side_effect = Exception("no such table: leases")
+        clock.now += 5
+        assert election.try_acquire()
+        
+        clock.now += 15
+        assert not election.try_acquire()
+    
+    def test_locked_database_keeps_leadership(self, clock):
+        """Test that a leader stays leader while the database is locked, until another holder appears"""
+        db_manager = Mock(spec=DatabaseManager)
+        db_manager.acquire_lease.return_value = True
+        election = LeaderElection(db_manager, ttl=15, heartbeat=5, clock=clock)
+        election.try_acquire()
+        
+        db_manager.acquire_lease.side_effect = sqlite3.OperationalError("database is locked")
+        for _ in range(10):
+            clock.now += 5
+            assert election.try_acquire()
+        assert election.is_leader
+        
+        db_manager.acquire_lease.side_effect = None
+        db_manager.acquire_lease.return_value = False
+        clock.now += 5
+        assert not election.try_acquire()
+        assert not election.is_leader
+    
+    def test_locked_database_does_not_elect_follower(self, clock):
+        """Test that a follower does not become leader while the database is locked"""
+        db_manager = Mock(spec=DatabaseManager)
+        db_manager.acquire_lease.side_effect = sqlite3.OperationalError("database is locked")
+        election = LeaderElection(db_manager, ttl=15, heartbeat=5, clock=clock)
+        
+        assert not election.try_acquire()
+    
+    def test_campaign_calls_callbacks(self, db_manager):
+        """Test that gaining and losing leadership runs the callbacks"""
+        election = LeaderElection(db_manager, ttl=1, heartbeat=0.05)
+        on_elected = AsyncMock()
+        on_demoted = AsyncMock()
+        
+        async def scenario():
+            election.start(on_elected, on_demoted)
+            await asyncio.sleep(0.1)
+            on_elected.assert_awaited_once()
+            
+            # Another process steals the lease
+            db_manager.release_lease(election.name, election.holder)
+            db_manager.acquire_lease(election.name, "other", 60, election._clock())
+            await asyncio.sleep(0.1)
+            on_demoted.assert_awaited_once()
+            
+            await election.stop()
+        
+        asyncio.run(scenario())
@@ -0,0 +1,162 @@
+"""
+Unit tests for the event loop lag monitor and slow callback detector
+"""
+import sys
+import time
+import asyncio
+import pytest
+from fastapi import FastAPI
+
+from app.core.instrumentation import SelfStats
+from app.core.loop_monitor import LoopLagMonitor, SlowCallbackDetector, route_table
+
+
+class TestLoopLagMonitor:
+    """Test suite for the LoopLagMonitor class"""
+    
+    def test_drain_summarizes_window(self):
+        """Test that drain returns max and mean lag in milliseconds and resets"""
+        stats = SelfStats()
+        monitor = LoopLagMonitor(stats=stats)
+        for lag in (0.001, 0.003, 0.002):
+            monitor.observe(lag)
+        monitor.count_slow_callback()
+        
+        window = monitor.drain()
+        
+        assert window["max_ms"] == pytest.approx(3.0)
+        assert window["mean_ms"] == pytest.approx(2.0)
+        assert window["slow_callbacks"] == 1
+        assert monitor.drain() is None
+        assert stats.histogram("loop", "lag").count == 3
+    
+    def test_get_stats(self):
+        """Test the monitor's state report"""
+        monitor = LoopLagMonitor(interval=0.25, stats=SelfStats())
+        monitor.observe(0.004)
+        monitor.count_slow_callback()
+        monitor.drain()
+        
+        stats = monitor.get_stats()
+        
+        assert stats["running"] is False
+        assert stats["interval_seconds"] == 0.25
+        assert stats["last_lag_ms"] == pytest.approx(4.0)
+        assert stats["slow_callbacks"] == 1
+    
+    def test_measures_blocking_call(self):
+        """Test that a blocking call on the loop shows up as lag"""
+        monitor = LoopLagMonitor(interval=0.02, stats=SelfStats())
+        
+        async def scenario():
+            await monitor.start()
+            assert monitor.running
+            await asyncio.sleep(0.05)
+            time.sleep(0.1)
+            await asyncio.sleep(0.05)
+            await monitor.stop()
+        
+        asyncio.run(scenario())
+        
+        assert monitor.running is False
+        assert monitor.drain()["max_ms"] >= 50
+
+
+class TestSlowCallbackDetector:
+    """Test suite for the SlowCallbackDetector class"""
+    
+    def test_route_table(self):
+        """Test that endpoints are named by method and route template"""
+        app = FastAPI()
+        
+        @app.get("/api/items/{item_id}")
+        async def get_item(item_id: int):
+            return {}
+        
+        @app.websocket("/ws/items")
+        async def items_websocket(websocket):
+            pass
+        
+        routes = route_table(app)
+        
+        assert routes[get_item.__code__] == "GET /api/items/{item_id}"
+        assert routes[items_websocket.__code__] == "WS /ws/items"
+    
+    def test_describe_finds_route_on_stack(self):
+        """Test that a stack is attributed to the endpoint it runs in"""
+        def handler():
+            return sys._getframe()
+        
+        detector = SlowCallbackDetector(routes={handler.__code__: "GET /api/processes"})
+        
+        where = detector.describe(handler())
+        
+        assert where["route"] == "GET /api/processes"
+        assert "in handler" in where["location"]
+    
+    def test_describe_outside_request(self):
+        """Test that work outside any endpoint has no route"""
+        where = SlowCallbackDetector().describe(sys._getframe())
+        
+        assert where["route"] is None
+        assert "test_describe_outside_request" in where["location"]
+    
+    def test_reports_blocking_call(self):
+        """Test that a call blocking the loop beyond the threshold is reported"""
+        reports = []
+        stats = SelfStats()
+        
+        def blocking_endpoint():
+            time.sleep(0.2)
+        
+        detector = SlowCallbackDetector(
+            threshold=0.05,
+            routes={blocking_endpoint.__code__: "GET /api/slow"},
+            on_slow=reports.append,
+            stats=stats,
+        )
+        
+        async def scenario():
+            detector.start()
+            assert detector.running
+            await asyncio.sleep(0.1)
+            blocking_endpoint()
+            await asyncio.sleep(0.1)
+            detector.stop()
+        
+        asyncio.run(scenario())
+        
+        assert detector.running is False
+        assert len(reports) == 1
+        assert reports[0]["route"] == "GET /api/slow"
+        assert "in blocking_endpoint" in reports[0]["location"]
+        assert 100 <= reports[0]["duration_ms"] <= 300
+        assert list(detector.recent) == reports
+        assert stats.histogram("loop", "slow_callback").count == 1
+    
+    def test_short_calls_are_not_reported(self):
+        """Test that an idle loop produces no reports"""
+        reports = []
+        detector = SlowCallbackDetector(threshold=0.1, on_slow=reports.append)
+        
+        async def scenario():
+            detector.start()
+            await asyncio.sleep(0.2)
+            detector.stop()
+        
+        asyncio.run(scenario())
+        
+        assert reports == []
+    
+    def test_report_survives_failing_callback(self):
+        """Test that an error in on_slow does not stop the detector"""
+        def on_slow(event):
+            raise RuntimeError("database is locked")
+        
+        detector = SlowCallbackDetector(on_slow=on_slow, stats=SelfStats())
+        
+        event = detector.report(0.15, "GET /", "app/main.py:1 in <module>")
+        
+        assert event["duration_ms"] == pytest.approx(150.0)
+        assert event["route"] == "GET /"
+        assert len(detector.recent) == 1
@@ -2,35 +2,43 @@
 Unit tests for MetricsRecorder class
 """
 import pytest
-import time
-from unittest.mock import patch, Mock, call
+import asyncio
+import sqlite3
 import threading
+from datetime import datetime
+from unittest.mock import patch, Mock
 
+from app.core.alerts import AlertRule
+from app.core.flight_recorder import ProcessFlightRecorder
 from app.core.metrics_recorder import MetricsRecorder
+from app.core.loop_monitor import LoopLagMonitor
+from app.core.sampling import AdaptiveSamplingPolicy
+from app.core.spool import SampleSpool
 from app.core.system_monitor import SystemMonitor
 from app.database.db_manager import DatabaseManager
 
 
+def cpu_breakdown(percent):
+    """Build a CPU breakdown as returned by SystemMonitor.get_cpu_breakdown"""
+    times = {"user": percent, "nice": 0.0, "system": 0.0, "idle": 100.0 - percent,
+             "iowait": 0.0, "irq": 0.0, "softirq": 0.0, "steal": 0.0}
+    return {
+        "cpu_percent": percent,
+        "per_core_cpu": [percent, percent],
+        "cpu_times": times,
+        "per_core_times": [times, times],
+    }
+
+
 class TestMetricsRecorder:
     """Test suite for the MetricsRecorder class"""
     
     @pytest.fixture
     def mock_db_manager(self):
         """Create a mock database manager"""
-        return Mock(spec=DatabaseManager)
-    
-    @pytest.fixture
-    def mock_system_monitor(self):
-        """Create a mock system monitor"""
-        monitor = Mock(spec=SystemMonitor)
-        monitor.get_cpu_usage.return_value = 75.0
-        monitor.get_memory_usage.return_value = {
-            "percent": 75.0,
-            "total_gb": 16.0,
-            "used_gb": 12.0,
-            "available_gb": 4.0
-        }
-        return monitor
+        db_manager = Mock(spec=DatabaseManager)
+        db_manager.get_open_alerts.return_value = []
+        return db_manager
     
     @pytest.fixture
     def metrics_recorder(self, mock_db_manager):
@@ -42,6 +50,9 @@ class TestMetricsRecorder:
                 cpu_threshold=70,
                 memory_threshold=70
             )
+            recorder.monitor.get_cpu_breakdown.return_value = cpu_breakdown(50.0)
+            recorder.monitor.get_memory_usage.return_value = {"percent": 50.0}
+            recorder.monitor.get_pressure.return_value = {}
             return recorder
     
     def test_init(self, metrics_recorder, mock_db_manager):
@@ -50,130 +61,431 @@ class TestMetricsRecorder:
         assert metrics_recorder.interval == 0.1
         assert metrics_recorder.cpu_threshold == 70
         assert metrics_recorder.memory_threshold == 70
-        assert metrics_recorder._running is False
-        assert metrics_recorder._thread is None
+        assert metrics_recorder.running is False
+        assert metrics_recorder._task is None
+    
+    def test_shares_given_monitor(self, mock_db_manager):
+        """Test that a monitor passed in is used, so its process table is shared"""
+        monitor = Mock(spec=SystemMonitor)
+        
+        recorder = MetricsRecorder(db_manager=mock_db_manager, monitor=monitor)
+        
+        assert recorder.monitor is monitor
     
     def test_start_and_stop(self, metrics_recorder):
         """Test starting and stopping the metrics recorder"""
-        # Start the recorder
-        metrics_recorder.start()
-        
-        assert metrics_recorder._running is True
-        assert metrics_recorder._thread is not None
-        assert metrics_recorder._thread.is_alive() is True
+        async def scenario():
+            await metrics_recorder.start()
+            assert metrics_recorder.running is True
+            
+            # Let a few ticks run
+            await asyncio.sleep(0.35)
+            
+            await metrics_recorder.stop()
+            assert metrics_recorder.running is False
         
-        # Stop the recorder
-        metrics_recorder.stop()
+        asyncio.run(scenario())
         
-        assert metrics_recorder._running is False
-        # Give the thread time to terminate
-        time.sleep(0.2)
-        assert metrics_recorder._thread.is_alive() is False
+        assert metrics_recorder.db_manager.insert_samples.called
+        assert metrics_recorder._executor is None
     
     def test_start_already_running(self, metrics_recorder):
         """Test starting the metrics recorder when it's already running"""
-        # Mock the thread to simulate it's already running
-        metrics_recorder._running = True
-        metrics_recorder._thread = Mock()
-        metrics_recorder._thread.is_alive.return_value = True
-        
-        # Try to start it again
-        metrics_recorder.start()
+        async def scenario():
+            await metrics_recorder.start()
+            task = metrics_recorder._task
+            
+            # Try to start it again
+            await metrics_recorder.start()
+            
+            # Should not create a new task
+            assert metrics_recorder._task is task
+            await metrics_recorder.stop()
         
-        # Should not create a new thread
-        assert metrics_recorder._thread.start.called is False
+        asyncio.run(scenario())
     
     def test_stop_not_running(self, metrics_recorder):
         """Test stopping the metrics recorder when it's not running"""
-        # Ensure it's not running
-        metrics_recorder._running = False
-        metrics_recorder._thread = None
-        
-        # Try to stop it
-        metrics_recorder.stop()
+        asyncio.run(metrics_recorder.stop())
         
         # Should not cause any errors
-        assert metrics_recorder._running is False
+        assert metrics_recorder.running is False
     
-    def test_record_metrics_below_threshold(self, metrics_recorder, mock_db_manager):
+    def test_record_metrics_below_threshold(self, metrics_recorder):
         """Test recording metrics when values are below thresholds"""
-        # Setup mocks
-        with patch('app.core.metrics_recorder.datetime') as mock_datetime, \
-             patch.object(metrics_recorder.monitor, 'get_cpu_usage', return_value=50.0), \
-             patch.object(metrics_recorder.monitor, 'get_memory_usage', return_value={"percent": 50.0}), \
-             patch('time.sleep'):
+        with patch.object(metrics_recorder.monitor, 'get_cpu_breakdown', return_value=cpu_breakdown(50.0)), \
+             patch.object(metrics_recorder.monitor, 'get_memory_usage', return_value={"percent": 50.0}):
             
-            mock_datetime.datetime.now.return_value.isoformat.return_value = "2025-05-25T12:00:00"
+            sample = metrics_recorder.collect("2025-05-25T12:00:00")
             
-            # Run record_metrics once
-            metrics_recorder._running = True
-            # Use a side effect to ensure we only run the loop once
-            mock_db_manager.insert_cpu_data.side_effect = [None, Exception("Stop the loop")]
-            
-            try:
-                metrics_recorder._record_metrics()
-            except Exception:
-                pass
-            
-            # Check that metrics were recorded but no alerts
-            mock_db_manager.insert_cpu_data.assert_called_once_with("2025-05-25T12:00:00", 50.0)
-            mock_db_manager.insert_memory_data.assert_called_once()
-            mock_db_manager.insert_alert.assert_not_called()
+            # Check that metrics were collected but no alerts
+            assert sample["timestamp"] == "2025-05-25T12:00:00"
+            assert sample["cpu"] == 50.0
+            assert sample["memory"] == {"percent": 50.0}
+            assert sample["alerts"] == []
     
-    def test_record_metrics_above_threshold(self, metrics_recorder, mock_db_manager):
+    def test_collect_breaks_down_cpu_time(self, metrics_recorder):
+        """Test that CPU usage and its breakdown come from one non-blocking reading"""
+        metrics_recorder.monitor.get_cpu_breakdown.return_value = cpu_breakdown(30.0)
+        
+        sample = metrics_recorder.collect("2025-05-25T12:00:00")
+        
+        assert sample["cpu"] == 30.0
+        assert sample["per_core"] == [30.0, 30.0]
+        assert sample["cpu_times"]["idle"] == 70.0
+        assert len(sample["per_core_times"]) == 2
+        metrics_recorder.monitor.get_cpu_usage.assert_not_called()
+        metrics_recorder.monitor.get_per_core_cpu.assert_not_called()
+    
+    def test_record_metrics_above_threshold(self, metrics_recorder):
         """Test recording metrics when values are above thresholds"""
-        # Setup mocks
-        with patch('app.core.metrics_recorder.datetime') as mock_datetime, \
-             patch.object(metrics_recorder.monitor, 'get_cpu_usage', return_value=80.0), \
-             patch.object(metrics_recorder.monitor, 'get_memory_usage', return_value={"percent": 90.0}), \
-             patch('time.sleep'):
-            
-            mock_datetime.datetime.now.return_value.isoformat.return_value = "2025-05-25T12:00:00"
+        with patch.object(metrics_recorder.monitor, 'get_cpu_breakdown', return_value=cpu_breakdown(80.0)), \
+             patch.object(metrics_recorder.monitor, 'get_memory_usage', return_value={"percent": 90.0}):
             
-            # Run record_metrics once
-            metrics_recorder._running = True
-            # Use a side effect to ensure we only run the loop once
-            mock_db_manager.insert_cpu_data.side_effect = [None, Exception("Stop the loop")]
+            sample = metrics_recorder.collect("2025-05-25T12:00:00")
             
-            try:
-                metrics_recorder._record_metrics()
-            except Exception:
-                pass
+            # Check that both CPU and memory alerts started firing
+            assert len(sample["alerts"]) == 2
+            assert all(alert["event"] == "firing" for alert in sample["alerts"])
             
-            # Check that metrics and alerts were recorded
-            mock_db_manager.insert_cpu_data.assert_called_once_with("2025-05-25T12:00:00", 80.0)
-            mock_db_manager.insert_memory_data.assert_called_once()
+            # First alert should be CPU
+            assert sample["alerts"][0]["alert_type"] == "CPU"
+            assert "CPU" in sample["alerts"][0]["message"]
+            assert sample["alerts"][0]["value"] == 80.0
             
-            # Check that both CPU and memory alerts were created
-            assert mock_db_manager.insert_alert.call_count == 2
+            # Second alert should be memory
+            assert sample["alerts"][1]["alert_type"] == "Memory"
+            assert "memory" in sample["alerts"][1]["message"].lower()
+            assert sample["alerts"][1]["value"] == 90.0
+    
+    def test_pressure_alert_fires_below_utilisation_threshold(self, metrics_recorder):
+        """Test that stalled tasks alert while CPU usage is still below its threshold"""
+        metrics_recorder.monitor.get_pressure.return_value = {
+            "psi_cpu_some_stall": 35.0, "psi_memory_some_stall": 0.0, "psi_io_some_stall": None,
+        }
+        
+        sample = metrics_recorder.collect("2025-05-25T12:00:00")
+        
+        assert sample["cpu"] == 50.0
+        assert sample["pressure"]["psi_cpu_some_stall"] == 35.0
+        assert [(alert["rule"], alert["alert_type"]) for alert in sample["alerts"]] == [
+            ("cpu_pressure", "CPU Pressure")
+        ]
+        assert metrics_recorder.alert_engine.state("io_pressure") == "inactive"
+    
+    def test_custom_rule_on_pressure_metric(self, mock_db_manager):
+        """Test that rules can be defined on any collected pressure metric"""
+        with patch('app.core.metrics_recorder.SystemMonitor'):
+            recorder = MetricsRecorder(
+                db_manager=mock_db_manager,
+                alert_rules=[AlertRule(
+                    name="run_queue_long", metric="run_queue", threshold=8,
+                    alert_type="Load", message="Long run queue",
+                )],
+            )
+        recorder.monitor.get_cpu_breakdown.return_value = cpu_breakdown(10.0)
+        recorder.monitor.get_memory_usage.return_value = {"percent": 10.0}
+        recorder.monitor.get_pressure.return_value = {"run_queue": 12, "load_1": 3.5}
+        
+        sample = recorder.collect("2025-05-25T12:00:00")
+        
+        assert [alert["rule"] for alert in sample["alerts"]] == ["run_queue_long"]
+    
+    def test_sustained_alert_is_stored_once(self, metrics_recorder):
+        """Test that a value staying above the threshold only fires once"""
+        metrics_recorder.monitor.get_cpu_breakdown.return_value = cpu_breakdown(95.0)
+        
+        samples = [
+            metrics_recorder.collect(f"2025-05-25T12:0{minute}:00")
+            for minute in range(5)
+        ]
+        
+        events = [alert for sample in samples for alert in sample["alerts"]]
+        assert [event["event"] for event in events] == ["firing"]
+        assert events[0]["rule"] == "cpu_high"
+    
+    def test_firing_alert_captures_processes(self, metrics_recorder):
+        """Test that the flight recorder's window is attached to firing alerts only"""
+        flight_recorder = Mock(spec=ProcessFlightRecorder)
+        flight_recorder.freeze.return_value = {"captured_at": "2025-05-25T12:00:00", "frames": []}
+        metrics_recorder.flight_recorder = flight_recorder
+        metrics_recorder.monitor.get_cpu_breakdown.return_value = cpu_breakdown(95.0)
+        
+        fired = metrics_recorder.collect("2025-05-25T12:00:00")
+        
+        assert fired["alerts"][0]["processes"] == flight_recorder.freeze.return_value
+        
+        metrics_recorder.monitor.get_cpu_breakdown.return_value = cpu_breakdown(10.0)
+        resolved = metrics_recorder.collect("2025-05-25T12:01:00")
+        
+        assert resolved["alerts"][0]["event"] == "resolved"
+        assert "processes" not in resolved["alerts"][0]
+        flight_recorder.freeze.assert_called_once()
+    
+    def test_samples_processes_while_running(self, metrics_recorder):
+        """Test that the flight recorder is fed from the process table while recording"""
+        metrics_recorder.flight_recorder = ProcessFlightRecorder(window_seconds=1, interval=0.05)
+        metrics_recorder.monitor.process_table.rows.return_value = [
+            {"pid": 7, "name": "stress", "cpu_percent": 99.0, "rss": 1024}
+        ]
+        
+        async def scenario():
+            await metrics_recorder.start()
+            await asyncio.sleep(0.2)
+            await metrics_recorder.stop()
+        
+        asyncio.run(scenario())
+        
+        assert len(metrics_recorder.flight_recorder) >= 2
+        assert metrics_recorder._flight_task is None
+        assert metrics_recorder.flight_recorder.freeze()["frames"][0]["pid"] == [7]
+    
+    def test_start_restores_open_alerts(self, metrics_recorder, mock_db_manager):
+        """Test that alerts left firing by a previous run are resumed"""
+        metrics_recorder.interval = 3600
+        mock_db_manager.get_open_alerts.return_value = [
+            {"rule": "cpu_high", "timestamp": "2025-05-25T11:00:00", "peak_value": 99.0}
+        ]
+        
+        async def scenario():
+            await metrics_recorder.start()
+            await metrics_recorder.stop()
+        
+        asyncio.run(scenario())
+        
+        assert metrics_recorder.alert_engine.state("cpu_high") == "firing"
+    
+    def test_record_once_buffers_until_batch_full(self, metrics_recorder, mock_db_manager):
+        """Test that samples are handed to the writer in batches"""
+        metrics_recorder.interval = 3600
+        metrics_recorder.batch_size = 2
+        
+        async def scenario():
+            await metrics_recorder.start()
+            await metrics_recorder.record_once("2025-05-25T12:00:00")
+            await asyncio.sleep(0.05)
+            mock_db_manager.insert_samples.assert_not_called()
             
-            # First call should be CPU alert
-            cpu_alert_call = mock_db_manager.insert_alert.call_args_list[0]
-            assert cpu_alert_call[0][1] == "CPU"
-            assert "CPU" in cpu_alert_call[0][2]
-            assert cpu_alert_call[0][3] == 80.0
+            await metrics_recorder.record_once("2025-05-25T12:01:00")
+            await asyncio.sleep(0.05)
+            mock_db_manager.insert_samples.assert_called_once()
+            await metrics_recorder.stop()
+        
+        asyncio.run(scenario())
+        
+        batch = mock_db_manager.insert_samples.call_args[0][0]
+        assert [sample["timestamp"] for sample in batch] == ["2025-05-25T12:00:00", "2025-05-25T12:01:00"]
+    
+    def test_record_once_attaches_loop_lag(self, metrics_recorder, mock_db_manager):
+        """Test that each sample carries the event loop lag of its window"""
+        loop_monitor = LoopLagMonitor()
+        loop_monitor.observe(0.02)
+        metrics_recorder.loop_monitor = loop_monitor
+        
+        async def scenario():
+            first = await metrics_recorder.record_once("2025-05-25T12:00:00")
+            second = await metrics_recorder.record_once("2025-05-25T12:01:00")
+            return first, second
+        
+        first, second = asyncio.run(scenario())
+        
+        assert first["loop_lag"]["max_ms"] == pytest.approx(20.0)
+        assert second["loop_lag"] is None
+    
+    def test_slow_writes_do_not_delay_collection(self, metrics_recorder, mock_db_manager):
+        """Test that collection continues while the database write is blocked"""
+        metrics_recorder.interval = 3600
+        release = threading.Event()
+        mock_db_manager.insert_samples.side_effect = lambda samples: release.wait(5)
+        
+        async def scenario():
+            await metrics_recorder.start()
+            await metrics_recorder.record_once("2025-05-25T12:00:00")
+            await asyncio.sleep(0.05)
             
-            # Second call should be memory alert
-            memory_alert_call = mock_db_manager.insert_alert.call_args_list[1]
-            assert memory_alert_call[0][1] == "Memory"
-            assert "Memory" in memory_alert_call[0][2]
-            assert memory_alert_call[0][3] == 90.0
+            # The writer is stuck, but the next sample is still collected
+            await asyncio.wait_for(metrics_recorder.record_once("2025-05-25T12:01:00"), timeout=1)
+            release.set()
+            await metrics_recorder.stop()
+        
+        asyncio.run(scenario())
+        
+        assert metrics_recorder._buffer == []
+    
+    def test_stop_flushes_buffer(self, metrics_recorder, mock_db_manager):
+        """Test that buffered samples are written when the recorder stops"""
+        metrics_recorder.interval = 3600
+        metrics_recorder.batch_size = 10
+        
+        async def scenario():
+            await metrics_recorder.start()
+            await metrics_recorder.record_once("2025-05-25T12:00:00")
+            mock_db_manager.insert_samples.assert_not_called()
+            await metrics_recorder.stop()
+        
+        asyncio.run(scenario())
+        
+        mock_db_manager.insert_samples.assert_called_once()
+    
+    def test_failed_flush_keeps_samples(self, metrics_recorder, mock_db_manager):
+        """Test that samples stay buffered when a write fails"""
+        metrics_recorder._buffer.append({"timestamp": "2025-05-25T12:00:00"})
+        mock_db_manager.insert_samples.side_effect = sqlite3.OperationalError("database is locked")
+        
+        with pytest.raises(sqlite3.OperationalError):
+            metrics_recorder.flush()
+        
+        assert len(metrics_recorder._buffer) == 1
+    
+    def test_failed_flush_spools_samples(self, metrics_recorder, mock_db_manager, tmp_path):
+        """Test that a rejected batch is spooled and replayed in order later"""
+        metrics_recorder.spool = SampleSpool(str(tmp_path / "spool.jsonl"))
+        metrics_recorder._buffer.append({"timestamp": "2025-05-25T12:00:00"})
+        mock_db_manager.insert_samples.side_effect = sqlite3.OperationalError("database is locked")
+        
+        metrics_recorder.flush()
+        
+        assert metrics_recorder._buffer == []
+        assert metrics_recorder.spool.depth == 1
+        assert metrics_recorder.get_stats()["spool_depth"] == 1
+        
+        mock_db_manager.insert_samples.side_effect = None
+        metrics_recorder._buffer.append({"timestamp": "2025-05-25T12:01:00"})
+        metrics_recorder.flush()
+        
+        written = [
+            sample["timestamp"]
+            for call in mock_db_manager.insert_samples.call_args_list[1:]
+            for sample in call[0][0]
+        ]
+        assert written == ["2025-05-25T12:00:00", "2025-05-25T12:01:00"]
+        assert metrics_recorder.spool.depth == 0
+    
+    def test_rejected_sample_is_dropped(self, metrics_recorder, mock_db_manager, tmp_path):
+        """Test that a sample the database cannot store is dropped instead of spooled"""
+        metrics_recorder.spool = SampleSpool(str(tmp_path / "spool.jsonl"))
+        written = []
+        
+        def insert_samples(samples):
+            if any("cpu" not in sample for sample in samples):
+                raise KeyError("cpu")
+            written.extend(sample["timestamp"] for sample in samples)
+        
+        mock_db_manager.insert_samples.side_effect = insert_samples
+        metrics_recorder._buffer.extend([
+            {"timestamp": "2025-05-25T12:00:00", "cpu": 1.0},
+            {"timestamp": "2025-05-25T12:01:00"},
+            {"timestamp": "2025-05-25T12:02:00", "cpu": 2.0},
+        ])
+        
+        assert metrics_recorder.flush() == 3
+        
+        assert written == ["2025-05-25T12:00:00", "2025-05-25T12:02:00"]
+        assert metrics_recorder.spool.depth == 0
+        assert metrics_recorder._buffer == []
+        assert metrics_recorder.get_stats()["rejected_samples"] == 1
+    
+    def test_rejected_spooled_sample_does_not_block_replay(self, metrics_recorder, mock_db_manager, tmp_path):
+        """Test that a spooled sample the database cannot store does not hold back later ones"""
+        metrics_recorder.spool = SampleSpool(str(tmp_path / "spool.jsonl"))
+        metrics_recorder.spool.append([{"timestamp": "2025-05-25T12:00:00"}])
+        written = []
+        
+        def insert_samples(samples):
+            if any("cpu" not in sample for sample in samples):
+                raise ValueError("malformed sample")
+            written.extend(sample["timestamp"] for sample in samples)
+        
+        mock_db_manager.insert_samples.side_effect = insert_samples
+        metrics_recorder._buffer.append({"timestamp": "2025-05-25T12:01:00", "cpu": 1.0})
+        metrics_recorder.flush()
+        
+        assert written == ["2025-05-25T12:01:00"]
+        assert metrics_recorder.spool.depth == 0
+    
+    def test_record_metrics_uses_aligned_timestamps(self, metrics_recorder):
+        """Test that the recording loop labels samples with aligned tick times"""
+        scheduler = Mock()
+        scheduler.missed_ticks = 0
+        scheduler.time_until_next.return_value = 0.0
+        scheduler.tick.side_effect = [1748174400.0, 1748174460.0]
+        timestamps = []
+        
+        async def record_once(timestamp):
+            timestamps.append(timestamp)
+            if len(timestamps) == 2:
+                raise asyncio.CancelledError()
+        
+        with patch('app.core.metrics_recorder.IntervalScheduler', return_value=scheduler), \
+             patch.object(metrics_recorder, 'record_once', side_effect=record_once):
+            with pytest.raises(asyncio.CancelledError):
+                asyncio.run(metrics_recorder._record_metrics())
+        
+        assert timestamps == [
+            datetime.fromtimestamp(1748174400.0).isoformat(),
+            datetime.fromtimestamp(1748174460.0).isoformat(),
+        ]
+    
+    def test_adaptive_sampling_changes_interval(self, metrics_recorder, mock_db_manager):
+        """Test that the policy speeds up ticks and the interval is recorded"""
+        metrics_recorder.sampling_policy = AdaptiveSamplingPolicy(fast_interval=0.02, slow_interval=0.1)
+        metrics_recorder.monitor.get_cpu_breakdown.return_value = cpu_breakdown(65.0)  # Near the threshold of 70
+        
+        async def scenario():
+            await metrics_recorder.start()
+            await asyncio.sleep(0.35)
+            await metrics_recorder.stop()
+        
+        asyncio.run(scenario())
+        
+        samples = [s for call in mock_db_manager.insert_samples.call_args_list for s in call[0][0]]
+        assert samples[0]["interval"] == 0.1
+        assert len(samples) >= 5
+        # Each later sample covers one fast tick, or a few if ticks were missed
+        assert all(0.02 - 1e-6 <= sample["interval"] < 0.1 for sample in samples[1:])
+    
+    def test_interval_is_time_since_previous_tick(self, metrics_recorder):
+        """Test that each sample records the time it covers, not the interval in effect"""
+        metrics_recorder.interval = 60
+        
+        first = metrics_recorder.collect("2025-05-25T10:00:00")
+        second = metrics_recorder.collect("2025-05-25T10:00:02")
+        third = metrics_recorder.collect("2025-05-25T10:01:00")
+        
+        assert first["interval"] == 60
+        assert second["interval"] == 2.0
+        assert third["interval"] == 58.0
     
     def test_exception_handling(self, metrics_recorder):
         """Test that exceptions in record_metrics are handled properly"""
-        # Setup mocks to raise exception
-        with patch.object(metrics_recorder.monitor, 'get_cpu_usage', side_effect=Exception("Test exception")), \
-             patch('time.sleep'):
-            
-            # Run record_metrics once
-            metrics_recorder._running = True
-            # Use a side effect to ensure we only run the loop twice
-            time.sleep.side_effect = [None, Exception("Stop the loop")]
-            
-            try:
-                metrics_recorder._record_metrics()
-            except Exception:
-                pass
-            
-            # Should not crash and should continue to next iteration
-            assert time.sleep.call_count == 1
+        scheduler = Mock()
+        scheduler.missed_ticks = 0
+        scheduler.time_until_next.return_value = 0.0
+        scheduler.tick.return_value = 1748174400.0
+        calls = []
+        
+        async def record_once(timestamp):
+            calls.append(timestamp)
+            if len(calls) == 2:
+                raise asyncio.CancelledError()
+            raise Exception("Test exception")
+        
+        with patch('app.core.metrics_recorder.IntervalScheduler', return_value=scheduler), \
+             patch.object(metrics_recorder, 'record_once', side_effect=record_once):
+            with pytest.raises(asyncio.CancelledError):
+                asyncio.run(metrics_recorder._record_metrics())
+        
+        # Should not crash and should continue to next iteration
+        assert len(calls) == 2
+    
+    def test_stop_interrupts_wait(self, metrics_recorder):
+        """Test that stopping the recorder does not wait for the next tick"""
+        metrics_recorder.interval = 3600
+        
+        async def scenario():
+            await metrics_recorder.start()
+            started = asyncio.get_running_loop().time()
+            await metrics_recorder.stop()
+            return asyncio.get_running_loop().time() - started
+        
+        assert asyncio.run(scenario()) < 1.0
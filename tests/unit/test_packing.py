@@ -0,0 +1,32 @@
+"""
+Unit tests for packed per-core samples
+"""
+import pytest
+
+from app.database.packing import pack_cores, unpack_cores
+
+
+class TestPacking:
+    """Test suite for pack_cores and unpack_cores"""
+    
+    def test_round_trip(self):
+        """Test that percentages survive packing to a hundredth of a percent"""
+        percents = [0.0, 12.3, 45.67, 100.0]
+        
+        blob = pack_cores(percents)
+        
+        assert len(blob) == 8
+        assert unpack_cores(blob) == percents
+    
+    def test_fixed_width_little_endian(self):
+        """Test the byte layout"""
+        assert pack_cores([1.0, 2.56]) == b"\x64\x00\x00\x01"
+    
+    def test_out_of_range_values_are_clamped(self):
+        """Test that values outside the encodable range are clamped"""
+        assert unpack_cores(pack_cores([-1.0, 1000.0])) == [0.0, pytest.approx(655.35)]
+    
+    def test_empty(self):
+        """Test a host reporting no cores"""
+        assert pack_cores([]) == b""
+        assert unpack_cores(b"") == []
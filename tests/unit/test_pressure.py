@@ -0,0 +1,155 @@
+"""
+Unit tests for the pressure and contention collector
+"""
+import os
+import pytest
+from unittest.mock import patch
+
+from app.core.pressure import PRESSURE_FIELDS, PressureSampler, read_pressure, read_stat
+
+
+def write_procfs(root, cpu_total=0, io_total=0, ctxt=1000, running=3, blocked=1, psi=True):
+    """Write the procfs files read by the collector under root"""
+    if psi:
+        os.makedirs(root / "pressure", exist_ok=True)
+        (root / "pressure" / "cpu").write_text(
+            f"some avg10=12.50 avg60=8.00 avg300=2.00 total={cpu_total}\n"
+            "full avg10=0.00 avg60=0.00 avg300=0.00 total=0\n"
+        )
+        (root / "pressure" / "memory").write_text(
+            "some avg10=0.00 avg60=0.00 avg300=0.00 total=0\n"
+            "full avg10=0.00 avg60=0.00 avg300=0.00 total=0\n"
+        )
+        (root / "pressure" / "io").write_text(
+            f"some avg10=40.00 avg60=30.00 avg300=10.00 total={io_total}\n"
+            f"full avg10=20.00 avg60=15.00 avg300=5.00 total={io_total // 2}\n"
+        )
+    (root / "stat").write_text(
+        "cpu  100 0 50 1000 10 0 0 0 0 0\n"
+        "intr 12345 0 0 0\n"
+        f"ctxt {ctxt}\n"
+        "btime 1700000000\n"
+        f"procs_running {running}\n"
+        f"procs_blocked {blocked}\n"
+    )
+
+
+class Clock:
+    """Manually advanced monotonic clock"""
+    
+    def __init__(self):
+        self.now = 100.0
+    
+    def __call__(self):
+        return self.now
+
+
+class TestReaders:
+    """Test suite for the procfs readers"""
+    
+    def test_read_pressure(self, tmp_path):
+        """Test parsing both kinds of a pressure file"""
+        write_procfs(tmp_path, cpu_total=5000)
+        
+        pressure = read_pressure("cpu", str(tmp_path))
+        
+        assert pressure["some"] == {"avg10": 12.5, "avg60": 8.0, "avg300": 2.0, "total": 5000.0}
+        assert pressure["full"]["total"] == 0.0
+    
+    def test_read_pressure_unavailable(self, tmp_path):
+        """Test that a kernel without PSI gives None"""
+        write_procfs(tmp_path, psi=False)
+        
+        assert read_pressure("memory", str(tmp_path)) is None
+    
+    def test_read_stat(self, tmp_path):
+        """Test that only the scheduler lines of /proc/stat are kept"""
+        write_procfs(tmp_path, ctxt=4242, running=5, blocked=2)
+        
+        assert read_stat(str(tmp_path)) == {"ctxt": 4242, "procs_running": 5, "procs_blocked": 2}
+        assert read_stat(str(tmp_path / "missing")) == {}
+
+
+class TestPressureSampler:
+    """Test suite for the PressureSampler class"""
+    
+    def test_first_sample_has_no_rates(self, tmp_path):
+        """Test that counter rates need a previous sample"""
+        write_procfs(tmp_path)
+        sampler = PressureSampler(str(tmp_path), clock=Clock())
+        
+        sample = sampler.sample()
+        
+        assert list(sample) == list(PRESSURE_FIELDS)
+        assert sample["psi_cpu_some_avg10"] == 12.5
+        assert sample["psi_io_full_avg60"] == 15.0
+        assert sample["psi_cpu_some_stall"] is None
+        assert sample["context_switches"] is None
+        assert sample["run_queue"] == 3
+        assert sample["blocked_processes"] == 1
+    
+    def test_rates_from_counter_deltas(self, tmp_path):
+        """Test that stall time and context switches are rates since the previous sample"""
+        clock = Clock()
+        sampler = PressureSampler(str(tmp_path), clock=clock)
+        write_procfs(tmp_path, cpu_total=1_000_000, io_total=0, ctxt=1000)
+        sampler.sample()
+        
+        # 10 seconds later: 2.5 s of CPU stall and 8 s of some I/O stall
+        write_procfs(tmp_path, cpu_total=3_500_000, io_total=8_000_000, ctxt=51000)
+        clock.now += 10
+        sample = sampler.sample()
+        
+        assert sample["psi_cpu_some_stall"] == 25.0
+        assert sample["psi_cpu_full_stall"] == 0.0
+        assert sample["psi_io_some_stall"] == 80.0
+        assert sample["psi_io_full_stall"] == 40.0
+        assert sample["context_switches"] == 5000.0
+    
+    def test_counter_reset(self, tmp_path):
+        """Test that a counter going backwards gives no rate"""
+        clock = Clock()
+        sampler = PressureSampler(str(tmp_path), clock=clock)
+        write_procfs(tmp_path, cpu_total=5_000_000, ctxt=9000)
+        sampler.sample()
+        
+        write_procfs(tmp_path, cpu_total=1_000, ctxt=10)
+        clock.now += 1
+        sample = sampler.sample()
+        
+        assert sample["psi_cpu_some_stall"] is None
+        assert sample["context_switches"] is None
+    
+    def test_without_psi(self, tmp_path):
+        """Test that PSI values are None on kernels without it"""
+        write_procfs(tmp_path, psi=False)
+        sampler = PressureSampler(str(tmp_path), clock=Clock())
+        sampler.sample()
+        
+        sample = sampler.sample()
+        
+        assert all(sample[field] is None for field in PRESSURE_FIELDS if field.startswith("psi_"))
+        assert sample["run_queue"] == 3
+    
+    def test_without_load_average(self, tmp_path):
+        """Test that load averages are None where the platform has none"""
+        write_procfs(tmp_path)
+        sampler = PressureSampler(str(tmp_path), clock=Clock())
+        
+        with patch("os.getloadavg", side_effect=OSError):
+            sample = sampler.sample()
+        
+        assert sample["load_1"] is None
+        assert sample["load_15"] is None
+    
+    @pytest.mark.skipif(not os.path.exists("/proc/stat"), reason="requires procfs")
+    def test_real_procfs(self):
+        """Test sampling the host's procfs"""
+        sampler = PressureSampler()
+        sampler.sample()
+        
+        sample = sampler.sample()
+        
+        assert sample["run_queue"] >= 1
+        assert sample["context_switches"] is None or sample["context_switches"] >= 0
+        assert sample["load_1"] >= 0
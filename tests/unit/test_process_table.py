@@ -0,0 +1,184 @@
+"""
+Unit tests for the process table and its groupings
+"""
+import pytest
+from unittest.mock import patch, Mock, mock_open
+import psutil
+
+from app.core.process_table import ProcessTable, read_cgroup
+
+
+def make_process(pid, name, username="www-data", cpu_percent=0.0, memory_percent=0.0, rss=0, num_threads=1):
+    """Build a process as yielded by psutil.process_iter with attributes"""
+    proc = Mock()
+    proc.info = {
+        "pid": pid,
+        "name": name,
+        "username": username,
+        "create_time": 1700000000.0 + pid,
+        "cpu_percent": cpu_percent,
+        "memory_percent": memory_percent,
+        "memory_info": Mock(rss=rss),
+        "num_threads": num_threads,
+    }
+    return proc
+
+
+PROCESSES = [
+    make_process(10, "nginx", cpu_percent=4.0, memory_percent=1.0, rss=100, num_threads=2),
+    make_process(11, "nginx", cpu_percent=4.5, memory_percent=1.5, rss=150, num_threads=2),
+    make_process(12, "nginx", cpu_percent=4.0, memory_percent=1.0, rss=100, num_threads=2),
+    make_process(20, "postgres", username="postgres", cpu_percent=9.0, memory_percent=6.0, rss=900, num_threads=1),
+    make_process(30, "sshd", username="root", cpu_percent=0.0, memory_percent=0.1, rss=10, num_threads=1),
+]
+
+CGROUPS = {10: "/system.slice/nginx.service", 11: "/system.slice/nginx.service",
+           12: "/system.slice/nginx.service", 20: "/system.slice/postgresql.service", 30: "/"}
+
+
+class Clock:
+    """Manually advanced monotonic clock"""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def table():
+    """Process table over PROCESSES with a manual clock"""
+    with patch("psutil.process_iter", return_value=PROCESSES) as process_iter, \
+         patch("app.core.process_table.read_cgroup", side_effect=CGROUPS.get) as cgroup:
+        table = ProcessTable(ttl=1.0, clock=Clock())
+        table.process_iter = process_iter
+        table.read_cgroup = cgroup
+        yield table
+
+
+class TestReadCgroup:
+    """Test suite for read_cgroup"""
+    
+    def test_unified_hierarchy(self):
+        """Test that the cgroup v2 path is used"""
+        with patch("builtins.open", mock_open(read_data="0::/system.slice/nginx.service\n")):
+            assert read_cgroup(10) == "/system.slice/nginx.service"
+    
+    def test_hybrid_hierarchy(self):
+        """Test that a deeper v1 path is used when the unified path is the root"""
+        data = "4:memory:/docker/abc\n2:cpuacct:/\n0::/\n"
+        with patch("builtins.open", mock_open(read_data=data)):
+            assert read_cgroup(10) == "/docker/abc"
+    
+    def test_root_only(self):
+        """Test that a process in no nested group is in the root"""
+        with patch("builtins.open", mock_open(read_data="1:cpu:/\n0::/\n")):
+            assert read_cgroup(10) == "/"
+    
+    def test_unavailable(self):
+        """Test that a missing cgroup file gives None"""
+        with patch("builtins.open", side_effect=FileNotFoundError):
+            assert read_cgroup(10) is None
+
+
+class TestProcessTable:
+    """Test suite for the ProcessTable class"""
+    
+    def test_rows(self, table):
+        """Test that a row holds every collected attribute"""
+        rows = table.rows()
+        
+        assert len(rows) == 5
+        assert rows[3] == {
+            "pid": 20,
+            "name": "postgres",
+            "username": "postgres",
+            "cgroup": "/system.slice/postgresql.service",
+            "cpu_percent": 9.0,
+            "memory_percent": 6.0,
+            "rss": 900,
+            "num_threads": 1,
+        }
+    
+    def test_table_is_reused_within_ttl(self, table):
+        """Test that the processes are only collected again after the ttl"""
+        table.rows()
+        table.top()
+        table.groups()
+        assert table.process_iter.call_count == 1
+        
+        table.clock.now = 1.0
+        table.rows()
+        assert table.process_iter.call_count == 2
+    
+    def test_cgroup_read_once_per_process(self, table):
+        """Test that a process's cgroup is not read again on refresh"""
+        table.refresh()
+        table.refresh()
+        
+        assert table.read_cgroup.call_count == 5
+    
+    def test_skips_vanished_processes(self, table):
+        """Test that a process exiting during the pass is skipped"""
+        gone = Mock()
+        type(gone).info = property(Mock(side_effect=psutil.NoSuchProcess(40)))
+        table.process_iter.return_value = PROCESSES + [gone]
+        
+        assert len(table.refresh()) == 5
+    
+    def test_top(self, table):
+        """Test ranking processes by different keys"""
+        assert [row["pid"] for row in table.top(2)] == [20, 11]
+        assert [row["pid"] for row in table.top(1, sort="rss")] == [20]
+        assert [row["pid"] for row in table.top(10, sort="num_threads")][:3] == [10, 11, 12]
+    
+    def test_top_unknown_sort(self, table):
+        """Test that an unknown sort key is rejected"""
+        with pytest.raises(ValueError, match="pid"):
+            table.top(sort="pid")
+    
+    def test_groups_by_name(self, table):
+        """Test that processes with the same name are summed"""
+        groups = table.groups(by="name")
+        
+        assert groups[0] == {
+            "name": "nginx",
+            "count": 3,
+            "cpu_percent": 12.5,
+            "memory_percent": 3.5,
+            "rss": 350,
+            "num_threads": 6,
+        }
+        assert [group["name"] for group in groups] == ["nginx", "postgres", "sshd"]
+    
+    def test_groups_by_user_and_cgroup(self, table):
+        """Test grouping by username and by cgroup"""
+        users = table.groups(by="user", sort="count")
+        cgroups = table.groups(by="cgroup", sort="rss", limit=1)
+        
+        assert [(group["user"], group["count"]) for group in users] == [("www-data", 3), ("postgres", 1), ("root", 1)]
+        assert cgroups == [{
+            "cgroup": "/system.slice/postgresql.service",
+            "count": 1,
+            "cpu_percent": 9.0,
+            "memory_percent": 6.0,
+            "rss": 900,
+            "num_threads": 1,
+        }]
+    
+    def test_groups_recomputed_after_refresh(self, table):
+        """Test that groups follow the table when it is collected again"""
+        assert table.groups(by="name")[0]["count"] == 3
+        
+        table.process_iter.return_value = PROCESSES[:1]
+        table.clock.now = 5.0
+        
+        assert table.groups(by="name")[0]["count"] == 1
+    
+    def test_groups_unknown_keys(self, table):
+        """Test that unknown groupings and sort keys are rejected"""
+        with pytest.raises(ValueError, match="pod"):
+            table.groups(by="pod")
+        with pytest.raises(ValueError, match="pid"):
+            table.groups(sort="pid")
@@ -0,0 +1,54 @@
+"""
+Unit tests for AdaptiveSamplingPolicy class
+"""
+import pytest
+
+from app.core.sampling import AdaptiveSamplingPolicy
+
+
+THRESHOLDS = {"cpu": 80, "memory": 80}
+
+
+class TestAdaptiveSamplingPolicy:
+    """Test suite for the AdaptiveSamplingPolicy class"""
+    
+    @pytest.fixture
+    def policy(self):
+        """Create a policy switching between 2 and 60 second intervals"""
+        return AdaptiveSamplingPolicy(fast_interval=2, slow_interval=60, near_threshold=10, change_threshold=15)
+    
+    def test_invalid_intervals(self):
+        """Test that the fast interval must not exceed the slow one"""
+        with pytest.raises(ValueError):
+            AdaptiveSamplingPolicy(fast_interval=10, slow_interval=5)
+    
+    def test_flat_values_stay_slow(self, policy):
+        """Test that flat values far from thresholds use the slow interval"""
+        for _ in range(3):
+            assert policy.next_interval({"cpu": 20.0, "memory": 40.0}, THRESHOLDS) == 60
+    
+    def test_near_threshold_speeds_up(self, policy):
+        """Test that a value close to its threshold switches to the fast interval"""
+        policy.next_interval({"cpu": 20.0, "memory": 40.0}, THRESHOLDS)
+        
+        assert policy.next_interval({"cpu": 20.0, "memory": 72.0}, THRESHOLDS) == 2
+    
+    def test_sharp_change_speeds_up(self, policy):
+        """Test that a sharp change far from any threshold switches to the fast interval"""
+        policy.next_interval({"cpu": 5.0, "memory": 40.0}, THRESHOLDS)
+        
+        assert policy.next_interval({"cpu": 45.0, "memory": 40.0}, THRESHOLDS) == 2
+    
+    def test_backs_off_gradually(self, policy):
+        """Test that calm values double the interval up to the slow interval"""
+        policy.next_interval({"cpu": 95.0}, THRESHOLDS)
+        
+        intervals = [policy.next_interval({"cpu": 95.0 - 80.0 + 1}, THRESHOLDS)]
+        intervals += [policy.next_interval({"cpu": 16.0}, THRESHOLDS) for _ in range(6)]
+        
+        # The drop itself is a sharp change; backing off starts afterwards
+        assert intervals == [2, 4, 8, 16, 32, 60, 60]
+    
+    def test_missing_values_are_ignored(self, policy):
+        """Test that metrics without a value do not affect the interval"""
+        assert policy.next_interval({"cpu": None, "memory": 40.0}, THRESHOLDS) == 60
@@ -0,0 +1,110 @@
+"""
+Unit tests for IntervalScheduler class
+"""
+import pytest
+
+from app.core.scheduler import IntervalScheduler
+
+
+class FakeClock:
+    """Controllable clock returning the current value of `now`"""
+    
+    def __init__(self, now: float):
+        self.now = now
+    
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestIntervalScheduler:
+    """Test suite for the IntervalScheduler class"""
+    
+    @pytest.fixture
+    def clocks(self):
+        """Monotonic and wall clocks 15 seconds past a minute boundary"""
+        return FakeClock(1000.0), FakeClock(1748174415.0)
+    
+    def test_first_tick_aligned_to_boundary(self, clocks):
+        """Test that the first tick waits for the next interval boundary"""
+        monotonic, wall = clocks
+        scheduler = IntervalScheduler(60, clock=monotonic, wall_clock=wall)
+        
+        assert scheduler.time_until_next() == pytest.approx(45.0)
+        
+        monotonic.now += 45.0
+        assert scheduler.tick() == 1748174460.0
+    
+    def test_no_drift_from_work_time(self, clocks):
+        """Test that time spent in a tick does not delay later ticks"""
+        monotonic, wall = clocks
+        scheduler = IntervalScheduler(60, clock=monotonic, wall_clock=wall)
+        monotonic.now += scheduler.time_until_next()
+        
+        ticks = []
+        for _ in range(5):
+            ticks.append(scheduler.tick())
+            # Simulate collection and storage taking 0.7 seconds
+            monotonic.now += 0.7
+            monotonic.now += scheduler.time_until_next()
+        
+        assert ticks == [1748174460.0 + 60 * i for i in range(5)]
+        assert scheduler.missed_ticks == 0
+    
+    def test_missed_ticks_are_counted(self, clocks):
+        """Test that overrunning ticks are skipped and counted"""
+        monotonic, wall = clocks
+        scheduler = IntervalScheduler(60, clock=monotonic, wall_clock=wall)
+        monotonic.now += scheduler.time_until_next()
+        scheduler.tick()
+        
+        # The next tick is reached 150 seconds late
+        monotonic.now += 60 + 150
+        
+        assert scheduler.tick() == 1748174460.0 + 60 * 3
+        assert scheduler.missed_ticks == 2
+        assert scheduler.time_until_next() == pytest.approx(30.0)
+    
+    def test_sub_second_interval(self):
+        """Test that sub-second intervals produce exact boundaries"""
+        monotonic = FakeClock(0.0)
+        scheduler = IntervalScheduler(0.25, clock=monotonic, wall_clock=FakeClock(100.1))
+        
+        monotonic.now += scheduler.time_until_next()
+        assert scheduler.tick() == 100.25
+        monotonic.now += scheduler.time_until_next()
+        assert scheduler.tick() == 100.5
+    
+    def test_set_interval_realigns(self, clocks):
+        """Test that changing the interval aligns to the new boundaries"""
+        monotonic, wall = clocks
+        scheduler = IntervalScheduler(60, clock=monotonic, wall_clock=wall)
+        monotonic.now += 45.0
+        assert scheduler.tick() == 1748174460.0
+        
+        # Collection took 1.5 seconds, then the rate speeds up
+        monotonic.now += 1.5
+        scheduler.set_interval(2)
+        assert scheduler.time_until_next() == pytest.approx(0.5)
+        monotonic.now += 0.5
+        assert scheduler.tick() == 1748174462.0
+        
+        # Slowing down again waits for the next full minute
+        scheduler.set_interval(60)
+        assert scheduler.time_until_next() == pytest.approx(58.0)
+    
+    def test_set_interval_never_repeats_tick(self, clocks):
+        """Test that a new interval cannot schedule the tick that just ran"""
+        monotonic, wall = clocks
+        scheduler = IntervalScheduler(10, clock=monotonic, wall_clock=wall)
+        monotonic.now += scheduler.time_until_next()
+        last = scheduler.tick()
+        
+        scheduler.set_interval(5)
+        
+        monotonic.now += scheduler.time_until_next()
+        assert scheduler.tick() == last + 5
+    
+    def test_invalid_interval(self):
+        """Test that non-positive intervals are rejected"""
+        with pytest.raises(ValueError):
+            IntervalScheduler(0)
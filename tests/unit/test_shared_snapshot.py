@@ -0,0 +1,175 @@
+"""
+Unit tests for the shared live snapshot
+"""
+import sys
+import time
+import uuid
+import asyncio
+import subprocess
+import pytest
+from unittest.mock import Mock
+
+from app.core.shared_snapshot import (
+    SharedSnapshot, SnapshotPublisher, MAX_PROCESSES, _SEQUENCE, _SEQUENCE_OFFSET
+)
+
+
+SYSTEM_INFO = {
+    "cpu_percent": 25.5,
+    "memory_info": {"total_gb": 16.0, "available_gb": 8.0, "used_gb": 8.0, "percent": 50.0},
+    "disk_info": [
+        {"device": "/dev/sda1", "mountpoint": "/", "total_gb": 500.0,
+         "used_gb": 250.0, "free_gb": 250.0, "percent": 50.0},
+    ],
+    "per_core_cpu": [20.0, 30.0, 25.0, 27.0],
+    "network_stats": {"bytes_sent": 100.5, "bytes_recv": 200.5, "packets_sent": 1000, "packets_recv": 2000},
+}
+
+BYTE_COUNTS = {
+    "memory": {"total": 17179869183, "available": 8589934593, "used": 8589934590},
+    "network": {"sent": 105381069, "recv": 210239489},
+    "disks": {"/": {"total": 536870912001, "used": 268435456001, "free": 268435456000}},
+}
+
+PROCESSES = [
+    {"pid": 1, "name": "systemd", "username": "root", "cpu_percent": 5.0, "memory_percent": 1.5},
+    {"pid": 42, "name": "python", "username": None, "cpu_percent": 2.5, "memory_percent": None},
+]
+
+
+class TestSharedSnapshot:
+    """Test suite for the SharedSnapshot class"""
+    
+    @pytest.fixture
+    def snapshot(self):
+        """Create a snapshot on a uniquely named segment, removed afterwards"""
+        snapshot = SharedSnapshot(f"sysmon_test_{uuid.uuid4().hex[:8]}")
+        yield snapshot
+        snapshot.unlink()
+    
+    def test_name_for_is_stable(self):
+        """Test that workers using the same database share a segment name"""
+        assert SharedSnapshot.name_for("/data/a.db") == SharedSnapshot.name_for("/data/a.db")
+        assert SharedSnapshot.name_for("/data/a.db") != SharedSnapshot.name_for("/data/b.db")
+    
+    def test_read_without_segment(self, snapshot):
+        """Test that reading before anything was published returns None"""
+        assert snapshot.read_system_info() is None
+        assert snapshot.read_processes() is None
+    
+    def test_round_trip(self, snapshot):
+        """Test that a published snapshot reads back unchanged"""
+        snapshot.write(SYSTEM_INFO, PROCESSES)
+        
+        assert snapshot.read_system_info() == SYSTEM_INFO
+        assert snapshot.read_processes() == PROCESSES
+    
+    def test_read_snapshot(self, snapshot):
+        """Test that the whole snapshot is read in one consistent pass"""
+        snapshot.write(SYSTEM_INFO, PROCESSES, published_at=1000.0, process_count=250,
+                       byte_counts=BYTE_COUNTS)
+        
+        assert snapshot.read_snapshot() == {
+            "published_at": 1000.0,
+            "system_info": SYSTEM_INFO,
+            "byte_counts": BYTE_COUNTS,
+            "processes": PROCESSES,
+            "process_count": 250,
+        }
+        assert snapshot.read_snapshot(max_age=10) is None
+    
+    def test_byte_counts_derived_when_missing(self, snapshot):
+        """Test that sizes not given in bytes are derived from the rounded values"""
+        snapshot.write(SYSTEM_INFO, PROCESSES)
+        
+        byte_counts = snapshot.read_snapshot()["byte_counts"]
+        assert byte_counts["memory"]["total"] == 16 * 1024 ** 3
+        assert byte_counts["network"]["sent"] == round(100.5 * 1024 ** 2)
+        assert byte_counts["disks"]["/"]["used"] == 250 * 1024 ** 3
+    
+    def test_second_write_replaces_first(self, snapshot):
+        """Test that shorter sections do not leave stale entries behind"""
+        snapshot.write(SYSTEM_INFO, PROCESSES)
+        snapshot.write(dict(SYSTEM_INFO, per_core_cpu=[99.0], disk_info=[]), PROCESSES[:1])
+        
+        system_info = snapshot.read_system_info()
+        assert system_info["per_core_cpu"] == [99.0]
+        assert system_info["disk_info"] == []
+        assert snapshot.read_processes() == PROCESSES[:1]
+    
+    def test_stale_snapshot_is_ignored(self, snapshot):
+        """Test that snapshots older than max_age are not returned"""
+        snapshot.write(SYSTEM_INFO, PROCESSES, published_at=time.time() - 60)
+        
+        assert snapshot.read_system_info(max_age=10) is None
+        assert snapshot.read_system_info() == SYSTEM_INFO
+    
+    def test_write_in_progress_is_not_read(self, snapshot):
+        """Test that readers never return data from an unfinished write"""
+        snapshot.write(SYSTEM_INFO, PROCESSES)
+        buf = snapshot._shm.buf
+        (sequence,) = _SEQUENCE.unpack_from(buf, _SEQUENCE_OFFSET)
+        
+        # Simulate a writer stopped halfway through an update
+        _SEQUENCE.pack_into(buf, _SEQUENCE_OFFSET, sequence + 1)
+        del buf
+        assert snapshot.read_system_info(retries=3) is None
+        
+        # The next writer recovers the sequence
+        snapshot.write(SYSTEM_INFO, PROCESSES)
+        assert snapshot.read_system_info() == SYSTEM_INFO
+    
+    def test_other_process_reads_snapshot(self, snapshot):
+        """Test that another process reads the snapshot and leaves the segment in place"""
+        snapshot.write(SYSTEM_INFO, PROCESSES)
+        code = (
+            "from app.core.shared_snapshot import SharedSnapshot; "
+            f"s = SharedSnapshot({snapshot.name!r}); "
+            "print(s.read_system_info()['cpu_percent']); s.close()"
+        )
+        
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == "25.5"
+        assert "leaked" not in result.stderr
+        assert snapshot.read_system_info() == SYSTEM_INFO
+
+
+class TestSnapshotPublisher:
+    """Test suite for the SnapshotPublisher class"""
+    
+    def test_publish_once(self):
+        """Test that the publisher writes the monitor's metrics"""
+        snapshot = Mock(spec=SharedSnapshot)
+        monitor = Mock()
+        monitor.get_system_info.return_value = SYSTEM_INFO
+        monitor.get_top_processes.return_value = PROCESSES
+        monitor.get_process_count.return_value = 250
+        monitor.get_byte_counts.return_value = BYTE_COUNTS
+        publisher = SnapshotPublisher(snapshot, monitor=monitor)
+        
+        publisher.publish_once()
+        
+        monitor.get_top_processes.assert_called_once_with(MAX_PROCESSES)
+        snapshot.write.assert_called_once_with(SYSTEM_INFO, PROCESSES, process_count=250, byte_counts=BYTE_COUNTS)
+    
+    def test_start_and_stop(self):
+        """Test that the publisher publishes while running"""
+        snapshot = Mock(spec=SharedSnapshot)
+        monitor = Mock()
+        monitor.get_system_info.return_value = SYSTEM_INFO
+        monitor.get_top_processes.return_value = PROCESSES
+        publisher = SnapshotPublisher(snapshot, interval=0.05, monitor=monitor)
+        
+        async def scenario():
+            await publisher.start()
+            assert publisher.running
+            await asyncio.sleep(0.12)
+            await publisher.stop()
+            assert not publisher.running
+        
+        asyncio.run(scenario())
+        
+        assert snapshot.write.call_count >= 2
+        snapshot.close.assert_called_once()
@@ -0,0 +1,115 @@
+"""
+Unit tests for SampleSpool class
+"""
+import json
+import datetime
+import pytest
+
+from app.core.spool import SampleSpool
+
+
+def sample(minute):
+    return {"timestamp": f"2025-05-25T12:{minute:02d}:00", "cpu": float(minute)}
+
+
+class TestSampleSpool:
+    """Test suite for the SampleSpool class"""
+    
+    @pytest.fixture
+    def spool_path(self, tmp_path):
+        """Path of a spool file in a temporary directory"""
+        return str(tmp_path / "spool.jsonl")
+    
+    def test_empty_spool(self, spool_path):
+        """Test a spool without a file"""
+        spool = SampleSpool(spool_path)
+        
+        assert spool.depth == 0
+        assert spool.size_bytes == 0
+        assert spool.replay_lag() == 0.0
+        assert spool.replay(lambda samples: None) == 0
+    
+    def test_append_and_replay_in_order(self, spool_path):
+        """Test that samples are replayed in the order they were appended"""
+        spool = SampleSpool(spool_path)
+        spool.append([sample(0), sample(1)])
+        spool.append([sample(2)])
+        
+        written = []
+        replayed = spool.replay(written.append, batch_size=2)
+        
+        assert replayed == 3
+        assert [s["timestamp"] for batch in written for s in batch] == [
+            "2025-05-25T12:00:00", "2025-05-25T12:01:00", "2025-05-25T12:02:00"
+        ]
+        assert [len(batch) for batch in written] == [2, 1]
+        assert spool.depth == 0
+    
+    def test_failed_replay_keeps_remaining_samples(self, spool_path):
+        """Test that a failing write leaves its batch and later ones spooled"""
+        spool = SampleSpool(spool_path)
+        spool.append([sample(0), sample(1), sample(2)])
+        
+        calls = []
+        def write(samples):
+            calls.append(samples)
+            if len(calls) == 2:
+                raise Exception("database is locked")
+        
+        with pytest.raises(Exception):
+            spool.replay(write, batch_size=1)
+        
+        assert spool.depth == 2
+        remaining = []
+        spool.replay(remaining.extend)
+        assert [s["cpu"] for s in remaining] == [1.0, 2.0]
+    
+    def test_replay_skips_undecodable_lines(self, spool_path):
+        """Test that a corrupt line is dropped rather than failing every replay"""
+        spool = SampleSpool(spool_path)
+        spool.append([sample(0)])
+        with open(spool_path, "ab") as spool_file:
+            spool_file.write(b"{not json\n")
+        spool.reload()
+        spool.append([sample(1)])
+        
+        written = []
+        assert spool.replay(written.extend) == 3
+        
+        assert [s["cpu"] for s in written] == [0.0, 1.0]
+        assert spool.dropped == 1
+        assert spool.depth == 0
+    
+    def test_spool_survives_restart(self, spool_path):
+        """Test that a new spool picks up samples left in the file"""
+        SampleSpool(spool_path).append([sample(0), sample(1)])
+        
+        spool = SampleSpool(spool_path)
+        
+        assert spool.depth == 2
+        now = datetime.datetime(2025, 5, 25, 12, 10, 0)
+        assert spool.replay_lag(now) == 600.0
+    
+    def test_partial_line_is_ignored(self, spool_path):
+        """Test that a torn write at the end of the file is discarded"""
+        with open(spool_path, "w") as spool_file:
+            spool_file.write(json.dumps(sample(0)) + "\n" + '{"timestamp": "2025')
+        
+        spool = SampleSpool(spool_path)
+        
+        assert spool.depth == 1
+    
+    def test_bounded_size_drops_oldest(self, spool_path):
+        """Test that the oldest samples are dropped once the bound is reached"""
+        line_size = len(json.dumps(sample(0), separators=(",", ":"))) + 1
+        spool = SampleSpool(spool_path, max_bytes=line_size * 3)
+        
+        for minute in range(5):
+            spool.append([sample(minute)])
+        
+        assert spool.depth == 3
+        assert spool.dropped == 2
+        assert spool.size_bytes <= line_size * 3
+        remaining = []
+        spool.replay(remaining.extend)
+        assert [s["cpu"] for s in remaining] == [2.0, 3.0, 4.0]
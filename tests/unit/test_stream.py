@@ -0,0 +1,221 @@
+"""
+Unit tests for the live stream broadcaster
+"""
+import json
+import asyncio
+import pytest
+from unittest.mock import Mock
+
+from app.api.stream import LiveBroadcaster, format_event
+from app.database.db_manager import DatabaseManager
+
+
+def parse(event: bytes):
+    """Split an encoded event into its name and decoded data"""
+    lines = event.decode("utf-8").strip().split("\n")
+    return lines[0][len("event: "):], json.loads(lines[1][len("data: "):])
+
+
+class TestLiveBroadcaster:
+    """Test suite for the LiveBroadcaster class"""
+    
+    @pytest.fixture
+    def db_manager(self):
+        """Create a mock database manager without history or alerts"""
+        db_manager = Mock(spec=DatabaseManager)
+        db_manager.get_alerts.return_value = []
+        db_manager.get_history_version.return_value = {"count": 0, "first": None, "last": None}
+        db_manager.get_history.side_effect = lambda series, hours, since: {
+            "timestamps": [], "series": {name: [] for name in series}, "cursor": since
+        }
+        return db_manager
+    
+    @pytest.fixture
+    def system_info(self):
+        """Live system information source returning a mutable dict"""
+        info = {"cpu_percent": 10.0, "memory_info": {"percent": 40.0}}
+        return Mock(side_effect=lambda: dict(info)), info
+    
+    def make_broadcaster(self, db_manager, system_info, **kwargs):
+        return LiveBroadcaster(
+            db_manager,
+            system_info=system_info,
+            processes=Mock(return_value=[{"pid": 1}]),
+            interval=0.02,
+            **kwargs
+        )
+    
+    def test_format_event(self):
+        """Test the wire format of an event"""
+        assert format_event("alerts", [1, 2]) == b"event: alerts\ndata: [1,2]\n\n"
+    
+    def test_snapshot_then_deltas(self, db_manager, system_info):
+        """Test that subscribers get a full snapshot and then only changed fields"""
+        source, info = system_info
+        broadcaster = self.make_broadcaster(db_manager, source)
+        
+        async def scenario():
+            subscriber = broadcaster.subscribe()
+            name, state = parse(await subscriber.queue.get())
+            assert name == "snapshot"
+            assert state["system_info"]["cpu_percent"] == 10.0
+            assert state["processes"] == [{"pid": 1}]
+            
+            info["cpu_percent"] = 55.0
+            name, delta = parse(await asyncio.wait_for(subscriber.queue.get(), 1))
+            assert name == "system_info"
+            assert delta == {"cpu_percent": 55.0}
+            
+            broadcaster.unsubscribe(subscriber)
+        
+        asyncio.run(scenario())
+    
+    def test_late_subscriber_gets_snapshot(self, db_manager, system_info):
+        """Test that a subscriber joining a running producer starts from the current state"""
+        source, info = system_info
+        broadcaster = self.make_broadcaster(db_manager, source)
+        
+        async def scenario():
+            first = broadcaster.subscribe()
+            await first.queue.get()
+            
+            second = broadcaster.subscribe()
+            name, state = parse(second.queue.get_nowait())
+            assert name == "snapshot"
+            assert state["system_info"]["cpu_percent"] == 10.0
+            
+            # Both share the single producer
+            assert source.call_count >= 1
+            broadcaster.unsubscribe(first)
+            broadcaster.unsubscribe(second)
+        
+        asyncio.run(scenario())
+    
+    def test_history_and_alert_events(self, db_manager, system_info):
+        """Test that new history points and alert changes are pushed"""
+        source, _ = system_info
+        broadcaster = self.make_broadcaster(db_manager, source)
+        
+        async def scenario():
+            subscriber = broadcaster.subscribe()
+            await subscriber.queue.get()
+            
+            db_manager.get_alerts.return_value = [{"id": 1, "state": "firing"}]
+            db_manager.get_history.side_effect = lambda series, hours, since: {
+                "timestamps": ["2099-01-01T00:00:00"],
+                "series": {"cpu": [90.0], "memory": [40.0]},
+                "cursor": "2099-01-01T00:00:00",
+            }
+            
+            events = {}
+            while len(events) < 2:
+                name, data = parse(await asyncio.wait_for(subscriber.queue.get(), 1))
+                events.setdefault(name, data)
+            assert events["alerts"] == [{"id": 1, "state": "firing"}]
+            assert events["history"]["series"]["cpu"] == [90.0]
+            
+            # Later rounds continue from the cursor of the last history event
+            assert broadcaster._cursor == "2099-01-01T00:00:00"
+            broadcaster.unsubscribe(subscriber)
+        
+        asyncio.run(scenario())
+    
+    def test_history_continues_after_newest_stored_row(self, db_manager, system_info):
+        """Test that a row stamped before the first round but written after it is still pushed"""
+        source, _ = system_info
+        db_manager.get_history_version.return_value = {
+            "count": 10, "first": "2025-05-25T11:00:00", "last": "2025-05-25T12:00:00",
+        }
+        broadcaster = self.make_broadcaster(db_manager, source)
+        
+        async def scenario():
+            subscriber = broadcaster.subscribe()
+            await subscriber.queue.get()
+            
+            assert broadcaster._cursor == "2025-05-25T12:00:00"
+            await asyncio.sleep(0.05)
+            since = {call.args[2] for call in db_manager.get_history.call_args_list}
+            assert since == {"2025-05-25T12:00:00"}
+            broadcaster.unsubscribe(subscriber)
+        
+        asyncio.run(scenario())
+    
+    def test_slow_consumer_is_dropped(self, db_manager, system_info):
+        """Test that a subscriber with a full queue is disconnected"""
+        source, info = system_info
+        broadcaster = self.make_broadcaster(db_manager, source, queue_size=2)
+        
+        async def scenario():
+            slow = broadcaster.subscribe()
+            fast = broadcaster.subscribe()
+            
+            # The slow subscriber never reads, the fast one keeps up
+            for value in range(6):
+                info["cpu_percent"] = float(value)
+                await asyncio.wait_for(fast.queue.get(), 1)
+            
+            assert slow.dropped
+            assert slow.queue.get_nowait() is None
+            assert broadcaster.subscriber_count == 1
+            assert broadcaster.dropped_subscribers == 1
+            broadcaster.unsubscribe(fast)
+        
+        asyncio.run(scenario())
+    
+    def test_stream_ends_when_dropped(self, db_manager, system_info):
+        """Test that the event stream of a dropped subscriber finishes"""
+        source, _ = system_info
+        broadcaster = self.make_broadcaster(db_manager, source)
+        
+        async def scenario():
+            subscriber = broadcaster.subscribe()
+            chunks = []
+            
+            async def consume():
+                async for chunk in broadcaster.stream(subscriber):
+                    chunks.append(chunk)
+            
+            consumer = asyncio.create_task(consume())
+            await asyncio.sleep(0.05)
+            await broadcaster.stop()
+            await asyncio.wait_for(consumer, 1)
+            return chunks
+        
+        chunks = asyncio.run(scenario())
+        
+        assert chunks[0] == b"retry: 3000\n\n"
+        assert parse(chunks[1])[0] == "snapshot"
+    
+    def test_producer_stops_without_subscribers(self, db_manager, system_info):
+        """Test that no data is collected while nobody is connected"""
+        source, _ = system_info
+        broadcaster = self.make_broadcaster(db_manager, source)
+        
+        async def scenario():
+            subscriber = broadcaster.subscribe()
+            await subscriber.queue.get()
+            broadcaster.unsubscribe(subscriber)
+            
+            calls = source.call_count
+            await asyncio.sleep(0.1)
+            assert source.call_count == calls
+        
+        asyncio.run(scenario())
+    
+    def test_failed_ticks_are_counted(self, db_manager, system_info):
+        """Test that a producer tick that raises is counted in the stats"""
+        source, _ = system_info
+        db_manager.get_history.side_effect = Exception("no such column: cpu")
+        broadcaster = self.make_broadcaster(db_manager, source)
+        
+        async def scenario():
+            subscriber = broadcaster.subscribe()
+            await subscriber.queue.get()
+            await asyncio.sleep(0.1)
+            broadcaster.unsubscribe(subscriber)
+        
+        asyncio.run(scenario())
+        stats = broadcaster.get_stats()
+        assert stats["failed_ticks"] >= 1
+        assert stats["last_error"] == "no such column: cpu"
+        assert stats["subscribers"] == 0
@@ -1,12 +1,30 @@
 """
 Unit tests for SystemMonitor class
 """
+import time
+import datetime
 import pytest
-from unittest.mock import patch, Mock
+from unittest.mock import patch, Mock, PropertyMock
 import psutil
 from app.core.system_monitor import SystemMonitor
 
 
+def make_process(pid, name, username='test_user', cpu_percent=0.0, memory_percent=0.0, rss=0, num_threads=1):
+    """Build a process as yielded by psutil.process_iter with attributes"""
+    proc = Mock()
+    proc.info = {
+        'pid': pid,
+        'name': name,
+        'username': username,
+        'create_time': 1700000000.0 + pid,
+        'cpu_percent': cpu_percent,
+        'memory_percent': memory_percent,
+        'memory_info': Mock(rss=rss),
+        'num_threads': num_threads
+    }
+    return proc
+
+
 class TestSystemMonitor:
     """Test suite for the SystemMonitor class"""
     
@@ -110,6 +128,47 @@ class TestSystemMonitor:
             assert len(result) == 4
             assert all(isinstance(x, float) for x in result)
     
+    def test_get_cpu_breakdown(self):
+        """Test that the breakdown separates busy percentages from the categories"""
+        sampler = Mock()
+        core = {"user": 20.0, "system": 5.0, "idle": 60.0, "iowait": 15.0, "busy": 25.0}
+        sampler.sample.return_value = {"total": core, "per_core": [core, core]}
+        monitor = SystemMonitor(cpu_times=sampler)
+        
+        result = monitor.get_cpu_breakdown()
+        
+        assert result["cpu_percent"] == 25.0
+        assert result["per_core_cpu"] == [25.0, 25.0]
+        assert result["cpu_times"] == {"user": 20.0, "system": 5.0, "idle": 60.0, "iowait": 15.0}
+        assert result["per_core_times"] == [result["cpu_times"]] * 2
+    
+    def test_get_cpu_breakdown_exception(self):
+        """Test that a failing reading gives an empty breakdown"""
+        sampler = Mock()
+        sampler.sample.side_effect = Exception("Test exception")
+        monitor = SystemMonitor(cpu_times=sampler)
+        
+        result = monitor.get_cpu_breakdown()
+        
+        assert result["cpu_percent"] == 0.0
+        assert result["per_core_times"] == []
+    
+    def test_get_pressure(self):
+        """Test that pressure metrics come from the monitor's sampler"""
+        sampler = Mock()
+        sampler.sample.return_value = {"psi_cpu_some_stall": 12.5, "run_queue": 4}
+        monitor = SystemMonitor(pressure=sampler)
+        
+        assert monitor.get_pressure() == {"psi_cpu_some_stall": 12.5, "run_queue": 4}
+    
+    def test_get_pressure_exception(self):
+        """Test that a failing sampler gives no pressure metrics"""
+        sampler = Mock()
+        sampler.sample.side_effect = Exception("Test exception")
+        monitor = SystemMonitor(pressure=sampler)
+        
+        assert monitor.get_pressure() == {}
+    
     def test_get_network_stats(self):
         """Test that network stats are correctly retrieved"""
         mock_net = Mock()
@@ -127,19 +186,49 @@ class TestSystemMonitor:
             assert result["packets_sent"] == 1000
             assert result["packets_recv"] == 2000
     
+    def test_get_byte_counts(self):
+        """Test that sizes are reported in bytes without rounding"""
+        mem = Mock(total=17179869183, available=8589934593, used=8589934590)
+        net = Mock(bytes_sent=105381069, bytes_recv=210239489)
+        partition = Mock(device="/dev/sda1", mountpoint="/")
+        usage = Mock(total=536870912001, used=268435456001, free=268435456000)
+        
+        with patch('psutil.virtual_memory', return_value=mem), \
+             patch('psutil.net_io_counters', return_value=net), \
+             patch('psutil.disk_partitions', return_value=[partition]), \
+             patch('psutil.disk_usage', return_value=usage):
+            result = SystemMonitor.get_byte_counts()
+        
+        assert result == {
+            "memory": {"total": 17179869183, "available": 8589934593, "used": 8589934590},
+            "network": {"sent": 105381069, "recv": 210239489},
+            "disks": {"/": {"total": 536870912001, "used": 268435456001, "free": 268435456000}},
+        }
+    
+    def test_get_network_stats_per_nic(self):
+        """Test that network stats are retrieved for each interface"""
+        mock_net = Mock()
+        mock_net.bytes_sent = 10 * 1024 * 1024  # 10 MB
+        mock_net.bytes_recv = 20 * 1024 * 1024  # 20 MB
+        mock_net.packets_sent = 100
+        mock_net.packets_recv = 200
+        
+        with patch('psutil.net_io_counters', return_value={"eth0": mock_net}) as counters:
+            monitor = SystemMonitor()
+            result = monitor.get_network_stats_per_nic()
+            
+            counters.assert_called_once_with(pernic=True)
+            assert result == {
+                "eth0": {"bytes_sent": 10.0, "bytes_recv": 20.0, "packets_sent": 100, "packets_recv": 200}
+            }
+    
     def test_get_top_processes(self):
         """Test that top processes are correctly retrieved"""
-        mock_proc = Mock()
-        mock_proc.info = {
-            'pid': 1234,
-            'name': 'test_process',
-            'username': 'test_user',
-            'cpu_percent': 10.5,
-            'memory_percent': 5.2
-        }
+        mock_proc = make_process(1234, 'test_process', cpu_percent=10.5, memory_percent=5.2)
+        idle_proc = make_process(1, 'init', cpu_percent=0.0, memory_percent=0.1)
         
-        with patch('psutil.process_iter', return_value=[mock_proc]), \
-             patch('sorted', return_value=[mock_proc]):
+        with patch('psutil.process_iter', return_value=[idle_proc, mock_proc]), \
+             patch('app.core.process_table.read_cgroup', return_value="/"):
             
             monitor = SystemMonitor()
             result = monitor.get_top_processes(limit=1)
@@ -153,20 +242,13 @@ class TestSystemMonitor:
     
     def test_get_top_processes_access_denied(self):
         """Test that top processes handles access denied errors"""
-        mock_proc = Mock()
-        mock_proc.info = {
-            'pid': 1234,
-            'name': 'test_process',
-            'username': 'test_user',
-            'cpu_percent': 10.5,
-            'memory_percent': 5.2
-        }
+        mock_proc = make_process(1234, 'test_process', cpu_percent=10.5, memory_percent=5.2)
         
         mock_proc_denied = Mock()
-        mock_proc_denied.info.side_effect = psutil.AccessDenied("Test access denied")
+        type(mock_proc_denied).info = PropertyMock(side_effect=psutil.AccessDenied("Test access denied"))
         
         with patch('psutil.process_iter', return_value=[mock_proc, mock_proc_denied]), \
-             patch('sorted', return_value=[mock_proc, mock_proc_denied]):
+             patch('app.core.process_table.read_cgroup', return_value="/"):
             
             monitor = SystemMonitor()
             result = monitor.get_top_processes(limit=2)
@@ -175,6 +257,31 @@ class TestSystemMonitor:
             assert len(result) == 1
             assert result[0]["pid"] == 1234
     
+    def test_get_top_processes_sort_key(self):
+        """Test that processes can be ranked by another key"""
+        busy = make_process(1, 'busy', cpu_percent=90.0, rss=1024)
+        large = make_process(2, 'large', cpu_percent=1.0, rss=4096)
+        
+        with patch('psutil.process_iter', return_value=[busy, large]), \
+             patch('app.core.process_table.read_cgroup', return_value="/"):
+            
+            monitor = SystemMonitor()
+            
+            assert [proc["pid"] for proc in monitor.get_top_processes(sort="rss")] == [2, 1]
+            with pytest.raises(ValueError):
+                monitor.get_top_processes(sort="pid")
+    
+    def test_get_process_groups(self):
+        """Test that process groups come from the monitor's process table"""
+        table = Mock()
+        table.groups.return_value = [{"name": "nginx", "count": 3}]
+        
+        monitor = SystemMonitor(process_table=table)
+        result = monitor.get_process_groups("name", "count", 5)
+        
+        table.groups.assert_called_once_with("name", "count", 5)
+        assert result == [{"name": "nginx", "count": 3}]
+    
     def test_get_system_info(self):
         """Test that system info aggregates all metrics correctly"""
         monitor = SystemMonitor()
@@ -192,3 +299,49 @@ class TestSystemMonitor:
             assert result["disk_info"] == ["disk_data"]
             assert result["per_core_cpu"] == [10.0, 20.0]
             assert result["network_stats"] == {"bytes_sent": 100}
+            assert "sampled_at" not in result
+    
+    def test_parse_fields(self):
+        """Test that field selections are parsed, deduplicated and validated"""
+        assert SystemMonitor.parse_fields(None) == ["cpu", "memory", "disk", "per_core", "network"]
+        assert SystemMonitor.parse_fields("") == ["cpu", "memory", "disk", "per_core", "network"]
+        assert SystemMonitor.parse_fields(" memory, cpu,memory") == ["memory", "cpu"]
+        
+        with pytest.raises(ValueError, match="gpu"):
+            SystemMonitor.parse_fields("cpu,gpu")
+    
+    def test_sample_system_info_selected_fields(self):
+        """Test that only the selected collectors run, each with its sample time"""
+        monitor = SystemMonitor()
+        
+        with patch.object(SystemMonitor, 'get_cpu_usage') as cpu, \
+             patch.object(SystemMonitor, 'get_memory_usage', return_value={"percent": 50.0}):
+            
+            result = monitor.sample_system_info(["memory"])
+            
+            cpu.assert_not_called()
+            assert set(result) == {"memory_info", "sampled_at"}
+            assert result["memory_info"] == {"percent": 50.0}
+            assert set(result["sampled_at"]) == {"memory_info"}
+            datetime.datetime.fromisoformat(result["sampled_at"]["memory_info"])
+    
+    def test_sample_system_info_runs_collectors_concurrently(self):
+        """Test that the measuring intervals of several collectors overlap"""
+        monitor = SystemMonitor()
+        
+        def slow(value):
+            def collector(*args):
+                time.sleep(0.2)
+                return value
+            return collector
+        
+        with patch.object(SystemMonitor, 'get_cpu_usage', side_effect=slow(25.5)), \
+             patch.object(SystemMonitor, 'get_per_core_cpu', side_effect=slow([10.0])):
+            
+            started = time.perf_counter()
+            result = monitor.sample_system_info(["cpu", "per_core"])
+            elapsed = time.perf_counter() - started
+            
+            assert result["cpu_percent"] == 25.5
+            assert result["per_core_cpu"] == [10.0]
+            assert elapsed < 0.35
@@ -0,0 +1,173 @@
+"""
+Unit tests for the metric topic broadcaster
+"""
+import json
+import asyncio
+import pytest
+from unittest.mock import Mock
+
+from app.api.topics import RateLimiter, TopicBroadcaster, TopicSubscriber
+from app.core.system_monitor import SystemMonitor
+
+
+class FakeClock:
+    """Manually advanced monotonic clock"""
+    
+    def __init__(self, now=100.0):
+        self.now = now
+    
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def monitor():
+    """Create a mock system monitor with two network interfaces"""
+    monitor = Mock(spec=SystemMonitor)
+    monitor.get_cpu_usage.return_value = 12.5
+    monitor.get_per_core_cpu.return_value = [10.0, 15.0]
+    monitor.get_network_stats_per_nic.return_value = {
+        "eth0": {"bytes_sent": 1.0, "bytes_recv": 2.0, "packets_sent": 3, "packets_recv": 4},
+        "lo": {"bytes_sent": 5.0, "bytes_recv": 5.0, "packets_sent": 6, "packets_recv": 6},
+    }
+    return monitor
+
+
+class TestRateLimiter:
+    """Test suite for the RateLimiter class"""
+    
+    def test_burst_then_refill(self):
+        """Test that the bucket allows a burst and refills at the rate"""
+        clock = FakeClock()
+        limiter = RateLimiter(rate=2, burst=3, clock=clock)
+        
+        assert [limiter.allow() for _ in range(4)] == [True, True, True, False]
+        
+        clock.now += 0.5
+        assert limiter.allow()
+        assert not limiter.allow()
+
+
+class TestTopicBroadcaster:
+    """Test suite for the TopicBroadcaster class"""
+    
+    @pytest.fixture
+    def clock(self):
+        """Create a fake clock"""
+        return FakeClock()
+    
+    @pytest.fixture
+    def broadcaster(self, monitor, clock):
+        """Create a broadcaster with a one second tick"""
+        return TopicBroadcaster(monitor, tick=1, queue_size=4, clock=clock)
+    
+    def add_subscriber(self, broadcaster, topics, interval=1):
+        """Register a subscriber without starting the producer task"""
+        subscriber = TopicSubscriber(broadcaster.queue_size)
+        broadcaster._subscribers.add(subscriber)
+        broadcaster.subscribe(subscriber, topics, interval)
+        return subscriber
+    
+    def tick(self, broadcaster, clock):
+        """Run one producer round synchronously"""
+        due = broadcaster.due_topics(clock.now)
+        broadcaster.fan_out(clock.now, due, broadcaster.collect(list(due)))
+    
+    def test_unknown_topic(self, broadcaster):
+        """Test that unknown topics and interfaces are rejected"""
+        subscriber = self.add_subscriber(broadcaster, ["cpu"])
+        
+        with pytest.raises(ValueError) as error:
+            broadcaster.subscribe(subscriber, ["gpu", "network:wlan9"], 1)
+        
+        assert "gpu" in str(error.value)
+        assert "network:eth0" in str(error.value)
+    
+    def test_interval_is_limited_to_tick(self, broadcaster):
+        """Test that a subscriber cannot ask for updates faster than the tick"""
+        subscriber = self.add_subscriber(broadcaster, ["cpu"], interval=0.01)
+        
+        assert subscriber.intervals["cpu"] == 1
+    
+    def test_serializes_once_per_topic(self, broadcaster, clock, monitor):
+        """Test that every subscriber of a topic gets the same encoded update"""
+        subscribers = [self.add_subscriber(broadcaster, ["per_core", "network:eth0"]) for _ in range(50)]
+        
+        self.tick(broadcaster, clock)
+        
+        assert broadcaster.serializations == 2
+        assert broadcaster.messages == 100
+        monitor.get_per_core_cpu.assert_called_once_with(interval=None)
+        first = [subscribers[0].queue.get_nowait() for _ in range(2)]
+        assert all(
+            subscriber.queue.get_nowait() is message
+            for subscriber in subscribers[1:]
+            for message in first
+        )
+        messages = {json.loads(message)["topic"]: json.loads(message)["data"] for message in first}
+        assert messages == {
+            "per_core": [10.0, 15.0],
+            "network:eth0": {"bytes_sent": 1.0, "bytes_recv": 2.0, "packets_sent": 3, "packets_recv": 4},
+        }
+    
+    def test_per_subscriber_rate(self, broadcaster, clock):
+        """Test that subscribers receive updates at their own interval"""
+        fast = self.add_subscriber(broadcaster, ["cpu"], interval=1)
+        slow = self.add_subscriber(broadcaster, ["cpu"], interval=3)
+        
+        for _ in range(4):
+            self.tick(broadcaster, clock)
+            clock.now += 1
+        
+        assert fast.queue.qsize() == 4
+        assert slow.queue.qsize() == 2
+    
+    def test_only_due_topics_are_collected(self, broadcaster, clock, monitor):
+        """Test that topics nobody is due for are not collected"""
+        self.add_subscriber(broadcaster, ["cpu"], interval=5)
+        self.tick(broadcaster, clock)
+        
+        clock.now += 1
+        self.tick(broadcaster, clock)
+        
+        assert monitor.get_cpu_usage.call_count == 1
+    
+    def test_slow_subscriber_is_dropped(self, broadcaster, clock):
+        """Test that a subscriber with a full queue is dropped"""
+        slow = self.add_subscriber(broadcaster, ["cpu"])
+        
+        for _ in range(5):
+            self.tick(broadcaster, clock)
+            clock.now += 1
+        
+        assert slow.dropped
+        assert slow.queue.get_nowait() is None
+        assert broadcaster.subscriber_count == 0
+        assert broadcaster.dropped_subscribers == 1
+    
+    def test_unsubscribe(self, broadcaster, clock):
+        """Test that unsubscribed topics are no longer sent"""
+        subscriber = self.add_subscriber(broadcaster, ["cpu", "per_core"])
+        broadcaster.unsubscribe(subscriber, ["cpu"])
+        
+        self.tick(broadcaster, clock)
+        
+        assert subscriber.queue.qsize() == 1
+        assert json.loads(subscriber.queue.get_nowait())["topic"] == "per_core"
+    
+    def test_producer_lifecycle(self, monitor):
+        """Test that the producer runs only while clients are connected"""
+        broadcaster = TopicBroadcaster(monitor, tick=0.02)
+        
+        async def scenario():
+            subscriber = broadcaster.connect()
+            broadcaster.subscribe(subscriber, ["cpu"], 0.02)
+            message = await asyncio.wait_for(subscriber.queue.get(), 1)
+            assert json.loads(message)["data"] == 12.5
+            
+            broadcaster.disconnect(subscriber)
+            calls = monitor.get_cpu_usage.call_count
+            await asyncio.sleep(0.1)
+            assert monitor.get_cpu_usage.call_count == calls
+        
+        asyncio.run(scenario())